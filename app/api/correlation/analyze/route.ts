@@ -15,9 +15,15 @@ import {
   elasticNetRegressionPython,
   svrRegressionPython,
   randomForestRegressionPython,
-  gradientBoostingRegressionPython
+  gradientBoostingRegressionPython,
+  compareModelsPython,
+  PythonScriptError,
+  DatasetSpec,
+  DatasetSummary,
+  RegressionData,
+  TimeSeriesCvSpec
 } from '@/lib/analysis/pythonRunner';
-import { removeOutliers } from '@/lib/analysis/dataUtils';
+import { getPumpCurves } from '@/lib/db';
 
 const DB_CONFIG = {
   host: 'gz-cdb-e3z4b5ql.sql.tencentcdb.com',
@@ -29,6 +35,27 @@ const DB_CONFIG = {
   connectTimeout: 60000,
 };
 
+// 多模型对比（analysis_type=compare）默认参与的模型
+const COMPARE_MODELS = [
+  'linear', 'polynomial', 'exponential', 'logarithmic', 'power',
+  'ridge', 'lasso', 'elastic_net', 'svr', 'random_forest',
+  'gradient_boosting', 'neural_network',
+];
+
+// 时间序列交叉验证训练块与测试块之间默认留出的行数（按时间粒度）
+const CV_DEFAULT_GAP: Record<string, number> = { minute: 60, hour: 24, day: 1 };
+
+// 支持在线更新的模型（线性族，见 scripts/online_models.py）
+const ONLINE_MODEL_TYPES = ['linear', 'polynomial', 'exponential', 'logarithmic', 'power', 'ridge'];
+
+// 绘图数据默认的最大点数
+const PLOT_MAX_POINTS = 5000;
+
+// 正则化强度的显示格式（交叉验证选出的 alpha 可能很小）
+function formatAlpha(alpha: number) {
+  return alpha >= 0.01 ? alpha.toFixed(2) : alpha.toExponential(2);
+}
+
 export async function GET(request: NextRequest) {
   let connection;
 
@@ -43,6 +70,20 @@ export async function GET(request: NextRequest) {
     const hiddenLayers = searchParams.get('hidden_layers') || '100,50';
     const timeGranularity = searchParams.get('time_granularity') || 'minute';
     const pumpType = searchParams.get('pump_type'); // 'pump1', 'pump2', 'aux_pump' 或 null
+    // 'sketch'：异常值边界取自按天分位数草图（近似，不对全部数据排序）；默认按本次数据精确计算
+    const outlierSource = searchParams.get('outlier_source') || 'exact';
+    // use_rollup=1：小时/日粒度读取汇总表（分钟数据已归档的范围），默认由分钟数据按行筛选后聚合
+    const useRollup = searchParams.get('use_rollup') === '1';
+    // save_model=1：保存拟合好的模型，结果中返回 model_id，之后可通过 /api/correlation/predict 直接打分
+    const saveModel = searchParams.get('save_model') === '1';
+    // online=1：线性族模型保存后随每次同步在线更新系数，half_life_days 为遗忘半衰期（天，可选）
+    const halfLifeDays = searchParams.get('half_life_days');
+    const online = saveModel && searchParams.get('online') === '1' && ONLINE_MODEL_TYPES.includes(analysisType)
+      ? { half_life_days: halfLifeDays ? parseFloat(halfLifeDays) : undefined }
+      : undefined;
+    // 绘图数据的最大点数（散点、残差、拟合曲线超过时降采样），max_points=0 返回全分辨率结果
+    const maxPointsParam = searchParams.get('max_points');
+    const maxPoints = maxPointsParam === null ? PLOT_MAX_POINTS : parseInt(maxPointsParam) || undefined;
 
     if (!xFieldsStr || !yField || !startDate || !endDate) {
       return NextResponse.json(
@@ -53,10 +94,6 @@ export async function GET(request: NextRequest) {
 
     const xFields = xFieldsStr.split(',').map(f => f.trim());
 
-    // 连接数据库
-    connection = await mysql.createConnection(DB_CONFIG);
-
-    // 根据时间粒度构建不同的查询
     const allFields = [...xFields, yField];
     
     // 泵频率字段映射
@@ -90,110 +127,37 @@ export async function GET(request: NextRequest) {
     console.log('分析字段:', allFields);
     console.log('WHERE条件:', whereConditions);
 
-    let query: string;
-    if (timeGranularity === 'hour') {
-      // 按小时聚合，计算均值
-      query = `
-        SELECT 
-          DATE_FORMAT(collect_time, '%Y-%m-%d %H:00:00') as collect_time,
-          ${allFields.map(f => `AVG(${f}) as ${f}`).join(', ')}
-        FROM fuan_data
-        WHERE ${whereConditions}
-          AND collect_time >= ?
-          AND collect_time <= ?
-        GROUP BY DATE_FORMAT(collect_time, '%Y-%m-%d %H:00:00')
-        ORDER BY collect_time
-      `;
-    } else if (timeGranularity === 'day') {
-      // 按日聚合，计算均值
-      query = `
-        SELECT 
-          DATE_FORMAT(collect_time, '%Y-%m-%d 00:00:00') as collect_time,
-          ${allFields.map(f => `AVG(${f}) as ${f}`).join(', ')}
-        FROM fuan_data
-        WHERE ${whereConditions}
-          AND collect_time >= ?
-          AND collect_time <= ?
-        GROUP BY DATE_FORMAT(collect_time, '%Y-%m-%d')
-        ORDER BY collect_time
-      `;
-    } else {
-      // 按分钟，原始数据
-      query = `
-        SELECT collect_time, ${allFields.join(', ')}
-        FROM fuan_data
-        WHERE ${whereConditions}
-          AND collect_time >= ?
-          AND collect_time <= ?
-        ORDER BY collect_time
-      `;
-    }
-
-    const [rows] = await connection.query<any[]>(query, [startDate, endDate]);
-    console.log('日期参数:', startDate, endDate);
-    console.log('查询:', query);
-    console.log(`查询到原始数据: ${rows?.length || 0} 条`);
-
-    if (!rows || rows.length === 0) {
-      return NextResponse.json(
-        { error: '没有符合条件的数据' },
-        { status: 404 }
-      );
-    }
-
-    // 转换数据类型
-    const data = rows.map(row => {
-      const converted: any = {};
-      for (const field of allFields) {
-        converted[field] = parseFloat(row[field]);
-      }
-      return converted;
-    });
-
-    console.log(`转换后数据: ${data.length} 条`);
-
-    // 移除异常值
-    const cleanData = removeOutliers(data, allFields);
-
-    console.log(`移除异常值后数据: ${cleanData.length} 条`);
-    console.log(`分析字段: X=${xFields.join(',')}, Y=${yField}`);
-
-    if (cleanData.length < 10) {
-      return NextResponse.json(
-        { 
-          error: '有效数据点太少，无法进行分析',
-          details: {
-            原始数据: rows.length,
-            转换后: data.length,
-            清洗后: cleanData.length,
-            最少需要: 10
-          }
-        },
-        { status: 400 }
-      );
-    }
-
-    // 准备训练数据
-    const X = cleanData.map(row => xFields.map(f => row[f]));
-    const y = cleanData.map(row => row[yField]);
-
-    // 分割训练集和测试集 (80/20)
-    const splitIndex = Math.floor(cleanData.length * 0.8);
-    const XTrain = X.slice(0, splitIndex);
-    const yTrain = y.slice(0, splitIndex);
-    const XTest = X.slice(splitIndex);
-    const yTest = y.slice(splitIndex);
+    // 回归分析的数据由 Python 端按数据集描述直接查询并清洗（scripts/dataset_loader.py），
+    // 查询条件和 IQR 异常值规则与原先在此处的处理一致，接口只接收分析结果
+    const dataset: DatasetSpec = {
+      x_fields: xFields,
+      y_field: yField,
+      start_date: startDate,
+      end_date: endDate,
+      granularity: timeGranularity as DatasetSpec['granularity'],
+      pump_type: pumpType,
+      outlier: { method: 'iqr', source: outlierSource === 'sketch' ? 'sketch' : 'exact' },
+      rollup: useRollup,
+    };
+    // 岭回归 / Lasso / 弹性网络的正则化参数：alpha=auto 时按交叉验证在正则化路径上选择（l1_ratio=auto 同时选择 L1 比例）
+    const alphaParam = searchParams.get('alpha');
+    const l1RatioParam = searchParams.get('l1_ratio');
+    const alphaOption = alphaParam === 'auto' ? 'auto' : alphaParam ? parseFloat(alphaParam) : undefined;
+    const l1RatioOption = l1RatioParam === 'auto' ? 'auto' : l1RatioParam ? parseFloat(l1RatioParam) : undefined;
+    const regressionData: RegressionData = { dataset, save_model: saveModel, online, max_points: maxPoints };
+    // 清洗后的数据集统计（由各回归分支赋值）
+    let datasetSummary: DatasetSummary | undefined;
 
     let result: any = {
       type: analysisType,
-      sample_count: cleanData.length,
-      train_count: XTrain.length,
-      test_count: XTest.length,
     };
 
     if (analysisType === 'polynomial') {
       // 多项式回归（使用Python，内部进行train/test分割）
-      const polyResult = await polynomialRegressionPython(X, y, degree);
+      const polyResult = await polynomialRegressionPython(regressionData, degree);
+      datasetSummary = polyResult.dataset;
+      result.model_id = polyResult.model_id;
+      result.sampling = polyResult.sampling;
 
       result.r2_train = polyResult.r2_train;
       result.r2_test = polyResult.r2_test;
@@ -237,18 +201,15 @@ export async function GET(request: NextRequest) {
       // 如果是单变量，生成时间序列数据用于绘制曲线
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = X.map((xVal, idx) => ({
-          x: xVal[0],
-          y_actual: y[idx],
-          y_predicted: polyResult.predictions[idx]
-        }));
-        // 按 x 值排序以便绘制曲线
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = polyResult.time_series_data;
       }
 
     } else if (analysisType === 'exponential') {
       // 指数回归（使用Python，内部进行train/test分割）
-      const expResult = await exponentialRegressionPython(X, y);
+      const expResult = await exponentialRegressionPython(regressionData);
+      datasetSummary = expResult.dataset;
+      result.model_id = expResult.model_id;
+      result.sampling = expResult.sampling;
 
       result.r2_train = expResult.r2_train;
       result.r2_test = expResult.r2_test;
@@ -276,17 +237,15 @@ export async function GET(request: NextRequest) {
       // 如果是单变量，返回时间序列数据
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = X.map((xVal, idx) => ({
-          x: xVal[0],
-          y_actual: y[idx],
-          y_predicted: expResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = expResult.time_series_data;
       }
 
     } else if (analysisType === 'logarithmic') {
       // 对数回归（使用Python，内部进行train/test分割）
-      const logResult = await logarithmicRegressionPython(X, y);
+      const logResult = await logarithmicRegressionPython(regressionData);
+      datasetSummary = logResult.dataset;
+      result.model_id = logResult.model_id;
+      result.sampling = logResult.sampling;
 
       result.r2_train = logResult.r2_train;
       result.r2_test = logResult.r2_test;
@@ -316,12 +275,7 @@ export async function GET(request: NextRequest) {
       // 如果是单变量，返回时间序列数据
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = X.map((xVal, idx) => ({
-          x: xVal[0],
-          y_actual: y[idx],
-          y_predicted: logResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = logResult.time_series_data;
       }
 
     } else if (analysisType === 'did') {
@@ -354,6 +308,7 @@ export async function GET(request: NextRequest) {
         ORDER BY collect_time
       `;
       
+      connection = await mysql.createConnection(DB_CONFIG);
       const [timeRows] = await connection.query<any[]>(queryWithTime, [startDate, endDate]);
       
       const timeData = timeRows.map(row => {
@@ -453,7 +408,10 @@ export async function GET(request: NextRequest) {
       
     } else if (analysisType === 'linear') {
       // 线性回归（使用Python）
-      const linearResult = await linearRegressionPython(X, y);
+      const linearResult = await linearRegressionPython(regressionData);
+      datasetSummary = linearResult.dataset;
+      result.model_id = linearResult.model_id;
+      result.sampling = linearResult.sampling;
 
       result.r2_train = linearResult.r2_train;
       result.r2_test = linearResult.r2_test;
@@ -480,17 +438,15 @@ export async function GET(request: NextRequest) {
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: linearResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = linearResult.time_series_data;
       }
 
     } else if (analysisType === 'power') {
       // 幂函数回归（使用Python）
-      const powerResult = await powerRegressionPython(X, y);
+      const powerResult = await powerRegressionPython(regressionData);
+      datasetSummary = powerResult.dataset;
+      result.model_id = powerResult.model_id;
+      result.sampling = powerResult.sampling;
 
       result.r2_train = powerResult.r2_train;
       result.r2_test = powerResult.r2_test;
@@ -512,17 +468,15 @@ export async function GET(request: NextRequest) {
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: powerResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = powerResult.time_series_data;
       }
 
     } else if (analysisType === 'ridge') {
       // 岭回归（使用Python）
-      const ridgeResult = await ridgeRegressionPython(X, y);
+      const ridgeResult = await ridgeRegressionPython(regressionData, alphaOption);
+      datasetSummary = ridgeResult.dataset;
+      result.model_id = ridgeResult.model_id;
+      result.sampling = ridgeResult.sampling;
 
       result.r2_train = ridgeResult.r2_train;
       result.r2_test = ridgeResult.r2_test;
@@ -530,23 +484,22 @@ export async function GET(request: NextRequest) {
       result.mse_test = ridgeResult.mse_test;
       result.scatter_data = ridgeResult.scatter_data;
       result.residuals_data = ridgeResult.residuals_data;
+      result.regularization_path = ridgeResult.regularization_path;
 
       const { intercept, coef, alpha } = ridgeResult.coefficients;
-      result.equation = `岭回归 (α=${alpha.toFixed(2)})`;
+      result.equation = `岭回归 (α=${formatAlpha(alpha)})`;
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: ridgeResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = ridgeResult.time_series_data;
       }
 
     } else if (analysisType === 'lasso') {
       // Lasso回归（使用Python）
-      const lassoResult = await lassoRegressionPython(X, y);
+      const lassoResult = await lassoRegressionPython(regressionData, alphaOption);
+      datasetSummary = lassoResult.dataset;
+      result.model_id = lassoResult.model_id;
+      result.sampling = lassoResult.sampling;
 
       result.r2_train = lassoResult.r2_train;
       result.r2_test = lassoResult.r2_test;
@@ -554,23 +507,22 @@ export async function GET(request: NextRequest) {
       result.mse_test = lassoResult.mse_test;
       result.scatter_data = lassoResult.scatter_data;
       result.residuals_data = lassoResult.residuals_data;
+      result.regularization_path = lassoResult.regularization_path;
 
       const { alpha, non_zero_features, total_features } = lassoResult.coefficients;
-      result.equation = `Lasso回归 (α=${alpha.toFixed(2)}, 选中${non_zero_features}/${total_features}特征)`;
+      result.equation = `Lasso回归 (α=${formatAlpha(alpha)}, 选中${non_zero_features}/${total_features}特征)`;
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: lassoResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = lassoResult.time_series_data;
       }
 
     } else if (analysisType === 'elastic_net') {
       // 弹性网络回归（使用Python）
-      const elasticResult = await elasticNetRegressionPython(X, y);
+      const elasticResult = await elasticNetRegressionPython(regressionData, alphaOption, l1RatioOption);
+      datasetSummary = elasticResult.dataset;
+      result.model_id = elasticResult.model_id;
+      result.sampling = elasticResult.sampling;
 
       result.r2_train = elasticResult.r2_train;
       result.r2_test = elasticResult.r2_test;
@@ -578,23 +530,22 @@ export async function GET(request: NextRequest) {
       result.mse_test = elasticResult.mse_test;
       result.scatter_data = elasticResult.scatter_data;
       result.residuals_data = elasticResult.residuals_data;
+      result.regularization_path = elasticResult.regularization_path;
 
       const { alpha, l1_ratio, non_zero_features, total_features } = elasticResult.coefficients;
-      result.equation = `弹性网络 (α=${alpha.toFixed(2)}, L1比=${l1_ratio.toFixed(2)}, 选中${non_zero_features}/${total_features}特征)`;
+      result.equation = `弹性网络 (α=${formatAlpha(alpha)}, L1比=${l1_ratio.toFixed(2)}, 选中${non_zero_features}/${total_features}特征)`;
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: elasticResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = elasticResult.time_series_data;
       }
 
     } else if (analysisType === 'svr') {
       // 支持向量回归（使用Python）
-      const svrResult = await svrRegressionPython(X, y);
+      const svrResult = await svrRegressionPython(regressionData);
+      datasetSummary = svrResult.dataset;
+      result.model_id = svrResult.model_id;
+      result.sampling = svrResult.sampling;
 
       result.r2_train = svrResult.r2_train;
       result.r2_test = svrResult.r2_test;
@@ -603,22 +554,25 @@ export async function GET(request: NextRequest) {
       result.scatter_data = svrResult.scatter_data;
       result.residuals_data = svrResult.residuals_data;
 
-      const { kernel, C, epsilon } = svrResult.model_params;
+      const { kernel, C, epsilon, approximation } = svrResult.model_params;
       result.equation = `SVR (kernel=${kernel}, C=${C.toFixed(2)}, ε=${epsilon.toFixed(2)})`;
+      if (approximation) {
+        // 样本多时为核近似模型，附带近似秩和与精确 SVR 的对比
+        result.equation += approximation.rank ? `，${approximation.method} 近似 (秩=${approximation.rank})` : '';
+        result.svr_approximation = approximation;
+      }
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: svrResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = svrResult.time_series_data;
       }
 
     } else if (analysisType === 'random_forest') {
       // 随机森林回归（使用Python）
-      const rfResult = await randomForestRegressionPython(X, y);
+      const rfResult = await randomForestRegressionPython(regressionData);
+      datasetSummary = rfResult.dataset;
+      result.model_id = rfResult.model_id;
+      result.sampling = rfResult.sampling;
 
       result.r2_train = rfResult.r2_train;
       result.r2_test = rfResult.r2_test;
@@ -633,17 +587,15 @@ export async function GET(request: NextRequest) {
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: rfResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = rfResult.time_series_data;
       }
 
     } else if (analysisType === 'gradient_boosting') {
       // 梯度提升回归（使用Python）
-      const gbResult = await gradientBoostingRegressionPython(X, y);
+      const gbResult = await gradientBoostingRegressionPython(regressionData);
+      datasetSummary = gbResult.dataset;
+      result.model_id = gbResult.model_id;
+      result.sampling = gbResult.sampling;
 
       result.r2_train = gbResult.r2_train;
       result.r2_test = gbResult.r2_test;
@@ -658,12 +610,7 @@ export async function GET(request: NextRequest) {
 
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = cleanData.map((row, idx) => ({
-          x: row[xFields[0]],
-          y_actual: row[yField],
-          y_predicted: gbResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = gbResult.time_series_data;
       }
 
     } else if (analysisType === 'neural_network') {
@@ -671,8 +618,11 @@ export async function GET(request: NextRequest) {
       const hiddenLayerSizes = hiddenLayers ? hiddenLayers.split(',').map((s: string) => parseInt(s.trim())) : [100, 50];
       
       const nnResult = await neuralNetworkRegressionPython(
-        X, y, xFields, hiddenLayerSizes
+        regressionData, xFields, hiddenLayerSizes
       );
+      datasetSummary = nnResult.dataset;
+      result.model_id = nnResult.model_id;
+      result.sampling = nnResult.sampling;
       
       result.r2_train = nnResult.r2_train;
       result.r2_test = nnResult.r2_test;
@@ -680,23 +630,8 @@ export async function GET(request: NextRequest) {
       result.mse_test = nnResult.mse_test;
       result.feature_importance = nnResult.feature_importance;
 
-      // 计算测试集的起始索引（80%用于训练）
-      const trainSize = Math.floor(cleanData.length * 0.8);
-
-      // 生成散点图数据
-      result.scatter_data = yTest.map((actual, idx) => ({
-        actual,
-        predicted: nnResult.predictions[trainSize + idx]
-      }));
-
-      // 生成残差数据
-      result.residuals_data = yTest.map((actual, idx) => {
-        const predicted = nnResult.predictions[trainSize + idx];
-        return {
-          predicted,
-          residual: actual - predicted
-        };
-      });
+      result.scatter_data = nnResult.scatter_data;
+      result.residuals_data = nnResult.residuals_data;
 
       // 生成方程描述
       result.equation = `神经网络 [${nnResult.layers.join(' → ')}] (${nnResult.iterations} 次迭代)`;
@@ -704,13 +639,49 @@ export async function GET(request: NextRequest) {
       // 如果是单变量，生成时间序列数据
       if (xFields.length === 1) {
         result.is_single_variable = true;
-        result.time_series_data = X.map((xVal, idx) => ({
-          x: xVal[0],
-          y_actual: y[idx],
-          y_predicted: nnResult.predictions[idx]
-        }));
-        result.time_series_data.sort((a: any, b: any) => a.x - b.x);
+        result.time_series_data = nnResult.time_series_data;
+      }
+    } else if (analysisType === 'compare') {
+      // 多模型对比：一次请求拟合全部（或 models 参数指定的）模型，返回按测试集 R² 排序的排行榜
+      const modelsParam = searchParams.get('models');
+      const hiddenLayerSizes = hiddenLayers.split(',').map((s: string) => parseInt(s.trim()));
+      const modelTypes = modelsParam
+        ? modelsParam.split(',').map(m => m.trim()).filter(Boolean)
+        : COMPARE_MODELS;
+      const modelSpecs = modelTypes.map(type => {
+        if (type === 'polynomial') return { type, degree };
+        if (type === 'neural_network') return { type, hidden_layers: hiddenLayerSizes };
+        return { type };
+      });
+
+      // cv=rolling|blocked：时间序列交叉验证（默认间隔按粒度取 1 小时 / 1 天 / 1 天的行数）
+      const cvMethod = searchParams.get('cv');
+      const cvFolds = searchParams.get('cv_folds');
+      const cvGap = searchParams.get('cv_gap');
+      const cv: TimeSeriesCvSpec | undefined = cvMethod === 'rolling' || cvMethod === 'blocked'
+        ? {
+            method: cvMethod,
+            folds: cvFolds ? parseInt(cvFolds) : 5,
+            gap: cvGap ? parseInt(cvGap) : CV_DEFAULT_GAP[timeGranularity] ?? 0,
+          }
+        : undefined;
+
+      const comparison = await compareModelsPython({ dataset }, xFields, modelSpecs, cv);
+      datasetSummary = comparison.dataset;
+      result.leaderboard = comparison.leaderboard;
+      result.best = comparison.best;
+      result.evaluation = comparison.evaluation;
+      // 交叉验证时各折的训练/测试行数不同，见 evaluation.splits，不返回单一的划分行数
+      if (!comparison.evaluation) {
+        result.train_count = comparison.train_count;
+        result.test_count = comparison.test_count;
       }
+      result.timing = {
+        prepare_seconds: comparison.prepare_seconds,
+        total_seconds: comparison.total_seconds,
+        workers: comparison.workers,
+      };
+
     } else {
       // 未实现的分析类型
       return NextResponse.json(
@@ -720,16 +691,41 @@ export async function GET(request: NextRequest) {
           available_types: [
             'linear', 'polynomial', 'exponential', 'logarithmic', 'power',
             'ridge', 'lasso', 'elastic_net', 'svr', 'random_forest', 
-            'gradient_boosting', 'neural_network', 'did'
+            'gradient_boosting', 'neural_network', 'did', 'compare'
           ]
         },
         { status: 501 }  // 501 Not Implemented
       );
     }
 
+    if (datasetSummary) {
+      result.sample_count = datasetSummary.sample_count;
+      if (analysisType !== 'compare') {
+        result.train_count = Math.floor(datasetSummary.sample_count * 0.8);
+        result.test_count = datasetSummary.sample_count - result.train_count;
+      }
+    }
+
+    // 泵效率分析：附带该泵在结束日期所在月份的缓存特性曲线（相似定律拟合）
+    if (pumpType && pumpFrequencyMap[pumpType]) {
+      try {
+        const curves = await getPumpCurves(pumpType, endDate.substring(0, 7));
+        result.pump_curve = curves[0] || null;
+      } catch (err) {
+        console.error('读取泵曲线失败:', err);
+      }
+    }
+
     return NextResponse.json(result);
 
   } catch (error) {
+    // 无数据 / 有效数据点太少：与原先接口返回的状态码和信息一致
+    if (error instanceof PythonScriptError && error.status) {
+      return NextResponse.json(
+        error.details ? { error: error.message, details: error.details } : { error: error.message },
+        { status: error.status }
+      );
+    }
     console.error('分析失败:', error);
     return NextResponse.json(
       { error: error instanceof Error ? error.message : '分析失败' },
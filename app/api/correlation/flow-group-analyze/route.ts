@@ -219,7 +219,7 @@ export async function GET(request: NextRequest) {
 
     if (analysisType === 'polynomial') {
       // 多项式回归（使用Python，内部进行train/test分割）
-      const polyResult = await polynomialRegressionPython(X, y, degree);
+      const polyResult = await polynomialRegressionPython({ X, y }, degree);
 
       result.r2_train = polyResult.r2_train;
       result.r2_test = polyResult.r2_test;
@@ -259,7 +259,7 @@ export async function GET(request: NextRequest) {
 
     } else if (analysisType === 'exponential') {
       // 指数回归（使用Python，内部进行train/test分割）
-      const expResult = await exponentialRegressionPython(X, y);
+      const expResult = await exponentialRegressionPython({ X, y });
 
       result.r2_train = expResult.r2_train;
       result.r2_test = expResult.r2_test;
@@ -295,7 +295,7 @@ export async function GET(request: NextRequest) {
 
     } else if (analysisType === 'logarithmic') {
       // 对数回归（使用Python，内部进行train/test分割）
-      const logResult = await logarithmicRegressionPython(X, y);
+      const logResult = await logarithmicRegressionPython({ X, y });
 
       result.r2_train = logResult.r2_train;
       result.r2_test = logResult.r2_test;
@@ -332,7 +332,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'linear') {
-      const linearResult = await linearRegressionPython(X, y);
+      const linearResult = await linearRegressionPython({ X, y });
       result.r2_train = linearResult.r2_train;
       result.r2_test = linearResult.r2_test;
       result.mse_train = linearResult.mse_train;
@@ -364,7 +364,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'power') {
-      const powerResult = await powerRegressionPython(X, y);
+      const powerResult = await powerRegressionPython({ X, y });
       result.r2_train = powerResult.r2_train;
       result.r2_test = powerResult.r2_test;
       result.mse_train = powerResult.mse_train;
@@ -391,7 +391,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'ridge') {
-      const ridgeResult = await ridgeRegressionPython(X, y);
+      const ridgeResult = await ridgeRegressionPython({ X, y });
       result.r2_train = ridgeResult.r2_train;
       result.r2_test = ridgeResult.r2_test;
       result.mse_train = ridgeResult.mse_train;
@@ -411,7 +411,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'lasso') {
-      const lassoResult = await lassoRegressionPython(X, y);
+      const lassoResult = await lassoRegressionPython({ X, y });
       result.r2_train = lassoResult.r2_train;
       result.r2_test = lassoResult.r2_test;
       result.mse_train = lassoResult.mse_train;
@@ -431,7 +431,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'elastic_net') {
-      const elasticResult = await elasticNetRegressionPython(X, y);
+      const elasticResult = await elasticNetRegressionPython({ X, y });
       result.r2_train = elasticResult.r2_train;
       result.r2_test = elasticResult.r2_test;
       result.mse_train = elasticResult.mse_train;
@@ -451,7 +451,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'svr') {
-      const svrResult = await svrRegressionPython(X, y);
+      const svrResult = await svrRegressionPython({ X, y });
       result.r2_train = svrResult.r2_train;
       result.r2_test = svrResult.r2_test;
       result.mse_train = svrResult.mse_train;
@@ -471,7 +471,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'random_forest') {
-      const rfResult = await randomForestRegressionPython(X, y);
+      const rfResult = await randomForestRegressionPython({ X, y });
       result.r2_train = rfResult.r2_train;
       result.r2_test = rfResult.r2_test;
       result.mse_train = rfResult.mse_train;
@@ -492,7 +492,7 @@ export async function GET(request: NextRequest) {
       }
 
     } else if (analysisType === 'gradient_boosting') {
-      const gbResult = await gradientBoostingRegressionPython(X, y);
+      const gbResult = await gradientBoostingRegressionPython({ X, y });
       result.r2_train = gbResult.r2_train;
       result.r2_test = gbResult.r2_test;
       result.mse_train = gbResult.mse_train;
@@ -517,7 +517,7 @@ export async function GET(request: NextRequest) {
       const hiddenLayerSizes = hiddenLayers ? hiddenLayers.split(',').map((s: string) => parseInt(s.trim())) : [100, 50];
       
       const nnResult = await neuralNetworkRegressionPython(
-        X, y, xFields, hiddenLayerSizes
+        { X, y }, xFields, hiddenLayerSizes
       );
       
       result.r2_train = nnResult.r2_train;
@@ -0,0 +1,111 @@
+/**
+ * API: 已保存模型的打分
+ * 模型由 /api/correlation/analyze?save_model=1 保存（scripts/model_store.py），打分时不重新拟合
+ *
+ * GET 查询参数:
+ * - model_id: 模型 id（不传时列出已保存的模型）
+ * - start_date / end_date: 按模型训练时的字段和筛选条件查询该日期范围的数据打分，并与实际值比较
+ *
+ * POST: { model_id, X: number[][] } 对给定行打分
+ * PATCH: { model_id, start_date, end_date } 线性族模型在线更新（吸收该日期范围的新数据，同步后会自动执行）
+ * DELETE 查询参数: model_id
+ */
+import { NextRequest, NextResponse } from 'next/server';
+import {
+  predictWithModelPython,
+  scoreModelPython,
+  listModelsPython,
+  deleteModelPython,
+  updateModelPython,
+  PythonScriptError
+} from '@/lib/analysis/pythonRunner';
+
+function errorResponse(error: unknown, fallback: string) {
+  console.error(`${fallback}:`, error);
+  return NextResponse.json(
+    { error: error instanceof Error ? error.message : fallback },
+    { status: error instanceof PythonScriptError && error.status ? error.status : 500 }
+  );
+}
+
+export async function GET(request: NextRequest) {
+  try {
+    const searchParams = request.nextUrl.searchParams;
+    const modelId = searchParams.get('model_id');
+    const startDate = searchParams.get('start_date');
+    const endDate = searchParams.get('end_date');
+
+    if (!modelId) {
+      const models = await listModelsPython();
+      return NextResponse.json({ success: true, models });
+    }
+
+    if (!startDate || !endDate) {
+      return NextResponse.json(
+        { error: '缺少必要参数' },
+        { status: 400 }
+      );
+    }
+
+    const scores = await scoreModelPython(modelId, startDate, endDate);
+    return NextResponse.json({ success: true, start_date: startDate, end_date: endDate, ...scores });
+  } catch (error) {
+    return errorResponse(error, '模型打分失败');
+  }
+}
+
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json();
+    const { model_id: modelId, X } = body;
+
+    if (!modelId || !Array.isArray(X)) {
+      return NextResponse.json(
+        { error: '缺少必要参数' },
+        { status: 400 }
+      );
+    }
+
+    const scores = await predictWithModelPython(modelId, X);
+    return NextResponse.json({ success: true, ...scores });
+  } catch (error) {
+    return errorResponse(error, '模型打分失败');
+  }
+}
+
+export async function PATCH(request: NextRequest) {
+  try {
+    const body = await request.json();
+    const { model_id: modelId, start_date: startDate, end_date: endDate } = body;
+
+    if (!modelId || !startDate || !endDate) {
+      return NextResponse.json(
+        { error: '缺少必要参数' },
+        { status: 400 }
+      );
+    }
+
+    const update = await updateModelPython(modelId, startDate, endDate);
+    return NextResponse.json({ success: true, ...update });
+  } catch (error) {
+    return errorResponse(error, '模型在线更新失败');
+  }
+}
+
+export async function DELETE(request: NextRequest) {
+  try {
+    const modelId = request.nextUrl.searchParams.get('model_id');
+
+    if (!modelId) {
+      return NextResponse.json(
+        { error: '缺少必要参数' },
+        { status: 400 }
+      );
+    }
+
+    const deleted = await deleteModelPython(modelId);
+    return NextResponse.json({ success: true, ...deleted });
+  } catch (error) {
+    return errorResponse(error, '删除模型失败');
+  }
+}
@@ -0,0 +1,51 @@
+/**
+ * API: 近似分位数
+ * 合并按天分位数草图（quantile_sketch.py，同步后计算），不扫描分钟数据
+ *
+ * 查询参数:
+ * - fields: 字段列表，逗号分隔（可包含派生字段 total_flow）
+ * - start_date / end_date: 日期范围（按整天统计）
+ * - quantiles: 分位点列表，逗号分隔（可选）
+ * - bins: 直方图分箱数（可选）
+ * - iqr_multiplier: IQR 倍数（可选，默认与异常值过滤一致）
+ */
+import { NextRequest, NextResponse } from 'next/server';
+import { quantileSketchSummaryPython } from '@/lib/analysis/pythonRunner';
+
+export async function GET(request: NextRequest) {
+  try {
+    const searchParams = request.nextUrl.searchParams;
+    const fieldsStr = searchParams.get('fields');
+    const startDate = searchParams.get('start_date');
+    const endDate = searchParams.get('end_date');
+    const quantilesStr = searchParams.get('quantiles');
+    const bins = searchParams.get('bins');
+    const iqrMultiplier = searchParams.get('iqr_multiplier');
+
+    if (!fieldsStr || !startDate || !endDate) {
+      return NextResponse.json(
+        { error: '缺少必要参数' },
+        { status: 400 }
+      );
+    }
+
+    const fields = fieldsStr.split(',').map(f => f.trim()).filter(Boolean);
+    const quantiles = quantilesStr
+      ? quantilesStr.split(',').map(q => parseFloat(q)).filter(q => q >= 0 && q <= 1)
+      : undefined;
+
+    const summary = await quantileSketchSummaryPython(fields, startDate, endDate, {
+      quantiles,
+      bins: bins ? Math.min(Math.max(parseInt(bins), 1), 200) : undefined,
+      iqrMultiplier: iqrMultiplier ? parseFloat(iqrMultiplier) : undefined,
+    });
+
+    return NextResponse.json({ success: true, start_date: startDate, end_date: endDate, fields: summary });
+  } catch (error) {
+    console.error('分位数查询失败:', error);
+    return NextResponse.json(
+      { error: error instanceof Error ? error.message : '分位数查询失败' },
+      { status: 500 }
+    );
+  }
+}
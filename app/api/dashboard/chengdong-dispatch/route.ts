@@ -4,9 +4,19 @@
  *   - hourly: 每小时平均供水量、平均清水池水位
  *   - valve_events: 阀门开度切换事件（从1分钟数据中检测）
  *   - level_data: 每5分钟的清水池水位折线数据
+ *   - typical: 小时典型曲线（hourly_profiles.py 预计算，profile_window=7/30/90，profile_day_type=all/weekday/weekend）
  */
 import { NextResponse } from 'next/server';
-import { getPool } from '@/lib/db';
+import {
+  getPool,
+  getLatestForecast,
+  getHourlyProfile,
+  getRecentProfileDays,
+  profileDayTypeOf,
+  ProfileDayType,
+  PROFILE_DAY_TYPES,
+  isProfileDayType,
+} from '@/lib/db';
 
 function getPeriod(hour: number): 'valley' | 'flat' | 'peak' {
   if (hour < 8) return 'valley';
@@ -20,6 +30,7 @@ function getPeriod(hour: number): 'valley' | 'flat' | 'peak' {
 }
 
 const PERIOD_NAMES: Record<string, string> = { valley: '谷', flat: '平', peak: '峰' };
+const PROFILE_WINDOWS = [7, 30, 90];
 
 /** 从1分钟粒度的阀门数据中检测切换事件 */
 function detectValveSwitches(
@@ -118,23 +129,34 @@ export async function GET(request: Request) {
   try {
     const { searchParams } = new URL(request.url);
     const dateParam = searchParams.get('date');
+    const profileDayTypeParam = searchParams.get('profile_day_type');
+    if (profileDayTypeParam && !isProfileDayType(profileDayTypeParam)) {
+      return NextResponse.json(
+        { error: `无效的 profile_day_type: ${profileDayTypeParam}（可选 ${PROFILE_DAY_TYPES.join(' / ')}）` },
+        { status: 400 }
+      );
+    }
 
     const pool = getPool();
 
     let targetDate = dateParam || null;
 
     if (!targetDate) {
-      const [recentDates] = await pool.query<any[]>(
-        `
-        SELECT DATE(collect_time) as d
-        FROM fuan_data
-        WHERE collect_time >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-          AND i_1102 > 0
-        GROUP BY DATE(collect_time)
-        ORDER BY d DESC
-        LIMIT 2
-        `
-      );
+      // 优先读取按天小时统计；统计表未建立或为空时回退到分钟表扫描
+      let recentDates: any[] = await getRecentProfileDays(['i_1102'], 2).catch(() => []);
+      if (recentDates.length === 0) {
+        [recentDates] = await pool.query<any[]>(
+          `
+          SELECT DATE(collect_time) as d
+          FROM fuan_data
+          WHERE collect_time >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+            AND i_1102 > 0
+          GROUP BY DATE(collect_time)
+          ORDER BY d DESC
+          LIMIT 2
+          `
+        );
+      }
       if (recentDates.length >= 2) {
         targetDate = recentDates[1].d instanceof Date
           ? recentDates[1].d.toISOString().split('T')[0]
@@ -245,6 +267,22 @@ export async function GET(request: Request) {
     // 合并同向连续事件为调节会话
     const valveSessions = buildValveSessions(valveEvents);
 
+    // 覆盖目标日期的最新预测（同步后预计算，失败时不影响主数据）
+    const forecast = await getLatestForecast(['i_1102'], targetDate!).catch((err) => {
+      console.error('读取预测数据失败:', err);
+      return {};
+    });
+
+    // 小时典型曲线（同步后增量维护的近 N 天均值），默认取与目标日期相同的工作日/周末类型
+    const profileWindow = PROFILE_WINDOWS.includes(Number(searchParams.get('profile_window')))
+      ? Number(searchParams.get('profile_window')) : 30;
+    const profileDayType: ProfileDayType = profileDayTypeParam && isProfileDayType(profileDayTypeParam)
+      ? profileDayTypeParam : profileDayTypeOf(targetDate!);
+    const typical = await getHourlyProfile(['i_1102', 'i_1097'], profileWindow, profileDayType).catch((err) => {
+      console.error('读取小时典型曲线失败:', err);
+      return {};
+    });
+
     return NextResponse.json({
       success: true,
       date: targetDate,
@@ -253,6 +291,8 @@ export async function GET(request: Request) {
       valve_sessions: valveSessions,
       initial_valve_pct: initialValvePct,
       level_data: levelData,
+      forecast,
+      typical: { window_days: profileWindow, day_type: profileDayType, profiles: typical },
     });
   } catch (error) {
     console.error('城东调度数据查询失败:', error);
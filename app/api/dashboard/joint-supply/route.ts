@@ -3,9 +3,20 @@
  * - 小时图表数据：SQL 分钟均值 × 1小时
  * - 时段汇总卡片：直接调用 analyzeFlowByElectricityPeriod（与流量分时段分析一致）
  *   岩湖用 i_1072 水表差值方法，精度更高
+ * - typical: 小时典型曲线（hourly_profiles.py 预计算，profile_window=7/30/90，profile_day_type=all/weekday/weekend）
  */
 import { NextResponse } from 'next/server';
-import { getPool, getDataByDateRange } from '@/lib/db';
+import {
+  getPool,
+  getDataByDateRange,
+  getLatestForecast,
+  getHourlyProfile,
+  getRecentProfileDays,
+  profileDayTypeOf,
+  ProfileDayType,
+  PROFILE_DAY_TYPES,
+  isProfileDayType,
+} from '@/lib/db';
 import { analyzeFlowByElectricityPeriod } from '@/lib/analysis';
 
 function getPeriod(hour: number): 'valley' | 'flat' | 'peak' {
@@ -20,11 +31,19 @@ function getPeriod(hour: number): 'valley' | 'flat' | 'peak' {
 }
 
 const PERIOD_NAMES: Record<string, string> = { valley: '谷', flat: '平', peak: '峰' };
+const PROFILE_WINDOWS = [7, 30, 90];
 
 export async function GET(request: Request) {
   try {
     const { searchParams } = new URL(request.url);
     const dateParam = searchParams.get('date');
+    const profileDayTypeParam = searchParams.get('profile_day_type');
+    if (profileDayTypeParam && !isProfileDayType(profileDayTypeParam)) {
+      return NextResponse.json(
+        { error: `无效的 profile_day_type: ${profileDayTypeParam}（可选 ${PROFILE_DAY_TYPES.join(' / ')}）` },
+        { status: 400 }
+      );
+    }
 
     const pool = getPool();
 
@@ -32,17 +51,21 @@ export async function GET(request: Request) {
     let targetDate = dateParam || null;
 
     if (!targetDate) {
-      const [recentDates] = await pool.query<any[]>(
-        `
-        SELECT DATE(collect_time) as d
-        FROM fuan_data
-        WHERE collect_time >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-          AND (i_1102 > 0 OR i_1034 > 0)
-        GROUP BY DATE(collect_time)
-        ORDER BY d DESC
-        LIMIT 2
-        `
-      );
+      // 优先读取按天小时统计；统计表未建立或为空时回退到分钟表扫描
+      let recentDates: any[] = await getRecentProfileDays(['i_1102', 'i_1034'], 2).catch(() => []);
+      if (recentDates.length === 0) {
+        [recentDates] = await pool.query<any[]>(
+          `
+          SELECT DATE(collect_time) as d
+          FROM fuan_data
+          WHERE collect_time >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+            AND (i_1102 > 0 OR i_1034 > 0)
+          GROUP BY DATE(collect_time)
+          ORDER BY d DESC
+          LIMIT 2
+          `
+        );
+      }
       if (recentDates.length >= 2) {
         targetDate = recentDates[1].d instanceof Date
           ? recentDates[1].d.toISOString().split('T')[0]
@@ -119,11 +142,29 @@ export async function GET(request: Request) {
       };
     });
 
+    // 覆盖目标日期的最新预测（同步后预计算，失败时不影响主数据）
+    const forecast = await getLatestForecast(['i_1102', 'i_1034'], targetDate!).catch((err) => {
+      console.error('读取预测数据失败:', err);
+      return {};
+    });
+
+    // 小时典型曲线（同步后增量维护的近 N 天均值），默认取与目标日期相同的工作日/周末类型
+    const profileWindow = PROFILE_WINDOWS.includes(Number(searchParams.get('profile_window')))
+      ? Number(searchParams.get('profile_window')) : 30;
+    const profileDayType: ProfileDayType = profileDayTypeParam && isProfileDayType(profileDayTypeParam)
+      ? profileDayTypeParam : profileDayTypeOf(targetDate!);
+    const typical = await getHourlyProfile(['i_1102', 'i_1034'], profileWindow, profileDayType).catch((err) => {
+      console.error('读取小时典型曲线失败:', err);
+      return {};
+    });
+
     return NextResponse.json({
       success: true,
       date: targetDate,
       hourly: hourlyData,
       period_summary: periodSummary,
+      forecast,
+      typical: { window_days: profileWindow, day_type: profileDayType, profiles: typical },
     });
   } catch (error) {
     console.error('联合供水数据查询失败:', error);
@@ -10,9 +10,18 @@
  *   - 送水量权重：AVG(i_1034) 每小时瞬时流量
  *   - 耗电量权重：MAX(i_1072) - MIN(i_1072) 每小时差值（i_1072 每分钟更新）
  *   - 0:00 排除：每小时差值计算时排除，避免前一天残留读数干扰权重
+ * 典型曲线 = hourly_profiles.py 预计算的近 7/30/90 天小时均值（profile_window / profile_day_type 参数）
  */
 import { NextResponse } from 'next/server';
-import { getPool } from '@/lib/db';
+import {
+  getPool,
+  getLatestForecast,
+  getHourlyProfile,
+  profileDayTypeOf,
+  ProfileDayType,
+  PROFILE_DAY_TYPES,
+  isProfileDayType,
+} from '@/lib/db';
 
 function getPeriod(hour: number): 'valley' | 'flat' | 'peak' {
   if (hour < 8) return 'valley';
@@ -26,6 +35,7 @@ function getPeriod(hour: number): 'valley' | 'flat' | 'peak' {
 }
 
 const PERIOD_NAMES: Record<string, string> = { valley: '谷', flat: '平', peak: '峰' };
+const PROFILE_WINDOWS = [7, 30, 90];
 
 function toDateStr(d: Date) {
   return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
@@ -41,6 +51,13 @@ export async function GET(request: Request) {
   try {
     const { searchParams } = new URL(request.url);
     const dateParam = searchParams.get('date');
+    const profileDayTypeParam = searchParams.get('profile_day_type');
+    if (profileDayTypeParam && !isProfileDayType(profileDayTypeParam)) {
+      return NextResponse.json(
+        { error: `无效的 profile_day_type: ${profileDayTypeParam}（可选 ${PROFILE_DAY_TYPES.join(' / ')}）` },
+        { status: 400 }
+      );
+    }
     const targetDate = dateParam || getYesterday();
 
     const prevDate = (() => {
@@ -161,6 +178,22 @@ export async function GET(request: Request) {
     const avgPressure = dailyWeightedPress;
     const dailyP1000t = totalFlow > 0 && totalPower > 0 ? totalPower * 1000 / totalFlow : null;
 
+    // 覆盖目标日期的最新预测（同步后预计算，失败时不影响主数据）
+    const forecast = await getLatestForecast(['i_1034', 'i_1030'], targetDate!).catch((err) => {
+      console.error('读取预测数据失败:', err);
+      return {};
+    });
+
+    // 小时典型曲线（同步后增量维护的近 N 天均值），默认取与目标日期相同的工作日/周末类型
+    const profileWindow = PROFILE_WINDOWS.includes(Number(searchParams.get('profile_window')))
+      ? Number(searchParams.get('profile_window')) : 30;
+    const profileDayType: ProfileDayType = profileDayTypeParam && isProfileDayType(profileDayTypeParam)
+      ? profileDayTypeParam : profileDayTypeOf(targetDate!);
+    const typical = await getHourlyProfile(['i_1034', 'i_1030'], profileWindow, profileDayType).catch((err) => {
+      console.error('读取小时典型曲线失败:', err);
+      return {};
+    });
+
     return NextResponse.json({
       success: true,
       date: targetDate,
@@ -171,6 +204,8 @@ export async function GET(request: Request) {
         avg_pressure_mpa: +avgPressure.toFixed(4),
         daily_power_1000t: dailyP1000t ? +dailyP1000t.toFixed(2) : null,
       },
+      forecast,
+      typical: { window_days: profileWindow, day_type: profileDayType, profiles: typical },
     });
   } catch (error) {
     console.error('岩湖调度数据查询失败:', error);
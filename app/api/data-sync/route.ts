@@ -9,6 +9,7 @@ import { runDataSync, manualDataSync } from '@/lib/scheduler/dataSyncScheduler';
 /**
  * GET /api/data-sync
  * 手动触发数据同步
+ * 与定时任务共用同步任务队列：已有任务覆盖该日期范围时返回该任务的状态，不会重复同步
  * 
  * 查询参数:
  * - date: 同步日期 (YYYYMMDD格式，可选，默认为昨天)
@@ -48,6 +49,7 @@ export async function GET(request: NextRequest) {
       return NextResponse.json({
         success: true,
         message: '数据同步成功',
+        job: result.job,
         output: result.output
       });
     } else {
@@ -55,6 +57,7 @@ export async function GET(request: NextRequest) {
         success: false,
         message: '数据同步失败',
         error: result.error,
+        job: result.job,
         output: result.output
       }, { status: 500 });
     }
@@ -103,6 +106,7 @@ export async function POST(request: NextRequest) {
       return NextResponse.json({
         success: true,
         message: '数据同步成功',
+        job: result.job,
         output: result.output
       });
     } else {
@@ -110,6 +114,7 @@ export async function POST(request: NextRequest) {
         success: false,
         message: '数据同步失败',
         error: result.error,
+        job: result.job,
         output: result.output
       }, { status: 500 });
     }
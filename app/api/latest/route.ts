@@ -5,6 +5,7 @@ import { NextResponse } from 'next/server';
 import { InfluxDB } from '@influxdata/influxdb-client';
 import fs from 'fs/promises';
 import path from 'path';
+import { readLatestSnapshot } from '@/lib/utils/latestSnapshot';
 
 // InfluxDB配置
 const INFLUX_CONFIG = {
@@ -84,6 +85,51 @@ async function writeCache(data: any) {
   }
 }
 
+// 将 {指标ID: {value, time, stale_seconds?}} 组织为接口返回格式
+function buildLatestResponse(results: Record<string, any>) {
+  // 组织数据
+  const yanhuData = INDICATORS.yanhu.metrics.map(metric => ({
+    id: metric.id,
+    name: metric.name,
+    unit: metric.unit,
+    value: results[metric.id]?.value || 0,
+    time: results[metric.id]?.time || null,
+    stale_seconds: results[metric.id]?.stale_seconds ?? null,
+    highlight: metric.highlight || false
+  }));
+  
+  const chengdongData = INDICATORS.chengdong.metrics.map(metric => ({
+    id: metric.id,
+    name: metric.name,
+    unit: metric.unit,
+    value: results[metric.id]?.value || 0,
+    time: results[metric.id]?.time || null,
+    stale_seconds: results[metric.id]?.stale_seconds ?? null,
+    highlight: metric.highlight || false
+  }));
+  
+  // 获取最新时间
+  const allTimes = Object.values(results)
+    .map((r: any) => r.time)
+    .filter(t => t);
+  const latestTime = allTimes.length > 0 ? allTimes.sort().reverse()[0] : new Date().toISOString();
+  
+  return {
+    success: true,
+    collect_time: latestTime,
+    data: {
+      yanhu: {
+        label: INDICATORS.yanhu.label,
+        metrics: yanhuData
+      },
+      chengdong: {
+        label: INDICATORS.chengdong.label,
+        metrics: chengdongData
+      }
+    }
+  };
+}
+
 // 从InfluxDB获取最新数据
 async function fetchFromInfluxDB() {
   const client = new InfluxDB({ url: INFLUX_CONFIG.url, token: INFLUX_CONFIG.token });
@@ -133,45 +179,7 @@ async function fetchFromInfluxDB() {
       });
     });
     
-    // 组织数据
-    const yanhuData = INDICATORS.yanhu.metrics.map(metric => ({
-      id: metric.id,
-      name: metric.name,
-      unit: metric.unit,
-      value: results[metric.id]?.value || 0,
-      time: results[metric.id]?.time || null,
-      highlight: metric.highlight || false
-    }));
-    
-    const chengdongData = INDICATORS.chengdong.metrics.map(metric => ({
-      id: metric.id,
-      name: metric.name,
-      unit: metric.unit,
-      value: results[metric.id]?.value || 0,
-      time: results[metric.id]?.time || null,
-      highlight: metric.highlight || false
-    }));
-    
-    // 获取最新时间
-    const allTimes = Object.values(results)
-      .map((r: any) => r.time)
-      .filter(t => t);
-    const latestTime = allTimes.length > 0 ? allTimes.sort().reverse()[0] : new Date().toISOString();
-    
-    return {
-      success: true,
-      collect_time: latestTime,
-      data: {
-        yanhu: {
-          label: INDICATORS.yanhu.label,
-          metrics: yanhuData
-        },
-        chengdong: {
-          label: INDICATORS.chengdong.label,
-          metrics: chengdongData
-        }
-      }
-    };
+    return buildLatestResponse(results);
     
   } catch (error) {
     console.error('从InfluxDB获取数据失败:', error);
@@ -195,6 +203,12 @@ function refreshCacheAsync() {
 
 export async function GET() {
   try {
+    // 优先读取同步脚本 tail 模式生成的本地快照
+    const snapshot = await readLatestSnapshot();
+    if (snapshot) {
+      return NextResponse.json(buildLatestResponse(snapshot.indicators));
+    }
+
     // 先尝试读取缓存
     const cache = await readCache();
     
@@ -5,6 +5,7 @@ import { NextResponse } from 'next/server';
 import { InfluxDB } from '@influxdata/influxdb-client';
 import fs from 'fs/promises';
 import path from 'path';
+import { readLatestSnapshot, LatestSnapshot } from '@/lib/utils/latestSnapshot';
 
 // 压力计配置
 const PRESSURE_METERS = [
@@ -139,6 +140,31 @@ async function fetchFromInfluxDB() {
   }
 }
 
+// 将同步脚本生成的实时快照转换为接口返回格式
+function buildFromSnapshot(snapshot: LatestSnapshot) {
+  const times = Object.values(snapshot.pressure).map(v => new Date(v.time).getTime());
+  if (times.length === 0) {
+    return null;
+  }
+
+  const pressureData = PRESSURE_METERS.map(meter => {
+    const data = snapshot.pressure[meter.sn];
+    return {
+      sn: meter.sn,
+      label: meter.label,
+      pressure: data ? data.press : 0,
+      collect_time: data ? new Date(data.time).toISOString() : null,
+      stale_seconds: data ? data.stale_seconds : null
+    };
+  });
+
+  return {
+    success: true,
+    data: pressureData,
+    collect_time: new Date(Math.max(...times)).toISOString()
+  };
+}
+
 // 异步刷新缓存（不阻塞响应）
 function refreshCacheAsync() {
   // 使用 Promise 异步执行，不等待结果
@@ -156,6 +182,13 @@ function refreshCacheAsync() {
 
 export async function GET() {
   try {
+    // 优先读取同步脚本 tail 模式生成的本地快照
+    const snapshot = await readLatestSnapshot();
+    const snapshotResult = snapshot ? buildFromSnapshot(snapshot) : null;
+    if (snapshotResult) {
+      return NextResponse.json(snapshotResult);
+    }
+
     // 先尝试读取缓存
     const cache = await readCache();
     
@@ -0,0 +1,65 @@
+/**
+ * API: 泵特性曲线
+ * 读取预先拟合的相似定律曲线（fuan_pump_curve），并计算指定频率下的曲线点
+ *
+ * 查询参数:
+ * - pump: pump1 / pump2 / aux_pump（可选）
+ * - month: YYYY-MM（可选）
+ * - frequencies: 需要计算曲线的频率列表，逗号分隔（默认 50,45,40）
+ */
+import { NextResponse } from 'next/server';
+import { getPumpCurves } from '@/lib/db';
+import { evaluatePumpCurve, PumpCurveParams } from '@/lib/analysis/pumpCurve';
+
+function parseJsonColumn(value: any) {
+  return typeof value === 'string' ? JSON.parse(value) : value;
+}
+
+export async function GET(request: Request) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const pump = searchParams.get('pump');
+    const month = searchParams.get('month');
+    const frequencies = (searchParams.get('frequencies') || '50,45,40')
+      .split(',')
+      .map(f => parseFloat(f.trim()))
+      .filter(f => f > 0);
+
+    const rows = await getPumpCurves(pump, month);
+
+    if (rows.length === 0) {
+      return NextResponse.json({ error: '没有已拟合的泵曲线' }, { status: 404 });
+    }
+
+    const curves = rows.map((row) => {
+      const curve: PumpCurveParams = {
+        pump: row.pump,
+        month: row.month,
+        head_params: parseJsonColumn(row.head_params),
+        power_params: parseJsonColumn(row.power_params),
+        flow_params: parseJsonColumn(row.flow_params),
+        bep_flow: row.bep_flow,
+        bep_efficiency: row.bep_efficiency,
+        mean_efficiency: row.mean_efficiency,
+        n_samples: row.n_samples,
+        freq_min: row.freq_min,
+        freq_max: row.freq_max,
+      };
+      return {
+        ...curve,
+        head_rmse: row.head_rmse,
+        power_rmse: row.power_rmse,
+        fitted_at: row.fitted_at,
+        curves: frequencies.map(frequency => ({
+          frequency,
+          points: evaluatePumpCurve(curve, frequency),
+        })),
+      };
+    });
+
+    return NextResponse.json({ success: true, curves });
+  } catch (error) {
+    console.error('泵曲线查询失败:', error);
+    return NextResponse.json({ error: '查询失败' }, { status: 500 });
+  }
+}
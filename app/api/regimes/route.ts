@@ -0,0 +1,80 @@
+/**
+ * API: 运行工况区间
+ * 读取预先计算的泵/阀门工况连续区间（fuan_data_regimes），不扫描分钟数据
+ *
+ * 查询参数:
+ * - start_date / end_date: 时间范围（必填）
+ * - pump: pump1 / pump2 / aux_pump，只返回仅该泵运行的区间（可选）
+ * - pump_mask: 运行中的泵组合位掩码（1=1#泵 2=2#泵 4=辅泵，0=全部停机），与 pump 二选一（可选）
+ * - min_minutes: 最短区间时长（可选）
+ * - limit: 返回区间数上限（默认 1000）
+ */
+import { NextRequest, NextResponse } from 'next/server';
+import { getOperatingRegimes } from '@/lib/db';
+
+const PUMP_MASKS: Record<string, number> = {
+  pump1: 1,
+  pump2: 2,
+  aux_pump: 4,
+};
+
+function describeMask(mask: number) {
+  const names = [
+    mask & 1 ? '1#泵' : null,
+    mask & 2 ? '2#泵' : null,
+    mask & 4 ? '辅泵' : null,
+  ].filter(Boolean);
+  return names.length > 0 ? names.join('+') : '停机';
+}
+
+export async function GET(request: NextRequest) {
+  try {
+    const searchParams = request.nextUrl.searchParams;
+    const startDate = searchParams.get('start_date');
+    const endDate = searchParams.get('end_date');
+    const pump = searchParams.get('pump');
+    const pumpMaskParam = searchParams.get('pump_mask');
+    const minMinutes = parseInt(searchParams.get('min_minutes') || '0');
+    const limit = Math.min(parseInt(searchParams.get('limit') || '1000'), 10000);
+
+    if (!startDate || !endDate) {
+      return NextResponse.json(
+        { error: '请提供开始日期和结束日期' },
+        { status: 400 }
+      );
+    }
+
+    if (pump && !(pump in PUMP_MASKS)) {
+      return NextResponse.json(
+        { error: `未知的泵: ${pump}` },
+        { status: 400 }
+      );
+    }
+
+    const pumpMask = pump ? PUMP_MASKS[pump] : pumpMaskParam !== null ? parseInt(pumpMaskParam) : null;
+    const { intervals, summary } = await getOperatingRegimes({
+      startDate,
+      endDate,
+      pumpMask,
+      minMinutes,
+      limit,
+    });
+
+    return NextResponse.json({
+      success: true,
+      intervals: intervals.map(row => ({ ...row, pumps: describeMask(row.pump_mask) })),
+      summary: summary.map(row => ({
+        ...row,
+        pumps: describeMask(row.pump_mask),
+        total_minutes: Number(row.total_minutes),
+      })),
+      truncated: intervals.length >= limit,
+    });
+  } catch (error) {
+    console.error('读取运行工况失败:', error);
+    return NextResponse.json(
+      { error: error instanceof Error ? error.message : '读取运行工况失败' },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,149 @@
+/**
+ * Node 与回归脚本之间的二进制帧（格式与 scripts/regression_io.py 一致）
+ * 小段 JSON 头 + 原始小端 float64 数组，大数组不经过 JSON 编解码
+ *
+ *   4 字节 魔数 'FAB1' | 4 字节 JSON 头长度 (uint32 LE) | JSON 头（补齐到 8 字节）| 数据区（各数组 8 字节对齐）
+ */
+
+const MAGIC = Buffer.from('FAB1', 'ascii');
+const ALIGNMENT = 8;
+// 顶层数值数组长度达到该值才以二进制存放（与 Python 端一致）
+const MIN_BINARY_LENGTH = 64;
+// 输入行数达到该值时 runPythonScript 自动改用二进制帧；结果数组达到该值时 Python 端以二进制帧返回（regression_io.py 中同名常量）
+export const BINARY_MIN_ROWS = 5000;
+
+interface ArraySpec {
+  name: string;
+  dtype: '<f8' | '<f4';
+  shape: number[];
+  offset: number;
+}
+
+interface RecordsSpec {
+  name: string;
+  keys: string[];
+  dtype: '<f8' | '<f4';
+  length: number;
+  offset: number;
+}
+
+function padding(length: number) {
+  return (ALIGNMENT - (length % ALIGNMENT)) % ALIGNMENT;
+}
+
+function isNumberArray(value: any): value is number[] {
+  return Array.isArray(value) && value.length >= MIN_BINARY_LENGTH && typeof value[0] === 'number';
+}
+
+function isMatrix(value: any): value is number[][] {
+  if (!Array.isArray(value) || value.length < MIN_BINARY_LENGTH || !Array.isArray(value[0])) {
+    return false;
+  }
+  const width = value[0].length;
+  return typeof value[0][0] === 'number' && value.every((row: any) => Array.isArray(row) && row.length === width);
+}
+
+/** 输入中是否有足够大的数值数组，值得使用二进制帧 */
+export function shouldUseBinary(inputData: any) {
+  return inputData != null && typeof inputData === 'object'
+    && Array.isArray(inputData.y) && inputData.y.length >= BINARY_MIN_ROWS;
+}
+
+/** 把顶层的数值数组 / 矩阵写入数据区，其余字段放在 JSON 头中 */
+export function encodeFrame(inputData: Record<string, any>): Buffer {
+  const fields: Record<string, any> = {};
+  const arrays: ArraySpec[] = [];
+  const chunks: Buffer[] = [];
+  let offset = 0;
+
+  for (const [name, value] of Object.entries(inputData)) {
+    let data: Float64Array;
+    let shape: number[];
+    if (isMatrix(value)) {
+      const width = value[0].length;
+      data = new Float64Array(value.length * width);
+      value.forEach((row, i) => data.set(row, i * width));
+      shape = [value.length, width];
+    } else if (isNumberArray(value)) {
+      data = Float64Array.from(value);
+      shape = [value.length];
+    } else {
+      fields[name] = value;
+      continue;
+    }
+    // 服务端运行在小端平台（x86/ARM），Float64Array 的内存布局即为小端
+    const buffer = Buffer.from(data.buffer, data.byteOffset, data.byteLength);
+    arrays.push({ name, dtype: '<f8', shape, offset });
+    chunks.push(buffer);
+    offset += buffer.length;
+    const pad = padding(offset);
+    if (pad) {
+      chunks.push(Buffer.alloc(pad));
+      offset += pad;
+    }
+  }
+
+  const header = Buffer.from(JSON.stringify({ fields, arrays, records: [] }), 'utf8');
+  const lengthField = Buffer.alloc(4);
+  lengthField.writeUInt32LE(header.length, 0);
+  const prefixLength = MAGIC.length + 4 + header.length;
+  return Buffer.concat([MAGIC, lengthField, header, Buffer.alloc(padding(prefixLength)), ...chunks]);
+}
+
+export function isFrame(buffer: Buffer) {
+  return buffer.length >= MAGIC.length && buffer.subarray(0, MAGIC.length).equals(MAGIC);
+}
+
+function readValues(buffer: Buffer, start: number, count: number, dtype: string): ArrayLike<number> {
+  const bytes = dtype === '<f4' ? 4 : 8;
+  const byteOffset = buffer.byteOffset + start;
+  // 类型化数组要求按元素大小对齐；Buffer 可能来自共享内存池，不对齐时复制一份
+  if (byteOffset % bytes === 0) {
+    return dtype === '<f4'
+      ? new Float32Array(buffer.buffer, byteOffset, count)
+      : new Float64Array(buffer.buffer, byteOffset, count);
+  }
+  const copy = Uint8Array.prototype.slice.call(buffer, start, start + count * bytes);
+  return dtype === '<f4' ? new Float32Array(copy.buffer) : new Float64Array(copy.buffer);
+}
+
+/** 解析结果帧：数组还原为普通 number[]（矩阵为 number[][]），按列存放的对象数组还原为对象列表 */
+export function decodeFrame(buffer: Buffer): Record<string, any> {
+  if (!isFrame(buffer)) {
+    throw new Error('Invalid binary frame');
+  }
+  const headerLength = buffer.readUInt32LE(MAGIC.length);
+  const headerStart = MAGIC.length + 4;
+  const header = JSON.parse(buffer.toString('utf8', headerStart, headerStart + headerLength));
+  const dataStart = headerStart + headerLength + padding(headerStart + headerLength);
+
+  const result: Record<string, any> = { ...header.fields };
+
+  for (const spec of header.arrays as ArraySpec[]) {
+    const count = spec.shape.reduce((a, b) => a * b, 1);
+    const values = readValues(buffer, dataStart + spec.offset, count, spec.dtype);
+    if (spec.shape.length === 2) {
+      const [rows, width] = spec.shape;
+      result[spec.name] = Array.from({ length: rows }, (_, i) =>
+        Array.from(values instanceof Float64Array || values instanceof Float32Array
+          ? values.subarray(i * width, (i + 1) * width)
+          : Array.prototype.slice.call(values, i * width, (i + 1) * width)));
+    } else {
+      result[spec.name] = Array.from(values);
+    }
+  }
+
+  for (const spec of header.records as RecordsSpec[]) {
+    const values = readValues(buffer, dataStart + spec.offset, spec.length * spec.keys.length, spec.dtype);
+    // 按列存放：第 k 列位于 [k * length, (k + 1) * length)
+    result[spec.name] = Array.from({ length: spec.length }, (_, i) => {
+      const record: Record<string, number> = {};
+      spec.keys.forEach((key, k) => {
+        record[key] = values[k * spec.length + i];
+      });
+      return record;
+    });
+  }
+
+  return result;
+}
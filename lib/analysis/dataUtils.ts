@@ -41,11 +41,21 @@ export function normalizeData(X: number[][]): {
   return { data, mean, std };
 }
 
+export interface OutlierBounds {
+  lower: number;
+  upper: number;
+}
+
 /**
  * 移除异常值（使用IQR方法）
  * 对小数据集使用更宽松的倍数（3倍IQR而不是1.5倍）
+ * @param bounds - 预先计算的边界（如分位数草图的 iqr），提供时该字段不再排序计算
  */
-export function removeOutliers(data: any[], fields: string[]): any[] {
+export function removeOutliers(
+  data: any[],
+  fields: string[],
+  bounds: Record<string, OutlierBounds> = {}
+): any[] {
   let filtered = [...data];
   const initialCount = data.length;
   
@@ -54,12 +64,18 @@ export function removeOutliers(data: any[], fields: string[]): any[] {
   
   for (const field of fields) {
     const beforeFilter = filtered.length;
-    const values = filtered.map(row => row[field]).sort((a, b) => a - b);
-    const q1 = values[Math.floor(values.length * 0.25)];
-    const q3 = values[Math.floor(values.length * 0.75)];
-    const iqr = q3 - q1;
-    const lowerBound = q1 - iqrMultiplier * iqr;
-    const upperBound = q3 + iqrMultiplier * iqr;
+    let lowerBound: number;
+    let upperBound: number;
+    if (bounds[field]) {
+      ({ lower: lowerBound, upper: upperBound } = bounds[field]);
+    } else {
+      const values = filtered.map(row => row[field]).sort((a, b) => a - b);
+      const q1 = values[Math.floor(values.length * 0.25)];
+      const q3 = values[Math.floor(values.length * 0.75)];
+      const iqr = q3 - q1;
+      lowerBound = q1 - iqrMultiplier * iqr;
+      upperBound = q3 + iqrMultiplier * iqr;
+    }
     
     filtered = filtered.filter(row => 
       row[field] >= lowerBound && row[field] <= upperBound
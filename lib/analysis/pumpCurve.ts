@@ -0,0 +1,61 @@
+/**
+ * 泵特性曲线计算
+ * 曲线参数由 scripts/pump_curve_fit.py 按相似定律拟合并缓存到 fuan_pump_curve 表
+ *   扬程: H = r² · (h0 - k · (Q/r)^m)
+ *   功率: P = r³ · (p0 + p1·(Q/r) + p2·(Q/r)²)
+ *   r = 频率 / 额定频率
+ */
+
+export const RATED_FREQUENCY = 50;
+
+export interface PumpCurveParams {
+  pump: string;
+  month: string;
+  head_params: [number, number, number];
+  power_params: [number, number, number];
+  flow_params: [number, number];
+  bep_flow: number | null;
+  bep_efficiency: number | null;
+  mean_efficiency: number | null;
+  n_samples: number;
+  freq_min: number | null;
+  freq_max: number | null;
+}
+
+export interface PumpCurvePoint {
+  flow: number;
+  head: number;
+  power: number;
+  efficiency: number | null;
+}
+
+/**
+ * 计算指定频率下的扬程/功率/效率曲线
+ */
+export function evaluatePumpCurve(
+  curve: PumpCurveParams,
+  frequency: number,
+  points: number = 50
+): PumpCurvePoint[] {
+  const [h0, k, m] = curve.head_params;
+  const [p0, p1, p2] = curve.power_params;
+  const r = frequency / RATED_FREQUENCY;
+
+  // 流量范围：额定频率下扬程降为0时的流量，按相似定律缩放
+  const shutoffFlow = k > 0 ? Math.pow(h0 / k, 1 / m) : (curve.bep_flow || 0) * 2;
+  const maxFlow = shutoffFlow * r;
+
+  return Array.from({ length: points }, (_, i) => {
+    const flow = (maxFlow * (i + 1)) / points;
+    const u = flow / r;
+    const head = r * r * (h0 - k * Math.pow(u, m));
+    const power = r * r * r * (p0 + p1 * u + p2 * u * u);
+    const efficiency = power > 0 && head > 0 ? (flow * head) / (367.2 * power) : null;
+    return {
+      flow: +flow.toFixed(2),
+      head: +head.toFixed(3),
+      power: +power.toFixed(3),
+      efficiency: efficiency !== null ? +efficiency.toFixed(4) : null,
+    };
+  }).filter(p => p.head > 0);
+}
@@ -5,22 +5,116 @@
 
 import { spawn } from 'child_process';
 import path from 'path';
+import { getPythonWorkerPool, WORKER_SCRIPTS } from './pythonWorkerPool';
+import { decodeFrame, encodeFrame, isFrame, shouldUseBinary } from './binaryFrame';
 
 export interface PythonScriptResult {
   success: boolean;
   data?: any;
   error?: string;
+  status?: number;   // 数据集错误（无数据 / 样本过少）建议的 HTTP 状态码
+  details?: any;
+}
+
+/**
+ * Python 脚本执行失败；status / details 来自 dataset_loader.DatasetError，接口可直接返回
+ */
+export class PythonScriptError extends Error {
+  constructor(message: string, readonly status?: number, readonly details?: any) {
+    super(message);
+    this.name = 'PythonScriptError';
+  }
+}
+
+function scriptError(result: PythonScriptResult, fallback: string) {
+  return new PythonScriptError(result.error || fallback, result.status, result.details);
+}
+
+/**
+ * 回归分析的数据集描述：由 Python 端（scripts/dataset_loader.py）直接查询 fuan_data 并清洗
+ */
+export interface DatasetSpec {
+  x_fields: string[];
+  y_field: string;
+  start_date: string;
+  end_date: string;
+  granularity?: 'minute' | 'hour' | 'day';
+  pump_type?: string | null;
+  outlier?: { method?: 'iqr' | 'none'; source?: 'exact' | 'sketch'; multiplier?: number | null };
+  // 小时/日粒度读取汇总表（按字段分别求均值，与按行筛选后求均值不完全一致），默认由分钟数据聚合
+  rollup?: boolean;
+}
+
+/**
+ * 回归脚本的输入：已准备好的 X / y，或数据集描述
+ * save_model 为 true 时保存拟合好的模型（见 scripts/model_store.py），线性族模型同时传 online 时启用同步后的在线更新（见 scripts/online_models.py）；
+ * max_points 为绘图数据的最大点数，超过时降采样（见 scripts/plot_sampling.py），不传时返回全分辨率结果
+ */
+export type RegressionData = ({ X: number[][]; y: number[] } | { dataset: DatasetSpec }) & {
+  save_model?: boolean;
+  online?: boolean | { half_life_days?: number };
+  max_points?: number;
+};
+
+export interface SamplingInfo {
+  total: number;
+  returned: number;
+  method: 'lttb' | 'density';
+}
+
+export interface DatasetSummary {
+  x_fields: string[];
+  y_field: string;
+  raw_count: number;
+  sample_count: number;
+  outlier_bounds: Record<string, { lower: number; upper: number }>;
+}
+
+/** 以数据集描述调用时附带的字段 */
+export interface DatasetResult {
+  dataset?: DatasetSummary;
+  time_series_data?: Array<{ x: number; y_actual: number; y_predicted: number }>;
+  model_id?: string;
+  /** 降采样后 predictions 对应的原始行号 */
+  prediction_index?: number[];
+  sampling?: { max_points: number } & Record<string, SamplingInfo | number>;
 }
 
 /**
  * 执行Python脚本
+ * 回归脚本交给常驻 worker 进程池执行（见 pythonWorkerPool.ts），其余脚本或进程池不可用时启动新进程
+ * 回归脚本的样本数达到 BINARY_MIN_ROWS 时自动以二进制帧传递数组（见 binaryFrame.ts）；
+ * 数据集描述输入没有数组，由 Python 端按结果大小决定是否以二进制帧返回
  * @param scriptName - Python脚本文件名（位于scripts目录下）
- * @param inputData - 传递给Python脚本的数据（将通过stdin以JSON格式传递）
+ * @param inputData - 传递给Python脚本的数据（通过stdin以JSON或二进制帧格式传递）
  * @returns Promise<PythonScriptResult>
  */
 export async function runPythonScript(
   scriptName: string,
   inputData: any
+): Promise<PythonScriptResult> {
+  // 只有回归脚本（regression_io.run_cli）支持二进制帧
+  const binary = WORKER_SCRIPTS.has(scriptName) && shouldUseBinary(inputData);
+  const pool = getPythonWorkerPool();
+  if (pool && pool.available && pool.supports(scriptName)) {
+    const result = await pool.run(scriptName, inputData, binary);
+    // 进程池在任务执行期间变为不可用时改用单次进程重试
+    if (result.success || pool.available) {
+      return result;
+    }
+  }
+  return spawnPythonScript(scriptName, inputData, binary);
+}
+
+/**
+ * 启动新的Python进程执行脚本
+ * 默认 stdin 传入 JSON、stdout 读取 JSON 结果；binary 为 true 时输入为二进制帧
+ * 回归脚本在输入为二进制帧或结果数组较大时输出二进制帧，按魔数识别
+ */
+export async function spawnPythonScript(
+  scriptName: string,
+  inputData: any,
+  binary = false
 ): Promise<PythonScriptResult> {
   return new Promise((resolve) => {
     // 构建脚本路径
@@ -29,12 +123,12 @@ export async function runPythonScript(
     // 启动Python进程
     const pythonProcess = spawn('python3', [scriptPath]);
     
-    let stdoutData = '';
+    const stdoutChunks: Buffer[] = [];
     let stderrData = '';
     
-    // 收集stdout数据
-    pythonProcess.stdout.on('data', (data) => {
-      stdoutData += data.toString();
+    // 收集stdout数据（二进制帧不能按字符串拼接）
+    pythonProcess.stdout.on('data', (data: Buffer) => {
+      stdoutChunks.push(data);
     });
     
     // 收集stderr数据
@@ -46,7 +140,9 @@ export async function runPythonScript(
     pythonProcess.on('close', (code) => {
       if (code === 0) {
         try {
-          const result = JSON.parse(stdoutData);
+          const stdoutData = Buffer.concat(stdoutChunks);
+          // 结果数组较大时回归脚本总是输出二进制帧（数据集描述输入为 JSON），按魔数判断
+          const result = isFrame(stdoutData) ? decodeFrame(stdoutData) : JSON.parse(stdoutData.toString());
           resolve({
             success: true,
             data: result
@@ -58,10 +154,11 @@ export async function runPythonScript(
           });
         }
       } else {
-        // 尝试解析stderr中的错误信息
+        // 尝试解析stderr中的错误信息（最后一行，之前可能有日志输出）
         let errorMessage = stderrData;
+        let errorObj: any = {};
         try {
-          const errorObj = JSON.parse(stderrData);
+          errorObj = JSON.parse(stderrData.trim().split('\n').pop() || '');
           errorMessage = errorObj.error || stderrData;
         } catch {
           // 如果stderr不是JSON，直接使用原始内容
@@ -69,7 +166,9 @@ export async function runPythonScript(
         
         resolve({
           success: false,
-          error: errorMessage || `Python script exited with code ${code}`
+          error: errorMessage || `Python script exited with code ${code}`,
+          status: errorObj.status,
+          details: errorObj.details
         });
       }
     });
@@ -84,7 +183,7 @@ export async function runPythonScript(
     
     // 将输入数据写入stdin
     try {
-      pythonProcess.stdin.write(JSON.stringify(inputData));
+      pythonProcess.stdin.write(binary ? encodeFrame(inputData) : JSON.stringify(inputData));
       pythonProcess.stdin.end();
     } catch (e) {
       resolve({
@@ -99,10 +198,9 @@ export async function runPythonScript(
  * 执行多项式回归分析（Python版本）
  */
 export async function polynomialRegressionPython(
-  X: number[][],
-  y: number[],
+  data: RegressionData,
   degree: number
-): Promise<{
+): Promise<DatasetResult & {
   coefficients: number[];
   r2_train: number;
   r2_test: number;
@@ -113,13 +211,12 @@ export async function polynomialRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('polynomial_regression.py', {
-    X,
-    y,
+    ...data,
     degree
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Python script execution failed');
+    throw scriptError(result, 'Python script execution failed');
   }
   
   return result.data;
@@ -129,25 +226,25 @@ export async function polynomialRegressionPython(
  * 执行神经网络回归分析（Python版本）
  */
 export async function neuralNetworkRegressionPython(
-  X: number[][],
-  y: number[],
+  data: RegressionData,
   X_fields: string[],
   hidden_layers: number[] = [100, 50],
   max_iter: number = 1000
-): Promise<{
+): Promise<DatasetResult & {
   r2_train: number;
   r2_test: number;
   mse_train: number;
   mse_test: number;
   predictions: number[];
   feature_importance: Record<string, number>;
+  scatter_data: Array<{ actual: number; predicted: number }>;
+  residuals_data: Array<{ predicted: number; residual: number }>;
   layers: number[];
   iterations: number;
   loss_curve?: number[];
 }> {
   const result = await runPythonScript('neural_network_regression.py', {
-    X,
-    y,
+    ...data,
     X_fields,
     hidden_layers,
     max_iter,
@@ -155,7 +252,7 @@ export async function neuralNetworkRegressionPython(
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Neural network Python script execution failed');
+    throw scriptError(result, 'Neural network Python script execution failed');
   }
   
   return result.data;
@@ -165,9 +262,8 @@ export async function neuralNetworkRegressionPython(
  * 执行指数回归分析（Python版本）
  */
 export async function exponentialRegressionPython(
-  X: number[][],
-  y: number[]
-): Promise<{
+  data: RegressionData
+): Promise<DatasetResult & {
   coefficients: { a: number; b: number | number[] };
   r2_train: number;
   r2_test: number;
@@ -178,14 +274,13 @@ export async function exponentialRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('exponential_regression.py', {
-    X,
-    y,
+    ...data,
     test_size: 0.2,
     random_state: 42
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Exponential regression Python script execution failed');
+    throw scriptError(result, 'Exponential regression Python script execution failed');
   }
   
   return result.data;
@@ -195,9 +290,8 @@ export async function exponentialRegressionPython(
  * 执行对数回归分析（Python版本）
  */
 export async function logarithmicRegressionPython(
-  X: number[][],
-  y: number[]
-): Promise<{
+  data: RegressionData
+): Promise<DatasetResult & {
   coefficients: { intercept: number; coef: number | number[] };
   r2_train: number;
   r2_test: number;
@@ -208,14 +302,13 @@ export async function logarithmicRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('logarithmic_regression.py', {
-    X,
-    y,
+    ...data,
     test_size: 0.2,
     random_state: 42
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Logarithmic regression Python script execution failed');
+    throw scriptError(result, 'Logarithmic regression Python script execution failed');
   }
   
   return result.data;
@@ -225,9 +318,8 @@ export async function logarithmicRegressionPython(
  * 线性回归（Python实现）
  */
 export async function linearRegressionPython(
-  X: number[][],
-  y: number[]
-): Promise<{
+  data: RegressionData
+): Promise<DatasetResult & {
   coefficients: { intercept: number; coef: number | number[] };
   r2_train: number;
   r2_test: number;
@@ -238,14 +330,13 @@ export async function linearRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('linear_regression.py', {
-    X,
-    y,
+    ...data,
     test_size: 0.2,
     random_state: 42
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Linear regression Python script execution failed');
+    throw scriptError(result, 'Linear regression Python script execution failed');
   }
   
   return result.data;
@@ -255,9 +346,8 @@ export async function linearRegressionPython(
  * 幂函数回归（Python实现）
  */
 export async function powerRegressionPython(
-  X: number[][],
-  y: number[]
-): Promise<{
+  data: RegressionData
+): Promise<DatasetResult & {
   coefficients: { a: number; b: number | number[] };
   r2_train: number;
   r2_test: number;
@@ -268,28 +358,46 @@ export async function powerRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('power_regression.py', {
-    X,
-    y,
+    ...data,
     test_size: 0.2,
     random_state: 42
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Power regression Python script execution failed');
+    throw scriptError(result, 'Power regression Python script execution failed');
   }
   
   return result.data;
 }
 
+/**
+ * 正则化路径与交叉验证曲线（alpha 为 'auto' 时返回，见 scripts/regularization_path.py）
+ * 系数和 MSE 均为标准化空间的值；岭回归为留一交叉验证，Lasso / 弹性网络为 K 折交叉验证
+ */
+export interface RegularizationPath {
+  method: 'loo' | 'kfold';
+  folds: number;
+  alphas: number[];
+  coefs: number[][];
+  cv_mse: number[];
+  cv_mse_std: number[];
+  best_alpha: number;
+  best_l1_ratio?: number;
+  l1_ratios?: number[];
+  cv_mse_by_l1_ratio?: number[];
+  search_seconds: number;
+}
+
 /**
  * 岭回归（Python实现）
+ * alpha 为 'auto' 时一次计算整条正则化路径，按留一交叉验证选择 alpha
  */
 export async function ridgeRegressionPython(
-  X: number[][],
-  y: number[],
-  alpha: number = 1.0
-): Promise<{
+  data: RegressionData,
+  alpha: number | 'auto' = 1.0
+): Promise<DatasetResult & {
   coefficients: { intercept: number; coef: number | number[]; alpha: number };
+  regularization_path?: RegularizationPath;
   r2_train: number;
   r2_test: number;
   mse_train: number;
@@ -299,15 +407,14 @@ export async function ridgeRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('ridge_regression.py', {
-    X,
-    y,
+    ...data,
     alpha,
     test_size: 0.2,
     random_state: 42
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Ridge regression Python script execution failed');
+    throw scriptError(result, 'Ridge regression Python script execution failed');
   }
   
   return result.data;
@@ -315,13 +422,14 @@ export async function ridgeRegressionPython(
 
 /**
  * Lasso回归（Python实现）
+ * alpha 为 'auto' 时热启动计算正则化路径，按 K 折交叉验证（各折并行）选择 alpha
  */
 export async function lassoRegressionPython(
-  X: number[][],
-  y: number[],
-  alpha: number = 1.0
-): Promise<{
+  data: RegressionData,
+  alpha: number | 'auto' = 1.0
+): Promise<DatasetResult & {
   coefficients: { intercept: number; coef: number | number[]; alpha: number; non_zero_features: number; total_features: number };
+  regularization_path?: RegularizationPath;
   r2_train: number;
   r2_test: number;
   mse_train: number;
@@ -331,15 +439,14 @@ export async function lassoRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('lasso_regression.py', {
-    X,
-    y,
+    ...data,
     alpha,
     test_size: 0.2,
     random_state: 42
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Lasso regression Python script execution failed');
+    throw scriptError(result, 'Lasso regression Python script execution failed');
   }
   
   return result.data;
@@ -347,14 +454,15 @@ export async function lassoRegressionPython(
 
 /**
  * 弹性网络回归（Python实现）
+ * alpha 为 'auto' 时按 K 折交叉验证选择 alpha；l1_ratio 可为候选列表或 'auto'（默认候选值）同时选择
  */
 export async function elasticNetRegressionPython(
-  X: number[][],
-  y: number[],
-  alpha: number = 1.0,
-  l1_ratio: number = 0.5
-): Promise<{
+  data: RegressionData,
+  alpha: number | 'auto' = 1.0,
+  l1_ratio: number | number[] | 'auto' = 0.5
+): Promise<DatasetResult & {
   coefficients: { intercept: number; coef: number | number[]; alpha: number; l1_ratio: number; non_zero_features: number; total_features: number };
+  regularization_path?: RegularizationPath;
   r2_train: number;
   r2_test: number;
   mse_train: number;
@@ -364,8 +472,7 @@ export async function elasticNetRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('elastic_net_regression.py', {
-    X,
-    y,
+    ...data,
     alpha,
     l1_ratio,
     test_size: 0.2,
@@ -373,23 +480,49 @@ export async function elasticNetRegressionPython(
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'ElasticNet regression Python script execution failed');
+    throw scriptError(result, 'ElasticNet regression Python script execution failed');
   }
   
   return result.data;
 }
 
+/**
+ * SVR 核近似信息（训练样本数达到阈值时自动启用，见 scripts/svr_regression.py）
+ * validation 为训练集子样本上的精确 SVR 与近似模型在测试集上的预测对比（标准化空间）
+ */
+export interface SvrApproximation {
+  method: 'nystroem' | 'rff' | 'linear';
+  rank: number | null;
+  solver: 'linear_svr' | 'ridge';
+  gamma: number;
+  train_samples: number;
+  fit_seconds: number;
+  validation?: { subsample: number; r2_vs_exact: number; rmse_vs_exact: number; exact_fit_seconds: number };
+}
+
 /**
  * 支持向量回归（Python实现）
+ * 训练样本多时改用 Nyström 核近似 + 线性求解器（options.approximation 可强制 'exact' / 'nystroem' / 'rff'）
  */
 export async function svrRegressionPython(
-  X: number[][],
-  y: number[],
+  data: RegressionData,
   kernel: string = 'rbf',
   C: number = 1.0,
-  epsilon: number = 0.1
-): Promise<{
-  model_params: { kernel: string; C: number; epsilon: number; n_support_vectors: number | null };
+  epsilon: number = 0.1,
+  options: {
+    approximation?: 'auto' | 'exact' | 'nystroem' | 'rff';
+    n_components?: number;
+    solver?: 'linear_svr' | 'ridge';
+    validate?: boolean;
+  } = {}
+): Promise<DatasetResult & {
+  model_params: {
+    kernel: string;
+    C: number;
+    epsilon: number;
+    n_support_vectors: number | null;
+    approximation?: SvrApproximation;
+  };
   r2_train: number;
   r2_test: number;
   mse_train: number;
@@ -399,17 +532,17 @@ export async function svrRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('svr_regression.py', {
-    X,
-    y,
+    ...data,
     kernel,
     C,
     epsilon,
+    ...options,
     test_size: 0.2,
     random_state: 42
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'SVR Python script execution failed');
+    throw scriptError(result, 'SVR Python script execution failed');
   }
   
   return result.data;
@@ -419,11 +552,10 @@ export async function svrRegressionPython(
  * 随机森林回归（Python实现）
  */
 export async function randomForestRegressionPython(
-  X: number[][],
-  y: number[],
+  data: RegressionData,
   n_estimators: number = 100,
   max_depth: number | null = null
-): Promise<{
+): Promise<DatasetResult & {
   model_params: { n_estimators: number; max_depth: number | null; n_features: number };
   feature_importance: number[];
   r2_train: number;
@@ -435,8 +567,7 @@ export async function randomForestRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('random_forest_regression.py', {
-    X,
-    y,
+    ...data,
     n_estimators,
     max_depth,
     test_size: 0.2,
@@ -444,7 +575,7 @@ export async function randomForestRegressionPython(
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Random Forest Python script execution failed');
+    throw scriptError(result, 'Random Forest Python script execution failed');
   }
   
   return result.data;
@@ -454,12 +585,11 @@ export async function randomForestRegressionPython(
  * 梯度提升回归（Python实现）
  */
 export async function gradientBoostingRegressionPython(
-  X: number[][],
-  y: number[],
+  data: RegressionData,
   n_estimators: number = 100,
   learning_rate: number = 0.1,
   max_depth: number = 3
-): Promise<{
+): Promise<DatasetResult & {
   model_params: { n_estimators: number; learning_rate: number; max_depth: number; n_features: number; n_estimators_used: number };
   feature_importance: number[];
   r2_train: number;
@@ -471,8 +601,7 @@ export async function gradientBoostingRegressionPython(
   residuals_data: Array<{ predicted: number; residual: number }>;
 }> {
   const result = await runPythonScript('gradient_boosting_regression.py', {
-    X,
-    y,
+    ...data,
     n_estimators,
     learning_rate,
     max_depth,
@@ -481,8 +610,237 @@ export async function gradientBoostingRegressionPython(
   });
   
   if (!result.success) {
-    throw new Error(result.error || 'Gradient Boosting Python script execution failed');
+    throw scriptError(result, 'Gradient Boosting Python script execution failed');
   }
   
   return result.data;
 }
+
+/**
+ * 时间序列交叉验证设置（见 scripts/time_series_cv.py），数据需按时间排序
+ * rolling：滚动起点（扩展窗口）；blocked：连续块轮流作为测试集；gap 为训练块与测试块之间留出的行数
+ */
+export interface TimeSeriesCvSpec {
+  method: 'rolling' | 'blocked';
+  folds?: number;
+  gap?: number;
+  test_size?: number;
+  max_train_size?: number;
+}
+
+export interface ModelLeaderboardEntry {
+  type: string;
+  params: Record<string, any>;
+  rank: number;
+  fit_seconds: number;
+  r2_train?: number;
+  r2_test?: number;
+  mse_train?: number;
+  mse_test?: number;
+  /** 交叉验证时：指标为各折均值，附带标准差和每折指标 */
+  r2_train_std?: number;
+  r2_test_std?: number;
+  mse_train_std?: number;
+  mse_test_std?: number;
+  folds?: Array<{ fold: number; r2_train?: number; r2_test?: number; mse_train?: number; mse_test?: number; error?: string }>;
+  coefficients?: any;
+  model_params?: Record<string, any>;
+  feature_importance?: number[] | Record<string, number>;
+  error?: string;
+}
+
+/**
+ * 多模型对比（Python实现）
+ * 数据集只传一次，共享训练/测试集划分和标准化，各模型在进程池中并行拟合
+ * 传入 cv 时改为时间序列交叉验证，各模型的各折一起并行拟合，指标为各折均值和标准差
+ */
+export async function compareModelsPython(
+  data: RegressionData,
+  X_fields: string[],
+  models?: Array<string | Record<string, any>>,
+  cv?: TimeSeriesCvSpec
+): Promise<DatasetResult & {
+  sample_count: number;
+  train_count: number;
+  test_count: number;
+  leaderboard: ModelLeaderboardEntry[];
+  best: string | null;
+  prepare_seconds: number;
+  total_seconds: number;
+  workers: number;
+  evaluation?: {
+    method: TimeSeriesCvSpec['method'];
+    folds: number;
+    gap: number;
+    splits: Array<{ train_count: number; test_count: number; test_start: number; test_end: number }>;
+  };
+}> {
+  const result = await runPythonScript('regression_engine.py', {
+    ...data,
+    X_fields,
+    models,
+    cv
+  });
+
+  if (!result.success) {
+    throw scriptError(result, 'Model comparison Python script execution failed');
+  }
+
+  return result.data;
+}
+
+export interface SketchFieldSummary {
+  count: number;
+  mean?: number;
+  min?: number;
+  max?: number;
+  quantiles?: Record<string, number>;
+  iqr?: { q1: number; q3: number; multiplier: number; lower: number; upper: number };
+  histogram?: { edges: number[]; counts: number[] };
+}
+
+/**
+ * 按天分位数草图汇总（Python实现）
+ * 合并日期范围内每天的 t-digest，得到近似分位数、IQR 异常值边界和直方图（按整天统计）
+ */
+export async function quantileSketchSummaryPython(
+  fields: string[],
+  startDate: string,
+  endDate: string,
+  options: { quantiles?: number[]; bins?: number; iqrMultiplier?: number } = {}
+): Promise<Record<string, SketchFieldSummary>> {
+  const result = await runPythonScript('quantile_sketch.py', {
+    fields,
+    start_date: startDate,
+    end_date: endDate,
+    quantiles: options.quantiles,
+    bins: options.bins,
+    iqr_multiplier: options.iqrMultiplier
+  });
+
+  if (!result.success) {
+    throw scriptError(result, 'Quantile sketch Python script execution failed');
+  }
+
+  return result.data;
+}
+
+export interface SavedModelInfo {
+  model_id: string;
+  model_type: string;
+  created_at: string;
+  sklearn_version: string;
+  script: string;
+  x_fields: string[];
+  y_field?: string;
+  params: Record<string, any>;
+  metrics: { r2_train?: number; r2_test?: number; mse_train?: number; mse_test?: number };
+  n_samples: number | null;
+  dataset?: DatasetSpec;
+  online?: OnlineModelState;
+  coefficient_history?: CoefficientRecord[];
+}
+
+export interface OnlineModelState {
+  half_life_days: number | null;
+  rows: number;
+  updated_through: string | null;
+  updated_at: string;
+}
+
+/** 在线更新后的系数记录（特征空间中的截距和系数） */
+export interface CoefficientRecord {
+  through: string | null;
+  rows: number;
+  intercept: number;
+  coef: number[];
+}
+
+export interface ModelScoreResult {
+  model_id: string;
+  count: number;
+  predictions: Array<number | null>;   // 超出模型定义域或含缺失值的行为 null
+  invalid_count: number;
+  invalid_reason?: string;
+  collect_time?: string[];
+  actual?: number[];
+  mae?: number;
+  rmse?: number;
+}
+
+/**
+ * 用已保存的模型对给定行打分（Python实现，不重新拟合）
+ */
+export async function predictWithModelPython(modelId: string, X: number[][]): Promise<ModelScoreResult> {
+  const result = await runPythonScript('model_store.py', { action: 'predict', model_id: modelId, X });
+
+  if (!result.success) {
+    throw scriptError(result, 'Model predict Python script execution failed');
+  }
+
+  return result.data;
+}
+
+/**
+ * 用已保存的模型对日期范围内的新数据打分（按模型训练时的字段和筛选条件查询），并与实际值比较
+ */
+export async function scoreModelPython(
+  modelId: string,
+  startDate: string,
+  endDate: string
+): Promise<ModelScoreResult> {
+  const result = await runPythonScript('model_store.py', {
+    action: 'predict',
+    model_id: modelId,
+    start_date: startDate,
+    end_date: endDate
+  });
+
+  if (!result.success) {
+    throw scriptError(result, 'Model scoring Python script execution failed');
+  }
+
+  return result.data;
+}
+
+export async function listModelsPython(): Promise<SavedModelInfo[]> {
+  const result = await runPythonScript('model_store.py', { action: 'list' });
+
+  if (!result.success) {
+    throw scriptError(result, 'Model list Python script execution failed');
+  }
+
+  return result.data.models;
+}
+
+export async function deleteModelPython(modelId: string): Promise<{ model_id: string; deleted: boolean }> {
+  const result = await runPythonScript('model_store.py', { action: 'delete', model_id: modelId });
+
+  if (!result.success) {
+    throw scriptError(result, 'Model delete Python script execution failed');
+  }
+
+  return result.data;
+}
+
+/**
+ * 线性族模型在线更新：按模型的数据集描述逐天吸收日期范围内的新数据（已吸收的日期跳过）
+ */
+export async function updateModelPython(
+  modelId: string,
+  startDate: string,
+  endDate: string
+): Promise<{ model_id: string; absorbed_rows: number; online: OnlineModelState; coefficient_history: CoefficientRecord[] }> {
+  const result = await runPythonScript('model_store.py', {
+    action: 'update',
+    model_id: modelId,
+    start_date: startDate,
+    end_date: endDate
+  });
+
+  if (!result.success) {
+    throw scriptError(result, 'Model update Python script execution failed');
+  }
+
+  return result.data;
+}
@@ -0,0 +1,376 @@
+/**
+ * 常驻 Python worker 进程池
+ * 预先启动若干 scripts/regression_worker.py 进程（启动时已导入 numpy / sklearn 和全部回归脚本），
+ * 通过 stdin/stdout 逐行传递 JSON 任务，避免每次回归请求都重新启动 Python
+ * 大数据量任务以二进制帧传递（任务行后紧跟帧字节，见 binaryFrame.ts / regression_worker.py）
+ *
+ * - 池大小：PYTHON_POOL_SIZE（默认 2，设为 0 关闭进程池，回退为每次启动新进程）
+ * - 回收：每个 worker 处理 PYTHON_POOL_MAX_JOBS 个任务后退出并由新进程替换（默认 200），防止内存增长
+ * - 健康检查：定期向空闲 worker 发送 ping，超时未响应则结束并替换；单个任务超时同样替换 worker
+ */
+
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import type { PythonScriptResult } from './pythonRunner';
+import { decodeFrame, encodeFrame } from './binaryFrame';
+
+// 与 regression_worker.py 中的 HANDLER_SCRIPTS 保持一致
+export const WORKER_SCRIPTS = new Set([
+  'linear_regression.py',
+  'polynomial_regression.py',
+  'exponential_regression.py',
+  'logarithmic_regression.py',
+  'power_regression.py',
+  'ridge_regression.py',
+  'lasso_regression.py',
+  'elastic_net_regression.py',
+  'svr_regression.py',
+  'random_forest_regression.py',
+  'gradient_boosting_regression.py',
+  'neural_network_regression.py',
+  'regression_engine.py',
+  'model_store.py',
+]);
+
+export interface WorkerPoolOptions {
+  size: number;
+  maxJobsPerWorker: number;
+  jobTimeoutMs: number;
+  healthCheckIntervalMs: number;
+  pingTimeoutMs: number;
+}
+
+const DEFAULT_OPTIONS: WorkerPoolOptions = {
+  size: Number(process.env.PYTHON_POOL_SIZE ?? 2),
+  maxJobsPerWorker: Number(process.env.PYTHON_POOL_MAX_JOBS ?? 200),
+  jobTimeoutMs: 5 * 60 * 1000,
+  healthCheckIntervalMs: 30 * 1000,
+  pingTimeoutMs: 10 * 1000,
+};
+
+// 连续多少个 worker 在就绪前退出后视为环境不可用，停止重启
+const MAX_STARTUP_FAILURES = 3;
+
+interface PendingJob {
+  id: number;
+  script: string;
+  input: any;
+  binary: boolean;
+  resolve: (result: PythonScriptResult) => void;
+}
+
+class PythonWorker {
+  readonly process: ChildProcessWithoutNullStreams;
+  ready = false;
+  started = false;   // 是否曾经就绪（区分启动失败与运行中退出）
+  jobs = 0;
+  current: PendingJob | null = null;
+  private pingId: number | null = null;
+  private timer: NodeJS.Timeout | null = null;
+  private stderrTail = '';
+  private exited = false;
+  // stdout 字节流缓冲：按行解析 JSON 消息，消息带 binary 时再读取指定字节数的结果帧
+  private stdoutBuffer = Buffer.alloc(0);
+  private pendingFrame: { message: any; length: number } | null = null;
+
+  constructor(
+    private readonly onReady: (worker: PythonWorker) => void,
+    private readonly onIdle: (worker: PythonWorker) => void,
+    private readonly onExit: (worker: PythonWorker, code: number | null) => void
+  ) {
+    const scriptPath = path.join(process.cwd(), 'scripts', 'regression_worker.py');
+    this.process = spawn('python3', [scriptPath]);
+
+    this.process.stdout.on('data', (chunk: Buffer) => this.handleData(chunk));
+
+    // 只保留最近的 stderr 输出（sklearn 警告等），worker 异常退出时作为错误信息
+    this.process.stderr.on('data', (data) => {
+      this.stderrTail = (this.stderrTail + data.toString()).slice(-4000);
+    });
+
+    this.process.on('exit', (code) => this.finish(code));
+
+    // 启动失败（如找不到 python3）时不一定触发 exit
+    this.process.on('error', (error) => {
+      this.stderrTail = `Failed to start Python process: ${error.message}`;
+      this.finish(null);
+    });
+  }
+
+  private finish(code: number | null) {
+    if (this.exited) {
+      return;
+    }
+    this.exited = true;
+    this.ready = false;
+    this.clearTimer();
+    if (this.current) {
+      this.current.resolve({
+        success: false,
+        error: this.stderrTail.trim() || `Python worker exited with code ${code}`,
+      });
+      this.current = null;
+    }
+    this.onExit(this, code);
+  }
+
+  get idle() {
+    return this.ready && !this.current && this.pingId === null;
+  }
+
+  run(job: PendingJob, timeoutMs: number) {
+    this.current = job;
+    this.startTimer(timeoutMs, `Python worker job timed out after ${timeoutMs} ms`);
+    if (job.binary) {
+      const frame = encodeFrame(job.input);
+      this.send({ id: job.id, script: job.script, binary: frame.length }, frame);
+    } else {
+      this.send({ id: job.id, script: job.script, input: job.input });
+    }
+  }
+
+  ping(id: number, timeoutMs: number) {
+    this.pingId = id;
+    this.startTimer(timeoutMs, 'Python worker health check timed out');
+    this.send({ id, type: 'ping' });
+  }
+
+  stop() {
+    this.ready = false;
+    this.process.stdin.end();
+  }
+
+  kill(reason: string) {
+    this.stderrTail = reason;
+    this.ready = false;
+    this.process.kill('SIGKILL');
+  }
+
+  private send(message: any, frame?: Buffer) {
+    try {
+      this.process.stdin.write(JSON.stringify(message) + '\n');
+      if (frame) {
+        this.process.stdin.write(frame);
+      }
+    } catch (e) {
+      this.kill(`Failed to write to Python stdin: ${e instanceof Error ? e.message : 'Unknown error'}`);
+    }
+  }
+
+  private startTimer(timeoutMs: number, reason: string) {
+    this.clearTimer();
+    this.timer = setTimeout(() => this.kill(reason), timeoutMs);
+  }
+
+  private clearTimer() {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+  }
+
+  private handleData(chunk: Buffer) {
+    this.stdoutBuffer = this.stdoutBuffer.length ? Buffer.concat([this.stdoutBuffer, chunk]) : chunk;
+    while (true) {
+      if (this.pendingFrame) {
+        if (this.stdoutBuffer.length < this.pendingFrame.length) {
+          return;
+        }
+        const { message, length } = this.pendingFrame;
+        const frame = this.stdoutBuffer.subarray(0, length);
+        this.stdoutBuffer = this.stdoutBuffer.subarray(length);
+        this.pendingFrame = null;
+        try {
+          message.result = decodeFrame(frame);
+        } catch (e) {
+          this.failCurrent(`Failed to decode Python output: ${e instanceof Error ? e.message : 'Unknown error'}`);
+          continue;
+        }
+        this.handleMessage(message);
+        continue;
+      }
+
+      const newline = this.stdoutBuffer.indexOf(0x0a);
+      if (newline < 0) {
+        return;
+      }
+      const line = this.stdoutBuffer.toString('utf8', 0, newline).trim();
+      this.stdoutBuffer = this.stdoutBuffer.subarray(newline + 1);
+      if (line) {
+        this.handleLine(line);
+      }
+    }
+  }
+
+  // 每个 worker 同时只处理一个任务，无法解析的结果直接归属当前任务
+  private failCurrent(error: string) {
+    if (this.current) {
+      const job = this.current;
+      this.current = null;
+      this.clearTimer();
+      this.jobs += 1;
+      job.resolve({ success: false, error });
+      this.onIdle(this);
+    }
+  }
+
+  private handleLine(line: string) {
+    let message: any;
+    try {
+      message = JSON.parse(line);
+    } catch (e) {
+      this.failCurrent(`Failed to parse Python output: ${e instanceof Error ? e.message : 'Unknown error'}`);
+      return;
+    }
+
+    if (typeof message.binary === 'number') {
+      this.pendingFrame = { message, length: message.binary };
+      return;
+    }
+    this.handleMessage(message);
+  }
+
+  private handleMessage(message: any) {
+
+    if (message.ready) {
+      this.ready = true;
+      this.started = true;
+      this.onReady(this);
+      return;
+    }
+
+    if (this.pingId !== null && message.id === this.pingId) {
+      this.pingId = null;
+      this.clearTimer();
+      this.onIdle(this);
+      return;
+    }
+
+    if (this.current && message.id === this.current.id) {
+      const job = this.current;
+      this.current = null;
+      this.clearTimer();
+      this.jobs += 1;
+      job.resolve(message.ok
+        ? { success: true, data: message.result }
+        : { success: false, error: message.error, status: message.status, details: message.details });
+      this.onIdle(this);
+    }
+  }
+}
+
+export class PythonWorkerPool {
+  private workers: PythonWorker[] = [];
+  private queue: PendingJob[] = [];
+  private nextId = 1;
+  private startupFailures = 0;
+  private healthTimer: NodeJS.Timeout | null = null;
+  private closed = false;
+
+  constructor(private readonly options: WorkerPoolOptions = DEFAULT_OPTIONS) {
+    for (let i = 0; i < options.size; i++) {
+      this.spawnWorker();
+    }
+    this.healthTimer = setInterval(() => this.healthCheck(), options.healthCheckIntervalMs);
+    this.healthTimer.unref();
+  }
+
+  /** 进程池是否可用（worker 反复启动失败时不可用，调用方应回退为单次进程） */
+  get available() {
+    return !this.closed && this.startupFailures < MAX_STARTUP_FAILURES;
+  }
+
+  supports(scriptName: string) {
+    return WORKER_SCRIPTS.has(scriptName);
+  }
+
+  run(script: string, input: any, binary = false): Promise<PythonScriptResult> {
+    return new Promise((resolve) => {
+      this.queue.push({ id: this.nextId++, script, input, binary, resolve });
+      this.dispatch();
+    });
+  }
+
+  close() {
+    this.closed = true;
+    if (this.healthTimer) {
+      clearInterval(this.healthTimer);
+      this.healthTimer = null;
+    }
+    for (const worker of this.workers) {
+      worker.stop();
+    }
+    for (const job of this.queue.splice(0)) {
+      job.resolve({ success: false, error: 'Python worker pool closed' });
+    }
+  }
+
+  private spawnWorker() {
+    const worker = new PythonWorker(
+      () => {
+        this.startupFailures = 0;
+        this.dispatch();
+      },
+      (w) => {
+        if (w.jobs >= this.options.maxJobsPerWorker) {
+          // 达到任务数上限：正常退出，exit 回调中补充新进程
+          w.stop();
+          return;
+        }
+        this.dispatch();
+      },
+      (w, code) => this.handleExit(w, code)
+    );
+    this.workers.push(worker);
+  }
+
+  private handleExit(worker: PythonWorker, code: number | null) {
+    this.workers = this.workers.filter((w) => w !== worker);
+    if (this.closed) {
+      return;
+    }
+    if (!worker.started) {
+      this.startupFailures += 1;
+    }
+    if (!this.available) {
+      console.error('Python worker 连续启动失败，回退为单次进程执行');
+      for (const job of this.queue.splice(0)) {
+        job.resolve({ success: false, error: 'Python worker pool unavailable' });
+      }
+      return;
+    }
+    this.spawnWorker();
+  }
+
+  private dispatch() {
+    for (const worker of this.workers) {
+      if (this.queue.length === 0) {
+        return;
+      }
+      if (worker.idle) {
+        worker.run(this.queue.shift()!, this.options.jobTimeoutMs);
+      }
+    }
+  }
+
+  private healthCheck() {
+    for (const worker of this.workers) {
+      if (worker.idle) {
+        worker.ping(this.nextId++, this.options.pingTimeoutMs);
+      }
+    }
+  }
+}
+
+let pool: PythonWorkerPool | null = null;
+
+/** 获取全局进程池；PYTHON_POOL_SIZE=0 时返回 null */
+export function getPythonWorkerPool() {
+  if (DEFAULT_OPTIONS.size <= 0) {
+    return null;
+  }
+  if (!pool) {
+    pool = new PythonWorkerPool();
+  }
+  return pool;
+}
@@ -86,6 +86,173 @@ export async function getDataByDateRange(startDate: string, endDate: string) {
   return rows;
 }
 
+// 查询各指标最新一次发布的短期预测（由同步后的 flow_forecast.py 生成）
+// 传入 targetDate (YYYY-MM-DD) 时只取预测时段覆盖该日期的最新一次发布，没有则不返回该指标
+export async function getLatestForecast(metrics: string[], targetDate?: string) {
+  const pool = getPool();
+  const dateFilter = targetDate
+    ? 'AND target_time >= ? AND target_time < DATE_ADD(?, INTERVAL 1 DAY)'
+    : '';
+  const params: any[] = targetDate ? [metrics, targetDate, targetDate] : [metrics];
+  const [rows] = await pool.query<mysql.RowDataPacket[]>(`
+    SELECT f.metric, f.issue_time, f.target_time, f.value, f.lower_bound, f.upper_bound
+    FROM fuan_forecast f
+    JOIN (
+      SELECT metric, MAX(issue_time) AS issue_time
+      FROM fuan_forecast
+      WHERE metric IN (?) ${dateFilter}
+      GROUP BY metric
+    ) latest ON latest.metric = f.metric AND latest.issue_time = f.issue_time
+    ORDER BY f.metric, f.target_time
+  `, params);
+
+  const result: Record<string, {
+    issue_time: Date;
+    points: Array<{ time: Date; value: number; lower: number; upper: number }>;
+  }> = {};
+  for (const row of rows) {
+    if (!result[row.metric]) {
+      result[row.metric] = { issue_time: row.issue_time, points: [] };
+    }
+    result[row.metric].points.push({
+      time: row.target_time,
+      value: Number(row.value),
+      lower: Number(row.lower_bound),
+      upper: Number(row.upper_bound),
+    });
+  }
+  return result;
+}
+
+// 查询缓存的泵特性曲线（由同步后的 pump_curve_fit.py 按泵、按月拟合）
+export async function getPumpCurves(pump?: string | null, month?: string | null) {
+  const pool = getPool();
+  const conditions: string[] = [];
+  const params: string[] = [];
+  if (pump) {
+    conditions.push('pump = ?');
+    params.push(pump);
+  }
+  if (month) {
+    conditions.push('month = ?');
+    params.push(month);
+  }
+  const [rows] = await pool.query<mysql.RowDataPacket[]>(`
+    SELECT pump, month, head_params, power_params, flow_params,
+           head_rmse, power_rmse, flow_rmse, bep_flow, bep_efficiency, mean_efficiency,
+           n_samples, freq_min, freq_max, fitted_at
+    FROM fuan_pump_curve
+    ${conditions.length > 0 ? `WHERE ${conditions.join(' AND ')}` : ''}
+    ORDER BY pump, month
+  `, params);
+  return rows;
+}
+
+export interface RegimeFilter {
+  startDate: string;
+  endDate: string;
+  pumpMask?: number | null;   // 运行中的泵组合（1=1#泵 2=2#泵 4=辅泵），精确匹配
+  minMinutes?: number;
+  limit?: number;
+}
+
+// 运行工况区间（operating_regimes.py 同步后维护）
+export async function getOperatingRegimes(filter: RegimeFilter) {
+  const pool = getPool();
+  const conditions = ['start_time < ?', 'end_time > ?'];
+  const params: any[] = [filter.endDate, filter.startDate];
+  if (filter.pumpMask !== undefined && filter.pumpMask !== null) {
+    conditions.push('pump_mask = ?');
+    params.push(filter.pumpMask);
+  }
+  if (filter.minMinutes) {
+    conditions.push('minutes >= ?');
+    params.push(filter.minMinutes);
+  }
+  const where = conditions.join(' AND ');
+
+  const [intervals] = await pool.query<mysql.RowDataPacket[]>(`
+    SELECT start_time, end_time, minutes, pump_mask, pump1_band, pump2_band, aux_band, valve_band,
+           pump1_freq_avg, pump2_freq_avg, aux_freq_avg, valve_avg
+    FROM fuan_data_regimes
+    WHERE ${where}
+    ORDER BY start_time
+    LIMIT ?
+  `, [...params, filter.limit || 1000]);
+
+  const [summary] = await pool.query<mysql.RowDataPacket[]>(`
+    SELECT pump_mask, pump1_band, pump2_band, aux_band, valve_band,
+           COUNT(*) as runs, SUM(minutes) as total_minutes, MAX(minutes) as longest_run
+    FROM fuan_data_regimes
+    WHERE ${where}
+    GROUP BY pump_mask, pump1_band, pump2_band, aux_band, valve_band
+    ORDER BY total_minutes DESC
+  `, params);
+
+  return { intervals, summary };
+}
+
+export type ProfileDayType = 'all' | 'weekday' | 'weekend';
+export const PROFILE_DAY_TYPES: ProfileDayType[] = ['all', 'weekday', 'weekend'];
+
+export function isProfileDayType(value: string): value is ProfileDayType {
+  return (PROFILE_DAY_TYPES as string[]).includes(value);
+}
+
+// 日期对应的典型曲线日期类型（周六、周日为周末）
+export function profileDayTypeOf(date: string): ProfileDayType {
+  const day = new Date(date + 'T00:00:00').getDay();
+  return day === 0 || day === 6 ? 'weekend' : 'weekday';
+}
+
+// 小时典型曲线（hourly_profiles.py 同步后增量维护），每个指标返回 24 行以内
+export async function getHourlyProfile(
+  metrics: string[],
+  windowDays: number = 30,
+  dayType: ProfileDayType = 'all'
+) {
+  const pool = getPool();
+  const [rows] = await pool.query<mysql.RowDataPacket[]>(`
+    SELECT metric, hour, n, s, ss, days
+    FROM fuan_data_hour_profile
+    WHERE window_days = ? AND day_type = ? AND metric IN (?) AND n > 0
+    ORDER BY metric, hour
+  `, [windowDays, dayType, metrics]);
+
+  const result: Record<string, Array<{ hour: number; mean: number; std: number; samples: number; days: number }>> = {};
+  for (const row of rows) {
+    const n = Number(row.n);
+    const mean = Number(row.s) / n;
+    // 增量加减存在浮点误差，方差下限截为 0
+    const variance = Math.max(Number(row.ss) / n - mean * mean, 0);
+    if (!result[row.metric]) {
+      result[row.metric] = [];
+    }
+    result[row.metric].push({
+      hour: Number(row.hour),
+      mean,
+      std: Math.sqrt(variance),
+      samples: n,
+      days: Number(row.days),
+    });
+  }
+  return result;
+}
+
+// 最近有有效数据的日期（读取按天小时统计，替代对分钟表的 GROUP BY DATE 扫描）
+export async function getRecentProfileDays(metrics: string[], limit: number = 2, withinDays: number = 7) {
+  const pool = getPool();
+  const [rows] = await pool.query<mysql.RowDataPacket[]>(`
+    SELECT day AS d
+    FROM fuan_data_hour_day_stats
+    WHERE metric IN (?) AND day >= DATE_SUB(CURDATE(), INTERVAL ? DAY) AND n > 0
+    GROUP BY day
+    ORDER BY day DESC
+    LIMIT ?
+  `, [metrics, withinDays, limit]);
+  return rows;
+}
+
 // 关闭连接池
 export async function closePool() {
   if (pool) {
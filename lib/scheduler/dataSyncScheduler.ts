@@ -9,11 +9,43 @@ import cron from 'node-cron';
 
 const PYTHON_SCRIPT_PATH = path.join(process.cwd(), 'scripts', 'fuan_data_sync.py');
 
+/**
+ * 同步任务状态（由 Python 脚本输出的 SYNC_JOB_STATUS 行解析）
+ * 重复或重叠的同步请求会返回已覆盖该日期范围的同一个任务
+ */
+export interface SyncJobStatus {
+  id: number;
+  start_date: string;
+  end_date: string;
+  status: 'queued' | 'running' | 'done' | 'failed' | 'merged' | 'unknown';
+  message?: string | null;
+  created_at?: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
+
+export interface DataSyncResult {
+  success: boolean;
+  output: string;
+  error?: string;
+  job?: SyncJobStatus;
+}
+
+function parseJobStatus(output: string): SyncJobStatus | undefined {
+  const line = output.split('\n').reverse().find(l => l.startsWith('SYNC_JOB_STATUS '));
+  if (!line) return undefined;
+  try {
+    return JSON.parse(line.substring('SYNC_JOB_STATUS '.length));
+  } catch {
+    return undefined;
+  }
+}
+
 /**
  * 执行数据同步脚本
  * @param date 同步日期 (格式: YYYYMMDD)
  */
-export async function runDataSync(date?: string): Promise<{ success: boolean; output: string; error?: string }> {
+export async function runDataSync(date?: string): Promise<DataSyncResult> {
   return new Promise((resolve) => {
     // 如果没有指定日期，使用昨天的日期
     const syncDate = date || getYesterdayDate();
@@ -51,13 +83,14 @@ export async function runDataSync(date?: string): Promise<{ success: boolean; ou
     pythonProcess.on('close', (code) => {
       if (code === 0) {
         console.log(`[数据同步] 同步完成: ${syncDate}`);
-        resolve({ success: true, output });
+        resolve({ success: true, output, job: parseJobStatus(output) });
       } else {
         console.error(`[数据同步] 同步失败，退出码: ${code}`);
         resolve({ 
           success: false, 
           output, 
-          error: errorOutput || `进程退出码: ${code}` 
+          error: errorOutput || `进程退出码: ${code}`,
+          job: parseJobStatus(output)
         });
       }
     });
@@ -116,12 +149,55 @@ export function startDataSyncScheduler() {
   return task;
 }
 
+/**
+ * 启动实时快照任务
+ * 每分钟以 tail 模式运行同步脚本，更新 cache/latest_snapshot.json
+ */
+export function startLatestSnapshotScheduler() {
+  let running = false;
+
+  console.log('[定时任务] 实时快照任务已启动，每分钟更新一次');
+
+  const task = cron.schedule('* * * * *', () => {
+    // 上一次尚未结束时跳过，避免进程堆积
+    if (running) return;
+    running = true;
+
+    const pythonProcess = spawn('python3', [PYTHON_SCRIPT_PATH, '--tail']);
+    let errorOutput = '';
+
+    pythonProcess.stderr.on('data', (data) => {
+      const message = data.toString();
+      if (message.includes('ERROR')) {
+        errorOutput += message;
+      }
+    });
+
+    pythonProcess.on('close', (code) => {
+      running = false;
+      if (code !== 0) {
+        console.error(`[实时快照] 更新失败，退出码: ${code}`, errorOutput.trim());
+      }
+    });
+
+    pythonProcess.on('error', (error) => {
+      running = false;
+      console.error('[实时快照] 执行错误:', error);
+    });
+  }, {
+    scheduled: true,
+    timezone: 'Asia/Shanghai'
+  });
+
+  return task;
+}
+
 /**
  * 执行日期范围数据同步
  * @param startDate 开始日期 (格式: YYYYMMDD)
  * @param endDate 结束日期 (格式: YYYYMMDD)
  */
-export async function runDataSyncRange(startDate: string, endDate: string): Promise<{ success: boolean; output: string; error?: string }> {
+export async function runDataSyncRange(startDate: string, endDate: string): Promise<DataSyncResult> {
   return new Promise((resolve) => {
     console.log(`[数据同步] 开始同步数据范围: ${startDate} - ${endDate}`);
     
@@ -156,13 +232,14 @@ export async function runDataSyncRange(startDate: string, endDate: string): Prom
     pythonProcess.on('close', (code) => {
       if (code === 0) {
         console.log(`[数据同步] 同步完成: ${startDate} - ${endDate}`);
-        resolve({ success: true, output });
+        resolve({ success: true, output, job: parseJobStatus(output) });
       } else {
         console.error(`[数据同步] 同步失败，退出码: ${code}`);
         resolve({ 
           success: false, 
           output, 
-          error: errorOutput || `进程退出码: ${code}` 
+          error: errorOutput || `进程退出码: ${code}`,
+          job: parseJobStatus(output)
         });
       }
     });
@@ -3,7 +3,7 @@
  * 在应用启动时自动启动所有定时任务
  */
 
-import { startDataSyncScheduler } from './dataSyncScheduler';
+import { startDataSyncScheduler, startLatestSnapshotScheduler } from './dataSyncScheduler';
 
 let isInitialized = false;
 
@@ -21,6 +21,9 @@ export function initializeSchedulers() {
   try {
     // 启动数据同步定时任务
     startDataSyncScheduler();
+
+    // 启动实时快照定时任务
+    startLatestSnapshotScheduler();
     
     isInitialized = true;
     console.log('[定时任务] 所有定时任务初始化完成');
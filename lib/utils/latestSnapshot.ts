@@ -0,0 +1,53 @@
+/**
+ * 实时数据快照读取工具
+ * 快照由 `python3 scripts/fuan_data_sync.py --tail` 定时生成（原子替换写入），
+ * /api/latest 和 /api/pressure/latest 优先读取本地快照，避免每次轮询都查询 InfluxDB
+ */
+import fs from 'fs/promises';
+import path from 'path';
+
+export const SNAPSHOT_FILE = path.join(process.cwd(), 'cache', 'latest_snapshot.json');
+
+// 快照生成时间超过该时长视为失效（tail 任务每分钟运行一次）
+const SNAPSHOT_MAX_AGE = 3 * 60 * 1000;
+
+export interface SnapshotValue {
+  value?: number;
+  press?: number;
+  time: string;
+  stale_seconds: number;
+}
+
+export interface LatestSnapshot {
+  generated_at: string;
+  indicators: Record<string, SnapshotValue>;
+  pressure: Record<string, SnapshotValue>;
+}
+
+/**
+ * 读取实时快照
+ * @returns 快照内容（stale_seconds 已按当前时间重新计算），不存在或已失效时返回 null
+ */
+export async function readLatestSnapshot(): Promise<LatestSnapshot | null> {
+  try {
+    const content = await fs.readFile(SNAPSHOT_FILE, 'utf-8');
+    const snapshot: LatestSnapshot = JSON.parse(content);
+    const now = Date.now();
+
+    if (now - new Date(snapshot.generated_at).getTime() > SNAPSHOT_MAX_AGE) {
+      return null;
+    }
+
+    const refreshStaleness = (values: Record<string, SnapshotValue>) => {
+      for (const item of Object.values(values)) {
+        item.stale_seconds = Math.round((now - new Date(item.time).getTime()) / 100) / 10;
+      }
+    };
+    refreshStaleness(snapshot.indicators);
+    refreshStaleness(snapshot.pressure);
+
+    return snapshot;
+  } catch {
+    return null;
+  }
+}
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分钟数据冷热分层
+    热数据：最近 N 天（默认90天）的分钟数据保留在 MySQL
+    冷数据：更早的分钟数据归档为按月分区的 Parquet 文件（zstd），随后分批从 MySQL 删除
+    汇总：小时/日均值表（<表名>_hourly / <表名>_daily）覆盖全部时间，始终保留在 MySQL
+
+用法:
+    python3 data_retention.py archive --retention-days 90     # 归档并删除过期分钟数据
+    python3 data_retention.py rehydrate 20250101 20250131     # 将归档的分钟数据写回 MySQL
+    python3 data_retention.py rollup 20250101 20250131        # 重新计算小时/日汇总
+
+归档目录默认为 <项目>/archive，可用环境变量 FUAN_ARCHIVE_DIR 指定
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+from parquet_mirror import month_key, next_month, pq, pa, require_pyarrow, write_atomic
+from storage_migration import COMPACT_VERSION, ZERO_VALID_COLUMNS, read_schema_version
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ROOT = os.environ.get(
+    'FUAN_ARCHIVE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'archive')
+)
+DEFAULT_RETENTION_DAYS = 90
+DELETE_BATCH_ROWS = 5000        # 每批删除行数，避免长事务和大量 undo
+DELETE_PAUSE_SECONDS = 0.2      # 批次间隔，给看板查询和 purge 线程让出资源
+REHYDRATE_BATCH_ROWS = 5000
+
+# 汇总粒度：表名后缀 -> 时间截断格式
+ROLLUPS = {
+    'hourly': '%Y-%m-%d %H:00:00',
+    'daily': '%Y-%m-%d 00:00:00',
+}
+
+
+class RetentionManager:
+    def __init__(self, connection, table='fuan_data', archive_root=ARCHIVE_ROOT):
+        self.connection = connection
+        self.table = table
+        self.archive_dir = os.path.join(archive_root, table)
+        self.archive_table = f"{table}_archive"
+
+    def data_columns(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DESCRIBE {self.table}")
+            return [row[0] for row in cursor.fetchall() if row[0] != 'collect_time']
+
+    def archive_path(self, key):
+        return os.path.join(self.archive_dir, f"month={key}.parquet")
+
+    def create_tables(self, columns):
+        """创建归档记录表和小时/日汇总表，汇总表缺少的字段自动补齐"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.archive_table} (
+                month CHAR(7) PRIMARY KEY,
+                archived_from DATETIME NOT NULL COMMENT '该月已归档的起始时间',
+                archived_until DATETIME NOT NULL COMMENT '该月已归档的截止时间（不含）',
+                row_count INT NOT NULL,
+                file_path VARCHAR(512) NOT NULL,
+                archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='分钟数据归档记录'
+            """)
+
+            for suffix in ROLLUPS:
+                rollup_table = f"{self.table}_{suffix}"
+                value_columns = [f"{col} DOUBLE NULL" for col in columns]
+                cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {rollup_table} (
+                    collect_time DATETIME PRIMARY KEY,
+                    sample_count INT NOT NULL,
+                    {', '.join(value_columns)}
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='分钟数据{suffix}均值汇总'
+                """)
+                cursor.execute(f"DESCRIBE {rollup_table}")
+                existing = {row[0] for row in cursor.fetchall()}
+                for col in columns:
+                    if col not in existing:
+                        cursor.execute(f"ALTER TABLE {rollup_table} ADD COLUMN {col} DOUBLE NULL")
+
+    def refresh_rollups(self, start, end, columns=None):
+        """
+        重新计算 [start, end) 所在小时/日的均值
+        旧布局缺失值为 0：除泵频率/阀门开度外按 NULLIF(col, 0) 求均值，与分析接口过滤 0 值的口径一致
+        """
+        columns = columns or self.data_columns()
+        self.create_tables(columns)
+        zeros_are_missing = read_schema_version(self.connection, self.table)[0] < COMPACT_VERSION
+
+        def average(col):
+            if zeros_are_missing and col not in ZERO_VALID_COLUMNS:
+                return f"AVG(NULLIF({col}, 0))"
+            return f"AVG({col})"
+
+        column_list = ', '.join(columns)
+        averages = ', '.join(average(col) for col in columns)
+        updates = ', '.join(f"{col}=VALUES({col})" for col in columns)
+
+        for suffix, time_format in ROLLUPS.items():
+            bucket = f"DATE_FORMAT(collect_time, '{time_format}')"
+            # 对齐到完整的小时/天，避免部分时段覆盖已有的完整汇总
+            aligned_start = start.replace(minute=0, second=0, microsecond=0)
+            if suffix == 'daily':
+                aligned_start = aligned_start.replace(hour=0)
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"""
+                INSERT INTO {self.table}_{suffix} (collect_time, sample_count, {column_list})
+                SELECT {bucket}, COUNT(*), {averages}
+                FROM {self.table}
+                WHERE collect_time >= %s AND collect_time < %s
+                GROUP BY {bucket}
+                ON DUPLICATE KEY UPDATE sample_count=VALUES(sample_count), {updates}
+                """, (aligned_start, end))
+                logger.info(f"{self.table}_{suffix} 汇总更新 {cursor.rowcount} 行")
+        return True
+
+    def refresh_rollups_range(self, start_date, end_date):
+        start = datetime.strptime(start_date, '%Y%m%d')
+        end = datetime.strptime(end_date, '%Y%m%d') + timedelta(days=1)
+        return self.refresh_rollups(start, end)
+
+    def query_rows(self, start, end):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT * FROM {self.table} WHERE collect_time >= %s AND collect_time < %s ORDER BY collect_time",
+                (start, end)
+            )
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+        df = pd.DataFrame(rows, columns=columns)
+        df['collect_time'] = pd.to_datetime(df['collect_time'])
+        for col in columns:
+            if col != 'collect_time':
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+        return df
+
+    def write_archive(self, key, fresh):
+        """写入月归档文件；该月已有归档时合并（同一时间以新数据为准）"""
+        path = self.archive_path(key)
+        if os.path.exists(path):
+            existing = pq.read_table(path).to_pandas()
+            merged = pd.concat([existing, fresh], ignore_index=True)
+            merged = merged.drop_duplicates('collect_time', keep='last')
+        else:
+            merged = fresh
+        merged = merged.sort_values('collect_time').reset_index(drop=True)
+
+        table = pa.Table.from_pandas(merged, preserve_index=False)
+        write_atomic(path, lambda tmp_path: pq.write_table(
+            table, tmp_path, row_group_size=24 * 60, compression='zstd', compression_level=9
+        ))
+
+        # 重新读取校验，确认本批数据已完整落盘后才允许删除
+        written = pq.read_table(path, columns=['collect_time']).to_pandas()['collect_time']
+        missing = ~fresh['collect_time'].isin(written)
+        if missing.any():
+            raise RuntimeError(f"归档文件 {path} 校验失败，缺少 {int(missing.sum())} 行")
+        return path, merged
+
+    def delete_batched(self, start, end):
+        """分批删除 [start, end) 的分钟数据，每批一个短事务"""
+        deleted = 0
+        while True:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE collect_time >= %s AND collect_time < %s "
+                    f"ORDER BY collect_time LIMIT {DELETE_BATCH_ROWS}",
+                    (start, end)
+                )
+                batch = cursor.rowcount
+            deleted += batch
+            if batch < DELETE_BATCH_ROWS:
+                return deleted
+            time.sleep(DELETE_PAUSE_SECONDS)
+
+    def archive(self, retention_days=DEFAULT_RETENTION_DAYS, now=None):
+        """归档并删除早于 retention_days 天（按整天）的分钟数据，逐月处理"""
+        require_pyarrow()
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=retention_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(collect_time) FROM {self.table} WHERE collect_time < %s", (cutoff,))
+            first_time = cursor.fetchone()[0]
+        if first_time is None:
+            logger.info(f"没有早于 {cutoff:%Y-%m-%d} 的分钟数据，无需归档")
+            return True
+
+        columns = self.data_columns()
+        self.create_tables(columns)
+
+        current = first_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        while current < cutoff:
+            key = month_key(current)
+            chunk_end = min(next_month(current), cutoff)
+
+            fresh = self.query_rows(current, chunk_end)
+            if fresh.empty:
+                current = chunk_end
+                continue
+
+            # 先保证汇总覆盖该时段，再归档和删除
+            self.refresh_rollups(current, chunk_end, columns)
+            path, merged = self.write_archive(key, fresh)
+
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"""
+                INSERT INTO {self.archive_table} (month, archived_from, archived_until, row_count, file_path)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    archived_from=LEAST(archived_from, VALUES(archived_from)),
+                    archived_until=GREATEST(archived_until, VALUES(archived_until)),
+                    row_count=VALUES(row_count), file_path=VALUES(file_path)
+                """, (key, merged['collect_time'].min().to_pydatetime(), chunk_end, len(merged), path))
+
+            deleted = self.delete_batched(current, chunk_end)
+            logger.info(f"{key}: 归档 {len(fresh)} 行 -> {path}，MySQL 删除 {deleted} 行")
+            current = chunk_end
+
+        return True
+
+    def rehydrate(self, start, end):
+        """
+        将归档中 [start, end) 的分钟数据写回 MySQL（INSERT IGNORE，不覆盖已存在的行）
+        归档文件保留；之后再次归档时按时间去重合并
+        """
+        require_pyarrow()
+        table_columns = set(self.data_columns())
+        restored = 0
+        current = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        while current < end:
+            path = self.archive_path(month_key(current))
+            current = next_month(current)
+            if not os.path.exists(path):
+                continue
+
+            df = pq.read_table(path, filters=[
+                ('collect_time', '>=', pd.Timestamp(start)),
+                ('collect_time', '<', pd.Timestamp(end)),
+            ]).to_pandas()
+            if df.empty:
+                continue
+
+            # 归档时的字段可能少于当前表（之后新增的字段按默认值处理）
+            columns = [col for col in df.columns if col == 'collect_time' or col in table_columns]
+            df = df[columns]
+            values = df.astype(object).where(df.notna(), None)
+            values['collect_time'] = df['collect_time'].dt.to_pydatetime()
+            rows = [tuple(row) for row in values.values]
+
+            sql = f"""
+            INSERT IGNORE INTO {self.table} ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+            """
+            with self.connection.cursor() as cursor:
+                for i in range(0, len(rows), REHYDRATE_BATCH_ROWS):
+                    cursor.executemany(sql, rows[i:i + REHYDRATE_BATCH_ROWS])
+            restored += len(rows)
+            logger.info(f"从 {path} 恢复 {len(rows)} 行")
+
+        logger.info(f"共恢复 {restored} 行分钟数据")
+        return True
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y%m%d')
+
+
+def main():
+    """主函数"""
+    from fuan_data_sync import TARGET_DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='分钟数据冷热分层')
+    parser.add_argument('--table', default='fuan_data', help='数据表名')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    archive_parser = subparsers.add_parser('archive', help='归档并删除过期分钟数据')
+    archive_parser.add_argument('--retention-days', type=int, default=DEFAULT_RETENTION_DAYS,
+                                help='MySQL 中保留的分钟数据天数')
+
+    for name, help_text in [('rehydrate', '将归档的分钟数据写回 MySQL'), ('rollup', '重新计算小时/日汇总')]:
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
+        sub.add_argument('end_date', help='结束日期（含），格式：YYYYMMDD')
+
+    args = parser.parse_args()
+
+    connection = pymysql.connect(**TARGET_DB_CONFIG)
+    try:
+        manager = RetentionManager(connection, args.table)
+        if args.command == 'archive':
+            success = manager.archive(args.retention_days)
+        elif args.command == 'rehydrate':
+            success = manager.rehydrate(parse_date(args.start_date), parse_date(args.end_date) + timedelta(days=1))
+        else:
+            success = manager.refresh_rollups_range(args.start_date, args.end_date)
+    finally:
+        connection.close()
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回归分析数据集加载
+按数据集描述直接从 fuan_data 读取数据到 NumPy 数组并清洗，回归脚本只返回分析结果；
+Node 端不再逐行转换、清洗数据，也不再把整个数据集序列化后传给 Python
+
+数据集描述（与 /api/correlation/analyze 的查询参数对应）:
+    {
+      "x_fields": ["i_1034"],
+      "y_field": "i_1102",
+      "start_date": "2026-01-01",
+      "end_date": "2026-01-31",
+      "granularity": "minute",                       # minute | hour | day
+      "pump_type": null,                             # pump1 | aux_pump | null
+      "outlier": {"method": "iqr", "source": "exact", "multiplier": null},
+      "rollup": false                                # 小时/日粒度读取汇总表（可选）
+    }
+
+查询条件与原接口一致：各字段 > 0；按泵筛选时要求该泵频率 > 0、其余泵频率 = 0；
+分钟粒度优先读取 Parquet 镜像（parquet_mirror.py 维护，只解码需要的列），镜像不可用或未覆盖该范围时查询 MySQL；
+小时/日粒度默认由分钟数据按行筛选后求桶均值；"rollup": true 且不按泵筛选时改为读取汇总表（data_retention.py 维护），
+汇总表按字段分别排除缺失值求均值，同一小时内各字段参与平均的分钟可能不同，结果与按行筛选不完全一致，
+用于分钟数据已归档的远期范围或只需要趋势的场景
+
+用法:
+    echo '{"x_fields": ["i_1034"], "y_field": "i_1102", "start_date": "2026-01-01", "end_date": "2026-01-31"}' | python3 dataset_loader.py
+"""
+
+import json
+import logging
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('minute', 'hour', 'day')
+OUTLIER_METHODS = ('iqr', 'none')
+OUTLIER_SOURCES = ('exact', 'sketch')
+MIN_SAMPLES = 10
+
+# 泵频率字段（与 analyze 接口的 pumpFrequencyMap 一致）
+PUMP_FREQUENCY_FIELDS = {
+    'pump1': 'i_1049',      # 泵1运行频率
+    'aux_pump': 'i_1051',   # 辅泵运行频率
+}
+
+ROLLUP_TABLES = {'hour': 'fuan_data_hourly', 'day': 'fuan_data_daily'}
+BUCKET_FORMATS = {'hour': '%%Y-%%m-%%d %%H:00:00', 'day': '%%Y-%%m-%%d 00:00:00'}
+
+FIELD_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# 常驻 worker 中复用的数据库连接（worker 单线程逐个处理任务，一个连接即可）
+_connection = None
+
+
+class DatasetError(ValueError):
+    """数据集无法用于分析（无数据或清洗后样本过少），status / details 供接口返回"""
+
+    def __init__(self, message, status=400, details=None):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class Dataset:
+    """清洗后的数据集：X (n, k)、y (n,)、collect_time (n,) 及清洗统计"""
+
+    def __init__(self, spec, times, X, y, raw_count, bounds):
+        self.x_fields = spec['x_fields']
+        self.y_field = spec['y_field']
+        self.times = times
+        self.X = X
+        self.y = y
+        self.raw_count = raw_count
+        self.bounds = bounds
+
+    def summary(self):
+        return {
+            'x_fields': self.x_fields,
+            'y_field': self.y_field,
+            'raw_count': self.raw_count,
+            'sample_count': len(self.y),
+            'outlier_bounds': self.bounds,
+        }
+
+
+def get_connection():
+    """返回复用的数据库连接，断开时自动重连"""
+    global _connection
+    from fuan_data_sync import TARGET_DB_CONFIG
+
+    if _connection is None:
+        _connection = pymysql.connect(**TARGET_DB_CONFIG)
+    else:
+        _connection.ping(reconnect=True)
+    return _connection
+
+
+def normalize_spec(spec):
+    """校验数据集描述并补全默认值；字段名会拼入 SQL，只允许标识符"""
+    x_fields = spec.get('x_fields')
+    if isinstance(x_fields, str):
+        x_fields = [f.strip() for f in x_fields.split(',') if f.strip()]
+    y_field = spec.get('y_field')
+    if not x_fields or not y_field or not spec.get('start_date') or not spec.get('end_date'):
+        raise DatasetError("数据集缺少必要参数（x_fields、y_field、start_date、end_date）")
+    for field in [*x_fields, y_field]:
+        if not FIELD_PATTERN.match(field):
+            raise DatasetError(f"无效的字段名: {field}")
+
+    granularity = spec.get('granularity') or 'minute'
+    if granularity not in GRANULARITIES:
+        raise DatasetError(f"不支持的时间粒度: {granularity}")
+    pump_type = spec.get('pump_type') or None
+    if pump_type is not None and pump_type not in PUMP_FREQUENCY_FIELDS:
+        pump_type = None
+
+    outlier = {'method': 'iqr', 'source': 'exact', 'multiplier': None, **(spec.get('outlier') or {})}
+    if outlier['method'] not in OUTLIER_METHODS:
+        raise DatasetError(f"不支持的异常值规则: {outlier['method']}")
+    if outlier['source'] not in OUTLIER_SOURCES:
+        outlier['source'] = 'exact'
+
+    return {
+        'x_fields': list(x_fields),
+        'y_field': y_field,
+        'start_date': spec['start_date'],
+        'end_date': spec['end_date'],
+        'granularity': granularity,
+        'pump_type': pump_type,
+        'outlier': outlier,
+        'rollup': bool(spec.get('rollup')),
+        'table': spec.get('table', 'fuan_data'),
+    }
+
+
+def row_conditions(fields, pump_type):
+    """
+    行筛选条件 [(字段, '>' | '=')]，与 0 比较：
+    各字段 > 0；按泵筛选时当前泵频率 > 0、其余泵频率 = 0（已在分析字段中的泵频率不额外限制）
+    """
+    conditions = [(f, '>') for f in fields]
+    if pump_type:
+        current = PUMP_FREQUENCY_FIELDS[pump_type]
+        if current not in fields:
+            conditions.append((current, '>'))
+        for other_type, field in PUMP_FREQUENCY_FIELDS.items():
+            if other_type != pump_type and field not in fields:
+                conditions.append((field, '='))
+    return conditions
+
+
+def where_conditions(fields, pump_type):
+    return ' AND '.join(f"{field} {op} 0" for field, op in row_conditions(fields, pump_type))
+
+
+def build_query(spec, fields):
+    """分钟数据查询（小时/日粒度在 SQL 中按桶求均值）"""
+    where = where_conditions(fields, spec['pump_type'])
+    table = spec['table']
+    granularity = spec['granularity']
+    if granularity == 'minute':
+        return f"""
+            SELECT collect_time, {', '.join(fields)}
+            FROM {table}
+            WHERE {where} AND collect_time >= %s AND collect_time <= %s
+            ORDER BY collect_time
+        """
+    bucket = f"DATE_FORMAT(collect_time, '{BUCKET_FORMATS[granularity]}')"
+    return f"""
+        SELECT {bucket} AS bucket, {', '.join(f'AVG({f})' for f in fields)}
+        FROM {table}
+        WHERE {where} AND collect_time >= %s AND collect_time <= %s
+        GROUP BY bucket
+        ORDER BY bucket
+    """
+
+
+def build_rollup_query(spec, fields):
+    """汇总表查询（汇总表按字段分别排除缺失值求均值，起点取所在小时/日）"""
+    where = where_conditions(fields, None)
+    start = "DATE_FORMAT(%s, '%%Y-%%m-%%d %%H:00:00')" if spec['granularity'] == 'hour' else 'DATE(%s)'
+    return f"""
+        SELECT collect_time, {', '.join(fields)}
+        FROM {ROLLUP_TABLES[spec['granularity']]}
+        WHERE {where} AND collect_time >= {start} AND collect_time <= %s
+        ORDER BY collect_time
+    """
+
+
+def fetch_matrix(connection, query, params, n_fields):
+    """执行查询，返回 (时间数组, 数值矩阵)；数值直接转换为 float64，NULL 为 NaN"""
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    if not rows:
+        return np.empty(0, dtype='datetime64[s]'), np.empty((0, n_fields))
+    times = np.array([row[0] for row in rows], dtype='datetime64[s]')
+    values = np.array([row[1:] for row in rows], dtype=np.float64)
+    return times, values
+
+
+def load_mirror_rows(spec, fields):
+    """
+    分钟粒度从 Parquet 镜像读取，筛选条件与 build_query 相同（闭区间 end_date 与 SQL 的 <= 一致）
+    条件先作为取值范围裁剪月份和 row group，读取后再按原条件逐行过滤；镜像不可用时返回 None
+    """
+    from parquet_mirror import load_columns
+
+    conditions = row_conditions(fields, spec['pump_type'])
+    value_ranges = {field: (0, None) if op == '>' else (0, 0) for field, op in conditions}
+    start = pd.Timestamp(spec['start_date'])
+    end = pd.Timestamp(spec['end_date']) + pd.Timedelta(seconds=1)
+    df = load_columns(list(value_ranges), start, end, spec['table'], value_ranges)
+    if df is None:
+        return None
+
+    keep = np.ones(len(df), dtype=bool)
+    for field, op in conditions:
+        column = df[field].to_numpy(dtype=np.float64)
+        keep &= column > 0 if op == '>' else column == 0
+    df = df[keep].sort_values('collect_time')
+    times = df['collect_time'].to_numpy(dtype='datetime64[s]')
+    return times, df[fields].to_numpy(dtype=np.float64)
+
+
+def load_rows(connection, spec):
+    fields = [*spec['x_fields'], spec['y_field']]
+    params = (spec['start_date'], spec['end_date'])
+    if spec['granularity'] == 'minute':
+        try:
+            mirrored = load_mirror_rows(spec, fields)
+            if mirrored is not None:
+                logger.info(f"使用 Parquet 镜像: {len(mirrored[1])} 条")
+                return mirrored
+        except Exception as e:
+            logger.warning(f"读取 Parquet 镜像失败，查询 MySQL: {e}")
+    if (spec['rollup'] and spec['granularity'] in ROLLUP_TABLES
+            and not spec['pump_type'] and spec['table'] == 'fuan_data'):
+        try:
+            times, values = fetch_matrix(connection, build_rollup_query(spec, fields), params, len(fields))
+            if len(values):
+                logger.info(f"使用汇总表 {ROLLUP_TABLES[spec['granularity']]}: {len(values)} 条")
+                return times, values
+        except pymysql.MySQLError as e:
+            logger.warning(f"读取汇总表失败，使用分钟数据聚合: {e}")
+    return fetch_matrix(connection, build_query(spec, fields), params, len(fields))
+
+
+def iqr_bounds(values, multiplier):
+    """
+    各列的 IQR 边界，一次排序全部字段
+    分位数取法与 removeOutliers 一致：排序后取 floor(n * 0.25) 和 floor(n * 0.75) 位置
+    """
+    n = len(values)
+    ordered = np.sort(values, axis=0)
+    q1 = ordered[int(n * 0.25)]
+    q3 = ordered[int(n * 0.75)]
+    iqr = q3 - q1
+    return q1 - multiplier * iqr, q3 + multiplier * iqr
+
+
+def sketch_bounds(connection, spec, fields):
+    """从按天分位数草图读取 IQR 边界，草图缺失的字段不返回"""
+    from quantile_sketch import SketchStore, parse_day
+
+    summary = SketchStore(connection, spec['table']).summarize(
+        fields,
+        parse_day(spec['start_date']),
+        parse_day(spec['end_date']),
+        iqr_multiplier=spec['outlier']['multiplier'],
+    )
+    return {
+        field: (summary[field]['iqr']['lower'], summary[field]['iqr']['upper'])
+        for field in fields
+        if summary.get(field, {}).get('iqr')
+    }
+
+
+def outlier_mask(values, fields, lower, upper):
+    """所有字段一次性判断：每行全部字段都在 [下限, 上限] 内才保留（NaN 视为异常）"""
+    with np.errstate(invalid='ignore'):
+        inside = (values >= lower) & (values <= upper)
+    removed = (~inside).sum(axis=0)
+    for field, count, low, high in zip(fields, removed, lower, upper):
+        if count:
+            logger.info(f"字段 {field}: 移除 {int(count)} 个异常值 (范围: {low:.2f} - {high:.2f})")
+    return inside.all(axis=1)
+
+
+def clean(connection, spec, values):
+    """按异常值规则计算保留行掩码，返回 (掩码, 各字段边界)"""
+    fields = [*spec['x_fields'], spec['y_field']]
+    finite = np.isfinite(values).all(axis=1)
+    outlier = spec['outlier']
+    if outlier['method'] == 'none' or not finite.any():
+        return finite, {}
+
+    multiplier = outlier['multiplier'] or (3.0 if len(values) < 50 else 1.5)
+    lower, upper = iqr_bounds(values[finite], multiplier)
+
+    # 草图按字段整体分布统计，只适用于分钟粒度且未按泵运行状态筛选的分析
+    if outlier['source'] == 'sketch' and spec['granularity'] == 'minute' and not spec['pump_type']:
+        try:
+            for field, (low, high) in sketch_bounds(connection, spec, fields).items():
+                i = fields.index(field)
+                lower[i], upper[i] = low, high
+        except Exception as e:
+            logger.warning(f"读取分位数草图失败，回退到精确计算: {e}")
+
+    mask = finite & outlier_mask(values, fields, lower, upper)
+    bounds = {
+        field: {'lower': float(low), 'upper': float(high)}
+        for field, low, high in zip(fields, lower, upper)
+    }
+    return mask, bounds
+
+
+def load_dataset(spec, connection=None):
+    """按数据集描述加载并清洗数据，样本不足时抛出 DatasetError"""
+    spec = normalize_spec(spec)
+    connection = connection or get_connection()
+
+    times, values = load_rows(connection, spec)
+    raw_count = len(values)
+    if raw_count == 0:
+        raise DatasetError('没有符合条件的数据', status=404)
+
+    mask, bounds = clean(connection, spec, values)
+    values = values[mask]
+    logger.info(f"异常值过滤: {raw_count} -> {len(values)} (移除 {raw_count - len(values)} 条)")
+
+    if len(values) < MIN_SAMPLES:
+        raise DatasetError('有效数据点太少，无法进行分析', details={
+            '原始数据': raw_count,
+            '转换后': raw_count,
+            '清洗后': int(len(values)),
+            '最少需要': MIN_SAMPLES,
+        })
+
+    k = len(spec['x_fields'])
+    return Dataset(spec, times[mask], values[:, :k], values[:, k], raw_count, bounds)
+
+
+def main():
+    """stdin 读取数据集描述，输出清洗统计（用于检查数据集）"""
+    try:
+        spec = json.loads(sys.stdin.read())
+        dataset = load_dataset(spec)
+        print(json.dumps(dataset.summary(), ensure_ascii=False))
+    except Exception as e:
+        print(json.dumps({'error': str(e)}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,33 @@
 使用对数变换将指数关系转换为线性关系
 """
 
-import sys
-import json
 import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
+from regression_io import Records, run_cli
+from model_store import FittedModel, positive_offset
 
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）：对 y 取对数
+PREPROCESS = ('log_y',)
 
-def exponential_regression(X, y, test_size=0.2, random_state=42):
+
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在训练集上对 ln(y) 线性拟合（本脚本与 regression_engine.py 共用），y_train 为已取对数的目标值
+    返回 (估计器, 结果中的系数等字段)；估计器预测的是 ln(y)
+    """
+    model = LinearRegression()
+    model.fit(X_train, y_train)
+    b = model.coef_
+    coefficients = {
+        'a': float(np.exp(model.intercept_)),  # intercept = ln(a), coef = b
+        'b': b.tolist() if len(b) > 1 else float(b[0])
+    }
+    return model, {'coefficients': coefficients}
+
+
+def exponential_regression(X, y, test_size=0.2, random_state=42, return_model=False):
     """
     执行指数回归分析
     模型形式: y = a * exp(b*x) 或 y = a * exp(b1*x1 + b2*x2 + ...)
@@ -24,6 +42,7 @@ def exponential_regression(X, y, test_size=0.2, random_state=42):
         y: 因变量数据 (n_samples,)
         test_size: 测试集比例
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
     
     返回:
         dict: 包含系数、R²、预测值等结果
@@ -31,16 +50,10 @@ def exponential_regression(X, y, test_size=0.2, random_state=42):
     # 转换为numpy数组
     X = np.array(X)
     y = np.array(y)
-    
-    # 确保y中所有值都是正数（指数回归要求）
-    if np.any(y <= 0):
-        # 将所有值平移到正数区域
-        y_min = np.min(y)
-        if y_min <= 0:
-            y = y - y_min + 1
-    
-    # 对y取对数
-    log_y = np.log(y)
+    # 确保y中所有值都是正数（指数回归要求）：最小值 <= 0 时整体平移到最小值为 1 后取对数
+    # 预测值还原时减去平移量，预测值和指标都在原始尺度上（与保存的模型一致）
+    y_offset = positive_offset(y)
+    log_y = np.log(y + y_offset)
     
     # 分割训练集和测试集（随机打乱）
     X_train, X_test, log_y_train, log_y_test, y_train, y_test = train_test_split(
@@ -48,8 +61,7 @@ def exponential_regression(X, y, test_size=0.2, random_state=42):
     )
     
     # 训练线性回归模型（对log(y)）
-    model = LinearRegression()
-    model.fit(X_train, log_y_train)
+    model, details = fit_model(X_train, log_y_train, random_state=random_state)
     
     # 预测log(y)
     log_y_pred_train = model.predict(X_train)
@@ -57,9 +69,9 @@ def exponential_regression(X, y, test_size=0.2, random_state=42):
     log_y_pred_all = model.predict(X)
     
     # 转换回原始尺度
-    y_pred_train = np.exp(log_y_pred_train)
-    y_pred_test = np.exp(log_y_pred_test)
-    y_pred_all = np.exp(log_y_pred_all)
+    y_pred_train = np.exp(log_y_pred_train) - y_offset
+    y_pred_test = np.exp(log_y_pred_test) - y_offset
+    y_pred_all = np.exp(log_y_pred_all) - y_offset
     
     # 计算R²和MSE（在原始尺度上）
     r2_train = r2_score(y_train, y_pred_train)
@@ -67,68 +79,46 @@ def exponential_regression(X, y, test_size=0.2, random_state=42):
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 获取系数
-    # intercept = ln(a), coef = b
-    a = np.exp(model.intercept_)
-    b = model.coef_
-    
-    coefficients = {
-        'a': float(a),
-        'b': b.tolist() if len(b) > 1 else float(b[0])
-    }
-    
     # 计算散点图数据（使用测试集）
-    scatter_data = [
-        {'actual': float(y_test[i]), 'predicted': float(y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    scatter_data = Records(actual=y_test, predicted=y_pred_test)
     
     # 计算残差数据（使用测试集）
-    residuals_data = [
-        {'predicted': float(y_pred_test[i]), 'residual': float(y_test[i] - y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    residuals_data = Records(predicted=y_pred_test, residual=y_test - y_pred_test)
     
-    return {
-        'coefficients': coefficients,
+    result = {
+        **details,
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': y_pred_all.tolist(),
+        'predictions': y_pred_all,
         'scatter_data': scatter_data,
         'residuals_data': residuals_data
     }
+    if return_model:
+        result['model'] = FittedModel('exponential', model, log_y=True, y_offset=y_offset)
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    test_size = input_data.get('test_size', 0.2)
+    random_state = input_data.get('random_state', 42)
+    save_model = input_data.get('save_model', False)
+
+    # 执行指数回归
+    return exponential_regression(X, y, test_size, random_state, return_model=save_model)
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        test_size = input_data.get('test_size', 0.2)
-        random_state = input_data.get('random_state', 42)
-        
-        # 执行指数回归
-        result = exponential_regression(X, y, test_size, random_state)
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+福安短期预测脚本
+基于 fuan_data 历史数据，预测未来24小时（15分钟粒度）的出水流量和出水压力，
+结果写入 fuan_forecast 表，调度看板直接读取预计算结果
+
+模型:
+    1. 季节项：按 工作日/周末 × 96个15分钟时段 计算指数衰减加权均值
+    2. 回归项：对去季节残差做多步直接回归（所有预测步长一次性最小二乘求解）
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+from fuan_data_sync import TARGET_DB_CONFIG
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 预测目标：字段 -> 有效值范围（与调度看板的过滤条件一致）
+FORECAST_TARGETS = {
+    'i_1034': (0, 10000),   # 岩湖出水流量
+    'i_1102': (0, 10000),   # 城东瞬时流量
+    'i_1030': (0, 10),      # 岩湖出水压力
+}
+
+FORECAST_TABLE = 'fuan_forecast'
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+HORIZON_SLOTS = SLOTS_PER_DAY      # 预测未来24小时
+HISTORY_DAYS = 28                  # 拟合所用历史天数
+HALF_LIFE_DAYS = 7                 # 季节项权重半衰期
+RESIDUAL_LAGS = 4                  # 残差回归使用的滞后阶数（最近1小时）
+RIDGE_LAMBDA = 1e-3                # 回归项的岭正则系数
+RETENTION_DAYS = 7                 # 预测结果保留天数（按发布时间）
+STALE_AFTER_HOURS = 24             # 最后观测早于截止时间超过一个同步周期（每日同步）时不发布预测
+MODEL_NAME = 'seasonal_ar_v1'
+
+
+def load_history(connection, end_time, days=HISTORY_DAYS):
+    """读取历史分钟数据并聚合为15分钟均值（无效值置为NaN）"""
+    start_time = end_time - timedelta(days=days)
+    fields = list(FORECAST_TARGETS.keys())
+    query = f"""
+    SELECT collect_time, {', '.join(fields)}
+    FROM fuan_data
+    WHERE collect_time >= %s AND collect_time < %s
+    ORDER BY collect_time
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, (start_time, end_time))
+        rows = cursor.fetchall()
+
+    if not rows:
+        return pd.DataFrame(columns=fields)
+
+    df = pd.DataFrame(rows, columns=['collect_time'] + fields)
+    df['collect_time'] = pd.to_datetime(df['collect_time'])
+    df = df.set_index('collect_time')
+    values = df[fields].astype(float)
+
+    # 超出有效范围（含0值填充）视为缺失
+    for field, (low, high) in FORECAST_TARGETS.items():
+        values[field] = values[field].where((values[field] > low) & (values[field] < high))
+
+    return values.resample(f'{SLOT_MINUTES}min').mean()
+
+
+def slot_features(index):
+    """时间索引 -> (日类型, 时段序号)，日类型 0=工作日 1=周末"""
+    index = pd.DatetimeIndex(index)
+    day_type = (index.dayofweek >= 5).astype(np.int64)
+    slot = (index.hour * 60 + index.minute) // SLOT_MINUTES
+    return np.asarray(day_type), np.asarray(slot, dtype=np.int64)
+
+
+def fit_seasonal_profile(series):
+    """
+    拟合季节项：profile[日类型, 时段]
+    使用 np.bincount 一次性完成加权分组求均值，近期数据权重更高
+    """
+    valid = series.notna().to_numpy()
+    values = series.to_numpy()[valid]
+    index = series.index[valid]
+    if len(values) == 0:
+        return None
+
+    day_type, slot = slot_features(index)
+    age_days = (index[-1] - index).total_seconds().to_numpy() / 86400.0
+    weights = np.power(0.5, age_days / HALF_LIFE_DAYS)
+
+    bins = day_type * SLOTS_PER_DAY + slot
+    weight_sum = np.bincount(bins, weights=weights, minlength=2 * SLOTS_PER_DAY)
+    value_sum = np.bincount(bins, weights=weights * values, minlength=2 * SLOTS_PER_DAY)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profile = (value_sum / weight_sum).reshape(2, SLOTS_PER_DAY)
+
+    # 某类日期缺失时段：先用另一类日期同时段补，再用整体均值补
+    overall = np.nanmean(values)
+    profile = np.where(np.isnan(profile), profile[::-1], profile)
+    profile = np.where(np.isnan(profile), overall, profile)
+    return profile
+
+
+def fit_residual_model(residuals):
+    """
+    多步直接回归：r[t+h] = x[t] · B[:, h]，x[t] = (r[t], r[t-1], ..., r[t-p+1])
+    所有步长共享同一设计矩阵，一次岭回归求解全部 HORIZON_SLOTS 列
+    返回 (B, sigma)，sigma 为每个步长的残差标准差
+    """
+    r = residuals
+    n = len(r)
+    usable = n - HORIZON_SLOTS - RESIDUAL_LAGS + 1
+    if usable <= RESIDUAL_LAGS * 4:
+        return None, None
+
+    # 滑动窗口构造滞后特征和多步目标（视图，无数据复制）
+    windows = np.lib.stride_tricks.sliding_window_view(r, RESIDUAL_LAGS + HORIZON_SLOTS)
+    X = windows[:, :RESIDUAL_LAGS][:, ::-1]
+    Y = windows[:, RESIDUAL_LAGS:]
+
+    complete = ~(np.isnan(X).any(axis=1) | np.isnan(Y).any(axis=1))
+    X = X[complete]
+    Y = Y[complete]
+    if len(X) <= RESIDUAL_LAGS * 4:
+        return None, None
+
+    gram = X.T @ X + RIDGE_LAMBDA * len(X) * np.eye(RESIDUAL_LAGS)
+    B = np.linalg.solve(gram, X.T @ Y)
+    sigma = np.sqrt(np.mean((Y - X @ B) ** 2, axis=0))
+    return B, sigma
+
+
+def forecast_series(series, horizon=HORIZON_SLOTS):
+    """对单个15分钟序列生成未来 horizon 个时段的预测"""
+    observed = series.dropna()
+    if len(observed) < SLOTS_PER_DAY:
+        return None
+
+    profile = fit_seasonal_profile(series)
+    if profile is None:
+        return None
+
+    # 预测起点：最后一个有观测值的时段；之后的空时段不参与
+    series = series.loc[:observed.index[-1]]
+    day_type, slot = slot_features(series.index)
+    residuals = series.to_numpy() - profile[day_type, slot]
+
+    B, sigma = fit_residual_model(residuals)
+
+    origin = series.index[-1]
+    target_index = pd.date_range(origin + timedelta(minutes=SLOT_MINUTES), periods=horizon, freq=f'{SLOT_MINUTES}min')
+    target_day_type, target_slot = slot_features(target_index)
+    seasonal = profile[target_day_type, target_slot]
+
+    if B is not None:
+        last = residuals[-RESIDUAL_LAGS:][::-1]
+        last = np.where(np.isnan(last), 0.0, last)
+        predicted = seasonal + last @ B[:, :horizon]
+        spread = 1.96 * sigma[:horizon]
+    else:
+        # 数据不足以拟合回归项，退化为纯季节模型
+        predicted = seasonal
+        spread = np.full(horizon, 1.96 * np.nanstd(residuals))
+
+    return pd.DataFrame({
+        'target_time': target_index,
+        'value': predicted,
+        'lower_bound': predicted - spread,
+        'upper_bound': predicted + spread,
+    }), origin
+
+
+class FlowForecaster:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_forecast_table(self):
+        """创建预测结果表"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {FORECAST_TABLE} (
+                metric VARCHAR(32) NOT NULL,
+                issue_time DATETIME NOT NULL COMMENT '预测起点（最后观测时段）',
+                target_time DATETIME NOT NULL,
+                value DOUBLE NULL,
+                lower_bound DOUBLE NULL,
+                upper_bound DOUBLE NULL,
+                model VARCHAR(32) NOT NULL,
+                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (metric, issue_time, target_time),
+                KEY idx_target_time (target_time)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='福安短期预测结果'
+            """)
+
+    def save_forecast(self, metric, forecast_df, issue_time):
+        """写入单个指标的预测结果，并清理过期预测"""
+        rows = [
+            (metric, issue_time.to_pydatetime(), row.target_time.to_pydatetime(),
+             float(row.value), float(row.lower_bound), float(row.upper_bound), MODEL_NAME)
+            for row in forecast_df.itertuples(index=False)
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"""
+            INSERT INTO {FORECAST_TABLE}
+                (metric, issue_time, target_time, value, lower_bound, upper_bound, model)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                value=VALUES(value), lower_bound=VALUES(lower_bound),
+                upper_bound=VALUES(upper_bound), model=VALUES(model), created_at=CURRENT_TIMESTAMP
+            """, rows)
+            cursor.execute(
+                f"DELETE FROM {FORECAST_TABLE} WHERE metric = %s AND issue_time < %s",
+                (metric, issue_time.to_pydatetime() - timedelta(days=RETENTION_DAYS))
+            )
+
+    def run(self, end_time=None, stale_after_hours=STALE_AFTER_HOURS):
+        """
+        拟合所有预测目标并写入结果表
+        最后观测距 end_time 超过 stale_after_hours 时（同步停滞）跳过该指标，避免以几天前的数据作为“当前”预测起点
+        """
+        if end_time is None:
+            end_time = datetime.now().replace(second=0, microsecond=0)
+
+        self.create_forecast_table()
+        history = load_history(self.connection, end_time)
+        if history.empty:
+            logger.warning("历史数据为空，跳过预测")
+            return False
+
+        success = True
+        stale_after = timedelta(hours=stale_after_hours)
+        for metric in FORECAST_TARGETS:
+            last_observed = history[metric].last_valid_index()
+            if last_observed is not None and end_time - last_observed.to_pydatetime() > stale_after:
+                logger.warning(f"指标 {metric} 最后观测 {last_observed} 距 {end_time} 超过 {stale_after_hours} 小时，"
+                               f"同步可能已停滞，跳过预测")
+                success = False
+                continue
+
+            result = forecast_series(history[metric])
+            if result is None:
+                logger.warning(f"指标 {metric} 有效数据不足，跳过预测")
+                success = False
+                continue
+
+            forecast_df, issue_time = result
+            self.save_forecast(metric, forecast_df, issue_time)
+            logger.info(f"指标 {metric} 预测完成: 起点 {issue_time}, {len(forecast_df)} 个时段")
+
+        return success
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='福安短期流量/压力预测')
+    parser.add_argument('--end-time', help='历史数据截止时间，格式：YYYYMMDDHHMM，默认当前时间')
+    parser.add_argument('--stale-after-hours', type=float, default=STALE_AFTER_HOURS,
+                        help='最后观测早于截止时间超过该小时数时跳过预测')
+    args = parser.parse_args()
+
+    end_time = None
+    if args.end_time:
+        try:
+            end_time = datetime.strptime(args.end_time, '%Y%m%d%H%M')
+        except ValueError:
+            logger.error("时间格式错误，请使用 YYYYMMDDHHMM 格式")
+            sys.exit(1)
+
+    connection = pymysql.connect(**TARGET_DB_CONFIG)
+    try:
+        success = FlowForecaster(connection).run(end_time, args.stale_after_hours)
+    finally:
+        connection.close()
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
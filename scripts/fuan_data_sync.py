@@ -3,7 +3,7 @@
 """
 福安数据同步脚本
 将末端压力计和水厂指标数据同步到目标数据库的 fuan_data 表
-支持时间对齐和数据聚合
+支持时间对齐和数据聚合；多站点时每个站点一个进程并行同步到各自的表（见 sites.json）
 """
 
 import pymysql
@@ -11,9 +11,21 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import argparse
+import json
+import os
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from influxdb_client import InfluxDBClient
 from influxdb_client.client.query_api import QueryApi
+from storage_migration import (
+    COMPACT_VERSION, LAYOUTS, ZERO_VALID_COLUMNS, StorageLayoutMigrator, imprecise_columns, is_integer_type,
+    read_schema_version, value_limits, widen_columns, write_schema_version
+)
+from site_registry import get_site, load_sites
+from influx_downsample import DOWNSAMPLE_BUCKET, INFLUX_SOURCES, InfluxDownsampler
+from minute_alignment import ALIGN_MODES, DEFAULT_TOLERANCE_SECONDS, asof_minute_grid
 import logging
 import pytz
 
@@ -60,28 +72,63 @@ INFLUX_CONFIG = {
     'bucket': 'metricsData'
 }
 
-# 压力计编号
-PRESSURE_METERS = [
-    '862006079084137',
-    '862006079089300', 
-    '862006078962366',
-    '862006078966540',
-    '862006078965385',
-    '862006079083873',
-    '862006078961665'
-]
+# 压力计数据（实时快照使用 InfluxDB 中的压力计数据）
+PRESSURE_INFLUX_BUCKET = 'pressData'
 
-# 水厂指标
-YANHU_INDICATORS = list(range(1069, 1078)) + list(range(1029, 1052))  # 1069-1077, 1029-1051
-CHENGDONG_INDICATORS = list(range(1128, 1131)) + [1102, 1101, 1099, 1098, 1097, 1096]  # 1128-1130, 1102,1101,1099,1098,1097,1096
+# 实时快照（供 /api/latest 和 /api/pressure/latest 直接读取）
+SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'latest_snapshot.json')
+SNAPSHOT_LOOKBACK = '-4h'
 
-ALL_INDICATORS = YANHU_INDICATORS + CHENGDONG_INDICATORS
+# 站点配置见 sites.json（site_registry.py），默认站点为福安
+DEFAULT_SITE = 'fuan'
+FUAN_SITE = get_site(DEFAULT_SITE)
+
+# 福安压力计编号和水厂指标（实时快照使用）
+PRESSURE_METERS = FUAN_SITE['pressure_meters']
+YANHU_INDICATORS = FUAN_SITE['indicator_groups']['yanhu']          # 1069-1077, 1029-1051
+CHENGDONG_INDICATORS = FUAN_SITE['indicator_groups']['chengdong']  # 1128-1130, 1102,1101,1099,1098,1097,1096
+
+ALL_INDICATORS = FUAN_SITE['indicators']
+
+# 写入方式：upsert 逐行写入目标表；staging 先批量写入暂存表，校验后按天一条语句合并
+WRITE_MODES = ('upsert', 'staging')
+
+# 同步任务协调
+SYNC_JOB_TABLE = 'fuan_sync_jobs'
+SYNC_QUEUE_LOCK = 'fuan_sync_queue'     # 队列读写锁
+SYNC_WORKER_LOCK = 'fuan_sync_worker'   # 同步执行锁
 
 class DataSyncManager:
-    def __init__(self):
+    def __init__(self, run_post_tasks=True, site=None, write_mode='upsert', influx_source='auto',
+                 align_mode='floor', align_tolerance=DEFAULT_TOLERANCE_SECONDS):
         self.source_conn = None
         self.target_conn = None
         self.influx_client = None
+        self.site = site or FUAN_SITE
+        self.table = self.site['table']
+        self.pressure_meters = self.site['pressure_meters']
+        self.indicators = self.site['indicators']
+        self.influx_bucket = self.site['influx_bucket'] or INFLUX_CONFIG['bucket']
+        self.staging_table = f"{self.table}_staging"
+        self.write_mode = write_mode
+        # Influx 数据源：auto 优先读降采样桶（未覆盖的日期回退原始数据），raw/downsampled 强制指定
+        self.influx_source = influx_source
+        self.downsample_coverage = None
+        # 强制降采样模式下查询失败的日期，这些日期跳过写入，同步返回失败
+        self.failed_days = []
+        # 压力计对齐方式：floor 按分钟取整求均值；asof 按时钟偏差修正后 as-of 插值、时间加权（见 minute_alignment.py）
+        self.align_mode = align_mode
+        self.align_tolerance = align_tolerance
+        # 派生计算（预测、泵曲线）基于福安的字段含义，只对配置了 post_tasks 的站点执行
+        self.run_post_tasks = run_post_tasks and self.site['post_tasks']
+        # 存储布局版本（见 storage_migration.py），由 create_target_table 读取
+        self.storage_version = 1
+        self.column_types = {}
+
+    @property
+    def nullable_storage(self):
+        """紧凑布局下缺失值写为 NULL，旧布局写为 0"""
+        return self.storage_version >= COMPACT_VERSION
         
     def connect_mysql(self, config):
         """连接MySQL数据库"""
@@ -109,46 +156,50 @@ class DataSyncManager:
             logger.error(f"InfluxDB连接失败: {e}")
             return None
     
-    def create_target_table(self):
-        """创建目标表 fuan_data"""
+    def create_target_table(self, migrate_to=None):
+        """创建/更新站点目标表（默认 fuan_data）
+        
+        migrate_to: 指定时（'float' 或 'narrow'）将旧布局在线迁移为紧凑布局，见 storage_migration.py
+        """
         if not self.target_conn:
             logger.error("目标数据库连接不存在")
             return False
         
         try:
+            self.storage_version, self.column_types = read_schema_version(self.target_conn, self.table)
             with self.target_conn.cursor() as cursor:
                 # 1. 先检查表是否存在
-                cursor.execute("SHOW TABLES LIKE 'fuan_data'")
+                cursor.execute("SHOW TABLES LIKE %s", (self.table,))
                 table_exists = cursor.fetchone() is not None
                 
                 if not table_exists:
                     # 表不存在，创建新表
-                    logger.info("表不存在，创建新表 fuan_data")
+                    logger.info(f"表不存在，创建新表 {self.table}")
                     columns = ['collect_time DATETIME PRIMARY KEY']
                     
                     # 添加压力计字段
-                    for meter in PRESSURE_METERS:
+                    for meter in self.pressure_meters:
                         column_name = f"press_{meter[-4:]}"
                         columns.append(f"{column_name} DECIMAL(10,3) DEFAULT 0")
                     
                     # 添加指标字段
-                    for indicator in ALL_INDICATORS:
+                    for indicator in self.indicators:
                         column_name = f"i_{indicator}"
                         columns.append(f"{column_name} DECIMAL(10,3) DEFAULT 0")
                     
                     create_sql = f"""
-                    CREATE TABLE fuan_data (
+                    CREATE TABLE {self.table} (
                         {', '.join(columns)}
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='福安数据同步表'
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='{self.site['label']}数据同步表'
                     """
                     cursor.execute(create_sql)
-                    logger.info("表 fuan_data 创建成功")
+                    logger.info(f"表 {self.table} 创建成功")
                 else:
                     # 表已存在，检查并添加缺失的字段
                     logger.info("表已存在，检查并添加缺失字段")
                     
                     # 获取现有字段
-                    cursor.execute("DESCRIBE fuan_data")
+                    cursor.execute(f"DESCRIBE {self.table}")
                     existing_columns = {row[0] for row in cursor.fetchall()}
                     logger.info(f"现有字段数量: {len(existing_columns)}")
                     
@@ -156,13 +207,13 @@ class DataSyncManager:
                     fields_to_add = []
                     
                     # 检查压力计字段
-                    for meter in PRESSURE_METERS:
+                    for meter in self.pressure_meters:
                         column_name = f"press_{meter[-4:]}"
                         if column_name not in existing_columns:
                             fields_to_add.append(column_name)
                     
                     # 检查指标字段
-                    for indicator in ALL_INDICATORS:
+                    for indicator in self.indicators:
                         column_name = f"i_{indicator}"
                         if column_name not in existing_columns:
                             fields_to_add.append(column_name)
@@ -170,18 +221,33 @@ class DataSyncManager:
                     # 添加缺失的字段
                     if fields_to_add:
                         logger.info(f"需要添加 {len(fields_to_add)} 个字段: {fields_to_add}")
+                        column_def = "FLOAT NULL DEFAULT NULL" if self.nullable_storage else "DECIMAL(10,3) DEFAULT 0"
                         for field in fields_to_add:
-                            alter_sql = f"ALTER TABLE fuan_data ADD COLUMN {field} DECIMAL(10,3) DEFAULT 0"
+                            alter_sql = f"ALTER TABLE {self.table} ADD COLUMN {field} {column_def}"
                             try:
                                 cursor.execute(alter_sql)
                                 logger.info(f"成功添加字段: {field}")
+                                if self.nullable_storage:
+                                    self.column_types[field] = 'FLOAT'
                             except Exception as e:
                                 logger.error(f"添加字段 {field} 失败: {e}")
+                        if self.nullable_storage:
+                            write_schema_version(self.target_conn, self.table, self.storage_version,
+                                                 None, self.column_types)
                     else:
                         logger.info("所有字段已存在，无需添加")
                 
-                logger.info("目标表 fuan_data 创建/更新完成")
-                return True
+                logger.info(f"目标表 {self.table} 创建/更新完成")
+
+            if migrate_to and not self.nullable_storage:
+                logger.info(f"开始迁移存储布局: {migrate_to}")
+                migrator = StorageLayoutMigrator(self.target_conn, self.table,
+                                                 integer_columns=self.site['integer_columns'])
+                if not migrator.migrate(migrate_to):
+                    return False
+                self.storage_version, self.column_types = read_schema_version(self.target_conn, self.table)
+
+            return True
                 
         except Exception as e:
             logger.error(f"创建/更新目标表失败: {e}")
@@ -192,6 +258,9 @@ class DataSyncManager:
         if not self.source_conn:
             logger.error("源数据库连接不存在")
             return pd.DataFrame()
+
+        if not self.pressure_meters:
+            return pd.DataFrame()
         
         # 转换日期格式
         start_timestamp = int(datetime.strptime(start_date, '%Y%m%d').timestamp() * 1000)
@@ -208,7 +277,7 @@ class DataSyncManager:
         
         try:
             with self.source_conn.cursor() as cursor:
-                cursor.execute(query, (PRESSURE_METERS, start_timestamp, end_timestamp))
+                cursor.execute(query, (self.pressure_meters, start_timestamp, end_timestamp))
                 results = cursor.fetchall()
                 
                 data = []
@@ -246,11 +315,23 @@ class DataSyncManager:
         end_time = utc_end.strftime('%Y-%m-%dT%H:%M:%SZ')
         
         all_data = []
+
+        indicator_ids = self.indicators
+        if self.use_downsampled(utc_start, utc_end):
+            try:
+                all_data = self.query_downsampled_by_day(single_date, utc_start, utc_end)
+                indicator_ids = []
+            except Exception as e:
+                if self.influx_source != 'auto':
+                    # 强制降采样模式下不回退，由调用方跳过该天，避免把空数据写成一整天
+                    raise
+                # auto 模式下该天回退到原始数据逐指标查询，避免整天写入空数据
+                logger.warning(f"查询日期 {single_date} 降采样数据失败，回退到原始数据: {e}")
         
-        # 为每个指标单独查询
-        for indicator_id in ALL_INDICATORS:
+        # 为每个指标单独查询（原始数据，查询时聚合为分钟均值）
+        for indicator_id in indicator_ids:
             query = f'''
-            from(bucket: "{INFLUX_CONFIG['bucket']}")
+            from(bucket: "{self.influx_bucket}")
             |> range(start: {start_time}, stop: {end_time})
             |> filter(fn: (r) => 
                 r["_measurement"] == "plcData" and
@@ -298,24 +379,92 @@ class DataSyncManager:
         ).reset_index()
         
         # 重命名列
-        rename_dict = {str(ind): f"i_{ind}" for ind in ALL_INDICATORS if str(ind) in pivot_df.columns}
+        rename_dict = {str(ind): f"i_{ind}" for ind in self.indicators if str(ind) in pivot_df.columns}
         pivot_df.rename(columns=rename_dict, inplace=True)
         
         logger.info(f"日期 {single_date} 查询到InfluxDB数据: {len(pivot_df)} 条")
         return pivot_df
     
+    def resolve_downsample_coverage(self):
+        """读取降采样任务的覆盖范围（任务不健康或站点使用其他桶时为 None）"""
+        if self.influx_source == 'raw':
+            return None
+        if self.influx_bucket != INFLUX_CONFIG['bucket']:
+            logger.info(f"站点 {self.site['name']} 使用桶 {self.influx_bucket}，不经过降采样任务")
+            return None
+        try:
+            downsampler = InfluxDownsampler(
+                self.influx_client, INFLUX_CONFIG['org'], INFLUX_CONFIG['bucket'], self.indicators
+            )
+            coverage = downsampler.coverage()
+        except Exception as e:
+            logger.warning(f"检查降采样任务失败: {e}")
+            return None
+        if coverage:
+            logger.info(f"降采样数据覆盖范围: {coverage[0]} ~ {coverage[1]}")
+        return coverage
+
+    def use_downsampled(self, utc_start, utc_end):
+        if self.influx_source == 'downsampled':
+            return True
+        if self.influx_source == 'raw' or not self.downsample_coverage:
+            return False
+        covered_start, covered_end = self.downsample_coverage
+        return covered_start <= utc_start and utc_end <= covered_end
+
+    def query_downsampled_by_day(self, single_date, utc_start, utc_end):
+        """
+        从降采样桶读取一天所有指标的分钟均值（单次查询），查询失败时抛出异常由调用方决定是否回退
+        降采样点的时间戳为窗口结束时间，与原始查询 range(start, stop) |> aggregateWindow 的结果
+        对应的是 (start, stop]，因此查询范围整体后移1分钟
+        """
+        indicator_set = ', '.join(f'"{indicator}"' for indicator in self.indicators)
+        query = f'''
+        from(bucket: "{DOWNSAMPLE_BUCKET}")
+        |> range(start: {(utc_start + timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%SZ')},
+                 stop: {(utc_end + timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%SZ')})
+        |> filter(fn: (r) =>
+            r["_measurement"] == "plcData" and
+            r["_field"] == "value" and
+            contains(value: r["indicator_id"], set: [{indicator_set}]))
+        '''
+
+        all_data = []
+        logger.info(f"查询日期 {single_date} 降采样数据")
+        tables = self.influx_client.query_api().query(query, INFLUX_CONFIG['org'])
+        for table in tables:
+            for record in table.records:
+                if record.get_value() is None:
+                    continue
+                utc_time = record.get_time()
+                if utc_time.tzinfo is None:
+                    utc_time = UTC_TZ.localize(utc_time)
+                all_data.append({
+                    'collect_time': utc_time.astimezone(BEIJING_TZ).replace(tzinfo=None),
+                    'indicator_id': str(record.values.get('indicator_id')),
+                    'value': float(record.get_value())
+                })
+        return all_data
+
     def query_influx_data(self, start_date, end_date):
         """按天查询InfluxDB指标数据"""
         start_dt = datetime.strptime(start_date, '%Y%m%d')
         end_dt = datetime.strptime(end_date, '%Y%m%d')
         
         all_dfs = []
+        self.failed_days = []
         
         # 按天循环查询
         current_date = start_dt
         while current_date <= end_dt:
             date_str = current_date.strftime('%Y%m%d')
-            daily_df = self.query_influx_data_by_day(date_str)
+            try:
+                daily_df = self.query_influx_data_by_day(date_str)
+            except Exception as e:
+                logger.error(f"查询日期 {date_str} 降采样数据失败，跳过该天写入: {e}")
+                self.failed_days.append(date_str)
+                current_date += timedelta(days=1)
+                continue
             
             if not daily_df.empty:
                 all_dfs.append(daily_df)
@@ -342,7 +491,16 @@ class DataSyncManager:
         aligned_df = pd.DataFrame({'collect_time': time_range})
         
         # 处理压力计数据
-        if not pressure_df.empty:
+        if not pressure_df.empty and self.align_mode == 'asof':
+            pressure_wide = asof_minute_grid(
+                pressure_df, pd.DatetimeIndex(time_range),
+                tolerance_seconds=self.align_tolerance,
+                clock_offsets=self.site['pressure_clock_offsets'],
+            )
+            pressure_wide.columns = [f"press_{sn[-4:]}" for sn in pressure_wide.columns]
+            pressure_wide = pressure_wide.rename_axis('collect_time').reset_index()
+            aligned_df = aligned_df.merge(pressure_wide, on='collect_time', how='left')
+        elif not pressure_df.empty:
             # 按分钟分组并计算均值
             pressure_df['minute'] = pressure_df['collect_time'].dt.floor('min')
             pressure_grouped = pressure_df.groupby(['sn', 'minute'])['press'].mean().reset_index()
@@ -366,13 +524,43 @@ class DataSyncManager:
             influx_grouped = influx_df.groupby('minute')[indicator_columns].mean().reset_index()
             
             # 重命名列
-            rename_dict = {str(ind): f"i_{ind}" for ind in ALL_INDICATORS if str(ind) in influx_grouped.columns}
+            rename_dict = {str(ind): f"i_{ind}" for ind in self.indicators if str(ind) in influx_grouped.columns}
             influx_grouped.rename(columns=rename_dict, inplace=True)
             influx_grouped.rename(columns={'minute': 'collect_time'}, inplace=True)
             
             # 合并到对齐的时间序列
             aligned_df = aligned_df.merge(influx_grouped, on='collect_time', how='left')
         
+        numeric_columns = [col for col in aligned_df.columns if col != 'collect_time']
+
+        if self.nullable_storage:
+            # 紧凑布局：缺失值保持为空（写入 NULL），超出字段类型范围的值置为缺失
+            # 0 与迁移时的规则一致视为缺失（ZERO_VALID_COLUMNS 除外），读取异常的 0 不会覆盖原有的有效值
+            for col in numeric_columns:
+                if col not in ZERO_VALID_COLUMNS:
+                    aligned_df[col] = aligned_df[col].mask(aligned_df[col] == 0)
+            limits = value_limits(self.column_types)
+            for col in numeric_columns:
+                if col not in limits:
+                    continue
+                low, high = limits[col]
+                out_of_range_mask = (aligned_df[col] > high) | (aligned_df[col] < low)
+                out_of_range_count = out_of_range_mask.sum()
+                if out_of_range_count > 0:
+                    logger.warning(f"字段 {col} 有 {out_of_range_count} 个值超出 {self.column_types[col]} 范围，已置为空")
+                    aligned_df.loc[out_of_range_mask, col] = np.nan
+                if is_integer_type(self.column_types[col]):
+                    # 整数字段写入小数会被数据库四舍五入，拒绝写入而不是静默丢失精度
+                    values = aligned_df[col]
+                    fractional_mask = values.notna() & (values != values.round())
+                    fractional_count = fractional_mask.sum()
+                    if fractional_count > 0:
+                        logger.error(f"字段 {col} 为整数类型 {self.column_types[col]}，有 {fractional_count} 个小数值，"
+                                     f"已置为空（该字段不应声明为 integer_columns）")
+                        aligned_df.loc[fractional_mask, col] = np.nan
+            logger.info(f"数据对齐完成，生成 {len(aligned_df)} 条记录")
+            return aligned_df
+
         # 填充缺失值为0
         aligned_df = aligned_df.fillna(0)
         
@@ -382,7 +570,6 @@ class DataSyncManager:
         MIN_VALUE = -9999999.999
         
         # 对所有数值列进行范围检查（除了 collect_time）
-        numeric_columns = [col for col in aligned_df.columns if col != 'collect_time']
         for col in numeric_columns:
             # 将超出范围的值设置为0
             out_of_range_mask = (aligned_df[col] > MAX_VALUE) | (aligned_df[col] < MIN_VALUE)
@@ -394,11 +581,28 @@ class DataSyncManager:
         logger.info(f"数据对齐完成，生成 {len(aligned_df)} 条记录")
         return aligned_df
     
+    def widen_imprecise_columns(self, aligned_df):
+        """
+        紧凑布局：FLOAT 字段只能无损保存绝对值小于 2^13 的三位小数（迁移时按历史取值选择），
+        新数据超出时先把字段改为 DOUBLE 再写入，避免静默丢失精度
+        """
+        columns = imprecise_columns(self.column_types, aligned_df)
+        if not columns:
+            return True
+        logger.warning(f"字段 {columns} 的新数据超出 FLOAT 精度范围，改为 DOUBLE")
+        try:
+            widen_columns(self.target_conn, self.table, columns, self.column_types)
+            return True
+        except Exception as e:
+            logger.error(f"修改字段类型失败: {e}")
+            return False
+
     def insert_data_to_target(self, aligned_df):
         """将对齐的数据插入目标表
         
         注意：值为0的字段不会更新到数据库，保持原有值
         这样可以避免因读取异常导致的0值覆盖有效数据
+        紧凑布局下缺失值为 NULL，同样不会覆盖原有值
         """
         if not self.target_conn or aligned_df.empty:
             logger.error("目标数据库连接不存在或数据为空")
@@ -408,25 +612,17 @@ class DataSyncManager:
         columns = list(aligned_df.columns)
         placeholders = ', '.join(['%s'] * len(columns))
         
-        # 构建更新语句：只更新非0的值，使用 IF 条件判断
-        # IF(VALUES(col)!=0, VALUES(col), col) 表示：如果新值不为0则更新，否则保持原值
-        update_clauses = []
-        for col in columns:
-            if col != 'collect_time':
-                update_clauses.append(f"{col}=IF(VALUES({col})!=0, VALUES({col}), {col})")
-        
         insert_sql = f"""
-        INSERT INTO fuan_data ({', '.join(columns)})
+        INSERT INTO {self.table} ({', '.join(columns)})
         VALUES ({placeholders})
         ON DUPLICATE KEY UPDATE
-        {', '.join(update_clauses)}
+        {', '.join(self.build_update_clauses(columns))}
         """
         
         try:
             with self.target_conn.cursor() as cursor:
                 # 批量插入
-                data_tuples = [tuple(row) for row in aligned_df.values]
-                cursor.executemany(insert_sql, data_tuples)
+                cursor.executemany(insert_sql, self.to_row_tuples(aligned_df))
                 
             logger.info(f"成功插入/更新 {len(aligned_df)} 条数据到目标表")
             return True
@@ -434,10 +630,112 @@ class DataSyncManager:
         except Exception as e:
             logger.error(f"插入数据到目标表失败: {e}")
             return False
+
+    def build_update_clauses(self, columns, qualifier=''):
+        """
+        构建更新语句：只更新非0的值，使用 IF 条件判断
+        IF(VALUES(col)!=0, VALUES(col), col) 表示：如果新值不为0则更新，否则保持原值
+        紧凑布局下为 COALESCE(VALUES(col), col)：新值为 NULL 时保持原值（对齐时 0 已转为 NULL，见 align_data_by_minute）
+        qualifier: INSERT ... SELECT 时需用目标表名限定字段，避免与源表字段同名产生歧义
+        """
+        update_clauses = []
+        for col in columns:
+            if col != 'collect_time':
+                target = f"{qualifier}.{col}" if qualifier else col
+                if self.nullable_storage:
+                    update_clauses.append(f"{target}=COALESCE(VALUES({col}), {target})")
+                else:
+                    update_clauses.append(f"{target}=IF(VALUES({col})!=0, VALUES({col}), {target})")
+        return update_clauses
+
+    def to_row_tuples(self, aligned_df):
+        if self.nullable_storage:
+            # NaN -> None（写入 NULL）
+            values = aligned_df.astype(object).where(aligned_df.notna(), None).values
+        else:
+            values = aligned_df.values
+        return [tuple(row) for row in values]
+
+    def create_staging_table(self):
+        """每次同步重建暂存表，保证字段与目标表一致"""
+        with self.target_conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
+            cursor.execute(f"CREATE TABLE {self.staging_table} LIKE {self.table}")
+
+    def validate_staging(self, expected_rows, day_start, day_end):
+        """校验暂存表：行数与本批数据一致，且时间全部落在当天范围内"""
+        with self.target_conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*), MIN(collect_time), MAX(collect_time) FROM {self.staging_table}"
+            )
+            row_count, min_time, max_time = cursor.fetchone()
+
+        if row_count != expected_rows:
+            logger.error(f"暂存表行数 {row_count} 与待写入行数 {expected_rows} 不一致")
+            return False
+        if row_count and (min_time < day_start or max_time >= day_end):
+            logger.error(f"暂存表时间范围 {min_time} ~ {max_time} 超出 {day_start:%Y-%m-%d}")
+            return False
+        return True
+
+    def insert_data_via_staging(self, aligned_df):
+        """
+        暂存表方式写入：按天 批量写入暂存表 -> 校验 -> 一条 INSERT ... SELECT 合并到目标表
+        目标表上只有每天一条短语句持有行锁，看板查询不会被长时间的逐行写入阻塞
+        合并规则与 insert_data_to_target 相同（0 值/NULL 不覆盖原有值）
+        """
+        if not self.target_conn or aligned_df.empty:
+            logger.error("目标数据库连接不存在或数据为空")
+            return False
+
+        columns = list(aligned_df.columns)
+        column_list = ', '.join(columns)
+        placeholders = ', '.join(['%s'] * len(columns))
+        load_sql = f"INSERT INTO {self.staging_table} ({column_list}) VALUES ({placeholders})"
+        merge_sql = f"""
+        INSERT INTO {self.table} ({column_list})
+        SELECT {column_list} FROM {self.staging_table}
+        ON DUPLICATE KEY UPDATE
+        {', '.join(self.build_update_clauses(columns, qualifier=self.table))}
+        """
+
+        try:
+            self.create_staging_table()
+            days = aligned_df['collect_time'].dt.floor('D')
+            for day, day_df in aligned_df.groupby(days, sort=True):
+                day_start = day.to_pydatetime()
+                day_end = day_start + timedelta(days=1)
+
+                with self.target_conn.cursor() as cursor:
+                    cursor.execute(f"TRUNCATE TABLE {self.staging_table}")
+                    # pymysql 将 executemany 的 INSERT ... VALUES 改写为多行 INSERT，批量写入
+                    cursor.executemany(load_sql, self.to_row_tuples(day_df))
+
+                if not self.validate_staging(len(day_df), day_start, day_end):
+                    logger.error(f"日期 {day_start:%Y-%m-%d} 暂存数据校验失败，停止写入")
+                    return False
+
+                # 单条语句合并（autocommit 下即为一个事务）
+                with self.target_conn.cursor() as cursor:
+                    cursor.execute(merge_sql)
+                logger.info(f"日期 {day_start:%Y-%m-%d} 合并 {len(day_df)} 条数据到目标表")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"暂存表方式写入失败: {e}")
+            return False
+
+        finally:
+            try:
+                with self.target_conn.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
+            except Exception as e:
+                logger.warning(f"清理暂存表失败: {e}")
     
     def sync_data(self, start_date, end_date):
         """执行数据同步"""
-        logger.info(f"开始同步数据: {start_date} 到 {end_date}")
+        logger.info(f"开始同步站点 {self.site['name']} 数据: {start_date} 到 {end_date}")
         
         # 建立连接
         self.source_conn = self.connect_mysql(SOURCE_DB_CONFIG)
@@ -447,6 +745,8 @@ class DataSyncManager:
         if not all([self.source_conn, self.target_conn, self.influx_client]):
             logger.error("数据库连接失败，无法继续")
             return False
+
+        self.downsample_coverage = self.resolve_downsample_coverage()
         
         try:
             # 创建目标表
@@ -463,13 +763,34 @@ class DataSyncManager:
             # 对齐数据
             logger.info("对齐数据...")
             aligned_df = self.align_data_by_minute(pressure_df, influx_df, start_date, end_date)
+            if self.failed_days:
+                failed = aligned_df['collect_time'].dt.strftime('%Y%m%d').isin(self.failed_days)
+                aligned_df = aligned_df[~failed].reset_index(drop=True)
+                if aligned_df.empty:
+                    logger.error("所有日期的InfluxDB查询均失败，不写入数据")
+                    return False
             
+            if self.nullable_storage and not self.widen_imprecise_columns(aligned_df):
+                return False
+
             # 插入目标表
             logger.info("插入数据到目标表...")
-            success = self.insert_data_to_target(aligned_df)
+            if self.write_mode == 'staging':
+                success = self.insert_data_via_staging(aligned_df)
+            else:
+                success = self.insert_data_to_target(aligned_df)
+
+            if success:
+                self.invalidate_result_cache(start_date, end_date)
             
+            if success and self.failed_days:
+                logger.error(f"以下日期InfluxDB查询失败，未写入，需要重新同步: {', '.join(self.failed_days)}")
+                success = False
+
             if success:
                 logger.info("数据同步完成！")
+                if self.run_post_tasks:
+                    self.run_post_sync_tasks(start_date, end_date)
             else:
                 logger.error("数据同步失败！")
             
@@ -484,13 +805,542 @@ class DataSyncManager:
             if self.influx_client:
                 self.influx_client.close()
 
+    def _query_latest(self, query):
+        """执行 last() 查询，返回 {标签值: (值, UTC时间)}"""
+        tables = self.influx_client.query_api().query(query, INFLUX_CONFIG['org'])
+        latest = {}
+        for table in tables:
+            for record in table.records:
+                if record.get_value() is None:
+                    continue
+                record_time = record.get_time()
+                if record_time.tzinfo is None:
+                    record_time = UTC_TZ.localize(record_time)
+                key = record.values.get('indicator_id') or record.values.get('sn')
+                if key not in latest or record_time > latest[key][1]:
+                    latest[key] = (float(record.get_value()), record_time)
+        return latest
+
+    def query_latest_indicators(self):
+        """查询所有水厂指标的最新值（单次查询）"""
+        indicator_set = ', '.join(f'"{indicator}"' for indicator in self.indicators)
+        query = f'''
+        from(bucket: "{self.influx_bucket}")
+        |> range(start: {SNAPSHOT_LOOKBACK})
+        |> filter(fn: (r) =>
+            r["_measurement"] == "plcData" and
+            r["_field"] == "value" and
+            contains(value: r["indicator_id"], set: [{indicator_set}]))
+        |> group(columns: ["indicator_id"])
+        |> last()
+        '''
+        return self._query_latest(query)
+
+    def query_latest_pressure(self):
+        """查询所有压力计的最新值（单次查询）"""
+        query = f'''
+        from(bucket: "{PRESSURE_INFLUX_BUCKET}")
+        |> range(start: {SNAPSHOT_LOOKBACK})
+        |> filter(fn: (r) => r["_measurement"] == "pressureData" and r["_field"] == "press")
+        |> group(columns: ["sn"])
+        |> last()
+        '''
+        latest = self._query_latest(query)
+        return {sn: value for sn, value in latest.items() if sn in self.pressure_meters and value[0] > 0}
+
+    def publish_latest_snapshot(self, snapshot_file=SNAPSHOT_FILE):
+        """
+        实时模式：查询所有指标和压力计的最新值，原子替换写入快照文件
+        每个值附带采集时间和距快照生成时的滞后秒数
+        """
+        self.influx_client = self.connect_influxdb()
+        if not self.influx_client:
+            return False
+
+        try:
+            now = datetime.now(UTC_TZ)
+
+            def entries(latest, value_key):
+                return {
+                    key: {
+                        value_key: value,
+                        'time': value_time.isoformat().replace('+00:00', 'Z'),
+                        'stale_seconds': round((now - value_time).total_seconds(), 1),
+                    }
+                    for key, (value, value_time) in latest.items()
+                }
+
+            snapshot = {
+                'generated_at': now.isoformat().replace('+00:00', 'Z'),
+                'indicators': entries(self.query_latest_indicators(), 'value'),
+                'pressure': entries(self.query_latest_pressure(), 'press'),
+            }
+        except Exception as e:
+            logger.error(f"查询实时数据失败: {e}")
+            return False
+        finally:
+            self.influx_client.close()
+
+        # 写入同目录临时文件后 os.replace，读取方不会读到写了一半的文件
+        snapshot_dir = os.path.dirname(os.path.abspath(snapshot_file))
+        os.makedirs(snapshot_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.latest_snapshot.', dir=snapshot_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, snapshot_file)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        logger.info(
+            f"实时快照已更新: {len(snapshot['indicators'])} 个指标, {len(snapshot['pressure'])} 个压力计"
+        )
+        return True
+
+    def invalidate_result_cache(self, start_date, end_date):
+        """删除与写入日期重叠的回归结果缓存（--site 直接同步不经过任务队列水位，也不依赖同步后任务）"""
+        try:
+            from result_cache import ResultCache
+            ResultCache().invalidate_range(start_date, end_date, self.table)
+        except Exception as e:
+            logger.error(f"回归结果缓存失效失败: {e}")
+
+    def run_post_sync_tasks(self, start_date, end_date):
+        """同步成功后的派生计算任务（失败不影响同步结果）"""
+        try:
+            from parquet_mirror import ParquetMirror
+            logger.info("刷新 Parquet 列式镜像...")
+            ParquetMirror(self.target_conn, self.table).refresh_range(start_date, end_date)
+        except Exception as e:
+            logger.error(f"Parquet 镜像刷新失败: {e}")
+
+        try:
+            from data_retention import RetentionManager
+            logger.info("更新小时/日汇总...")
+            RetentionManager(self.target_conn, self.table).refresh_rollups_range(start_date, end_date)
+        except Exception as e:
+            logger.error(f"小时/日汇总更新失败: {e}")
+
+        try:
+            from operating_regimes import RegimeIndex
+            logger.info("更新运行工况区间...")
+            RegimeIndex(self.target_conn, self.table).refresh_range(start_date, end_date)
+        except Exception as e:
+            logger.error(f"运行工况区间更新失败: {e}")
+
+        try:
+            from hourly_profiles import HourlyProfileStore
+            logger.info("更新小时典型曲线...")
+            HourlyProfileStore(self.target_conn, self.table).refresh_range(start_date, end_date)
+        except Exception as e:
+            logger.error(f"小时典型曲线更新失败: {e}")
+
+        try:
+            from quantile_sketch import SketchStore
+            logger.info("计算按天分位数草图...")
+            SketchStore(self.target_conn, self.table).build_range(start_date, end_date)
+        except Exception as e:
+            logger.error(f"分位数草图计算失败: {e}")
+
+        try:
+            from flow_forecast import FlowForecaster
+            logger.info("生成短期流量/压力预测...")
+            FlowForecaster(self.target_conn).run()
+        except Exception as e:
+            logger.error(f"短期预测生成失败: {e}")
+
+        try:
+            from pump_curve_fit import PumpCurveEngine
+            logger.info("刷新泵特性曲线...")
+            PumpCurveEngine(self.target_conn).refresh_range(start_date, end_date)
+        except Exception as e:
+            logger.error(f"泵特性曲线刷新失败: {e}")
+
+        try:
+            from online_models import refresh_range
+            logger.info("在线更新线性族模型...")
+            refresh_range(start_date, end_date)
+        except Exception as e:
+            logger.error(f"模型在线更新失败: {e}")
+
+class SyncJobQueue:
+    """
+    同步任务协调
+    - 队列锁（短）：保护 fuan_sync_jobs 表的读写，合并重叠/相邻的日期范围
+    - 执行锁（长）：同一时刻只有一个进程执行同步，其余进程只入队并等待
+    锁均为 MySQL 会话级咨询锁（GET_LOCK），进程退出或连接断开时自动释放
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def _get_lock(self, name, timeout):
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+            return cursor.fetchone()[0] == 1
+
+    def _release_lock(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+
+    def _fetch_job(self, cursor, where, params):
+        cursor.execute(f"""
+        SELECT id, start_date, end_date, status, merged_into, message, created_at, started_at, finished_at
+        FROM {SYNC_JOB_TABLE} WHERE {where}
+        """, params)
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        keys = ['id', 'start_date', 'end_date', 'status', 'merged_into', 'message',
+                'created_at', 'started_at', 'finished_at']
+        return dict(zip(keys, row))
+
+    def create_job_table(self):
+        """创建同步任务表"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {SYNC_JOB_TABLE} (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                start_date DATE NOT NULL,
+                end_date DATE NOT NULL,
+                status VARCHAR(16) NOT NULL COMMENT 'queued/running/done/failed/merged',
+                merged_into INT NULL,
+                message VARCHAR(255) NULL,
+                pid INT NULL,
+                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                started_at DATETIME NULL,
+                finished_at DATETIME NULL,
+                KEY idx_status (status, start_date, end_date)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='数据同步任务队列'
+            """)
+
+    def submit(self, start_date, end_date):
+        """
+        提交同步请求
+        返回 (任务, 是否新建/扩展)：已有排队或运行中的任务完整覆盖该范围时直接返回该任务；
+        否则与重叠或相邻的排队任务合并为一个任务
+        """
+        start = datetime.strptime(start_date, '%Y%m%d').date()
+        end = datetime.strptime(end_date, '%Y%m%d').date()
+
+        if not self._get_lock(SYNC_QUEUE_LOCK, 30):
+            raise RuntimeError("获取同步队列锁超时")
+
+        try:
+            with self.connection.cursor() as cursor:
+                covering = self._fetch_job(
+                    cursor,
+                    "status IN ('queued', 'running') AND start_date <= %s AND end_date >= %s "
+                    "ORDER BY status = 'running' DESC, id LIMIT 1",
+                    (start, end)
+                )
+                if covering:
+                    return covering, False
+
+                # 与重叠或相邻（相差1天）的排队任务合并
+                cursor.execute(f"""
+                SELECT id, start_date, end_date FROM {SYNC_JOB_TABLE}
+                WHERE status = 'queued' AND start_date <= %s AND end_date >= %s
+                ORDER BY id
+                """, (end + timedelta(days=1), start - timedelta(days=1)))
+                mergeable = cursor.fetchall()
+
+                if mergeable:
+                    job_id = mergeable[0][0]
+                    merged_start = min([start] + [row[1] for row in mergeable])
+                    merged_end = max([end] + [row[2] for row in mergeable])
+                    cursor.execute(
+                        f"UPDATE {SYNC_JOB_TABLE} SET start_date = %s, end_date = %s WHERE id = %s",
+                        (merged_start, merged_end, job_id)
+                    )
+                    other_ids = [row[0] for row in mergeable[1:]]
+                    if other_ids:
+                        cursor.execute(
+                            f"UPDATE {SYNC_JOB_TABLE} SET status = 'merged', merged_into = %s, "
+                            f"finished_at = NOW() WHERE id IN %s",
+                            (job_id, other_ids)
+                        )
+                    logger.info(f"同步请求已合并到任务 #{job_id}: {merged_start} 到 {merged_end}")
+                else:
+                    cursor.execute(
+                        f"INSERT INTO {SYNC_JOB_TABLE} (start_date, end_date, status) VALUES (%s, %s, 'queued')",
+                        (start, end)
+                    )
+                    job_id = cursor.lastrowid
+                    logger.info(f"新建同步任务 #{job_id}: {start} 到 {end}")
+
+                return self._fetch_job(cursor, "id = %s", (job_id,)), True
+        finally:
+            self._release_lock(SYNC_QUEUE_LOCK)
+
+    def get_job(self, job_id):
+        """查询任务状态（已合并的任务返回合并后的任务）"""
+        with self.connection.cursor() as cursor:
+            job = self._fetch_job(cursor, "id = %s", (job_id,))
+            while job and job['status'] == 'merged' and job['merged_into']:
+                job = self._fetch_job(cursor, "id = %s", (job['merged_into'],))
+            return job
+
+    def acquire_worker(self, timeout=0):
+        """尝试获取执行锁，timeout 为等待秒数（默认不等待）"""
+        return self._get_lock(SYNC_WORKER_LOCK, timeout)
+
+    def release_worker(self):
+        self._release_lock(SYNC_WORKER_LOCK)
+
+    def run_pending(self, run_job):
+        """
+        持有执行锁时调用：依次执行队列中的任务直到队列为空
+        run_job(start_date, end_date) 返回是否成功，日期格式 YYYYMMDD
+        """
+        with self.connection.cursor() as cursor:
+            # 持有执行锁说明没有其他进程在运行，遗留的 running 任务来自异常退出的进程
+            cursor.execute(f"UPDATE {SYNC_JOB_TABLE} SET status = 'queued' WHERE status = 'running'")
+
+        while True:
+            if not self._get_lock(SYNC_QUEUE_LOCK, 30):
+                raise RuntimeError("获取同步队列锁超时")
+            try:
+                with self.connection.cursor() as cursor:
+                    job = self._fetch_job(cursor, "status = 'queued' ORDER BY id LIMIT 1", ())
+                    if job is None:
+                        return
+                    cursor.execute(
+                        f"UPDATE {SYNC_JOB_TABLE} SET status = 'running', started_at = NOW(), pid = %s WHERE id = %s",
+                        (os.getpid(), job['id'])
+                    )
+            finally:
+                self._release_lock(SYNC_QUEUE_LOCK)
+
+            logger.info(f"执行同步任务 #{job['id']}: {job['start_date']} 到 {job['end_date']}")
+            try:
+                success = run_job(job['start_date'].strftime('%Y%m%d'), job['end_date'].strftime('%Y%m%d'))
+                message = None if success else '同步失败'
+            except Exception as e:
+                success = False
+                message = str(e)[:255]
+                logger.error(f"同步任务 #{job['id']} 异常: {e}")
+
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {SYNC_JOB_TABLE} SET status = %s, message = %s, finished_at = NOW() WHERE id = %s",
+                    ('done' if success else 'failed', message, job['id'])
+                )
+
+    def wait_for(self, job_id, run_job, poll_interval=5, timeout=None):
+        """
+        等待任务结束；等待期间若执行锁空闲（原执行进程已退出），则由当前进程接手执行队列
+        """
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            job = self.get_job(job_id)
+            if job is None or job['status'] in ('done', 'failed'):
+                return job
+
+            if self.acquire_worker():
+                try:
+                    self.run_pending(run_job)
+                finally:
+                    self.release_worker()
+                continue
+
+            if deadline and time.time() > deadline:
+                return job
+            time.sleep(poll_interval)
+
+
+def format_job_status(job):
+    """任务状态输出为单行JSON，供 Node.js 调用方解析"""
+    if job is None:
+        return json.dumps({'status': 'unknown'})
+    return json.dumps({
+        key: (value.isoformat() if hasattr(value, 'isoformat') else value)
+        for key, value in job.items()
+    }, ensure_ascii=False)
+
+def sync_site(site_name, start_date, end_date, options):
+    """
+    单个站点的同步（进程池 worker 入口，每个进程使用独立的数据库连接）
+    options: DataSyncManager 的参数（run_post_tasks、write_mode、influx_source、align_mode、align_tolerance）
+    """
+    manager = DataSyncManager(site=get_site(site_name), **options)
+    return manager.sync_data(start_date, end_date)
+
+
+def sync_sites(site_names, start_date, end_date, options, workers=None):
+    """
+    多站点并行同步：每个站点一个进程，互不阻塞
+    返回是否全部成功；单个站点失败不影响其他站点
+    """
+    if not site_names:
+        logger.warning("没有启用的站点（检查 sites.json 的 enabled 或 --site 参数），跳过同步")
+        return True
+    if len(site_names) == 1:
+        return sync_site(site_names[0], start_date, end_date, options)
+
+    workers = workers or min(len(site_names), os.cpu_count() or 1)
+    logger.info(f"并行同步 {len(site_names)} 个站点（{workers} 个进程）: {', '.join(site_names)}")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(sync_site, name, start_date, end_date, options)
+            for name in site_names
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"站点 {name} 同步异常: {e}")
+                results[name] = False
+
+    failed = [name for name, ok in results.items() if not ok]
+    if failed:
+        logger.error(f"以下站点同步失败: {', '.join(failed)}")
+    return not failed
+
+
+def setup_downsampling(sites, backfill_days=0):
+    """为所有使用默认桶的站点指标创建/更新降采样任务"""
+    indicators = sorted({
+        indicator
+        for site in sites.values()
+        if (site['influx_bucket'] or INFLUX_CONFIG['bucket']) == INFLUX_CONFIG['bucket']
+        for indicator in site['indicators']
+    })
+    client = DataSyncManager().connect_influxdb()
+    if not client:
+        return False
+
+    try:
+        downsampler = InfluxDownsampler(client, INFLUX_CONFIG['org'], INFLUX_CONFIG['bucket'], indicators)
+        downsampler.setup(backfill_days)
+        # 新建的任务首次运行前检查结果为未完成，不视为失败
+        _, message = downsampler.check_health()
+        logger.info(message)
+        return True
+    except Exception as e:
+        logger.error(f"设置降采样任务失败: {e}")
+        return False
+    finally:
+        client.close()
+
+
+def archive_minute_data(retention_days, lock_timeout, site_name=DEFAULT_SITE):
+    """持有同步执行锁归档过期分钟数据（见 data_retention.py），避免与同步写入交错"""
+    from data_retention import RetentionManager
+
+    site = get_site(site_name)
+    connection = DataSyncManager(site=site).connect_mysql(TARGET_DB_CONFIG)
+    if not connection:
+        return False
+
+    queue = SyncJobQueue(connection)
+    try:
+        if not queue.acquire_worker(lock_timeout):
+            logger.error("等待同步执行锁超时，归档未执行")
+            return False
+        try:
+            return RetentionManager(connection, site['table']).archive(retention_days)
+        except Exception as e:
+            logger.error(f"归档失败: {e}")
+            return False
+        finally:
+            queue.release_worker()
+    finally:
+        connection.close()
+
+
+def migrate_storage(layout, lock_timeout, site_name=DEFAULT_SITE):
+    """持有同步执行锁迁移存储布局，迁移期间同步任务只入队不执行"""
+    manager = DataSyncManager(run_post_tasks=False, site=get_site(site_name))
+    manager.target_conn = manager.connect_mysql(TARGET_DB_CONFIG)
+    if not manager.target_conn:
+        return False
+
+    queue = SyncJobQueue(manager.target_conn)
+    try:
+        if not queue.acquire_worker(lock_timeout):
+            logger.error("等待同步执行锁超时，迁移未执行")
+            return False
+        try:
+            return manager.create_target_table(migrate_to=layout)
+        finally:
+            queue.release_worker()
+    finally:
+        manager.target_conn.close()
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='福安数据同步脚本')
-    parser.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
-    parser.add_argument('end_date', help='结束日期，格式：YYYYMMDD')
+    parser.add_argument('start_date', nargs='?', help='开始日期，格式：YYYYMMDD')
+    parser.add_argument('end_date', nargs='?', help='结束日期，格式：YYYYMMDD')
+    parser.add_argument('--tail', action='store_true',
+                        help='实时模式：只更新最新值快照文件（供 /api/latest 读取），不同步历史数据')
+    parser.add_argument('--skip-post-tasks', action='store_true', help='跳过同步后的预测等派生计算')
+    parser.add_argument('--no-wait', action='store_true',
+                        help='已有其他进程在同步时只入队，不等待任务完成')
+    parser.add_argument('--wait-timeout', type=int, default=6 * 3600, help='等待任务完成的最长时间（秒）')
+    parser.add_argument('--migrate-storage', choices=LAYOUTS,
+                        help='将站点数据表迁移为紧凑存储布局（float: FLOAT/DOUBLE，narrow: 按取值范围选最窄类型）')
+    parser.add_argument('--site', action='append',
+                        help='只同步指定站点（可多次指定），默认同步 sites.json 中所有启用的站点')
+    parser.add_argument('--workers', type=int, help='并行同步的进程数，默认 min(站点数, CPU核数)')
+    parser.add_argument('--write-mode', choices=WRITE_MODES, default='upsert',
+                        help='写入方式：upsert 逐行写入目标表；staging 经暂存表校验后按天合并（适合大范围补数）')
+    parser.add_argument('--influx-source', choices=INFLUX_SOURCES, default='auto',
+                        help='Influx 数据源：auto 优先读降采样桶，未覆盖的日期回退原始数据；raw/downsampled 强制指定')
+    parser.add_argument('--align-mode', choices=ALIGN_MODES, default='floor',
+                        help='压力计分钟对齐：floor 按分钟取整求均值；asof 按时钟偏差修正后插值并按时间加权')
+    parser.add_argument('--align-tolerance', type=int, default=DEFAULT_TOLERANCE_SECONDS,
+                        help='asof 对齐时分钟边界与读数的最大间隔（秒），超出则该分钟保持缺失')
+    parser.add_argument('--archive', action='store_true',
+                        help='将早于 --retention-days 天的分钟数据归档为 Parquet 并从 MySQL 删除（小时/日汇总保留）')
+    parser.add_argument('--retention-days', type=int, default=90, help='MySQL 中保留的分钟数据天数')
+    parser.add_argument('--setup-downsampling', action='store_true',
+                        help='创建/更新 InfluxDB 降采样桶和任务，并检查任务状态')
+    parser.add_argument('--backfill-days', type=int, default=0,
+                        help='配合 --setup-downsampling，补写最近 N 天的降采样数据')
     
     args = parser.parse_args()
+
+    sites = load_sites()
+    if args.site:
+        unknown = [name for name in args.site if name not in sites]
+        if unknown:
+            parser.error(f"未知站点: {', '.join(unknown)}，可选: {', '.join(sites)}")
+        site_names = args.site
+    else:
+        site_names = [name for name, site in sites.items() if site['enabled']]
+
+    if args.setup_downsampling:
+        sys.exit(0 if setup_downsampling(sites, args.backfill_days) else 1)
+
+    if args.archive:
+        success = all(
+            archive_minute_data(args.retention_days, args.wait_timeout, name)
+            for name in site_names
+        )
+        sys.exit(0 if success else 1)
+
+    if args.migrate_storage:
+        success = all(
+            migrate_storage(args.migrate_storage, args.wait_timeout, name)
+            for name in (args.site or [DEFAULT_SITE])
+        )
+        sys.exit(0 if success else 1)
+
+    if args.tail:
+        success = DataSyncManager().publish_latest_snapshot()
+        sys.exit(0 if success else 1)
+
+    if not args.start_date or not args.end_date:
+        parser.error('非实时模式需要提供 start_date 和 end_date')
     
     # 验证日期格式
     try:
@@ -500,10 +1350,61 @@ def main():
         logger.error("日期格式错误，请使用 YYYYMMDD 格式")
         sys.exit(1)
     
-    # 执行同步
-    sync_manager = DataSyncManager()
-    success = sync_manager.sync_data(args.start_date, args.end_date)
-    
+    def run_job(start_date, end_date):
+        options = {
+            'run_post_tasks': not args.skip_post_tasks,
+            'write_mode': args.write_mode,
+            'influx_source': args.influx_source,
+            'align_mode': args.align_mode,
+            'align_tolerance': args.align_tolerance,
+        }
+        return sync_sites(site_names, start_date, end_date, options, args.workers)
+
+    # 通过任务队列执行同步，避免多个进程重复同步相同日期
+    queue_conn = DataSyncManager().connect_mysql(TARGET_DB_CONFIG)
+    if not queue_conn:
+        sys.exit(1)
+
+    if args.site:
+        # 队列中的任务覆盖所有站点；只同步部分站点时不入队，持有执行锁直接执行
+        try:
+            queue = SyncJobQueue(queue_conn)
+            if not queue.acquire_worker(args.wait_timeout):
+                logger.error("等待同步执行锁超时")
+                sys.exit(1)
+            try:
+                success = run_job(args.start_date, args.end_date)
+            finally:
+                queue.release_worker()
+        finally:
+            queue_conn.close()
+        sys.exit(0 if success else 1)
+
+    try:
+        queue = SyncJobQueue(queue_conn)
+        queue.create_job_table()
+        job, created = queue.submit(args.start_date, args.end_date)
+        if not created:
+            logger.info(f"已有任务 #{job['id']} ({job['status']}) 覆盖该日期范围，不再重复同步")
+
+        if args.no_wait:
+            if queue.acquire_worker():
+                try:
+                    queue.run_pending(run_job)
+                finally:
+                    queue.release_worker()
+            job = queue.get_job(job['id'])
+        else:
+            job = queue.wait_for(job['id'], run_job, timeout=args.wait_timeout)
+    finally:
+        queue_conn.close()
+
+    print(f"SYNC_JOB_STATUS {format_job_status(job)}", flush=True)
+
+    # 不等待模式下，任务已入队或运行中也视为请求成功
+    success = job is not None and (
+        job['status'] == 'done' or (args.no_wait and job['status'] in ('queued', 'running'))
+    )
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
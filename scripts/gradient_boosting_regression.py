@@ -5,15 +5,49 @@
 高精度的集成学习方法，通常比随机森林更准确
 """
 
-import sys
-import json
 import numpy as np
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
+from regression_io import Records, run_cli
+from model_store import FittedModel
 
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）
+PREPROCESS = ()
 
-def gradient_boosting_regression(X, y, n_estimators=100, learning_rate=0.1, max_depth=3, test_size=0.2, random_state=42):
+
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在训练集上拟合梯度提升模型（本脚本与 regression_engine.py 共用）
+    params: n_estimators、learning_rate、max_depth
+    返回 (估计器, 结果中的模型参数和特征重要性)
+    """
+    params = params or {}
+    n_estimators = int(params.get('n_estimators', 100))
+    learning_rate = float(params.get('learning_rate', 0.1))
+    max_depth = int(params.get('max_depth', 3))
+    model = GradientBoostingRegressor(
+        n_estimators=n_estimators,
+        learning_rate=learning_rate,
+        max_depth=max_depth,
+        random_state=random_state,
+        validation_fraction=0.1,
+        n_iter_no_change=10  # 早停
+    )
+    model.fit(X_train, y_train)
+    return model, {
+        'model_params': {
+            'n_estimators': n_estimators,
+            'learning_rate': learning_rate,
+            'max_depth': max_depth,
+            'n_features': int(X_train.shape[1]),
+            'n_estimators_used': int(model.n_estimators_)  # 实际使用的估计器数量（考虑早停）
+        },
+        'feature_importance': model.feature_importances_.tolist(),
+    }
+
+
+def gradient_boosting_regression(X, y, n_estimators=100, learning_rate=0.1, max_depth=3, test_size=0.2, random_state=42, return_model=False):
     """
     执行梯度提升回归分析
     
@@ -25,6 +59,7 @@ def gradient_boosting_regression(X, y, n_estimators=100, learning_rate=0.1, max_
         max_depth: 每棵树的最大深度
         test_size: 测试集比例
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
     
     返回:
         dict: 包含R²、预测值、特征重要性等结果
@@ -39,15 +74,8 @@ def gradient_boosting_regression(X, y, n_estimators=100, learning_rate=0.1, max_
     )
     
     # 训练梯度提升模型
-    model = GradientBoostingRegressor(
-        n_estimators=n_estimators,
-        learning_rate=learning_rate,
-        max_depth=max_depth,
-        random_state=random_state,
-        validation_fraction=0.1,
-        n_iter_no_change=10  # 早停
-    )
-    model.fit(X_train, y_train)
+    params = {'n_estimators': n_estimators, 'learning_rate': learning_rate, 'max_depth': max_depth}
+    model, details = fit_model(X_train, y_train, params, random_state)
     
     # 预测
     y_pred_train = model.predict(X_train)
@@ -60,71 +88,49 @@ def gradient_boosting_regression(X, y, n_estimators=100, learning_rate=0.1, max_
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 获取特征重要性
-    feature_importance = model.feature_importances_.tolist()
-    
     # 计算散点图数据（使用测试集）
-    scatter_data = [
-        {'actual': float(y_test[i]), 'predicted': float(y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    scatter_data = Records(actual=y_test, predicted=y_pred_test)
     
     # 计算残差数据（使用测试集）
-    residuals_data = [
-        {'predicted': float(y_pred_test[i]), 'residual': float(y_test[i] - y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    residuals_data = Records(predicted=y_pred_test, residual=y_test - y_pred_test)
     
-    return {
-        'model_params': {
-            'n_estimators': int(n_estimators),
-            'learning_rate': float(learning_rate),
-            'max_depth': int(max_depth),
-            'n_features': int(X.shape[1]),
-            'n_estimators_used': int(model.n_estimators_)  # 实际使用的估计器数量（考虑早停）
-        },
-        'feature_importance': feature_importance,
+    result = {
+        **details,
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': y_pred_all.tolist(),
+        'predictions': y_pred_all,
         'scatter_data': scatter_data,
         'residuals_data': residuals_data
     }
+    if return_model:
+        result['model'] = FittedModel('gradient_boosting', model)
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    n_estimators = input_data.get('n_estimators', 100)
+    learning_rate = input_data.get('learning_rate', 0.1)
+    max_depth = input_data.get('max_depth', 3)
+    test_size = input_data.get('test_size', 0.2)
+    random_state = input_data.get('random_state', 42)
+    save_model = input_data.get('save_model', False)
+
+    # 执行梯度提升回归
+    return gradient_boosting_regression(X, y, n_estimators, learning_rate, max_depth, test_size, random_state, return_model=save_model)
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        n_estimators = input_data.get('n_estimators', 100)
-        learning_rate = input_data.get('learning_rate', 0.1)
-        max_depth = input_data.get('max_depth', 3)
-        test_size = input_data.get('test_size', 0.2)
-        random_state = input_data.get('random_state', 42)
-        
-        # 执行梯度提升回归
-        result = gradient_boosting_regression(X, y, n_estimators, learning_rate, max_depth, test_size, random_state)
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+小时典型曲线（hour-of-day profile）
+同步后维护各指标每小时的 样本数 / 和 / 平方和，调度看板直接读取 24 行预计算结果，不再逐次扫描多天分钟数据
+
+表结构:
+    <表名>_hour_day_stats   按天 × 小时 × 指标的 n / sum / sumsq（只重算同步到的日期）
+    <表名>_hour_profile     近 7/30/90 天窗口 × 全部/工作日/周末 × 小时 × 指标的累计值
+    <表名>_hour_profile_state  各窗口当前的截止日期
+
+窗口为截至最新同步日的 N 个自然日。新同步日期晚于截止日期时增量更新：加入新日期、减去滑出窗口的日期；
+窗口内的历史日期被重新同步时整窗重算（仅读取按天统计，数据量很小）
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 指标 -> 有效取值区间（开区间，与调度看板的过滤条件一致，同时排除旧布局中表示缺失的 0）
+PROFILE_METRICS = {
+    'i_1102': (0, 10000),    # 城东瞬时流量
+    'i_1034': (0, 10000),    # 岩湖瞬时流量
+    'i_1030': (0, 10),       # 岩湖出厂压力
+    'i_1097': (0.1, 20),     # 清水池水位
+}
+WINDOWS = (7, 30, 90)
+DAY_TYPES = ('all', 'weekday', 'weekend')
+STAT_COLUMNS = ['n', 's', 'ss', 'days']
+
+
+def aggregate_profile(day_stats):
+    """按天统计 -> 各日期类型 × 小时 × 指标的累计值（days 为有有效样本的天数）"""
+    if day_stats.empty:
+        return pd.DataFrame(columns=['day_type', 'hour', 'metric'] + STAT_COLUMNS)
+
+    frame = day_stats.copy()
+    frame['days'] = (frame['n'] > 0).astype(np.int64)
+    weekend = pd.to_datetime(frame['day']).dt.dayofweek >= 5
+    parts = [
+        frame.assign(day_type='all'),
+        frame[~weekend].assign(day_type='weekday'),
+        frame[weekend].assign(day_type='weekend'),
+    ]
+    combined = pd.concat(parts, ignore_index=True)
+    return combined.groupby(['day_type', 'hour', 'metric'], as_index=False)[STAT_COLUMNS].sum()
+
+
+class HourlyProfileStore:
+    def __init__(self, connection, table='fuan_data'):
+        self.connection = connection
+        self.table = table
+        self.day_table = f"{table}_hour_day_stats"
+        self.profile_table = f"{table}_hour_profile"
+        self.state_table = f"{table}_hour_profile_state"
+
+    def create_tables(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.day_table} (
+                day DATE NOT NULL,
+                hour TINYINT NOT NULL,
+                metric VARCHAR(32) NOT NULL,
+                n INT NOT NULL,
+                s DOUBLE NOT NULL,
+                ss DOUBLE NOT NULL,
+                PRIMARY KEY (day, metric, hour)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='按天小时统计'
+            """)
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.profile_table} (
+                window_days SMALLINT NOT NULL,
+                day_type VARCHAR(8) NOT NULL COMMENT 'all / weekday / weekend',
+                hour TINYINT NOT NULL,
+                metric VARCHAR(32) NOT NULL,
+                n BIGINT NOT NULL,
+                s DOUBLE NOT NULL,
+                ss DOUBLE NOT NULL,
+                days INT NOT NULL COMMENT '有有效样本的天数',
+                PRIMARY KEY (window_days, day_type, metric, hour)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='小时典型曲线'
+            """)
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.state_table} (
+                window_days SMALLINT PRIMARY KEY,
+                anchor_day DATE NOT NULL COMMENT '窗口截止日期（含）',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='小时典型曲线窗口状态'
+            """)
+
+    def refresh_day_stats(self, start, end):
+        """重算 [start, end) 内各天的小时统计"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.day_table} WHERE day >= %s AND day < %s",
+                (start.date(), end.date())
+            )
+            for metric, (low, high) in PROFILE_METRICS.items():
+                cursor.execute(f"""
+                INSERT INTO {self.day_table} (day, hour, metric, n, s, ss)
+                SELECT DATE(collect_time), HOUR(collect_time), %s,
+                       COUNT(*), SUM({metric}), SUM({metric} * {metric})
+                FROM {self.table}
+                WHERE collect_time >= %s AND collect_time < %s
+                  AND {metric} > %s AND {metric} < %s
+                GROUP BY DATE(collect_time), HOUR(collect_time)
+                """, (metric, start, end, low, high))
+
+    def load_day_stats(self, first_day, last_day):
+        """读取 [first_day, last_day] 的按天统计"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT day, hour, metric, n, s, ss FROM {self.day_table} WHERE day >= %s AND day <= %s",
+                (first_day, last_day)
+            )
+            rows = cursor.fetchall()
+        frame = pd.DataFrame(rows, columns=['day', 'hour', 'metric', 'n', 's', 'ss'])
+        return frame.astype({'n': np.int64, 's': np.float64, 'ss': np.float64})
+
+    def latest_day(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT MAX(day) FROM {self.day_table}")
+            return cursor.fetchone()[0]
+
+    def read_anchors(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT window_days, anchor_day FROM {self.state_table}")
+            return {int(window): anchor for window, anchor in cursor.fetchall()}
+
+    def write_profile(self, window, profile, accumulate):
+        """写入窗口累计值；accumulate=True 时在已有值上累加（增量），否则覆盖"""
+        if profile.empty:
+            return
+        rows = [
+            (window, row.day_type, int(row.hour), row.metric, int(row.n), float(row.s), float(row.ss), int(row.days))
+            for row in profile.itertuples(index=False)
+        ]
+        if accumulate:
+            updates = 'n = n + VALUES(n), s = s + VALUES(s), ss = ss + VALUES(ss), days = days + VALUES(days)'
+        else:
+            updates = 'n = VALUES(n), s = VALUES(s), ss = VALUES(ss), days = VALUES(days)'
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"""
+            INSERT INTO {self.profile_table} (window_days, day_type, hour, metric, n, s, ss, days)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE {updates}
+            """, rows)
+
+    def rebuild_window(self, window, anchor):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.profile_table} WHERE window_days = %s", (window,))
+        stats = self.load_day_stats(anchor - timedelta(days=window - 1), anchor)
+        self.write_profile(window, aggregate_profile(stats), accumulate=False)
+
+    def advance_window(self, window, anchor, new_anchor):
+        """窗口截止日期从 anchor 推进到 new_anchor：加入新日期，减去滑出窗口的日期"""
+        added = aggregate_profile(self.load_day_stats(anchor + timedelta(days=1), new_anchor))
+        expired = aggregate_profile(self.load_day_stats(
+            anchor - timedelta(days=window - 1), new_anchor - timedelta(days=window)
+        ))
+        expired[STAT_COLUMNS] = -expired[STAT_COLUMNS]
+        delta = pd.concat([added, expired], ignore_index=True)
+        if delta.empty:
+            return
+        delta = delta.groupby(['day_type', 'hour', 'metric'], as_index=False)[STAT_COLUMNS].sum()
+        self.write_profile(window, delta, accumulate=True)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.profile_table} WHERE window_days = %s AND n <= 0", (window,))
+
+    def refresh(self, start, end, rebuild=False):
+        """重算 [start, end) 的按天统计，并更新各窗口"""
+        self.create_tables()
+        self.refresh_day_stats(start, end)
+
+        latest = self.latest_day()
+        if latest is None:
+            logger.info("无小时统计数据，跳过典型曲线更新")
+            return True
+
+        first_changed = start.date()
+        last_changed = (end - timedelta(days=1)).date()
+        anchors = self.read_anchors()
+
+        for window in WINDOWS:
+            anchor = anchors.get(window)
+            new_anchor = max(anchor, latest) if anchor else latest
+            # 窗口内（截止日期之前）的历史日期被改写，或推进跨度超过窗口时整窗重算
+            touches_window = anchor is not None and \
+                first_changed <= anchor and last_changed > anchor - timedelta(days=window)
+            if rebuild or anchor is None or touches_window or (new_anchor - anchor).days >= window:
+                update, mode = lambda: self.rebuild_window(window, new_anchor), '重算'
+            elif new_anchor > anchor:
+                update, mode = lambda: self.advance_window(window, anchor, new_anchor), '增量'
+            else:
+                continue
+
+            # 累计值与截止日期在同一事务中写入：增量更新后若截止日期未写入，下次会重复累加同一增量
+            self.connection.begin()
+            try:
+                update()
+                with self.connection.cursor() as cursor:
+                    cursor.execute(f"""
+                    INSERT INTO {self.state_table} (window_days, anchor_day) VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE anchor_day = VALUES(anchor_day)
+                    """, (window, new_anchor))
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+            logger.info(f"典型曲线 {window} 天窗口{mode}，截止 {new_anchor}")
+
+        return True
+
+    def refresh_range(self, start_date, end_date, rebuild=False):
+        start = datetime.strptime(start_date, '%Y%m%d')
+        end = datetime.strptime(end_date, '%Y%m%d') + timedelta(days=1)
+        return self.refresh(start, end, rebuild=rebuild)
+
+
+def main():
+    """主函数"""
+    from fuan_data_sync import TARGET_DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='小时典型曲线')
+    parser.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
+    parser.add_argument('end_date', help='结束日期，格式：YYYYMMDD')
+    parser.add_argument('--table', default='fuan_data', help='数据表名')
+    parser.add_argument('--rebuild', action='store_true', help='忽略增量状态，整窗重算')
+    args = parser.parse_args()
+
+    connection = pymysql.connect(**TARGET_DB_CONFIG)
+    try:
+        success = HourlyProfileStore(connection, args.table).refresh_range(
+            args.start_date, args.end_date, rebuild=args.rebuild
+        )
+    finally:
+        connection.close()
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
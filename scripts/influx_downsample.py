@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+InfluxDB 降采样任务管理
+由 Influx 任务持续将原始 plcData 按1分钟均值写入独立的降采样桶，同步时直接读取分钟数据，
+不必每次查询都对原始数据执行 aggregateWindow
+
+    原始桶 metricsData  --(任务，每分钟)-->  降采样桶 metricsData_1m
+
+降采样写入的时间戳与同步原来的查询一致（aggregateWindow 默认取窗口结束时间），两种数据源可互换
+任务未覆盖的时间范围（任务创建之前、任务停滞之后）同步时回退到原始数据
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+import pytz
+from influxdb_client.domain.bucket_retention_rules import BucketRetentionRules
+from influxdb_client.domain.task_create_request import TaskCreateRequest
+
+logger = logging.getLogger(__name__)
+
+UTC_TZ = pytz.UTC
+
+DOWNSAMPLE_BUCKET = 'metricsData_1m'
+DOWNSAMPLE_TASK_NAME = 'fuan_plc_downsample_1m'
+DOWNSAMPLE_EVERY = '1m'
+DOWNSAMPLE_OFFSET = '30s'        # 等待迟到数据
+DOWNSAMPLE_LOOKBACK = '-10m'     # 每次重算最近10分钟，覆盖迟到数据（同一时间戳覆盖写入）
+HEALTH_MAX_LAG = timedelta(minutes=15)
+
+# Influx 数据源选择
+INFLUX_SOURCES = ('auto', 'raw', 'downsampled')
+
+
+def format_time(value):
+    return value.astimezone(UTC_TZ).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def indicator_filter(indicators):
+    indicator_set = ', '.join(f'"{indicator}"' for indicator in indicators)
+    return f'''
+    r["_measurement"] == "plcData" and
+    r["_field"] == "value" and
+    contains(value: r["indicator_id"], set: [{indicator_set}])'''
+
+
+def build_task_flux(source_bucket, target_bucket, org, indicators):
+    return f'''option task = {{name: "{DOWNSAMPLE_TASK_NAME}", every: {DOWNSAMPLE_EVERY}, offset: {DOWNSAMPLE_OFFSET}}}
+
+from(bucket: "{source_bucket}")
+    |> range(start: {DOWNSAMPLE_LOOKBACK})
+    |> filter(fn: (r) => {indicator_filter(indicators)})
+    |> aggregateWindow(every: 1m, fn: mean, createEmpty: false)
+    |> to(bucket: "{target_bucket}", org: "{org}")
+'''
+
+
+class InfluxDownsampler:
+    def __init__(self, client, org, source_bucket, indicators, target_bucket=DOWNSAMPLE_BUCKET):
+        self.client = client
+        self.org = org
+        self.source_bucket = source_bucket
+        self.target_bucket = target_bucket
+        self.indicators = sorted(set(indicators))
+
+    def find_task(self):
+        tasks = self.client.tasks_api().find_tasks(name=DOWNSAMPLE_TASK_NAME)
+        return tasks[0] if tasks else None
+
+    def ensure_bucket(self):
+        buckets_api = self.client.buckets_api()
+        if buckets_api.find_bucket_by_name(self.target_bucket) is None:
+            buckets_api.create_bucket(
+                bucket_name=self.target_bucket,
+                org=self.org,
+                retention_rules=BucketRetentionRules(type='expire', every_seconds=0),
+                description='plcData 1分钟均值（降采样任务写入）',
+            )
+            logger.info(f"已创建降采样桶: {self.target_bucket}")
+
+    def ensure_task(self):
+        """创建任务；指标列表变化时更新任务脚本；任务被停用时重新启用"""
+        flux = build_task_flux(self.source_bucket, self.target_bucket, self.org, self.indicators)
+        tasks_api = self.client.tasks_api()
+        task = self.find_task()
+
+        if task is None:
+            task = tasks_api.create_task(task_create_request=TaskCreateRequest(
+                org=self.org, flux=flux, status='active',
+                description='福安同步：plcData 1分钟均值降采样',
+            ))
+            logger.info(f"已创建降采样任务: {DOWNSAMPLE_TASK_NAME} ({task.id})")
+            return task
+
+        if task.flux.strip() != flux.strip() or task.status != 'active':
+            task.flux = flux
+            task.status = 'active'
+            task = tasks_api.update_task(task)
+            logger.info(f"已更新降采样任务: {DOWNSAMPLE_TASK_NAME} ({task.id})")
+        return task
+
+    def backfill(self, start, end):
+        """用一次性查询补写 [start, end) 的降采样数据（按天执行，避免单次查询过大）"""
+        query_api = self.client.query_api()
+        current = start
+        while current < end:
+            chunk_end = min(current + timedelta(days=1), end)
+            query_api.query(f'''
+            from(bucket: "{self.source_bucket}")
+            |> range(start: {format_time(current)}, stop: {format_time(chunk_end)})
+            |> filter(fn: (r) => {indicator_filter(self.indicators)})
+            |> aggregateWindow(every: 1m, fn: mean, createEmpty: false)
+            |> to(bucket: "{self.target_bucket}", org: "{self.org}")
+            |> count()
+            ''', self.org)
+            logger.info(f"降采样补写: {format_time(current)} ~ {format_time(chunk_end)}")
+            current = chunk_end
+
+    def setup(self, backfill_days=0):
+        self.ensure_bucket()
+        self.ensure_task()
+        if backfill_days > 0:
+            now = datetime.now(UTC_TZ).replace(second=0, microsecond=0)
+            self.backfill(now - timedelta(days=backfill_days), now)
+        return True
+
+    def check_health(self):
+        """
+        任务状态检查，返回 (是否健康, 说明)
+        健康：任务启用、最近一次运行成功、最近完成的调度时间滞后不超过 HEALTH_MAX_LAG
+        """
+        task = self.find_task()
+        if task is None:
+            return False, '降采样任务不存在'
+        if task.status != 'active':
+            return False, f'降采样任务未启用 ({task.status})'
+        if task.last_run_status and task.last_run_status != 'success':
+            return False, f'降采样任务最近一次运行失败: {task.last_run_error}'
+        if task.latest_completed is None:
+            return False, '降采样任务尚未完成任何运行'
+
+        latest_completed = task.latest_completed
+        if latest_completed.tzinfo is None:
+            latest_completed = UTC_TZ.localize(latest_completed)
+        lag = datetime.now(UTC_TZ) - latest_completed
+        if lag > HEALTH_MAX_LAG:
+            return False, f'降采样任务滞后 {lag}'
+        return True, f'降采样任务正常，最近完成于 {format_time(latest_completed)}'
+
+    def coverage(self):
+        """
+        降采样桶已覆盖的时间范围 (起始, 截止)，UTC
+        起始取各指标最早数据时间中最晚的一个（保证所有已写入的指标都已覆盖），截止取任务最近完成的调度时间
+        任务不健康时返回 None
+        """
+        healthy, message = self.check_health()
+        if not healthy:
+            logger.warning(f"{message}，同步将读取原始数据")
+            return None
+
+        tables = self.client.query_api().query(f'''
+        from(bucket: "{self.target_bucket}")
+        |> range(start: 0)
+        |> filter(fn: (r) => {indicator_filter(self.indicators)})
+        |> first()
+        |> keep(columns: ["_time", "indicator_id"])
+        ''', self.org)
+        first_times = [record.get_time() for table in tables for record in table.records]
+        if not first_times:
+            return None
+
+        latest_completed = self.find_task().latest_completed
+        if latest_completed.tzinfo is None:
+            latest_completed = UTC_TZ.localize(latest_completed)
+        return max(first_times), latest_completed
@@ -5,15 +5,33 @@
 使用对数变换将对数关系转换为线性关系
 """
 
-import sys
-import json
 import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
+from regression_io import Records, run_cli
+from model_store import FittedModel, positive_offsets
 
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）：对 X 取对数
+PREPROCESS = ('log_x',)
 
-def logarithmic_regression(X, y, test_size=0.2, random_state=42):
+
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在训练集上对 ln(X) 线性拟合（本脚本与 regression_engine.py 共用），X_train 为已取对数的自变量
+    返回 (估计器, 结果中的系数等字段)
+    """
+    model = LinearRegression()
+    model.fit(X_train, y_train)
+    # y = intercept + coef[0]*ln(x1) + coef[1]*ln(x2) + ...
+    coefficients = {
+        'intercept': float(model.intercept_),
+        'coef': model.coef_.tolist() if len(model.coef_) > 1 else float(model.coef_[0])
+    }
+    return model, {'coefficients': coefficients}
+
+
+def logarithmic_regression(X, y, test_size=0.2, random_state=42, return_model=False):
     """
     执行对数回归分析
     模型形式: y = a + b*ln(x) 或 y = a + b1*ln(x1) + b2*ln(x2) + ...
@@ -23,6 +41,7 @@ def logarithmic_regression(X, y, test_size=0.2, random_state=42):
         y: 因变量数据 (n_samples,)
         test_size: 测试集比例
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
     
     返回:
         dict: 包含系数、R²、预测值等结果
@@ -30,6 +49,7 @@ def logarithmic_regression(X, y, test_size=0.2, random_state=42):
     # 转换为numpy数组
     X = np.array(X)
     y = np.array(y)
+    x_offset = positive_offsets(X)  # 保存模型时记录平移量，新数据使用相同的平移
     
     # 确保X中所有值都是正数（对数回归要求）
     if np.any(X <= 0):
@@ -53,8 +73,7 @@ def logarithmic_regression(X, y, test_size=0.2, random_state=42):
     )[0:2]
     
     # 训练线性回归模型（对log(X)）
-    model = LinearRegression()
-    model.fit(log_X_train, y_train)
+    model, details = fit_model(log_X_train, y_train, random_state=random_state)
     
     # 预测
     y_pred_train = model.predict(log_X_train)
@@ -67,68 +86,46 @@ def logarithmic_regression(X, y, test_size=0.2, random_state=42):
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 获取系数
-    # y = intercept + coef[0]*ln(x1) + coef[1]*ln(x2) + ...
-    intercept = model.intercept_
-    coef = model.coef_
-    
-    coefficients = {
-        'intercept': float(intercept),
-        'coef': coef.tolist() if len(coef) > 1 else float(coef[0])
-    }
-    
     # 计算散点图数据（使用测试集）
-    scatter_data = [
-        {'actual': float(y_test[i]), 'predicted': float(y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    scatter_data = Records(actual=y_test, predicted=y_pred_test)
     
     # 计算残差数据（使用测试集）
-    residuals_data = [
-        {'predicted': float(y_pred_test[i]), 'residual': float(y_test[i] - y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    residuals_data = Records(predicted=y_pred_test, residual=y_test - y_pred_test)
     
-    return {
-        'coefficients': coefficients,
+    result = {
+        **details,
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': y_pred_all.tolist(),
+        'predictions': y_pred_all,
         'scatter_data': scatter_data,
         'residuals_data': residuals_data
     }
+    if return_model:
+        result['model'] = FittedModel('logarithmic', model, x_offset=x_offset, log_x=True)
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    test_size = input_data.get('test_size', 0.2)
+    random_state = input_data.get('random_state', 42)
+    save_model = input_data.get('save_model', False)
+
+    # 执行对数回归
+    return logarithmic_regression(X, y, test_size, random_state, return_model=save_model)
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        test_size = input_data.get('test_size', 0.2)
-        random_state = input_data.get('random_state', 42)
-        
-        # 执行对数回归
-        result = logarithmic_regression(X, y, test_size, random_state)
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
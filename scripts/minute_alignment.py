@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分钟网格对齐（as-of 模式）
+压力计上报不规则时，按分钟取整求均值会偏向上报密集的时段，并留下空分钟。
+此模块对所有压力计一次性向量化处理：
+
+    1. 按各压力计的时钟偏差修正采集时间
+    2. 用有序 as-of 连接（merge_asof，按 sn 分组，带容差）找到每个分钟边界前后最近的读数，线性插值出边界值
+    3. 边界值与分钟内的读数合并，按梯形积分求时间加权均值
+
+容差内没有读数的分钟保持缺失，不会跨越长时间断点插值
+"""
+
+import numpy as np
+import pandas as pd
+
+ALIGN_MODES = ('floor', 'asof')
+DEFAULT_TOLERANCE_SECONDS = 180
+
+
+def interpolate_at(readings, times, keys, tolerance):
+    """
+    在 (key, time) 处线性插值：前后最近读数均在容差内时按时间加权插值，只有一侧时取该侧读数
+    readings: 列 key / time / value，已按 time 排序
+    """
+    targets = pd.DataFrame({'key': keys, 'time': times.astype('datetime64[ns]')}).sort_values('time', kind='stable')
+    before = readings.rename(columns={'time': 't0', 'value': 'v0'})
+    after = readings.rename(columns={'time': 't1', 'value': 'v1'})
+
+    merged = pd.merge_asof(targets, before, left_on='time', right_on='t0', by='key',
+                           direction='backward', tolerance=tolerance)
+    merged = pd.merge_asof(merged, after, left_on='time', right_on='t1', by='key',
+                           direction='forward', tolerance=tolerance)
+
+    span = (merged['t1'] - merged['t0']).dt.total_seconds().to_numpy()
+    offset = (merged['time'] - merged['t0']).dt.total_seconds().to_numpy()
+    v0 = merged['v0'].to_numpy(dtype=np.float64)
+    v1 = merged['v1'].to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(span > 0, offset / span, 0.0)
+    value = np.where(np.isnan(v0), v1, np.where(np.isnan(v1), v0, v0 + (v1 - v0) * weight))
+
+    return pd.DataFrame({'key': merged['key'].to_numpy(), 'time': merged['time'].to_numpy(), 'value': value})
+
+
+def asof_minute_grid(df, grid, key_col='sn', time_col='collect_time', value_col='press',
+                     tolerance_seconds=DEFAULT_TOLERANCE_SECONDS, clock_offsets=None):
+    """
+    将长表读数对齐到分钟网格，返回 index 为分钟、列为 key 的时间加权均值宽表
+    clock_offsets: {key: 秒}，正值表示该表时钟偏快，采集时间减去偏差后再对齐
+    """
+    if df.empty:
+        return pd.DataFrame(index=grid)
+
+    readings = pd.DataFrame({
+        'key': df[key_col].astype(str).to_numpy(),
+        'time': pd.to_datetime(df[time_col]).to_numpy().astype('datetime64[ns]'),
+        'value': pd.to_numeric(df[value_col], errors='coerce').to_numpy(dtype=np.float64),
+    })
+    if clock_offsets:
+        skew = readings['key'].map(clock_offsets).fillna(0).to_numpy(dtype=np.float64)
+        readings['time'] = readings['time'] - pd.to_timedelta(skew, unit='s')
+    readings = readings.dropna(subset=['value']).sort_values('time', kind='stable').reset_index(drop=True)
+
+    keys = readings['key'].unique()
+    tolerance = pd.Timedelta(seconds=tolerance_seconds)
+
+    # 分钟边界（含最后一分钟的结束边界）× 压力计，一次插值
+    edges = grid.append(pd.DatetimeIndex([grid[-1] + pd.Timedelta(minutes=1)])) if len(grid) else grid
+    edge_values = interpolate_at(readings, np.tile(edges.to_numpy(), len(keys)),
+                                 np.repeat(keys, len(edges)), tolerance)
+
+    # 边界点同时是本分钟的起点和上一分钟的终点
+    starts = edge_values.assign(minute=edge_values['time'])
+    ends = edge_values.assign(minute=edge_values['time'] - pd.Timedelta(minutes=1))
+    inner = readings.assign(minute=readings['time'].dt.floor('min'))
+    points = pd.concat([starts, inner, ends], ignore_index=True)
+    points = points[points['minute'].isin(grid) & points['value'].notna()]
+    points = points.sort_values(['key', 'minute', 'time'], kind='stable').reset_index(drop=True)
+
+    # 梯形积分：同一 (key, minute) 内相邻两点构成一段
+    times = points['time'].to_numpy()
+    values = points['value'].to_numpy(dtype=np.float64)
+    same = np.zeros(len(points), dtype=bool)
+    if len(points) > 1:
+        same[1:] = (points['key'].to_numpy()[1:] == points['key'].to_numpy()[:-1]) & \
+                   (points['minute'].to_numpy()[1:] == points['minute'].to_numpy()[:-1])
+    dt = np.zeros(len(points))
+    area = np.zeros(len(points))
+    if len(points) > 1:
+        dt[1:] = (times[1:] - times[:-1]) / np.timedelta64(1, 's')
+        area[1:] = (values[1:] + values[:-1]) / 2 * dt[1:]
+    points['dt'] = np.where(same, dt, 0.0)
+    points['area'] = np.where(same, area, 0.0)
+
+    grouped = points.groupby(['minute', 'key']).agg(area=('area', 'sum'), dt=('dt', 'sum'), mean=('value', 'mean'))
+    # 只有单点（或同一时刻多点）的分钟没有时间跨度，退化为算术均值
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weighted = np.where(grouped['dt'] > 0, grouped['area'] / grouped['dt'], grouped['mean'])
+    grouped['value'] = weighted
+
+    return grouped['value'].unstack('key').reindex(grid)
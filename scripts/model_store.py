@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已拟合回归模型的持久化与批量预测
+回归脚本输入中带 "save_model": true 时，把拟合好的估计器连同标准化器、多项式特征、
+对数变换的平移量一起保存，结果中返回 model_id；之后可直接用该模型对新数据打分，不需要重新拟合
+
+模型保存在源码目录之外的 ~/.local/share/fuan/models/（可用环境变量 FUAN_MODEL_DIR 指定）：<id>.joblib 为模型，<id>.json 为元数据
+
+调用方式（stdin JSON，常驻 worker 中已加载的模型会保留在内存中）:
+    {"action": "predict", "model_id": "...", "X": [[...], ...]}                  # 对给定行打分
+    {"action": "predict", "model_id": "...", "start_date": "...", "end_date": "..."}  # 按模型的字段和筛选条件查询新数据打分
+    {"action": "list"}
+    {"action": "info", "model_id": "..."}
+    {"action": "delete", "model_id": "..."}
+    {"action": "update", "model_id": "...", "start_date": "...", "end_date": "..."}  # 线性族模型在线更新（见 online_models.py）
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+
+import joblib
+import numpy as np
+import sklearn
+
+from regression_io import run_cli
+
+MODEL_ROOT = os.environ.get(
+    'FUAN_MODEL_DIR',
+    os.path.join(os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share'), 'fuan', 'models')
+)
+MODEL_ID_PATTERN = re.compile(r'^[a-z_]+-\d{8}T\d{6}-[0-9a-f]{8}$')
+# 常驻 worker 中保留在内存中的模型数
+MEMORY_CACHE_SIZE = 16
+METRIC_KEYS = ('r2_train', 'r2_test', 'mse_train', 'mse_test')
+
+_loaded = OrderedDict()
+
+
+class FittedModel:
+    """
+    可直接预测的拟合模型：输入变换 → 估计器 → 输出逆变换
+    各步骤与回归脚本中的处理一致，变换参数（平移量、标准化器等）均取自训练数据，对新数据不重新计算
+
+    x_offset: 对数变换前对 X 各列的平移量（未平移的列为 0）
+    y_offset: 对数变换前对 y 的平移量；预测时减去，结果为原始尺度
+    """
+
+    def __init__(self, model_type, estimator, x_offset=None, log_x=False, features=None,
+                 x_scaler=None, y_scaler=None, log_y=False, y_offset=0.0):
+        self.model_type = model_type
+        self.estimator = estimator
+        self.x_offset = None if x_offset is None else np.asarray(x_offset, dtype=np.float64)
+        self.log_x = log_x
+        self.features = features
+        self.x_scaler = x_scaler
+        self.y_scaler = y_scaler
+        self.log_y = log_y
+        self.y_offset = float(y_offset)
+
+    def transform_X(self, X):
+        """输入变换到估计器的特征空间"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.x_offset is not None:
+                X = X + self.x_offset
+            if self.log_x:
+                X = np.log(X)
+            if self.features is not None:
+                X = self.features.transform(X)
+            if self.x_scaler is not None:
+                X = self.x_scaler.transform(X)
+        return X
+
+    def transform_y(self, y):
+        """目标值变换到估计器的尺度（输出逆变换的反向，用于在线更新，见 online_models.py）"""
+        y = np.asarray(y, dtype=np.float64) + self.y_offset
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.log_y:
+                y = np.log(y)
+            if self.y_scaler is not None:
+                y = self.y_scaler.transform(y.reshape(-1, 1)).ravel()
+        return y
+
+    def predict(self, X):
+        """
+        预测；变换后不在模型定义域内的行（如对数/幂函数模型平移后 X <= 0，或含缺失值）不送入估计器，
+        预测值为 NaN，不影响同批其他行
+        """
+        features = self.transform_X(X)
+        valid = np.isfinite(features).all(axis=1)
+        y = np.full(len(features), np.nan)
+        if valid.any():
+            y[valid] = self.estimator.predict(features[valid])
+        with np.errstate(invalid='ignore', over='ignore'):
+            if self.y_scaler is not None:
+                y = self.y_scaler.inverse_transform(y.reshape(-1, 1)).ravel()
+            if self.log_y:
+                y = np.exp(y)
+        return y - self.y_offset
+
+
+def positive_offsets(X):
+    """与回归脚本一致：最小值 <= 0 的列平移 -min + 1，返回各列平移量"""
+    X_min = np.min(X, axis=0)
+    return np.where(X_min <= 0, -X_min + 1, 0.0)
+
+
+def positive_offset(y):
+    y_min = np.min(y)
+    return float(-y_min + 1) if y_min <= 0 else 0.0
+
+
+class ModelStoreError(ValueError):
+    """模型 id 无效或模型不存在，status 供接口返回（见 regression_io.error_payload）"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _paths(model_id, root=MODEL_ROOT):
+    return os.path.join(root, f'{model_id}.joblib'), os.path.join(root, f'{model_id}.json')
+
+
+def _check_id(model_id):
+    if not isinstance(model_id, str) or not MODEL_ID_PATTERN.match(model_id):
+        raise ModelStoreError(f"无效的模型 id: {model_id}")
+
+
+def save_model(model, meta, root=MODEL_ROOT):
+    """保存模型和元数据，返回模型 id（<类型>-<时间>-<哈希>）"""
+    now = datetime.now()
+    digest = hashlib.sha1(json.dumps(meta, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(str(now.timestamp()).encode())
+    model_id = f"{model.model_type}-{now:%Y%m%dT%H%M%S}-{digest.hexdigest()[:8]}"
+
+    meta = {
+        'model_id': model_id,
+        'model_type': model.model_type,
+        'created_at': now.isoformat(timespec='seconds'),
+        'sklearn_version': sklearn.__version__,
+        **meta,
+    }
+    write_model(model_id, model, meta, root)
+    return model_id
+
+
+def write_model(model_id, model, meta, root=MODEL_ROOT):
+    """写入模型和元数据（先写临时文件再替换；在线更新时原地覆盖）"""
+    os.makedirs(root, exist_ok=True)
+    model_path, meta_path = _paths(model_id, root)
+    for path, write in (
+        (model_path, lambda tmp: joblib.dump(model, tmp)),
+        (meta_path, lambda tmp: _dump_json(meta, tmp)),
+    ):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    _loaded.pop(model_id, None)
+
+
+def _dump_json(meta, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+
+
+def save_from_result(result, script, params, dataset=None):
+    """
+    取出回归结果中的 model 并保存，结果中改为 model_id
+    params 为回归输入（不含数据），dataset 为数据集描述（以描述调用时）
+    """
+    model = result.pop('model')
+    hyperparameters = {
+        key: value for key, value in params.items()
+        if key not in ('X', 'y', 'X_fields', 'save_model', 'cache', 'max_points', 'online')
+    }
+    meta = {
+        'script': script,
+        'x_fields': list(params.get('X_fields') or []),
+        'params': hyperparameters,
+        'metrics': {key: result[key] for key in METRIC_KEYS if key in result},
+        'n_samples': int(len(params['y'])) if 'y' in params else None,
+    }
+    if dataset is not None:
+        meta['dataset'] = dataset
+        meta['y_field'] = dataset.get('y_field')
+    if params.get('online'):
+        # 在线更新（线性族模型）：以本次全部数据初始化充分统计量，之后每次同步后吸收新数据
+        from online_models import enable_online
+        options = params['online'] if isinstance(params['online'], dict) else {}
+        meta['online'] = enable_online(model, params['X'], params['y'], options.get('half_life_days'),
+                                       dataset.get('end_date') if dataset else None)
+    result['model_id'] = save_model(model, meta)
+    return result
+
+
+def read_meta(model_id, root=MODEL_ROOT):
+    _check_id(model_id)
+    try:
+        with open(_paths(model_id, root)[1], encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ModelStoreError(f"模型不存在: {model_id}", status=404)
+
+
+def load_model(model_id, root=MODEL_ROOT):
+    """
+    读取模型（常驻 worker 中保留最近使用的模型，重复打分不再读取文件）
+    模型文件被在线更新改写后（修改时间变化）重新读取
+    """
+    _check_id(model_id)
+    model_path = _paths(model_id, root)[0]
+    try:
+        mtime = os.stat(model_path).st_mtime_ns
+    except FileNotFoundError:
+        _loaded.pop(model_id, None)
+        raise ModelStoreError(f"模型不存在: {model_id}", status=404)
+    if model_id in _loaded and _loaded[model_id][0] == mtime:
+        _loaded.move_to_end(model_id)
+        return _loaded[model_id][1]
+    model = joblib.load(model_path)
+    _loaded[model_id] = (mtime, model)
+    _loaded.move_to_end(model_id)
+    while len(_loaded) > MEMORY_CACHE_SIZE:
+        _loaded.popitem(last=False)
+    return model
+
+
+def list_models(root=MODEL_ROOT):
+    if not os.path.isdir(root):
+        return []
+    models = []
+    for name in sorted(os.listdir(root)):
+        if name.endswith('.json'):
+            with open(os.path.join(root, name), encoding='utf-8') as f:
+                models.append(json.load(f))
+    models.sort(key=lambda meta: meta.get('created_at', ''), reverse=True)
+    return models
+
+
+def delete_model(model_id, root=MODEL_ROOT):
+    _check_id(model_id)
+    _loaded.pop(model_id, None)
+    removed = False
+    for path in _paths(model_id, root):
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+    if not removed:
+        raise ModelStoreError(f"模型不存在: {model_id}", status=404)
+    return removed
+
+
+def load_scoring_rows(meta, start_date, end_date):
+    """按模型训练时的字段和筛选条件（不做异常值过滤）查询新数据，返回 (时间, X, y)"""
+    from dataset_loader import get_connection, load_rows, normalize_spec
+
+    if 'dataset' not in meta:
+        raise ValueError("该模型不是由数据集描述训练的，请直接传入 X")
+    spec = normalize_spec({
+        **meta['dataset'],
+        'start_date': start_date,
+        'end_date': end_date,
+        'outlier': {'method': 'none'},
+    })
+    times, values = load_rows(get_connection(), spec)
+    mask = np.isfinite(values).all(axis=1)
+    k = len(spec['x_fields'])
+    return times[mask], values[mask, :k], values[mask, k]
+
+
+def prediction_fields(predictions):
+    """
+    打分结果中的预测值：无法预测的行（超出模型定义域、含缺失值）为 null，并给出行数和原因
+    全部有效时保持为数组（大结果可走二进制帧）
+    """
+    invalid = ~np.isfinite(predictions)
+    fields = {'count': len(predictions), 'invalid_count': int(invalid.sum()), 'predictions': predictions}
+    if invalid.any():
+        fields['predictions'] = [None if bad else float(v) for v, bad in zip(predictions, invalid)]
+        fields['invalid_reason'] = '输入超出模型定义域（对数/幂函数模型的 X 平移后 <= 0）或含缺失值，预测值为 null'
+    return fields
+
+
+def predict(input_data):
+    model_id = input_data['model_id']
+    meta = read_meta(model_id)
+    model = load_model(model_id)
+
+    if 'X' in input_data:
+        predictions = model.predict(input_data['X'])
+        return {'model_id': model_id, **prediction_fields(predictions)}
+
+    times, X, y = load_scoring_rows(meta, input_data['start_date'], input_data['end_date'])
+    predictions = model.predict(X) if len(X) else np.empty(0)
+    result = {
+        'model_id': model_id,
+        'collect_time': [str(t) for t in times.astype('datetime64[s]')],
+        'actual': y,
+        **prediction_fields(predictions),
+    }
+    valid = np.isfinite(predictions)
+    if valid.any():
+        residual = y[valid] - predictions[valid]
+        result['mae'] = float(np.mean(np.abs(residual)))
+        result['rmse'] = float(np.sqrt(np.mean(residual ** 2)))
+    return result
+
+
+def handle(input_data):
+    """任务入口（命令行与常驻 worker 共用）"""
+    action = input_data.get('action', 'predict')
+    if action == 'predict':
+        return predict(input_data)
+    if action == 'list':
+        return {'models': list_models()}
+    if action == 'info':
+        return read_meta(input_data['model_id'])
+    if action == 'delete':
+        return {'model_id': input_data['model_id'], 'deleted': delete_model(input_data['model_id'])}
+    if action == 'update':
+        from online_models import update_handle
+        return update_handle(input_data)
+    raise ValueError(f"不支持的操作: {action}")
+
+
+def main():
+    run_cli(handle)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,17 +4,20 @@
 通过命令行接收JSON格式的数据，执行神经网络回归分析，返回JSON格式的结果
 """
 
-import sys
-import json
 import numpy as np
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
 import warnings
+from regression_io import Records, run_cli
+from model_store import FittedModel
 
 warnings.filterwarnings('ignore')
 
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）：X 和 y 按训练集标准化
+PREPROCESS = ('scale',)
+
 
 def calculate_feature_importance(model, scaler_X, X_train, y_train):
     """
@@ -37,7 +40,61 @@ def calculate_feature_importance(model, scaler_X, X_train, y_train):
         return [1.0 / X_train.shape[1]] * X_train.shape[1]
 
 
-def neural_network_regression(X, y, X_fields, hidden_layers=(100, 50), max_iter=1000, random_state=42):
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在标准化后的训练集上拟合神经网络（本脚本与 regression_engine.py 共用）
+    params: hidden_layers、max_iter、X_fields（特征重要性的字段名）
+    返回 (估计器, 结果中的特征重要性、网络结构、迭代次数、损失曲线)
+    """
+    params = params or {}
+    hidden_layers = params.get('hidden_layers', (100, 50))
+    # hidden_layers 可能是元组、列表或单个整数，统一转换为列表
+    hidden_layers_list = list(hidden_layers) if isinstance(hidden_layers, (tuple, list)) else [hidden_layers]
+    X_fields = params.get('X_fields') or [f'x{i + 1}' for i in range(X_train.shape[1])]
+
+    # 创建神经网络模型
+    model = MLPRegressor(
+        hidden_layer_sizes=tuple(hidden_layers_list),
+        max_iter=int(params.get('max_iter', 1000)),
+        random_state=random_state,
+        alpha=0.001,
+        learning_rate_init=0.001,
+        solver='adam',
+        activation='relu',
+        early_stopping=True,
+        validation_fraction=0.1,
+        n_iter_no_change=10,
+        verbose=False
+    )
+    model.fit(X_train, y_train)
+
+    # 计算特征重要性
+    feature_importance_values = calculate_feature_importance(model, None, X_train, y_train)
+    feature_importance = {
+        X_fields[i]: float(feature_importance_values[i])
+        for i in range(len(X_fields))
+    }
+
+    # 获取损失曲线（如果可用）
+    loss_curve = None
+    if hasattr(model, 'loss_curve_'):
+        loss_curve_data = model.loss_curve_
+        # 确保转换为列表
+        if isinstance(loss_curve_data, list):
+            loss_curve = loss_curve_data
+        else:
+            loss_curve = loss_curve_data.tolist() if hasattr(loss_curve_data, 'tolist') else list(loss_curve_data)
+
+    return model, {
+        'feature_importance': feature_importance,
+        'layers': [X_train.shape[1]] + hidden_layers_list + [1],
+        'iterations': int(model.n_iter_),
+        'loss_curve': loss_curve
+    }
+
+
+def neural_network_regression(X, y, X_fields, hidden_layers=(100, 50), max_iter=1000, random_state=42,
+                              return_model=False):
     """
     执行神经网络回归分析
     
@@ -48,6 +105,7 @@ def neural_network_regression(X, y, X_fields, hidden_layers=(100, 50), max_iter=
         hidden_layers: 隐藏层结构，例如 (100, 50)
         max_iter: 最大迭代次数
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
     
     返回:
         dict: 包含R²、MSE、预测值、特征重要性等结果
@@ -69,23 +127,9 @@ def neural_network_regression(X, y, X_fields, hidden_layers=(100, 50), max_iter=
     X_test_scaled = scaler_X.transform(X_test)
     y_train_scaled = scaler_y.fit_transform(y_train.reshape(-1, 1)).ravel()
     
-    # 创建神经网络模型
-    model = MLPRegressor(
-        hidden_layer_sizes=hidden_layers,
-        max_iter=max_iter,
-        random_state=random_state,
-        alpha=0.001,
-        learning_rate_init=0.001,
-        solver='adam',
-        activation='relu',
-        early_stopping=True,
-        validation_fraction=0.1,
-        n_iter_no_change=10,
-        verbose=False
-    )
-    
-    # 训练模型
-    model.fit(X_train_scaled, y_train_scaled)
+    # 创建并训练神经网络模型
+    params = {'hidden_layers': hidden_layers, 'max_iter': max_iter, 'X_fields': X_fields}
+    model, details = fit_model(X_train_scaled, y_train_scaled, params, random_state)
     
     # 预测（训练集）
     y_pred_train_scaled = model.predict(X_train_scaled)
@@ -106,76 +150,45 @@ def neural_network_regression(X, y, X_fields, hidden_layers=(100, 50), max_iter=
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 计算特征重要性
-    feature_importance_values = calculate_feature_importance(model, scaler_X, X_train, y_train)
-    feature_importance = {
-        X_fields[i]: float(feature_importance_values[i])
-        for i in range(len(X_fields))
-    }
-    
-    # 获取网络结构信息
-    # hidden_layers 可能是元组或列表，统一转换为列表
-    hidden_layers_list = list(hidden_layers) if isinstance(hidden_layers, (tuple, list)) else [hidden_layers]
-    layers = [X.shape[1]] + hidden_layers_list + [1]
-    
-    # 获取训练迭代次数
-    n_iter = model.n_iter_
-    
-    # 获取损失曲线（如果可用）
-    loss_curve = None
-    if hasattr(model, 'loss_curve_'):
-        loss_curve_data = model.loss_curve_
-        # 确保转换为列表
-        if isinstance(loss_curve_data, list):
-            loss_curve = loss_curve_data
-        else:
-            loss_curve = loss_curve_data.tolist() if hasattr(loss_curve_data, 'tolist') else list(loss_curve_data)
-    
-    return {
+    result = {
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': y_pred_all.tolist(),
-        'feature_importance': feature_importance,
-        'layers': layers,
-        'iterations': int(n_iter),
-        'loss_curve': loss_curve
+        'predictions': y_pred_all,
+        'scatter_data': Records(actual=y_test, predicted=y_pred_test),
+        'residuals_data': Records(predicted=y_pred_test, residual=y_test - y_pred_test),
+        **details
     }
+    if return_model:
+        result['model'] = FittedModel('neural_network', model, x_scaler=scaler_X, y_scaler=scaler_y)
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    X_fields = input_data.get('X_fields', [f'x{i+1}' for i in range(len(X[0]))])
+    hidden_layers = tuple(input_data.get('hidden_layers', [100, 50]))
+    max_iter = input_data.get('max_iter', 1000)
+    random_state = input_data.get('random_state', 42)
+    save_model = input_data.get('save_model', False)
+
+    # 执行神经网络回归
+    return neural_network_regression(
+        X, y, X_fields, hidden_layers, max_iter, random_state,
+        return_model=save_model
+    )
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        X_fields = input_data.get('X_fields', [f'x{i+1}' for i in range(len(X[0]))])
-        hidden_layers = tuple(input_data.get('hidden_layers', [100, 50]))
-        max_iter = input_data.get('max_iter', 1000)
-        random_state = input_data.get('random_state', 42)
-        
-        # 执行神经网络回归
-        result = neural_network_regression(
-            X, y, X_fields, hidden_layers, max_iter, random_state
-        )
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
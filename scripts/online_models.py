@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+线性族模型的在线更新（充分统计量 + 指数遗忘）
+linear / polynomial / exponential / logarithmic / power / ridge 在各自的特征空间中都是线性最小二乘，
+保存的模型只需记住 A = ZᵀZ 和 b = Zᵀt（Z 为变换后的特征加截距列，t 为变换后的目标值），
+新同步的一天数据按 A ← d·A + Z_newᵀZ_new、b ← d·b + Z_newᵀt_new 吸收（每行 O(p²)），
+再解 (A + αI) θ = b 得到新系数（p 为特征数，求解与历史数据量无关）。与带遗忘因子的递推最小二乘（RLS）等价，
+但不递推协方差矩阵，长期运行数值更稳定
+
+- 遗忘：half_life_days 为空时不遗忘（等价于用全部历史数据重新拟合）；否则每过一天旧数据的权重乘以 0.5^(1/half_life_days)
+- 输入变换（多项式特征、标准化器、对数平移量）固定为初次拟合时的值，只更新系数
+- 每次更新在模型元数据中追加一条系数记录（coefficient_history），可按天跟踪系数变化
+- 已吸收过的日期不会重复吸收（重新同步旧日期不会改写模型）
+
+保存模型时输入中带 "online": true 或 {"half_life_days": 30} 即启用；同步完成后自动吸收同步日期的数据
+
+用法:
+    python3 online_models.py update <model_id> 20260101 20260131   # 手动吸收指定日期的数据
+    python3 online_models.py refresh 20260101 20260131             # 更新全部启用在线更新的模型（同步后任务）
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from model_store import list_models, load_model, read_meta, write_model
+
+logger = logging.getLogger(__name__)
+
+ONLINE_TYPES = ('linear', 'polynomial', 'exponential', 'logarithmic', 'power', 'ridge')
+# 元数据中保留的系数记录条数
+HISTORY_LIMIT = 3650
+
+
+class OnlineState:
+    """充分统计量：A = Σ d^k ZᵀZ，b = Σ d^k Zᵀt，rows 为累计行数（未加权）"""
+
+    def __init__(self, n_features, intercept, penalty=0.0, half_life_days=None):
+        self.intercept = intercept
+        self.penalty = float(penalty)
+        self.half_life_days = half_life_days
+        size = n_features + (1 if intercept else 0)
+        self.A = np.zeros((size, size))
+        self.b = np.zeros(size)
+        self.rows = 0
+        self.updated_through = None
+
+    def decay(self, days):
+        if not self.half_life_days or days <= 0:
+            return 1.0
+        return 0.5 ** (days / float(self.half_life_days))
+
+    def design(self, features):
+        if self.intercept:
+            return np.column_stack([np.ones(len(features)), features])
+        return features
+
+    def absorb(self, features, target, through=None):
+        """吸收一批数据；through 为这批数据的日期，与上次更新日期之间的天数用于遗忘"""
+        if through is not None and self.updated_through is not None:
+            factor = self.decay((through - self.updated_through).days)
+            self.A *= factor
+            self.b *= factor
+        Z = self.design(features)
+        self.A += Z.T @ Z
+        self.b += Z.T @ target
+        self.rows += len(target)
+        if through is not None:
+            self.updated_through = through
+
+    def solve(self):
+        """(A + αI) θ = b，截距不加惩罚；返回 (截距, 系数)"""
+        penalty = np.full(len(self.b), self.penalty)
+        if self.intercept:
+            penalty[0] = 0.0
+        theta = np.linalg.lstsq(self.A + np.diag(penalty), self.b, rcond=None)[0]
+        if self.intercept:
+            return float(theta[0]), theta[1:]
+        return 0.0, theta
+
+
+def _parse_date(value):
+    """YYYYMMDD / YYYY-MM-DD（可带时分秒）转为日期"""
+    value = str(value)
+    if len(value) == 8 and value.isdigit():
+        return datetime.strptime(value, '%Y%m%d').date()
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+def training_rows(model, X, y):
+    """新数据变换到模型的特征空间和目标尺度，去掉变换后无效的行（如对数模型的非正值）"""
+    features = model.transform_X(X)
+    target = model.transform_y(y)
+    mask = np.isfinite(features).all(axis=1) & np.isfinite(target)
+    return features[mask], target[mask]
+
+
+def apply_state(model):
+    """用充分统计量的解替换估计器系数"""
+    intercept, coef = model.online.solve()
+    model.estimator.coef_ = coef
+    model.estimator.intercept_ = intercept
+
+
+def state_summary(state):
+    return {
+        'half_life_days': state.half_life_days,
+        'rows': int(state.rows),
+        'updated_through': state.updated_through.isoformat() if state.updated_through else None,
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def coefficient_record(model):
+    estimator = model.estimator
+    return {
+        'through': model.online.updated_through.isoformat() if model.online.updated_through else None,
+        'rows': int(model.online.rows),
+        'intercept': float(estimator.intercept_),
+        'coef': np.atleast_1d(estimator.coef_).tolist(),
+    }
+
+
+def enable_online(model, X, y, half_life_days=None, through=None):
+    """
+    为线性族模型建立在线更新状态（保存模型时调用），以本次全部数据初始化充分统计量
+    返回写入元数据的在线更新信息
+    """
+    if model.model_type not in ONLINE_TYPES:
+        raise ValueError(f"{model.model_type} 模型不支持在线更新（支持: {', '.join(ONLINE_TYPES)}）")
+    features, target = training_rows(model, X, y)
+    estimator = model.estimator
+    model.online = OnlineState(
+        features.shape[1],
+        intercept=bool(getattr(estimator, 'fit_intercept', True)),
+        penalty=getattr(estimator, 'alpha', 0.0) if model.model_type == 'ridge' else 0.0,
+        half_life_days=half_life_days,
+    )
+    model.online.absorb(features, target, _parse_date(through) if through else None)
+    return state_summary(model.online)
+
+
+def update_model(model_id, batches):
+    """
+    吸收若干批数据并原地保存模型：batches 为 [(日期, X, y)]，按日期升序
+    已吸收过的日期跳过；返回本次吸收的行数
+    """
+    meta = read_meta(model_id)
+    model = load_model(model_id)
+    state = getattr(model, 'online', None)
+    if state is None:
+        raise ValueError(f"模型未启用在线更新: {model_id}")
+
+    absorbed = 0
+    history = meta.setdefault('coefficient_history', [])
+    for day, X, y in batches:
+        if day is not None and state.updated_through is not None and day <= state.updated_through:
+            continue
+        features, target = training_rows(model, X, y)
+        if not len(target):
+            continue
+        state.absorb(features, target, day)
+        apply_state(model)
+        history.append(coefficient_record(model))
+        absorbed += len(target)
+
+    if absorbed:
+        meta['coefficient_history'] = history[-HISTORY_LIMIT:]
+        meta['online'] = state_summary(state)
+        write_model(model_id, model, meta)
+    return absorbed
+
+
+def daily_batches(meta, start_date, end_date):
+    """按模型的数据集描述逐天加载（异常值规则与训练时一致），无数据的日期跳过"""
+    from dataset_loader import DatasetError, load_dataset
+
+    if 'dataset' not in meta:
+        raise ValueError("该模型不是由数据集描述训练的，请直接传入 X / y")
+    day, end = _parse_date(start_date), _parse_date(end_date)
+    while day <= end:
+        spec = {**meta['dataset'], 'start_date': f'{day} 00:00:00', 'end_date': f'{day} 23:59:59'}
+        try:
+            dataset = load_dataset(spec)
+        except DatasetError as e:
+            logger.info(f"{meta['model_id']} {day} 无可用数据: {e}")
+        else:
+            yield day, dataset.X, dataset.y
+        day += timedelta(days=1)
+
+
+def update_from_range(model_id, start_date, end_date):
+    meta = read_meta(model_id)
+    return update_model(model_id, daily_batches(meta, start_date, end_date))
+
+
+def refresh_range(start_date, end_date):
+    """同步后任务：更新全部启用在线更新的模型，返回 {模型 id: 吸收行数}"""
+    updated = {}
+    for meta in list_models():
+        if not meta.get('online'):
+            continue
+        try:
+            updated[meta['model_id']] = update_from_range(meta['model_id'], start_date, end_date)
+        except Exception as e:
+            logger.error(f"模型在线更新失败 {meta['model_id']}: {e}")
+    logger.info(f"在线更新 {len(updated)} 个模型: {start_date} ~ {end_date}")
+    return updated
+
+
+def update_handle(input_data):
+    """model_store.py 的 update 操作：传 start_date / end_date 按数据集描述逐天吸收，或直接传 X / y"""
+    model_id = input_data['model_id']
+    if 'y' in input_data:
+        through = input_data.get('through')
+        absorbed = update_model(model_id, [(_parse_date(through) if through else None,
+                                            input_data['X'], input_data['y'])])
+    else:
+        absorbed = update_from_range(model_id, input_data['start_date'], input_data['end_date'])
+    meta = read_meta(model_id)
+    return {
+        'model_id': model_id,
+        'absorbed_rows': absorbed,
+        'online': meta.get('online'),
+        'coefficient_history': meta.get('coefficient_history', []),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='线性族模型在线更新')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    update_parser = subparsers.add_parser('update', help='吸收指定日期的数据')
+    update_parser.add_argument('model_id')
+    refresh_parser = subparsers.add_parser('refresh', help='更新全部启用在线更新的模型')
+    for sub in (update_parser, refresh_parser):
+        sub.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
+        sub.add_argument('end_date', help='结束日期，格式：YYYYMMDD')
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        absorbed = update_from_range(args.model_id, args.start_date, args.end_date)
+        logger.info(f"{args.model_id} 吸收 {absorbed} 行")
+    else:
+        refresh_range(args.start_date, args.end_date)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
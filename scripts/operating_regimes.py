@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行工况区间表
+将分钟数据按 运行中的泵组合 × 各泵频率档 × 阀门开度档 划分为连续区间，写入 <表名>_regimes 表，
+分析时可按区间关联（如"只有1#泵运行"），前端可直接列出工况，不需要逐分钟扫描
+
+工况编码:
+    pump_mask   运行中的泵（位掩码）：1 = 1#泵 (i_1049)，2 = 2#泵 (i_1050)，4 = 辅泵 (i_1051)
+    *_band      频率档下限（FREQ_BAND_HZ 赫兹一档，未运行为 NULL）
+    valve_band  阀门开度 (i_1098) 档下限（VALVE_BAND 一档）
+
+区间用向量化游程编码（run-length encoding）计算；同步后只重算同步日期及其前后相邻的区间
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PUMP_COLUMNS = {
+    'pump1': ('i_1049', 1),
+    'pump2': ('i_1050', 2),
+    'aux_pump': ('i_1051', 4),
+}
+VALVE_COLUMN = 'i_1098'
+FREQ_BAND_HZ = 5
+VALVE_BAND = 10
+
+# 编码各档位时的偏移（档位序号 + 1，0 表示未运行/缺失）
+BAND_SLOTS = 64
+
+
+def encode_regimes(df):
+    """
+    逐分钟计算工况，返回 (pump_mask, 各泵频率档, 阀门档, 工况键)
+    工况键把所有档位打包成一个 int64，相邻分钟键不同即为新区间
+    """
+    pump_mask = np.zeros(len(df), dtype=np.int64)
+    key = np.zeros(len(df), dtype=np.int64)
+    bands = {}
+
+    for name, (column, bit) in PUMP_COLUMNS.items():
+        freq = df[column].to_numpy(dtype=np.float64)
+        # 与分析接口的泵筛选条件一致：频率 > 0 视为运行
+        running = np.nan_to_num(freq) > 0
+        pump_mask |= np.where(running, bit, 0)
+        band_index = np.where(running, np.floor(np.nan_to_num(freq) / FREQ_BAND_HZ) + 1, 0).astype(np.int64)
+        bands[name] = band_index
+        key = key * BAND_SLOTS + np.clip(band_index, 0, BAND_SLOTS - 1)
+
+    valve = df[VALVE_COLUMN].to_numpy(dtype=np.float64)
+    valve_index = np.where(np.isnan(valve), 0, np.floor(np.nan_to_num(valve) / VALVE_BAND) + 1).astype(np.int64)
+    key = key * BAND_SLOTS + np.clip(valve_index, 0, BAND_SLOTS - 1)
+    return pump_mask, bands, valve_index, key
+
+
+def run_length_intervals(df):
+    """
+    向量化游程编码：工况键变化或时间不连续（缺分钟）处切分
+    返回区间 DataFrame（end_time 不含）
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    times = df.index.to_numpy()
+    pump_mask, bands, valve_index, key = encode_regimes(df)
+
+    gap = np.diff(times) != np.timedelta64(1, 'm')
+    changed = np.diff(key) != 0
+    starts = np.concatenate([[0], np.flatnonzero(changed | gap) + 1])
+    ends = np.concatenate([starts[1:], [len(df)]])
+    lengths = ends - starts
+
+    def band_floor(index):
+        values = (index[starts] - 1) * FREQ_BAND_HZ
+        return np.where(index[starts] > 0, values, np.nan)
+
+    def run_mean(column):
+        values = df[column].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums / counts
+
+    intervals = pd.DataFrame({
+        'start_time': times[starts],
+        'end_time': times[ends - 1] + np.timedelta64(1, 'm'),
+        'minutes': lengths,
+        'pump_mask': pump_mask[starts],
+        'pump1_band': band_floor(bands['pump1']),
+        'pump2_band': band_floor(bands['pump2']),
+        'aux_band': band_floor(bands['aux_pump']),
+        'valve_band': np.where(valve_index[starts] > 0, (valve_index[starts] - 1) * VALVE_BAND, np.nan),
+        'pump1_freq_avg': run_mean('i_1049'),
+        'pump2_freq_avg': run_mean('i_1050'),
+        'aux_freq_avg': run_mean('i_1051'),
+        'valve_avg': run_mean(VALVE_COLUMN),
+    })
+    return intervals
+
+
+class RegimeIndex:
+    def __init__(self, connection, table='fuan_data'):
+        self.connection = connection
+        self.table = table
+        self.regime_table = f"{table}_regimes"
+
+    def create_regime_table(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.regime_table} (
+                start_time DATETIME PRIMARY KEY,
+                end_time DATETIME NOT NULL COMMENT '区间结束时间（不含）',
+                minutes INT NOT NULL,
+                pump_mask TINYINT NOT NULL COMMENT '1=1#泵 2=2#泵 4=辅泵',
+                pump1_band SMALLINT NULL,
+                pump2_band SMALLINT NULL,
+                aux_band SMALLINT NULL,
+                valve_band SMALLINT NULL,
+                pump1_freq_avg DOUBLE NULL,
+                pump2_freq_avg DOUBLE NULL,
+                aux_freq_avg DOUBLE NULL,
+                valve_avg DOUBLE NULL,
+                KEY idx_mask_time (pump_mask, start_time),
+                KEY idx_end_time (end_time)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='运行工况区间'
+            """)
+
+    def expand_window(self, start, end):
+        """扩展重算范围：包含与 [start, end) 首尾相接或重叠的已有区间，使相邻区间能正确合并"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT MIN(start_time), MAX(end_time) FROM {self.regime_table} "
+                f"WHERE start_time <= %s AND end_time >= %s",
+                (end, start)
+            )
+            low, high = cursor.fetchone()
+        return min(low or start, start), max(high or end, end)
+
+    def load_minutes(self, start, end):
+        columns = [column for column, _ in PUMP_COLUMNS.values()] + [VALVE_COLUMN]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT collect_time, {', '.join(columns)} FROM {self.table} "
+                f"WHERE collect_time >= %s AND collect_time < %s ORDER BY collect_time",
+                (start, end)
+            )
+            rows = cursor.fetchall()
+        df = pd.DataFrame(rows, columns=['collect_time'] + columns)
+        df['collect_time'] = pd.to_datetime(df['collect_time'])
+        df = df.set_index('collect_time')
+        return df.apply(pd.to_numeric, errors='coerce').astype(np.float64)
+
+    def refresh(self, start, end):
+        self.create_regime_table()
+        window_start, window_end = self.expand_window(start, end)
+        intervals = run_length_intervals(self.load_minutes(window_start, window_end))
+
+        records = intervals.astype(object).where(intervals.notna(), None)
+        for column in ['start_time', 'end_time']:
+            records[column] = intervals[column].dt.to_pydatetime() if len(intervals) else []
+        rows = [tuple(row) for row in records.itertuples(index=False)]
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.regime_table} WHERE start_time < %s AND end_time > %s",
+                (window_end, window_start)
+            )
+            if rows:
+                cursor.executemany(f"""
+                INSERT INTO {self.regime_table}
+                    (start_time, end_time, minutes, pump_mask, pump1_band, pump2_band, aux_band, valve_band,
+                     pump1_freq_avg, pump2_freq_avg, aux_freq_avg, valve_avg)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, rows)
+
+        logger.info(f"工况区间更新: {window_start} ~ {window_end}，{len(rows)} 个区间")
+        return True
+
+    def refresh_range(self, start_date, end_date):
+        start = datetime.strptime(start_date, '%Y%m%d')
+        end = datetime.strptime(end_date, '%Y%m%d') + timedelta(days=1)
+        return self.refresh(start, end)
+
+
+def main():
+    """主函数"""
+    from fuan_data_sync import TARGET_DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='运行工况区间表')
+    parser.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
+    parser.add_argument('end_date', help='结束日期，格式：YYYYMMDD')
+    parser.add_argument('--table', default='fuan_data', help='数据表名')
+    args = parser.parse_args()
+
+    connection = pymysql.connect(**TARGET_DB_CONFIG)
+    try:
+        success = RegimeIndex(connection, args.table).refresh_range(args.start_date, args.end_date)
+    finally:
+        connection.close()
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
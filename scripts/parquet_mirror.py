@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fuan_data 列式镜像
+将 MySQL 中的同步表按月镜像为本地 Parquet 文件，供分析脚本只读取需要的列：
+
+    cache/parquet/<表名>/
+        manifest.json               每月的行数、时间范围和各字段统计（min/max/空值数/零值数）
+        month=2026-01.parquet       按 collect_time 排序，每天一个 row group
+
+同步成功后只刷新本次同步涉及的日期（读取 MySQL 中这些天的最终值，替换镜像中对应的天），
+分析脚本通过 load_columns() 读取：先用清单按月份和字段统计裁剪文件，
+再由 Parquet row group 统计按时间裁剪，只解码需要的列（memory_map）
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow 为可选依赖，未安装时镜像不可用，分析脚本回退到 MySQL
+    pa = None
+    pq = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MIRROR_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'parquet')
+MANIFEST_FILE = 'manifest.json'
+ROW_GROUP_ROWS = 24 * 60     # 每天一个 row group（分钟数据）
+COMPRESSION = 'zstd'
+
+
+def require_pyarrow():
+    if pq is None:
+        raise RuntimeError("未安装 pyarrow，无法使用 Parquet 镜像（pip install pyarrow）")
+
+
+def month_key(value):
+    return value.strftime('%Y-%m')
+
+
+def month_start(key):
+    return datetime.strptime(key, '%Y-%m')
+
+
+def next_month(value):
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def column_stats(df):
+    """各字段统计（写入清单，用于按取值条件裁剪月份）"""
+    stats = {}
+    for col in df.columns:
+        if col == 'collect_time':
+            continue
+        values = df[col].to_numpy(dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        stats[col] = {
+            'min': float(valid.min()) if len(valid) else None,
+            'max': float(valid.max()) if len(valid) else None,
+            'nulls': int(len(values) - len(valid)),
+            'zeros': int(np.count_nonzero(valid == 0)),
+        }
+    return stats
+
+
+def write_atomic(path, write):
+    """写入同目录临时文件后 os.replace，读取方不会读到写了一半的文件"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp.', dir=directory)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ParquetMirror:
+    def __init__(self, connection=None, table='fuan_data', root=MIRROR_ROOT):
+        self.connection = connection
+        self.table = table
+        self.directory = os.path.join(root, table)
+
+    def partition_path(self, key):
+        return os.path.join(self.directory, f"month={key}.parquet")
+
+    def read_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {'table': self.table, 'months': {}}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest):
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+        write_atomic(os.path.join(self.directory, MANIFEST_FILE), write)
+
+    def query_rows(self, start, end):
+        """从 MySQL 读取 [start, end) 的全部字段（同步后的最终值）"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT * FROM {self.table} WHERE collect_time >= %s AND collect_time < %s ORDER BY collect_time",
+                (start, end)
+            )
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+
+        df = pd.DataFrame(rows, columns=columns)
+        df['collect_time'] = pd.to_datetime(df['collect_time'])
+        for col in columns:
+            if col != 'collect_time':
+                # DECIMAL -> float64；紧凑布局的 NULL 保留为 NaN
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+        return df
+
+    def write_partition(self, key, df):
+        df = df.sort_values('collect_time').reset_index(drop=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        write_atomic(
+            self.partition_path(key),
+            lambda tmp_path: pq.write_table(
+                table, tmp_path,
+                row_group_size=ROW_GROUP_ROWS,
+                compression=COMPRESSION,
+                write_statistics=True,
+            )
+        )
+        return {
+            'rows': len(df),
+            'min_time': df['collect_time'].min().isoformat() if len(df) else None,
+            'max_time': df['collect_time'].max().isoformat() if len(df) else None,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'columns': column_stats(df),
+        }
+
+    def refresh(self, start, end):
+        """
+        刷新 [start, end) 范围：按月处理，只从 MySQL 读取该范围内的行，
+        与镜像中该月其余日期的数据合并后整体重写该月文件
+        """
+        require_pyarrow()
+        manifest = self.read_manifest()
+
+        current = start
+        while current < end:
+            key = month_key(current)
+            chunk_end = min(next_month(current), end)
+            fresh = self.query_rows(current, chunk_end)
+
+            path = self.partition_path(key)
+            if os.path.exists(path):
+                existing = pq.read_table(path, memory_map=True).to_pandas()
+                keep = (existing['collect_time'] < pd.Timestamp(current)) | \
+                       (existing['collect_time'] >= pd.Timestamp(chunk_end))
+                merged = pd.concat([existing[keep], fresh], ignore_index=True)
+            else:
+                merged = fresh
+
+            if merged.empty:
+                logger.info(f"{self.table} {key} 无数据，跳过")
+            else:
+                manifest['months'][key] = self.write_partition(key, merged)
+                logger.info(
+                    f"镜像 {self.table} {key}: 刷新 {len(fresh)} 行，月分区共 {len(merged)} 行"
+                )
+            current = chunk_end
+
+        self.write_manifest(manifest)
+        return True
+
+    def refresh_range(self, start_date, end_date):
+        """按同步日期（YYYYMMDD，含结束日期）刷新"""
+        start = datetime.strptime(start_date, '%Y%m%d')
+        end = datetime.strptime(end_date, '%Y%m%d') + timedelta(days=1)
+        return self.refresh(start, end)
+
+    def rebuild(self):
+        """按 MySQL 表的完整时间范围重建镜像"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(collect_time), MAX(collect_time) FROM {self.table}")
+            first_time, last_time = cursor.fetchone()
+        if first_time is None:
+            logger.info(f"表 {self.table} 为空，无需镜像")
+            return True
+        self.refresh(first_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+                     last_time + timedelta(minutes=1))
+
+        # 标记镜像已完整覆盖该表，之后的增量刷新保持完整
+        manifest = self.read_manifest()
+        manifest['complete_from'] = first_time.isoformat()
+        self.write_manifest(manifest)
+        return True
+
+
+def select_months(manifest, start, end, value_ranges=None):
+    """
+    根据清单选择需要读取的月份
+    value_ranges: {字段: (下限, 上限)}，月份内该字段的 [min, max] 与条件不相交时整月跳过
+    """
+    selected = []
+    for key, info in sorted(manifest['months'].items()):
+        month_begin = month_start(key)
+        if month_begin >= end or next_month(month_begin) <= start or not info['rows']:
+            continue
+
+        skip = False
+        for col, (low, high) in (value_ranges or {}).items():
+            stats = info['columns'].get(col)
+            if stats is None or stats['min'] is None:
+                skip = True
+                break
+            if (high is not None and stats['min'] > high) or (low is not None and stats['max'] < low):
+                skip = True
+                break
+        if not skip:
+            selected.append(key)
+    return selected
+
+
+def load_columns(columns, start, end, table='fuan_data', value_ranges=None, root=MIRROR_ROOT):
+    """
+    从镜像读取 [start, end) 内指定字段，返回以 collect_time 为首列的 DataFrame
+    value_ranges: {字段: (下限, 上限)}（闭区间，None 表示不限），同时用于裁剪月份/row group 和过滤行
+    镜像不存在或未覆盖该范围时返回 None，调用方应回退到 MySQL 查询
+    """
+    if pq is None:
+        return None
+
+    mirror = ParquetMirror(table=table, root=root)
+    manifest = mirror.read_manifest()
+    if not manifest['months'] or 'complete_from' not in manifest:
+        # 未执行过完整重建，只有增量刷新的日期，不能代替 MySQL
+        return None
+
+    covered_until = max(info['max_time'] for info in manifest['months'].values() if info['max_time'])
+    if pd.Timestamp(covered_until) < pd.Timestamp(end) - pd.Timedelta(days=1):
+        logger.info(f"镜像只覆盖到 {covered_until}，回退到 MySQL")
+        return None
+
+    filters = [('collect_time', '>=', pd.Timestamp(start)), ('collect_time', '<', pd.Timestamp(end))]
+    for col, (low, high) in (value_ranges or {}).items():
+        if low is not None:
+            filters.append((col, '>=', low))
+        if high is not None:
+            filters.append((col, '<=', high))
+
+    read_columns = ['collect_time'] + [col for col in columns if col != 'collect_time']
+    frames = []
+    for key in select_months(manifest, start, end, value_ranges):
+        frames.append(pq.read_table(
+            mirror.partition_path(key),
+            columns=read_columns,
+            filters=filters,
+            memory_map=True,
+        ).to_pandas())
+
+    if not frames:
+        return pd.DataFrame(columns=read_columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    """主函数"""
+    from fuan_data_sync import TARGET_DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='fuan_data Parquet 列式镜像')
+    parser.add_argument('start_date', nargs='?', help='开始日期，格式：YYYYMMDD')
+    parser.add_argument('end_date', nargs='?', help='结束日期，格式：YYYYMMDD')
+    parser.add_argument('--rebuild', action='store_true', help='按表的完整时间范围重建镜像')
+    parser.add_argument('--table', default='fuan_data', help='镜像的表名')
+    args = parser.parse_args()
+
+    if not args.rebuild and not (args.start_date and args.end_date):
+        parser.error('需要提供 start_date 和 end_date，或使用 --rebuild')
+
+    require_pyarrow()
+    connection = pymysql.connect(**TARGET_DB_CONFIG)
+    try:
+        mirror = ParquetMirror(connection, args.table)
+        success = mirror.rebuild() if args.rebuild else mirror.refresh_range(args.start_date, args.end_date)
+    finally:
+        connection.close()
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+回归结果的绘图数据降采样
+分钟级数据的回归结果逐行返回 predictions、scatter_data、residuals_data、time_series_data，
+几万行的结果有数 MB，图表也画不了这么多点；输入中带 "max_points" 时按图表类型降采样:
+
+- time_series_data（按 x 排序的拟合曲线）、predictions（按行顺序）：LTTB（Largest-Triangle-Three-Buckets），
+  保留曲线的峰谷形状；predictions 降采样后附带 prediction_index（原始行号）
+- scatter_data、residuals_data（散点图）：按二维网格的密度保持抽样，每个有点的格子至少保留一个点
+  （稀疏区域和异常点不会丢失），其余名额按格子内点数分配
+
+降采样在读取结果缓存之后进行（max_points 不参与缓存键），不传 max_points 即可取回全分辨率结果
+"""
+
+import numpy as np
+
+from regression_io import Records
+
+# max_points 的下限（LTTB 至少保留首尾两点和一个桶）
+MIN_POINTS = 10
+# 散点抽样的随机种子（同一结果多次请求返回相同的点）
+SAMPLING_SEED = 0
+
+
+def lttb_indices(x, y, n_out):
+    """
+    LTTB 降采样，返回保留点的下标（升序，含首尾两点）
+    x 需为升序；中间各点均分为 n_out - 2 个桶，每个桶选出与上一个选中点、下一个桶均值构成三角形面积最大的点
+    桶均值一次性向量计算，逐桶只做一次数组运算
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+
+    n_buckets = n_out - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # 最后一个桶的“下一个桶”为终点
+    next_x = np.append(avg_x[1:], x[n - 1])
+    next_y = np.append(avg_y[1:], y[n - 1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def density_indices(x, y, n_out, seed=SAMPLING_SEED):
+    """
+    散点的密度保持抽样，返回保留点的下标（升序，最多 n_out 个）
+    网格大小按 n_out 确定（格子数不超过 n_out / 2），每个有点的格子先保留一个点，剩余名额按格子内剩余点数比例分配
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+
+    grid = max(1, int(np.sqrt(n_out / 2)))
+
+    def bins(values):
+        low, high = np.nanmin(values), np.nanmax(values)
+        if not np.isfinite(high - low) or high == low:
+            return np.zeros(n, dtype=np.int64)
+        return np.clip(((values - low) / (high - low) * grid).astype(np.int64), 0, grid - 1)
+
+    cell = bins(x) * grid + bins(y)
+    counts = np.bincount(cell, minlength=grid * grid)
+    occupied = counts > 0
+    extra = n_out - int(occupied.sum())
+    quota = occupied.astype(np.int64)
+    quota += (np.maximum(counts - 1, 0) * extra) // max(n - int(occupied.sum()), 1)
+
+    # 每个格子内随机排序，取前 quota 个
+    order = np.random.default_rng(seed).permutation(n)
+    order = order[np.argsort(cell[order], kind='stable')]
+    sorted_cells = cell[order]
+    rank = np.arange(n) - (np.cumsum(counts) - counts)[sorted_cells]
+    return np.sort(order[rank < quota[sorted_cells]])
+
+
+def sample_result(result, max_points):
+    """
+    按 max_points 对回归结果中的绘图数据降采样，返回新的结果（不修改原结果，缓存中保留全分辨率）
+    结果中附带 sampling：各字段的原始点数、返回点数和方法
+    """
+    max_points = int(max_points)
+    if max_points < MIN_POINTS:
+        raise ValueError(f"max_points 不能小于 {MIN_POINTS}")
+
+    sampled = dict(result)
+    sampling = {}
+
+    series = result.get('time_series_data')
+    if isinstance(series, Records) and len(series) > max_points:
+        indices = lttb_indices(series.columns['x'], series.columns['y_actual'], max_points)
+        sampled['time_series_data'] = series.take(indices)
+        sampling['time_series_data'] = {'total': len(series), 'returned': len(indices), 'method': 'lttb'}
+
+    for name in ('scatter_data', 'residuals_data'):
+        points = result.get(name)
+        if isinstance(points, Records) and len(points) > max_points:
+            x, y = list(points.columns.values())[:2]
+            indices = density_indices(x, y, max_points)
+            sampled[name] = points.take(indices)
+            sampling[name] = {'total': len(points), 'returned': len(indices), 'method': 'density'}
+
+    predictions = result.get('predictions')
+    if predictions is not None and len(predictions) > max_points:
+        predictions = np.asarray(predictions, dtype=np.float64)
+        if predictions.ndim == 1:
+            indices = lttb_indices(np.arange(len(predictions)), predictions, max_points)
+            sampled['predictions'] = predictions[indices]
+            sampled['prediction_index'] = indices
+            sampling['predictions'] = {'total': len(predictions), 'returned': len(indices), 'method': 'lttb'}
+
+    if sampling:
+        sampled['sampling'] = {'max_points': max_points, **sampling}
+    return sampled
@@ -4,16 +4,37 @@
 通过命令行接收JSON格式的数据，执行多项式回归分析，返回JSON格式的结果
 """
 
-import sys
-import json
 import numpy as np
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import make_pipeline
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
+from regression_io import Records, run_cli
+from model_store import FittedModel
 
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）
+PREPROCESS = ()
 
-def polynomial_regression(X, y, degree=2, test_size=0.2, random_state=42):
+
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在训练集上拟合多项式回归（本脚本与 regression_engine.py 共用）
+    返回 (估计器, 结果中的系数等字段)；估计器为 多项式特征 → 线性回归 的管道，直接对原始 X 预测
+    """
+    degree = int((params or {}).get('degree', 2))
+    # 截距只由线性回归拟合，特征中不带常数列（在线更新的截距列不重复，见 online_models.py）
+    model = make_pipeline(
+        PolynomialFeatures(degree=degree, include_bias=False),
+        LinearRegression(),
+    )
+    model.fit(X_train, y_train)
+    # 系数首项为常数项，与原先常数列的系数位置一致
+    coefficients = [float(model[-1].intercept_)] + model[-1].coef_.tolist()
+    return model, {'coefficients': coefficients, 'degree': degree}
+
+
+def polynomial_regression(X, y, degree=2, test_size=0.2, random_state=42, return_model=False):
     """
     执行多项式回归分析
     
@@ -23,6 +44,7 @@ def polynomial_regression(X, y, degree=2, test_size=0.2, random_state=42):
         degree: 多项式阶数
         test_size: 测试集比例
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
     
     返回:
         dict: 包含系数、R²、预测值等结果
@@ -36,20 +58,13 @@ def polynomial_regression(X, y, degree=2, test_size=0.2, random_state=42):
         X, y, test_size=test_size, random_state=random_state, shuffle=True
     )
     
-    # 生成多项式特征
-    poly = PolynomialFeatures(degree=degree, include_bias=True)
-    X_train_poly = poly.fit_transform(X_train)
-    X_test_poly = poly.transform(X_test)
-    X_poly = poly.transform(X)  # 全部数据的多项式特征
-    
-    # 训练线性回归模型
-    model = LinearRegression(fit_intercept=False)  # 已经包含了截距项
-    model.fit(X_train_poly, y_train)
+    # 生成多项式特征并训练线性回归模型
+    model, details = fit_model(X_train, y_train, {'degree': degree}, random_state)
     
     # 预测
-    y_pred_train = model.predict(X_train_poly)
-    y_pred_test = model.predict(X_test_poly)
-    predictions = model.predict(X_poly)  # 全部数据的预测
+    y_pred_train = model.predict(X_train)
+    y_pred_test = model.predict(X_test)
+    predictions = model.predict(X)  # 全部数据的预测
     
     # 计算R²和MSE
     r2_train = r2_score(y_train, y_pred_train)
@@ -57,59 +72,44 @@ def polynomial_regression(X, y, degree=2, test_size=0.2, random_state=42):
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 获取系数
-    coefficients = model.coef_.tolist()
-    
     # 计算残差数据（使用测试集）
-    scatter_data = [
-        {'actual': float(y_test[i]), 'predicted': float(y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    scatter_data = Records(actual=y_test, predicted=y_pred_test)
     
-    residuals_data = [
-        {'predicted': float(y_pred_test[i]), 'residual': float(y_test[i] - y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    residuals_data = Records(predicted=y_pred_test, residual=y_test - y_pred_test)
     
-    return {
-        'coefficients': coefficients,
+    result = {
+        'coefficients': details['coefficients'],
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': predictions.tolist(),
+        'predictions': predictions,
         'scatter_data': scatter_data,
         'residuals_data': residuals_data
     }
+    if return_model:
+        result['model'] = FittedModel('polynomial', model[-1], features=model[0])
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    degree = input_data.get('degree', 2)
+    save_model = input_data.get('save_model', False)
+
+    # 执行多项式回归
+    return polynomial_regression(X, y, degree, return_model=save_model)
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        degree = input_data.get('degree', 2)
-        
-        # 执行多项式回归
-        result = polynomial_regression(X, y, degree)
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
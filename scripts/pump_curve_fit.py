@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+泵特性曲线拟合脚本
+按泵、按月拟合满足相似定律（affinity laws）的流量/扬程/功率曲线，结果缓存到 fuan_pump_curve 表
+
+相似定律（r = f / 额定频率）:
+    扬程: H = r² · (h0 - k · (Q/r)^m)          h0 > 0, k >= 0, 1 <= m <= 3
+    功率: P = r³ · (p0 + p1·(Q/r) + p2·(Q/r)²)  p0 >= 0, p1 >= 0
+    流量: Q = q · (r - r0)                      q > 0, 0 <= r0 < 1
+使用带约束的非线性最小二乘（解析雅可比矩阵，全样本向量化计算）
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pymysql
+from scipy.optimize import least_squares
+
+from fuan_data_sync import TARGET_DB_CONFIG
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 泵频率字段（与 /api/correlation/analyze 的 pumpFrequencyMap 一致）
+PUMP_FREQUENCY_FIELDS = {
+    'pump1': 'i_1049',      # 泵1运行频率
+    'pump2': 'i_1050',      # 泵2运行频率
+    'aux_pump': 'i_1051',   # 辅泵运行频率
+}
+
+FLOW_FIELD = 'i_1034'       # 出水流量 (m³/h)
+PRESSURE_FIELD = 'i_1030'   # 出水压力 (MPa)
+ENERGY_FIELD = 'i_1072'     # 日累计电量 (kWh)
+
+CURVE_TABLE = 'fuan_pump_curve'
+RATED_FREQUENCY = 50.0      # 额定频率 (Hz)
+MPA_TO_METER = 101.97       # 1 MPa ≈ 101.97 m 水柱
+WINDOW_MINUTES = 15         # 功率由累计电量差分计算，按15分钟窗口聚合
+MIN_WINDOW_MINUTES = 10     # 窗口内至少有效的分钟间隔数（前后两分钟均为该泵单独运行）
+MIN_SAMPLES = 20            # 拟合所需最少窗口数
+
+
+def head_model(params, q, r):
+    """扬程模型及其雅可比矩阵"""
+    h0, k, m = params
+    u = q / r
+    u_m = np.power(u, m)
+    r2 = r * r
+    value = r2 * (h0 - k * u_m)
+    jac = np.column_stack([
+        r2,
+        -r2 * u_m,
+        -r2 * k * u_m * np.log(u),
+    ])
+    return value, jac
+
+
+def power_model(params, q, r):
+    """功率模型及其雅可比矩阵"""
+    p0, p1, p2 = params
+    u = q / r
+    r3 = r * r * r
+    value = r3 * (p0 + p1 * u + p2 * u * u)
+    jac = np.column_stack([r3, r3 * u, r3 * u * u])
+    return value, jac
+
+
+def flow_model(params, r):
+    """流量-频率模型及其雅可比矩阵"""
+    q, r0 = params
+    value = q * (r - r0)
+    jac = np.column_stack([r - r0, np.full_like(r, -q)])
+    return value, jac
+
+
+def fit_least_squares(model, x0, bounds, target, *args):
+    """带边界约束的非线性最小二乘，返回 (参数, RMSE)"""
+    result = least_squares(
+        lambda p: model(p, *args)[0] - target,
+        x0,
+        jac=lambda p: model(p, *args)[1],
+        bounds=bounds,
+        method='trf',
+        loss='soft_l1',
+        f_scale=max(float(np.std(target)), 1e-6),
+    )
+    rmse = float(np.sqrt(np.mean(result.fun ** 2)))
+    return result.x, rmse
+
+
+def efficiency(q, h, p):
+    """泵组效率：η = ρgQH / P = Q(m³/h)·H(m) / (367.2·P(kW))"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(p > 0, q * h / (367.2 * p), np.nan)
+
+
+def load_windows(connection, pump, start_time, end_time):
+    """
+    读取单泵运行的分钟数据，按15分钟窗口聚合为 (频率比, 流量, 扬程, 功率) 样本
+    频率、流量、扬程取窗口内该泵单独运行的分钟的均值；功率只累加前后两分钟均为该泵单独运行的
+    相邻分钟间隔的电量差，除以这些间隔的总时长（其他泵运行或状态混合的分钟不计入）；
+    有效间隔不足 MIN_WINDOW_MINUTES 的窗口丢弃
+    """
+    freq_field = PUMP_FREQUENCY_FIELDS[pump]
+    other_fields = [f for p, f in PUMP_FREQUENCY_FIELDS.items() if p != pump]
+    fields = [freq_field, FLOW_FIELD, PRESSURE_FIELD, ENERGY_FIELD] + other_fields
+    query = f"""
+    SELECT collect_time, {', '.join(fields)}
+    FROM fuan_data
+    WHERE collect_time >= %s AND collect_time < %s
+    ORDER BY collect_time
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, (start_time, end_time))
+        rows = cursor.fetchall()
+
+    if not rows:
+        return None
+
+    df = pd.DataFrame(rows, columns=['collect_time'] + fields)
+    df[fields] = df[fields].astype(float)
+    df['collect_time'] = pd.to_datetime(df['collect_time'])
+
+    single = (df[freq_field] > 0) & (df[other_fields] <= 0).all(axis=1)
+    valid = single & (df[FLOW_FIELD] > 0) & (df[PRESSURE_FIELD] > 0) & (df[ENERGY_FIELD] > 0)
+    df['window'] = df['collect_time'].dt.floor(f'{WINDOW_MINUTES}min')
+
+    # 有效间隔：与上一分钟相邻、同一窗口（窗口按15分钟对齐，不会跨过日累计电量的零点清零），且两端均有效
+    interval = (
+        valid & valid.shift(1, fill_value=False)
+        & (df['collect_time'].diff() == pd.Timedelta(minutes=1))
+        & (df['window'] == df['window'].shift(1))
+    )
+    df['energy_delta'] = df[ENERGY_FIELD].diff().where(interval, 0.0)
+    df['interval'] = interval
+
+    df = df[valid]
+    if df.empty:
+        return None
+
+    grouped = df.groupby('window').agg(
+        intervals=('interval', 'sum'),
+        freq=(freq_field, 'mean'),
+        flow=(FLOW_FIELD, 'mean'),
+        pressure=(PRESSURE_FIELD, 'mean'),
+        energy=('energy_delta', 'sum'),
+    )
+    grouped = grouped[grouped['intervals'] >= MIN_WINDOW_MINUTES]
+
+    power = grouped['energy'] / (grouped['intervals'] / 60.0)
+    grouped = grouped[power > 0]
+    if len(grouped) < MIN_SAMPLES:
+        return None
+
+    return {
+        'r': (grouped['freq'] / RATED_FREQUENCY).to_numpy(),
+        'q': grouped['flow'].to_numpy(),
+        'h': (grouped['pressure'] * MPA_TO_METER).to_numpy(),
+        'p': power[power > 0].to_numpy(),
+    }
+
+
+def fit_pump_curves(samples):
+    """拟合扬程、功率、流量三条曲线，并计算额定频率下的最高效率点"""
+    r, q, h, p = samples['r'], samples['q'], samples['h'], samples['p']
+    u = q / r
+
+    head_params, head_rmse = fit_least_squares(
+        head_model, [float(np.max(h / r ** 2)) * 1.1, 1e-6, 2.0],
+        ([0, 0, 1], [np.inf, np.inf, 3]), h, q, r,
+    )
+    power_params, power_rmse = fit_least_squares(
+        power_model, [float(np.median(p / r ** 3)), 0.0, 0.0],
+        ([0, 0, -np.inf], [np.inf, np.inf, np.inf]), p, q, r,
+    )
+    flow_params, flow_rmse = fit_least_squares(
+        flow_model, [float(np.median(q / r)), 0.0],
+        ([0, 0], [np.inf, 0.99]), q, r,
+    )
+
+    # 额定频率下沿流量网格搜索最高效率点
+    q_grid = np.linspace(0, float(np.max(u)) * 1.2, 200)[1:]
+    r_one = np.ones_like(q_grid)
+    eta = efficiency(q_grid, head_model(head_params, q_grid, r_one)[0], power_model(power_params, q_grid, r_one)[0])
+    eta = np.where(np.isfinite(eta), eta, -np.inf)
+    best = int(np.argmax(eta))
+
+    observed_eta = efficiency(q, h, p)
+    return {
+        'head_params': head_params.tolist(),
+        'power_params': power_params.tolist(),
+        'flow_params': flow_params.tolist(),
+        'head_rmse': head_rmse,
+        'power_rmse': power_rmse,
+        'flow_rmse': flow_rmse,
+        'bep_flow': float(q_grid[best]),
+        'bep_efficiency': float(eta[best]) if np.isfinite(eta[best]) else None,
+        'mean_efficiency': float(np.nanmean(observed_eta)),
+        'n_samples': int(len(q)),
+        'freq_range': [float(r.min() * RATED_FREQUENCY), float(r.max() * RATED_FREQUENCY)],
+    }
+
+
+def month_bounds(month):
+    """'YYYY-MM' -> (月初, 下月初)"""
+    start = datetime.strptime(month, '%Y-%m')
+    end = datetime(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return start, end
+
+
+def months_between(start_date, end_date):
+    """日期范围（YYYYMMDD）覆盖的月份列表"""
+    start = datetime.strptime(start_date, '%Y%m%d')
+    end = datetime.strptime(end_date, '%Y%m%d')
+    return [p.strftime('%Y-%m') for p in pd.period_range(start, end, freq='M')]
+
+
+class PumpCurveEngine:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_curve_table(self):
+        """创建泵特性曲线缓存表"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {CURVE_TABLE} (
+                pump VARCHAR(16) NOT NULL,
+                month CHAR(7) NOT NULL COMMENT 'YYYY-MM',
+                head_params JSON NOT NULL COMMENT '[h0, k, m]',
+                power_params JSON NOT NULL COMMENT '[p0, p1, p2]',
+                flow_params JSON NOT NULL COMMENT '[q, r0]',
+                head_rmse DOUBLE NULL,
+                power_rmse DOUBLE NULL,
+                flow_rmse DOUBLE NULL,
+                bep_flow DOUBLE NULL COMMENT '额定频率下最高效率点流量 (m³/h)',
+                bep_efficiency DOUBLE NULL,
+                mean_efficiency DOUBLE NULL,
+                n_samples INT NOT NULL,
+                freq_min DOUBLE NULL,
+                freq_max DOUBLE NULL,
+                fitted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (pump, month)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='泵特性曲线（相似定律拟合）'
+            """)
+
+    def save_curve(self, pump, month, curve):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            REPLACE INTO {CURVE_TABLE}
+                (pump, month, head_params, power_params, flow_params, head_rmse, power_rmse, flow_rmse,
+                 bep_flow, bep_efficiency, mean_efficiency, n_samples, freq_min, freq_max)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                pump, month,
+                json.dumps(curve['head_params']), json.dumps(curve['power_params']), json.dumps(curve['flow_params']),
+                curve['head_rmse'], curve['power_rmse'], curve['flow_rmse'],
+                curve['bep_flow'], curve['bep_efficiency'], curve['mean_efficiency'],
+                curve['n_samples'], curve['freq_range'][0], curve['freq_range'][1],
+            ))
+
+    def refresh_months(self, months, pumps=None):
+        """重新拟合指定月份的泵曲线（增量刷新：只处理本次同步涉及的月份）"""
+        self.create_curve_table()
+        pumps = pumps or list(PUMP_FREQUENCY_FIELDS.keys())
+        fitted = 0
+        for month in months:
+            start, end = month_bounds(month)
+            for pump in pumps:
+                samples = load_windows(self.connection, pump, start, end)
+                if samples is None:
+                    logger.info(f"{month} {pump} 单泵运行样本不足，跳过")
+                    continue
+                try:
+                    curve = fit_pump_curves(samples)
+                except Exception as e:
+                    logger.error(f"{month} {pump} 曲线拟合失败: {e}")
+                    continue
+                self.save_curve(pump, month, curve)
+                fitted += 1
+                logger.info(
+                    f"{month} {pump} 曲线拟合完成: {curve['n_samples']} 个样本, "
+                    f"扬程RMSE={curve['head_rmse']:.3f}m, 功率RMSE={curve['power_rmse']:.3f}kW"
+                )
+        return fitted
+
+    def refresh_range(self, start_date, end_date):
+        """按同步日期范围（YYYYMMDD）刷新涉及的月份"""
+        return self.refresh_months(months_between(start_date, end_date))
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='泵特性曲线拟合')
+    parser.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
+    parser.add_argument('end_date', help='结束日期，格式：YYYYMMDD')
+    parser.add_argument('--pump', choices=list(PUMP_FREQUENCY_FIELDS.keys()), action='append',
+                        help='只拟合指定泵，可重复指定')
+    args = parser.parse_args()
+
+    try:
+        months = months_between(args.start_date, args.end_date)
+    except ValueError:
+        logger.error("日期格式错误，请使用 YYYYMMDD 格式")
+        sys.exit(1)
+
+    connection = pymysql.connect(**TARGET_DB_CONFIG)
+    try:
+        fitted = PumpCurveEngine(connection).refresh_months(months, args.pump)
+    finally:
+        connection.close()
+
+    logger.info(f"共拟合 {fitted} 条泵曲线")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
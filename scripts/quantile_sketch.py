@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按天的可合并分位数草图（t-digest）
+同步后为每个字段每天计算一个 t-digest（附 count/sum/min/max），写入 <表名>_sketch 表；
+任意日期范围的分位数、IQR 异常值边界和直方图通过合并每天的草图得到，不需要扫描分钟数据
+
+除数据表字段外，还按流量分组接口的算法预计算派生字段 total_flow（城东+岩湖滑动窗口流量）
+
+用法:
+    python3 quantile_sketch.py build 20260101 20260131     # 计算指定日期的草图
+    echo '{"fields": ["i_1034"], "start_date": "2026-01-01", "end_date": "2026-12-31"}' | python3 quantile_sketch.py
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+from storage_migration import COMPACT_VERSION, ZERO_VALID_COLUMNS, read_schema_version
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COMPRESSION = 200            # t-digest 压缩参数，约 COMPRESSION/2 个质心
+DEFAULT_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+# 派生字段：与 /api/correlation/flow-groups 的计算方式一致
+TOTAL_FLOW_COLUMN = 'total_flow'
+FLOW_WINDOW = 10             # 前后10分钟
+FLOW_MAX = 500
+
+
+class TDigest:
+    """合并式 t-digest（k1 刻度函数），质心按均值升序存储"""
+
+    def __init__(self, means=None, weights=None, min_value=np.nan, max_value=np.nan, compression=COMPRESSION):
+        self.means = np.asarray(means if means is not None else [], dtype=np.float64)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=np.float64)
+        self.min = float(min_value)
+        self.max = float(max_value)
+        self.compression = compression
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    @classmethod
+    def from_values(cls, values, compression=COMPRESSION):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return cls(compression=compression)
+        digest = cls(values, np.ones(len(values)), values.min(), values.max(), compression)
+        digest.compress()
+        return digest
+
+    @classmethod
+    def merge(cls, digests, compression=COMPRESSION):
+        digests = [d for d in digests if len(d.means)]
+        if not digests:
+            return cls(compression=compression)
+        merged = cls(
+            np.concatenate([d.means for d in digests]),
+            np.concatenate([d.weights for d in digests]),
+            min(d.min for d in digests),
+            max(d.max for d in digests),
+            compression,
+        )
+        merged.compress()
+        return merged
+
+    def compress(self):
+        """
+        向量化压缩：按质心中点的累计分位 q 计算 k(q) = δ/(2π)·asin(2q-1)，
+        k 值落在同一整数区间的相邻质心合并（尾部 k 变化快，保留更细的质心）
+        """
+        order = np.argsort(self.means, kind='mergesort')
+        means = self.means[order]
+        weights = self.weights[order]
+        total = weights.sum()
+
+        q_mid = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        groups = np.floor(k - k[0]).astype(np.int64)
+
+        merged_weights = np.bincount(groups, weights=weights)
+        merged_sums = np.bincount(groups, weights=weights * means)
+        keep = merged_weights > 0
+        self.weights = merged_weights[keep]
+        self.means = merged_sums[keep] / self.weights
+
+    def _knots(self):
+        """插值节点：(累计权重位置, 值)，两端为 min/max"""
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centers, [self.count]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return positions, values
+
+    def quantile(self, qs):
+        if not len(self.means):
+            return np.full(len(np.atleast_1d(qs)), np.nan)
+        positions, values = self._knots()
+        return np.interp(np.asarray(qs, dtype=np.float64) * self.count, positions, values)
+
+    def cdf(self, xs):
+        if not len(self.means):
+            return np.full(len(np.atleast_1d(xs)), np.nan)
+        positions, values = self._knots()
+        return np.interp(np.asarray(xs, dtype=np.float64), values, positions) / self.count
+
+    def histogram(self, bins):
+        edges = np.linspace(self.min, self.max, bins + 1)
+        counts = np.diff(self.cdf(edges)) * self.count
+        return edges, counts
+
+    def to_bytes(self):
+        return self.means.astype('<f8').tobytes() + self.weights.astype('<f4').tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob, min_value, max_value, compression=COMPRESSION):
+        n = len(blob) // 12
+        means = np.frombuffer(blob, dtype='<f8', count=n)
+        weights = np.frombuffer(blob, dtype='<f4', count=n, offset=8 * n).astype(np.float64)
+        return cls(means, weights, min_value, max_value, compression)
+
+
+def total_flow_series(df):
+    """滑动窗口流量：前后 FLOW_WINDOW 分钟累计流量 (max-min)/窗口点数，城东+岩湖取整"""
+    valid = df[['i_1129', 'i_1076']].dropna()
+    if valid.empty:
+        return pd.Series(dtype=np.float64)
+
+    window = 2 * FLOW_WINDOW + 1
+    flows = []
+    for col in ['i_1129', 'i_1076']:
+        rolling = valid[col].rolling(window, center=True, min_periods=1)
+        flows.append((rolling.max() - rolling.min()) / rolling.count())
+    total = np.floor(flows[0] + flows[1])
+    keep = (flows[0] >= 0) & (flows[1] >= 0) & (total <= FLOW_MAX)
+    return total[keep]
+
+
+class SketchStore:
+    def __init__(self, connection, table='fuan_data'):
+        self.connection = connection
+        self.table = table
+        self.sketch_table = f"{table}_sketch"
+
+    def create_sketch_table(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.sketch_table} (
+                day DATE NOT NULL,
+                column_name VARCHAR(64) NOT NULL,
+                count BIGINT NOT NULL,
+                sum DOUBLE NOT NULL,
+                min DOUBLE NULL,
+                max DOUBLE NULL,
+                zeros INT NOT NULL DEFAULT 0,
+                compression SMALLINT NOT NULL,
+                centroids MEDIUMBLOB NOT NULL,
+                updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (day, column_name)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='按天分位数草图（t-digest）'
+            """)
+
+    def load_rows(self, start, end):
+        # 前后多取窗口长度的数据，使 total_flow 在日期边界处的窗口与流量分组接口一致
+        margin = timedelta(minutes=FLOW_WINDOW)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT * FROM {self.table} WHERE collect_time >= %s AND collect_time < %s ORDER BY collect_time",
+                (start - margin, end + margin)
+            )
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+        df = pd.DataFrame(rows, columns=columns)
+        df['collect_time'] = pd.to_datetime(df['collect_time'])
+        df = df.set_index('collect_time')
+        return df.apply(pd.to_numeric, errors='coerce').astype(np.float64)
+
+    def build_range(self, start_date, end_date):
+        """计算 [start_date, end_date]（YYYYMMDD，含结束日期）每天每个字段的草图"""
+        start = datetime.strptime(start_date, '%Y%m%d')
+        end = datetime.strptime(end_date, '%Y%m%d') + timedelta(days=1)
+
+        self.create_sketch_table()
+        # 旧布局缺失值写为 0：除泵频率/阀门开度外，0 不计入分布，只记录个数
+        zeros_are_missing = read_schema_version(self.connection, self.table)[0] < COMPACT_VERSION
+
+        df = self.load_rows(start, end)
+        if df.empty:
+            logger.info(f"{start_date} ~ {end_date} 无数据，跳过草图计算")
+            return True
+
+        df[TOTAL_FLOW_COLUMN] = total_flow_series(df)
+        df = df[(df.index >= start) & (df.index < end)]
+
+        rows = []
+        for day, day_df in df.groupby(df.index.floor('D')):
+            for col in day_df.columns:
+                values = day_df[col].to_numpy()
+                values = values[~np.isnan(values)]
+                zeros = int(np.count_nonzero(values == 0))
+                if zeros_are_missing and col not in ZERO_VALID_COLUMNS and col != TOTAL_FLOW_COLUMN:
+                    values = values[values != 0]
+
+                digest = TDigest.from_values(values)
+                rows.append((
+                    day.date(), col, len(values), float(values.sum()),
+                    float(values.min()) if len(values) else None,
+                    float(values.max()) if len(values) else None,
+                    zeros, COMPRESSION, digest.to_bytes(),
+                ))
+
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"""
+            INSERT INTO {self.sketch_table}
+                (day, column_name, count, sum, min, max, zeros, compression, centroids)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                count=VALUES(count), sum=VALUES(sum), min=VALUES(min), max=VALUES(max),
+                zeros=VALUES(zeros), compression=VALUES(compression), centroids=VALUES(centroids)
+            """, rows)
+
+        logger.info(f"草图计算完成: {start_date} ~ {end_date}，{len(rows)} 个字段-日")
+        return True
+
+    def load_digests(self, columns, start_day, end_day):
+        """读取并合并 [start_day, end_day]（含）范围内每个字段的草图，返回 {字段: (TDigest, count, sum)}"""
+        placeholders = ', '.join(['%s'] * len(columns))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            SELECT column_name, count, sum, min, max, compression, centroids
+            FROM {self.sketch_table}
+            WHERE day >= %s AND day <= %s AND column_name IN ({placeholders}) AND count > 0
+            """, (start_day, end_day, *columns))
+            rows = cursor.fetchall()
+
+        parts = {col: [] for col in columns}
+        totals = {col: [0, 0.0] for col in columns}
+        for column_name, count, total, min_value, max_value, compression, blob in rows:
+            parts[column_name].append(TDigest.from_bytes(blob, min_value, max_value, compression))
+            totals[column_name][0] += int(count)
+            totals[column_name][1] += float(total)
+
+        return {
+            col: (TDigest.merge(parts[col]), totals[col][0], totals[col][1])
+            for col in columns
+        }
+
+    def summarize(self, columns, start_day, end_day, quantiles=None, bins=None, iqr_multiplier=None):
+        """
+        合并草图得到每个字段的近似统计
+        iqr_multiplier 为空时与 removeOutliers 一致：样本数 < 50 用 3.0，否则 1.5
+        """
+        quantiles = quantiles or DEFAULT_QUANTILES
+        summary = {}
+        for col, (digest, count, total) in self.load_digests(columns, start_day, end_day).items():
+            if count == 0:
+                summary[col] = {'count': 0}
+                continue
+
+            q1, q3 = digest.quantile([0.25, 0.75])
+            multiplier = iqr_multiplier or (3.0 if count < 50 else 1.5)
+            iqr = q3 - q1
+            result = {
+                'count': count,
+                'mean': total / count,
+                'min': digest.min,
+                'max': digest.max,
+                'quantiles': {str(q): float(v) for q, v in zip(quantiles, digest.quantile(quantiles))},
+                'iqr': {
+                    'q1': float(q1),
+                    'q3': float(q3),
+                    'multiplier': multiplier,
+                    'lower': float(q1 - multiplier * iqr),
+                    'upper': float(q3 + multiplier * iqr),
+                },
+            }
+            if bins:
+                edges, counts = digest.histogram(bins)
+                result['histogram'] = {'edges': edges.tolist(), 'counts': np.round(counts).astype(int).tolist()}
+            summary[col] = result
+        return summary
+
+
+def parse_day(value):
+    return pd.Timestamp(value).date()
+
+
+def main():
+    """主函数"""
+    from fuan_data_sync import TARGET_DB_CONFIG
+
+    if len(sys.argv) == 1:
+        # stdin JSON 模式（供 Node.js 调用）
+        try:
+            input_data = json.loads(sys.stdin.read())
+            fields = input_data['fields']
+            connection = pymysql.connect(**TARGET_DB_CONFIG)
+            try:
+                summary = SketchStore(connection, input_data.get('table', 'fuan_data')).summarize(
+                    fields,
+                    parse_day(input_data['start_date']),
+                    parse_day(input_data['end_date']),
+                    quantiles=input_data.get('quantiles'),
+                    bins=input_data.get('bins'),
+                    iqr_multiplier=input_data.get('iqr_multiplier'),
+                )
+            finally:
+                connection.close()
+            print(json.dumps(summary, ensure_ascii=False))
+        except Exception as e:
+            print(json.dumps({'error': str(e)}), file=sys.stderr)
+            sys.exit(1)
+        return
+
+    parser = argparse.ArgumentParser(description='按天分位数草图')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='计算指定日期的草图')
+    build_parser.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
+    build_parser.add_argument('end_date', help='结束日期，格式：YYYYMMDD')
+    build_parser.add_argument('--table', default='fuan_data', help='数据表名')
+    args = parser.parse_args()
+
+    connection = pymysql.connect(**TARGET_DB_CONFIG)
+    try:
+        success = SketchStore(connection, args.table).build_range(args.start_date, args.end_date)
+    finally:
+        connection.close()
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,45 @@
 强大的集成学习方法，适合非线性关系和复杂数据
 """
 
-import sys
-import json
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
+from regression_io import Records, run_cli
+from model_store import FittedModel
 
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）
+PREPROCESS = ()
 
-def random_forest_regression(X, y, n_estimators=100, max_depth=None, test_size=0.2, random_state=42):
+
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在训练集上拟合随机森林（本脚本与 regression_engine.py 共用）
+    params: n_estimators、max_depth、n_jobs（默认使用所有CPU核心，已在进程池中时传 1）
+    返回 (估计器, 结果中的模型参数和特征重要性)
+    """
+    params = params or {}
+    n_estimators = int(params.get('n_estimators', 100))
+    max_depth = params.get('max_depth')
+    max_depth = int(max_depth) if max_depth is not None else None
+    model = RandomForestRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        random_state=random_state,
+        n_jobs=params.get('n_jobs', -1)
+    )
+    model.fit(X_train, y_train)
+    return model, {
+        'model_params': {
+            'n_estimators': n_estimators,
+            'max_depth': max_depth,
+            'n_features': int(X_train.shape[1])
+        },
+        'feature_importance': model.feature_importances_.tolist(),
+    }
+
+
+def random_forest_regression(X, y, n_estimators=100, max_depth=None, test_size=0.2, random_state=42, return_model=False):
     """
     执行随机森林回归分析
     
@@ -24,6 +54,7 @@ def random_forest_regression(X, y, n_estimators=100, max_depth=None, test_size=0
         max_depth: 树的最大深度（None表示不限制）
         test_size: 测试集比例
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
     
     返回:
         dict: 包含R²、预测值、特征重要性等结果
@@ -38,13 +69,8 @@ def random_forest_regression(X, y, n_estimators=100, max_depth=None, test_size=0
     )
     
     # 训练随机森林模型
-    model = RandomForestRegressor(
-        n_estimators=n_estimators,
-        max_depth=max_depth,
-        random_state=random_state,
-        n_jobs=-1  # 使用所有CPU核心
-    )
-    model.fit(X_train, y_train)
+    model, details = fit_model(X_train, y_train, {'n_estimators': n_estimators, 'max_depth': max_depth},
+                               random_state)
     
     # 预测
     y_pred_train = model.predict(X_train)
@@ -57,68 +83,48 @@ def random_forest_regression(X, y, n_estimators=100, max_depth=None, test_size=0
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 获取特征重要性
-    feature_importance = model.feature_importances_.tolist()
-    
     # 计算散点图数据（使用测试集）
-    scatter_data = [
-        {'actual': float(y_test[i]), 'predicted': float(y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    scatter_data = Records(actual=y_test, predicted=y_pred_test)
     
     # 计算残差数据（使用测试集）
-    residuals_data = [
-        {'predicted': float(y_pred_test[i]), 'residual': float(y_test[i] - y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    residuals_data = Records(predicted=y_pred_test, residual=y_test - y_pred_test)
     
-    return {
-        'model_params': {
-            'n_estimators': int(n_estimators),
-            'max_depth': int(max_depth) if max_depth is not None else None,
-            'n_features': int(X.shape[1])
-        },
-        'feature_importance': feature_importance,
+    result = {
+        **details,
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': y_pred_all.tolist(),
+        'predictions': y_pred_all,
         'scatter_data': scatter_data,
         'residuals_data': residuals_data
     }
+    if return_model:
+        result['model'] = FittedModel('random_forest', model)
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    n_estimators = input_data.get('n_estimators', 100)
+    max_depth = input_data.get('max_depth', None)
+    test_size = input_data.get('test_size', 0.2)
+    random_state = input_data.get('random_state', 42)
+    save_model = input_data.get('save_model', False)
+
+    # 执行随机森林回归
+    return random_forest_regression(X, y, n_estimators, max_depth, test_size, random_state, return_model=save_model)
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        n_estimators = input_data.get('n_estimators', 100)
-        max_depth = input_data.get('max_depth', None)
-        test_size = input_data.get('test_size', 0.2)
-        random_state = input_data.get('random_state', 42)
-        
-        # 执行随机森林回归
-        result = random_forest_regression(X, y, n_estimators, max_depth, test_size, random_state)
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
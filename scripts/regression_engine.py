@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+多模型对比分析脚本
+一次接收数据集和模型列表，共享数据预处理（训练/测试集划分、标准化、对数变换只计算一次），
+用进程池并行拟合各模型，返回按测试集 R² 排序的排行榜及每个模型的耗时
+
+训练/测试集划分与各 *_regression.py 一致（train_test_split，test_size=0.2，random_state=42），
+同一数据集下排行榜指标与单独调用各脚本的结果相同
+
+输入中带 "cv" 时改为时间序列交叉验证（见 time_series_cv.py）：各模型的各折一起放入进程池并行拟合，
+排行榜中的指标为各折均值，附带标准差和每折的指标
+"""
+
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+import elastic_net_regression
+import exponential_regression
+import gradient_boosting_regression
+import lasso_regression
+import linear_regression
+import logarithmic_regression
+import neural_network_regression
+import polynomial_regression
+import power_regression
+import random_forest_regression
+import ridge_regression
+import svr_regression
+from regression_io import run_cli
+from time_series_cv import make_splits
+
+# 未指定模型列表时对比的模型（与 analyze 接口的 analysis_type 同名）
+DEFAULT_MODELS = [
+    'linear', 'polynomial', 'exponential', 'logarithmic', 'power',
+    'ridge', 'lasso', 'elastic_net', 'svr', 'random_forest', 'gradient_boosting', 'neural_network',
+]
+METRIC_NAMES = ('r2_train', 'r2_test', 'mse_train', 'mse_test')
+
+
+def shift_positive(values):
+    """平移到正数区域（各列最小值 <= 0 时平移为最小值 1），与对数/幂函数回归脚本的处理一致"""
+    values = values.copy()
+    minimum = np.min(values, axis=0)
+    shift = np.where(minimum <= 0, 1 - minimum, 0.0)
+    return values + shift, shift
+
+
+class PreparedDataset:
+    """共享的预处理结果：划分索引、标准化、对数变换（按需计算，进程池启动前在父进程中完成）"""
+
+    def __init__(self, X, y, X_fields=None, test_size=0.2, random_state=42, split=None):
+        self.X = np.asarray(X, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        if self.X.ndim == 1:
+            self.X = self.X.reshape(-1, 1)
+        self.X_fields = X_fields or [f'x{i + 1}' for i in range(self.X.shape[1])]
+        self.random_state = random_state
+
+        if split is not None:
+            self.train_idx, self.test_idx = split
+        else:
+            indices = np.arange(len(self.y))
+            self.train_idx, self.test_idx = train_test_split(
+                indices, test_size=test_size, random_state=random_state, shuffle=True
+            )
+        self._cache = {}
+
+    def with_split(self, train_idx, test_idx):
+        """共享同一份数组的另一种划分（交叉验证的一折）；标准化按该折的训练集重新计算，对数变换与划分无关，直接复用"""
+        fold = copy.copy(self)
+        fold.train_idx, fold.test_idx = train_idx, test_idx
+        fold._cache = {key: value for key, value in self._cache.items() if key in ('log_X', 'log_y')}
+        return fold
+
+    def prepare(self, models):
+        """预先计算所选模型需要的变换，避免每个子进程重复计算"""
+        steps = {step for model_type in models for step in MODEL_FITTERS[model_type].PREPROCESS}
+        for step, name in (('scale', 'scaled'), ('log_x', 'log_X'), ('log_y', 'log_y')):
+            if step in steps:
+                getattr(self, name)
+        return self
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def scaled(self):
+        """(X_scaled, y_scaled_train, scaler_y)，标准化参数只用训练集拟合"""
+        def compute():
+            scaler_X = StandardScaler().fit(self.X[self.train_idx])
+            scaler_y = StandardScaler().fit(self.y[self.train_idx].reshape(-1, 1))
+            X_scaled = scaler_X.transform(self.X)
+            y_scaled_train = scaler_y.transform(self.y[self.train_idx].reshape(-1, 1)).ravel()
+            return X_scaled, y_scaled_train, scaler_y
+        return self._cached('scaled', compute)
+
+    @property
+    def log_X(self):
+        return self._cached('log_X', lambda: np.log(shift_positive(self.X)[0]))
+
+    @property
+    def log_y(self):
+        """(log(y + shift), shift)"""
+        def compute():
+            shifted, shift = shift_positive(self.y)
+            return np.log(shifted), float(shift)
+        return self._cached('log_y', compute)
+
+
+def fit_shared(module, data, params):
+    """
+    按模型脚本声明的预处理（PREPROCESS）取共享的输入，调用脚本的 fit_model 在训练集上拟合，
+    对全部数据预测并还原到原始尺度；返回 (预测值, 结果中的系数等字段)
+    """
+    steps = module.PREPROCESS
+    train = data.train_idx
+    scaler_y = shift = None
+    if 'scale' in steps:
+        X, y_train, scaler_y = data.scaled
+    else:
+        X = data.log_X if 'log_x' in steps else data.X
+        if 'log_y' in steps:
+            log_y, shift = data.log_y
+            y_train = log_y[train]
+        else:
+            y_train = data.y[train]
+
+    estimator, details = module.fit_model(X[train], y_train, params, data.random_state)
+    predictions = estimator.predict(X)
+    if scaler_y is not None:
+        predictions = scaler_y.inverse_transform(predictions.reshape(-1, 1)).ravel()
+    if shift is not None:
+        predictions = np.exp(predictions) - shift
+    return predictions, details
+
+
+# 模型类型 -> 模型脚本（各脚本的 fit_model 与单独调用时相同，引擎只共享划分、标准化和对数变换）
+MODEL_FITTERS = {
+    'linear': linear_regression,
+    'polynomial': polynomial_regression,
+    'exponential': exponential_regression,
+    'logarithmic': logarithmic_regression,
+    'power': power_regression,
+    'ridge': ridge_regression,
+    'lasso': lasso_regression,
+    'elastic_net': elastic_net_regression,
+    'svr': svr_regression,
+    'random_forest': random_forest_regression,
+    'gradient_boosting': gradient_boosting_regression,
+    'neural_network': neural_network_regression,
+}
+# 进程池中运行时自身不再并行的模型（各模型已各占一个进程）
+NESTED_PARALLEL_MODELS = ('lasso', 'elastic_net', 'random_forest')
+
+# 子进程中的共享数据集（由进程池 initializer 设置；交叉验证时每折一个）
+_DATASETS = None
+
+
+def _init_worker(datasets):
+    global _DATASETS
+    _DATASETS = datasets
+
+
+def run_model(spec, data=None):
+    """拟合单个模型并计算指标；异常记录在结果中，不影响其他模型"""
+    data = data if data is not None else _DATASETS[0]
+    model_type = spec['type']
+    params = {key: value for key, value in spec.items() if key != 'type'}
+    started = time.perf_counter()
+    try:
+        module = MODEL_FITTERS[model_type]
+        fit_params = {**params, 'X_fields': data.X_fields} if model_type == 'neural_network' else params
+        predictions, details = fit_shared(module, data, fit_params)
+        y_train, y_test = data.y[data.train_idx], data.y[data.test_idx]
+        pred_train, pred_test = predictions[data.train_idx], predictions[data.test_idx]
+        entry = {
+            'type': model_type,
+            'params': params,
+            'r2_train': float(r2_score(y_train, pred_train)),
+            'r2_test': float(r2_score(y_test, pred_test)),
+            'mse_train': float(mean_squared_error(y_train, pred_train)),
+            'mse_test': float(mean_squared_error(y_test, pred_test)),
+            **details,
+        }
+        if spec.get('include_predictions'):
+            entry['predictions'] = predictions
+    except Exception as e:
+        entry = {'type': model_type, 'params': params, 'error': str(e)}
+    entry['fit_seconds'] = round(time.perf_counter() - started, 4)
+    return entry
+
+
+def run_fold(task):
+    """进程池任务：(模型设置, 折序号)"""
+    spec, fold = task
+    return run_model(spec, _DATASETS[fold])
+
+
+def summarize_folds(entries):
+    """
+    合并一个模型各折的结果：指标取均值并附带标准差，系数等取最后一折（训练数据最新）
+    全部折失败时返回第一折的错误
+    """
+    succeeded = [entry for entry in entries if 'error' not in entry]
+    if not succeeded:
+        summary = dict(entries[0])
+    else:
+        summary = {key: value for key, value in succeeded[-1].items() if key != 'predictions'}
+        for metric in METRIC_NAMES:
+            values = np.array([entry[metric] for entry in succeeded])
+            summary[metric] = float(np.mean(values))
+            summary[f'{metric}_std'] = float(np.std(values))
+    summary['folds'] = [
+        {'fold': i, **({'error': entry['error']} if 'error' in entry else {m: entry[m] for m in METRIC_NAMES})}
+        for i, entry in enumerate(entries)
+    ]
+    summary['fit_seconds'] = round(sum(entry['fit_seconds'] for entry in entries), 4)
+    return summary
+
+
+def compare_models(X, y, models=None, X_fields=None, test_size=0.2, random_state=42, workers=None, cv=None):
+    """
+    多模型对比
+    models: [{"type": "ridge", "alpha": 1.0}, "linear", ...]，默认对比全部模型
+    workers: 并行进程数，默认 min(任务数, CPU核数)；为 1 时在当前进程内依次拟合
+    cv: 时间序列交叉验证设置（见 time_series_cv.make_splits），为空时使用随机划分的单一训练/测试集
+    """
+    started = time.perf_counter()
+    specs = [{'type': m} if isinstance(m, str) else dict(m) for m in (models or DEFAULT_MODELS)]
+    unknown = [spec['type'] for spec in specs if spec['type'] not in MODEL_FITTERS]
+    if unknown:
+        raise ValueError(f"未知的模型类型: {', '.join(unknown)}")
+    model_types = [s['type'] for s in specs]
+
+    if cv:
+        splits = make_splits(len(y), cv)
+        base = PreparedDataset(X, y, X_fields, test_size, random_state, split=splits[0]).prepare(
+            [t for t in model_types if 'scale' not in MODEL_FITTERS[t].PREPROCESS]
+        )
+        datasets = [base.with_split(*split).prepare(model_types) for split in splits]
+    else:
+        datasets = [PreparedDataset(X, y, X_fields, test_size, random_state).prepare(model_types)]
+    prepare_seconds = time.perf_counter() - started
+
+    # 每个 (模型, 折) 为一个任务，全部放入同一个进程池
+    tasks = [(spec, fold) for spec in specs for fold in range(len(datasets))]
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1 or len(tasks) == 1:
+        results = [run_model(spec, datasets[fold]) for spec, fold in tasks]
+    else:
+        for spec in specs:
+            if spec['type'] in NESTED_PARALLEL_MODELS:
+                spec.setdefault('n_jobs', 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(datasets,)) as executor:
+            results = list(executor.map(run_fold, tasks))
+
+    if cv:
+        k = len(datasets)
+        entries = [summarize_folds(results[i * k:(i + 1) * k]) for i in range(len(specs))]
+    else:
+        entries = results
+
+    # 按测试集 R² 降序排名（交叉验证时为各折均值），失败的模型排在最后
+    ranked = sorted(entries, key=lambda e: -e['r2_test'] if 'r2_test' in e and np.isfinite(e['r2_test']) else np.inf)
+    for rank, entry in enumerate(ranked, start=1):
+        entry['rank'] = rank
+
+    result = {
+        'sample_count': int(len(datasets[0].y)),
+        'train_count': int(np.mean([len(d.train_idx) for d in datasets])),
+        'test_count': int(np.mean([len(d.test_idx) for d in datasets])),
+        'leaderboard': ranked,
+        'best': ranked[0]['type'] if ranked and 'error' not in ranked[0] else None,
+        'prepare_seconds': round(prepare_seconds, 4),
+        'total_seconds': round(time.perf_counter() - started, 4),
+        'workers': int(workers),
+    }
+    if cv:
+        result['evaluation'] = {
+            'method': cv.get('method', 'rolling'),
+            'folds': len(datasets),
+            'gap': int(cv.get('gap', 0)),
+            'splits': [
+                {
+                    'train_count': int(len(d.train_idx)),
+                    'test_count': int(len(d.test_idx)),
+                    'test_start': int(d.test_idx[0]),
+                    'test_end': int(d.test_idx[-1]),
+                }
+                for d in datasets
+            ],
+        }
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    return compare_models(
+        input_data['X'],
+        input_data['y'],
+        models=input_data.get('models'),
+        X_fields=input_data.get('X_fields'),
+        test_size=input_data.get('test_size', 0.2),
+        random_state=input_data.get('random_state', 42),
+        workers=input_data.get('workers'),
+        cv=input_data.get('cv'),
+    )
+
+
+def main():
+    """
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
+    """
+    run_cli(handle)
+
+
+if __name__ == '__main__':
+    main()
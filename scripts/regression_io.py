@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+回归脚本的输入输出协议
+- JSON：stdin 读取 JSON，stdout 输出 JSON（原有方式）
+- 二进制帧：小段 JSON 头 + 原始小端 float64/float32 数组，大数组不再经过 JSON 编解码
+
+二进制帧格式（与 lib/analysis/binaryFrame.ts 一致）:
+    4 字节   魔数 b'FAB1'
+    4 字节   JSON 头长度（uint32，小端）
+    N 字节   JSON 头（UTF-8），补齐到 8 字节边界
+    数据区   各数组依次存放，每个数组起点 8 字节对齐
+
+JSON 头:
+    {
+      "fields":  {...},                                          # 其余字段（普通 JSON）
+      "arrays":  [{"name": "X", "dtype": "<f8", "shape": [n, k], "offset": 0}, ...],
+      "records": [{"name": "scatter_data", "keys": ["actual", "predicted"],
+                   "dtype": "<f8", "length": n, "offset": ...}, ...]   # 对象数组按列存放
+    }
+只转换顶层字段；嵌套在对象中的数组仍放在 fields 中
+
+输入也可以是数据集描述 {"dataset": {...}, 其余参数}（见 dataset_loader.py），
+此时由 Python 端查询并清洗数据，结果附带 dataset 统计；单变量时附带按 x 排序的 time_series_data
+相同脚本、参数和数据的结果由 result_cache.py 缓存，输入中 "cache": false 时跳过
+输入中带 "max_points" 时，读取缓存后对绘图数据降采样（见 plot_sampling.py）
+输出格式：输入为二进制帧，或结果中有达到 BINARY_MIN_ROWS 行的顶层数组时输出二进制帧，否则输出 JSON
+"""
+
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b'FAB1'
+ALIGNMENT = 8
+# 顶层数值列表长度达到该值时才以二进制存放，短列表留在 JSON 头中
+MIN_BINARY_LENGTH = 64
+# 结果中顶层数组达到该行数时整体以二进制帧输出（与 binaryFrame.ts 的 BINARY_MIN_ROWS 一致）
+BINARY_MIN_ROWS = 5000
+DTYPES = {'<f8', '<f4'}
+
+
+class Records:
+    """
+    按列存放的对象数组，如 scatter_data = [{'actual': ..., 'predicted': ...}, ...]
+    JSON 输出时展开为对象列表（与逐行构造的结果相同），二进制输出时直接写出各列
+    """
+
+    def __init__(self, **columns):
+        self.columns = {key: np.asarray(values, dtype=np.float64).ravel() for key, values in columns.items()}
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Records 各列长度不一致")
+        self.length = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self.length
+
+    def take(self, indices):
+        """按下标取部分行（用于绘图数据降采样，见 plot_sampling.py）"""
+        return Records(**{key: values[indices] for key, values in self.columns.items()})
+
+    def to_list(self):
+        keys = list(self.columns)
+        return [dict(zip(keys, row)) for row in zip(*(self.columns[k].tolist() for k in keys))]
+
+
+def to_json(value):
+    """json.dumps 的 default：展开 Records 和 numpy 类型"""
+    if isinstance(value, Records):
+        return value.to_list()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(result):
+    return json.dumps(result, default=to_json)
+
+
+def is_frame(data):
+    return data[:len(MAGIC)] == MAGIC
+
+
+def _padding(length):
+    return (-length) % ALIGNMENT
+
+
+def decode_frame(data):
+    """解析二进制帧，数组为指向输入缓冲区的只读视图（np.frombuffer，不复制）"""
+    if not is_frame(data):
+        raise ValueError("不是有效的二进制帧")
+    header_length = struct.unpack_from('<I', data, len(MAGIC))[0]
+    header_start = len(MAGIC) + 4
+    header = json.loads(bytes(data[header_start:header_start + header_length]).decode('utf-8'))
+    data_start = header_start + header_length + _padding(header_start + header_length)
+
+    result = dict(header.get('fields', {}))
+    for spec in header.get('arrays', []):
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=data_start + spec['offset'])
+        result[spec['name']] = array.reshape(spec['shape'])
+    for spec in header.get('records', []):
+        dtype = np.dtype(spec['dtype'])
+        keys = spec['keys']
+        table = np.frombuffer(data, dtype=dtype, count=spec['length'] * len(keys),
+                              offset=data_start + spec['offset']).reshape(len(keys), spec['length'])
+        result[spec['name']] = Records(**{key: table[i] for i, key in enumerate(keys)})
+    return result
+
+
+def _binary_candidate(value):
+    """顶层字段是否以二进制存放，返回 float64 数组或 None"""
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'fiu':
+        return value
+    if isinstance(value, list) and len(value) >= MIN_BINARY_LENGTH:
+        try:
+            array = np.asarray(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            return None
+        return array if array.ndim in (1, 2) else None
+    return None
+
+
+def prefers_binary(result):
+    """结果是否值得以二进制帧输出（输入为数据集描述时请求中没有数组，只能按结果大小判断）"""
+    for value in result.values():
+        if isinstance(value, Records) or _binary_candidate(value) is not None:
+            if len(value) >= BINARY_MIN_ROWS:
+                return True
+    return False
+
+
+def encode_frame(result, dtype='<f8'):
+    """结果编码为二进制帧（数值数组和 Records 写入数据区，其余字段写入 JSON 头）"""
+    dtype = np.dtype(dtype)
+    fields, arrays, records, chunks = {}, [], [], []
+    offset = 0
+
+    def append(buffer):
+        nonlocal offset
+        start = offset
+        chunks.append(buffer)
+        offset += len(buffer)
+        pad = _padding(offset)
+        if pad:
+            chunks.append(b'\0' * pad)
+            offset += pad
+        return start
+
+    for name, value in result.items():
+        if isinstance(value, Records):
+            keys = list(value.columns)
+            table = np.stack([value.columns[k] for k in keys]) if keys else np.empty((0, 0))
+            start = append(np.ascontiguousarray(table, dtype=dtype).tobytes())
+            records.append({'name': name, 'keys': keys, 'dtype': dtype.str, 'length': len(value), 'offset': start})
+            continue
+        array = _binary_candidate(value)
+        if array is None:
+            fields[name] = value
+            continue
+        start = append(np.ascontiguousarray(array, dtype=dtype).tobytes())
+        arrays.append({'name': name, 'dtype': dtype.str, 'shape': list(array.shape), 'offset': start})
+
+    header = json.dumps({'fields': fields, 'arrays': arrays, 'records': records}, default=to_json).encode('utf-8')
+    prefix = MAGIC + struct.pack('<I', len(header)) + header
+    prefix += b'\0' * _padding(len(prefix))
+    return prefix + b''.join(chunks)
+
+
+def read_input(stream=None):
+    """读取 stdin：二进制帧或 JSON，返回 (输入数据, 是否二进制)"""
+    stream = stream or sys.stdin.buffer
+    data = stream.read()
+    if is_frame(data):
+        return decode_frame(data), True
+    return json.loads(data.decode('utf-8')), False
+
+
+def write_output(result, binary, stream=None):
+    """输入为二进制帧或结果数组较大时输出二进制帧，否则输出 JSON"""
+    stream = stream or sys.stdout.buffer
+    binary = binary or prefers_binary(result)
+    stream.write(encode_frame(result) if binary else dumps(result).encode('utf-8'))
+    stream.flush()
+
+
+def handler_name(handle):
+    """handle 所在脚本名（命令行执行时模块名为 __main__，取文件名）"""
+    module = sys.modules[handle.__module__]
+    return os.path.splitext(os.path.basename(getattr(module, '__file__', handle.__module__)))[0]
+
+
+def prepare_input(input_data, script):
+    """
+    返回 (handle 的输入, 结果后处理函数)
+    - 输入为数据集描述时先加载数据集，把 X / y 交给 handle，结果附带数据集统计
+    - 结果中带拟合模型（"save_model": true）时保存模型，结果中改为 model_id（见 model_store.py）
+    """
+    dataset = None
+    params = input_data
+    if 'dataset' in input_data:
+        from dataset_loader import load_dataset
+
+        params = {key: value for key, value in input_data.items() if key != 'dataset'}
+        dataset = load_dataset(input_data['dataset'])
+        params.update(X=dataset.X, y=dataset.y)
+        params.setdefault('X_fields', dataset.x_fields)
+
+    def finish(result):
+        if 'model' in result:
+            from model_store import save_from_result
+            save_from_result(result, script, params, input_data.get('dataset'))
+        if dataset is None:
+            return result
+
+        result['dataset'] = dataset.summary()
+        predictions = result.get('predictions')
+        if len(dataset.x_fields) == 1 and predictions is not None:
+            # 单变量：按 x 排序的实际值 / 预测值，用于绘制拟合曲线（稳定排序，与原 JS 端一致）
+            order = np.argsort(dataset.X[:, 0], kind='stable')
+            result['time_series_data'] = Records(
+                x=dataset.X[order, 0],
+                y_actual=dataset.y[order],
+                y_predicted=np.asarray(predictions)[order],
+            )
+        return result
+
+    return params, finish
+
+
+def run_handler(handle, input_data):
+    """调用 handle（经过结果缓存，见 result_cache.py），带 max_points 时对绘图数据降采样"""
+    from result_cache import cached_run
+
+    script = handler_name(handle)
+    result = cached_run(script, handle, input_data, lambda data: prepare_input(data, script))
+    if input_data.get('max_points'):
+        from plot_sampling import sample_result
+        result = sample_result(result, input_data['max_points'])
+    return result
+
+
+def error_payload(error):
+    """错误信息；数据集错误附带接口返回用的 status / details"""
+    payload = {'error': str(error), 'type': type(error).__name__}
+    for key in ('status', 'details'):
+        if getattr(error, key, None) is not None:
+            payload[key] = getattr(error, key)
+    return payload
+
+
+def run_cli(handle):
+    """
+    回归脚本的命令行入口：读取输入（JSON 或二进制帧），调用 handle，按输入的格式输出结果（结果数组较大时总是二进制帧）
+    出错时向 stderr 最后一行输出 JSON 错误信息并以状态码 1 退出
+    """
+    try:
+        input_data, binary = read_input()
+        result = run_handler(handle, input_data)
+        write_output(result, binary)
+        sys.exit(0)
+    except Exception as e:
+        print(json.dumps(error_payload(e), ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
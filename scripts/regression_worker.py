@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻回归分析 worker
+由 lib/analysis/pythonWorkerPool.ts 启动并复用，启动时一次性导入 numpy / sklearn 和全部回归脚本，
+之后逐行读取 JSON 任务、逐行输出 JSON 结果，避免每次请求都重新启动 Python 进程
+
+协议（每行一个 JSON 对象，同一 worker 同一时刻只处理一个任务）:
+    任务  {"id": 1, "script": "linear_regression.py", "input": {...}}
+    结果  {"id": 1, "ok": true, "result": {...}}
+          {"id": 1, "ok": false, "error": "...", "type": "ValueError"}（数据集错误另有 status / details）
+    探活  {"id": 2, "type": "ping"}  ->  {"id": 2, "ok": true, "pong": true, "jobs": 已处理任务数}
+
+二进制任务（大数组不经过 JSON，帧格式见 regression_io.py）:
+    任务  {"id": 3, "script": "...", "binary": 帧字节数}\n 紧接着为输入帧
+    结果  {"id": 3, "ok": true, "binary": 帧字节数}\n 紧接着为结果帧
+    JSON 任务的结果中有达到 BINARY_MIN_ROWS 行的数组时（如数据集描述任务），同样以结果帧返回
+"""
+
+import importlib
+import json
+import os
+import sys
+
+from regression_io import decode_frame, dumps, encode_frame, error_payload, prefers_binary, run_handler
+
+# 脚本文件名 -> 模块名（模块需提供 handle(input_data)）
+HANDLER_SCRIPTS = [
+    'linear_regression.py',
+    'polynomial_regression.py',
+    'exponential_regression.py',
+    'logarithmic_regression.py',
+    'power_regression.py',
+    'ridge_regression.py',
+    'lasso_regression.py',
+    'elastic_net_regression.py',
+    'svr_regression.py',
+    'random_forest_regression.py',
+    'gradient_boosting_regression.py',
+    'neural_network_regression.py',
+    'regression_engine.py',
+    'model_store.py',
+]
+
+
+def load_handlers():
+    """预先导入全部回归脚本（同时完成 numpy / sklearn 的导入）"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    handlers = {}
+    for script in HANDLER_SCRIPTS:
+        module = importlib.import_module(script[:-len('.py')])
+        handlers[script] = module.handle
+    return handlers
+
+
+def respond(payload, frame=None):
+    stdout = sys.stdout.buffer
+    stdout.write(payload.encode('utf-8') + b'\n')
+    if frame is not None:
+        stdout.write(frame)
+    stdout.flush()
+
+
+def main():
+    handlers = load_handlers()
+    jobs = 0
+    stdin = sys.stdin.buffer
+    # 就绪信号：进程池收到后才分配任务
+    respond(json.dumps({'ready': True, 'scripts': sorted(handlers)}))
+
+    for line in iter(stdin.readline, b''):
+        line = line.strip()
+        if not line:
+            continue
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get('id')
+            # 二进制任务的输入帧紧跟在任务行之后，先读完再处理，保证出错时也不会错位
+            frame = stdin.read(job['binary']) if 'binary' in job else None
+            if job.get('type') == 'ping':
+                respond(json.dumps({'id': job_id, 'ok': True, 'pong': True, 'jobs': jobs}))
+                continue
+
+            script = job['script']
+            if script not in handlers:
+                raise ValueError(f"worker 不支持的脚本: {script}")
+            input_data = decode_frame(frame) if frame is not None else job['input']
+            result = run_handler(handlers[script], input_data)
+            jobs += 1
+            # 数据集描述任务的输入很小，结果是否用二进制帧由结果大小决定
+            if frame is not None or prefers_binary(result):
+                output = encode_frame(result)
+                respond(json.dumps({'id': job_id, 'ok': True, 'binary': len(output)}), output)
+            else:
+                # 结果单独序列化后再拼接，与命令行模式的输出保持一致
+                respond(f'{{"id": {json.dumps(job_id)}, "ok": true, "result": {dumps(result)}}}')
+        except Exception as e:
+            jobs += 1
+            respond(json.dumps({'id': job_id, 'ok': False, **error_payload(e)}, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
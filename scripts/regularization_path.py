@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+岭回归 / Lasso / 弹性网络的正则化路径与交叉验证选参
+回归脚本中 "alpha": "auto" 时调用，一次请求返回整条正则化路径、交叉验证曲线和选出的模型，
+不再需要用不同的 alpha 反复调用接口
+
+- 岭回归：训练集只做一次 SVD，所有 alpha 的系数和留一交叉验证误差都由同一分解向量计算（闭式解）
+- Lasso / 弹性网络：LassoCV / ElasticNetCV 沿 alpha 从大到小热启动求整条路径，
+  K 折交叉验证的各折并行计算（n_jobs），弹性网络同时在 l1_ratio 候选值中选择
+
+输入为标准化后的训练集（与各脚本一致，截距为 0），路径上的系数和交叉验证 MSE 均为标准化空间的值
+"""
+
+import os
+import time
+
+import numpy as np
+from sklearn.linear_model import ElasticNetCV, LassoCV, enet_path
+from sklearn.model_selection import KFold
+
+# 岭回归默认 alpha 网格：相对最大奇异值平方的倍数（从几乎不收缩到强收缩）
+RIDGE_ALPHA_RANGE = (-6, 1)
+DEFAULT_N_ALPHAS = 50
+DEFAULT_FOLDS = 5
+# 弹性网络 l1_ratio 候选值（与 sklearn 文档推荐一致，偏向 Lasso 一侧）
+DEFAULT_L1_RATIOS = [0.1, 0.5, 0.7, 0.9, 0.95, 0.99, 1.0]
+
+
+def _as_list(values):
+    return np.asarray(values, dtype=np.float64).tolist()
+
+
+def ridge_search(X, y, alphas=None, n_alphas=DEFAULT_N_ALPHAS):
+    """
+    岭回归的正则化路径和留一交叉验证（GCV）：X = U S Vᵀ 只分解一次
+    系数     w(α) = V · diag(s / (s² + α)) · Uᵀy
+    帽子矩阵 h_ii(α) = 1/n + Σ_j U_ij² · s_j² / (s_j² + α)（1/n 为截距项）
+    留一残差 e_i / (1 - h_ii)
+    """
+    started = time.perf_counter()
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    U, s, Vt = np.linalg.svd(X, full_matrices=False)
+    if alphas is None:
+        scale = s[0] ** 2 if len(s) and s[0] > 0 else 1.0
+        alphas = scale * np.logspace(*RIDGE_ALPHA_RANGE, n_alphas)
+    alphas = np.sort(np.asarray(alphas, dtype=np.float64))[::-1]
+
+    s2 = s ** 2
+    shrink = s2[None, :] / (s2[None, :] + alphas[:, None])        # (n_alphas, k)
+    Uty = U.T @ y                                                  # (k,)
+    coefs = (shrink / np.where(s > 0, s, 1)[None, :] * Uty[None, :]) @ Vt   # (n_alphas, p)
+    fitted = (shrink * Uty[None, :]) @ U.T                         # (n_alphas, n)
+    leverage = 1.0 / n + shrink @ (U ** 2).T                       # (n_alphas, n)
+    loo_errors = ((y[None, :] - fitted) / (1 - leverage)) ** 2
+
+    cv_mse = loo_errors.mean(axis=1)
+    best = int(np.argmin(cv_mse))
+    return {
+        'method': 'loo',
+        'folds': n,
+        'alphas': _as_list(alphas),
+        'coefs': _as_list(coefs),
+        'cv_mse': _as_list(cv_mse),
+        'cv_mse_std': _as_list(loo_errors.std(axis=1) / np.sqrt(n)),
+        'best_alpha': float(alphas[best]),
+        'search_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def sparse_search(X, y, l1_ratios=(1.0,), alphas=None, n_alphas=DEFAULT_N_ALPHAS,
+                  folds=DEFAULT_FOLDS, random_state=42, n_jobs=None):
+    """
+    Lasso（l1_ratios=[1]）/ 弹性网络的正则化路径和 K 折交叉验证
+    各折沿路径热启动求解并并行计算（n_jobs 默认 min(折数, CPU 数)，已在进程池中时传 1）；
+    选出 (alpha, l1_ratio) 后在整个训练集上计算该 l1_ratio 的路径
+    """
+    started = time.perf_counter()
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    l1_ratios = [float(r) for r in l1_ratios]
+    splitter = KFold(n_splits=folds, shuffle=True, random_state=random_state)
+    if n_jobs is None:
+        n_jobs = min(folds, os.cpu_count() or 1)
+    options = dict(alphas=alphas, cv=splitter, n_jobs=n_jobs, max_iter=10000, random_state=random_state)
+    if alphas is None:
+        options.pop('alphas')
+        # sklearn 1.7 起 n_alphas 并入 alphas（整数为网格点数）
+        options['n_alphas' if 'n_alphas' in LassoCV().get_params() else 'alphas'] = n_alphas
+
+    if l1_ratios == [1.0]:
+        search = LassoCV(**options).fit(X, y)
+        path_alphas = search.alphas_
+        mse_path = search.mse_path_                               # (n_alphas, folds)
+        best_l1_ratio = 1.0
+    else:
+        search = ElasticNetCV(l1_ratio=l1_ratios, **options).fit(X, y)
+        best_l1_ratio = float(search.l1_ratio_)
+        index = l1_ratios.index(best_l1_ratio)
+        alphas_grid = np.atleast_2d(search.alphas_)
+        mse_grid = search.mse_path_.reshape(len(l1_ratios), -1, folds)
+        path_alphas = alphas_grid[index]
+        mse_path = mse_grid[index]
+
+    _, coefs, _ = enet_path(X, y, l1_ratio=best_l1_ratio, alphas=path_alphas, max_iter=10000)
+    result = {
+        'method': 'kfold',
+        'folds': folds,
+        'alphas': _as_list(path_alphas),
+        'coefs': _as_list(coefs.T),
+        'cv_mse': _as_list(mse_path.mean(axis=1)),
+        'cv_mse_std': _as_list(mse_path.std(axis=1)),
+        'best_alpha': float(search.alpha_),
+        'best_l1_ratio': best_l1_ratio,
+    }
+    if len(l1_ratios) > 1:
+        # 各 l1_ratio 的最小交叉验证 MSE
+        result['l1_ratios'] = l1_ratios
+        result['cv_mse_by_l1_ratio'] = _as_list(mse_grid.mean(axis=2).min(axis=1))
+    result['search_seconds'] = round(time.perf_counter() - started, 3)
+    return result
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回归结果缓存（按内容寻址）
+键为 (脚本, 超参数, 数据集指纹) 的哈希；数据集指纹取自：
+- 数据集描述（dataset_loader.py）+ 该日期范围的同步水位（fuan_sync_jobs 中覆盖该范围的最近一次完成时间）
+- 或直接传入的 X / y 数组字节
+重新同步某日期范围后水位变化，旧结果自然失效；同步后任务还会删除与同步日期重叠的缓存文件
+
+缓存以二进制帧（regression_io.py）存放在源码目录之外的 ~/.cache/fuan/regression/（可用环境变量 REGRESSION_CACHE_DIR 指定），
+总大小超过上限时按最近访问时间淘汰（LRU）
+
+用法:
+    python3 result_cache.py stats
+    python3 result_cache.py invalidate 20260101 20260131
+    python3 result_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from regression_io import decode_frame, encode_frame, to_json
+
+logger = logging.getLogger(__name__)
+
+CACHE_ROOT = os.environ.get(
+    'REGRESSION_CACHE_DIR',
+    os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'fuan', 'regression')
+)
+DEFAULT_MAX_BYTES = int(float(os.environ.get('REGRESSION_CACHE_MAX_MB', 256)) * 1024 * 1024)
+# 排队/运行超过该时长的同步任务视为异常退出遗留，不再阻止使用缓存（遗留任务由下次同步重新排队执行）
+STALE_JOB_HOURS = 6
+# 不参与缓存键的输入字段（数据本身由指纹表示；max_points 在读取缓存后处理，缓存中为全分辨率结果）
+DATA_KEYS = ('X', 'y', 'dataset', 'cache', 'max_points')
+
+
+def sync_watermark(connection, start_date, end_date):
+    """
+    日期范围的同步水位：覆盖该范围的已完成同步任务数和最近完成时间
+    有排队或运行中的任务覆盖该范围时返回 None（数据即将变化，不使用缓存）；
+    排队/开始时间超过 STALE_JOB_HOURS 的任务不计入（进程异常退出后状态停留在 running）
+    """
+    from fuan_data_sync import SYNC_JOB_TABLE
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+        SELECT
+            SUM(
+                (status = 'queued' AND created_at >= NOW() - INTERVAL %s HOUR)
+                OR (status = 'running' AND COALESCE(started_at, created_at) >= NOW() - INTERVAL %s HOUR)
+            ),
+            SUM(status = 'done'),
+            MAX(CASE WHEN status = 'done' THEN finished_at END)
+        FROM {SYNC_JOB_TABLE}
+        WHERE start_date <= DATE(%s) AND end_date >= DATE(%s)
+        """, (STALE_JOB_HOURS, STALE_JOB_HOURS, end_date, start_date))
+        pending, done, finished_at = cursor.fetchone()
+    if pending:
+        return None
+    return f"{int(done or 0)}@{finished_at.isoformat() if finished_at else ''}"
+
+
+def array_fingerprint(*arrays):
+    """数组内容指纹（按 float64 字节和形状）"""
+    digest = hashlib.blake2b(digest_size=20)
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(script, params, fingerprint):
+    payload = json.dumps({'script': script, 'params': params, 'data': fingerprint},
+                         sort_keys=True, default=to_json, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """磁盘结果缓存：<键>.bin 为结果帧，<键>.json 为元数据（脚本、数据日期范围、大小）"""
+
+    def __init__(self, root=CACHE_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+
+    def _paths(self, key):
+        return os.path.join(self.root, f'{key}.bin'), os.path.join(self.root, f'{key}.json')
+
+    def get(self, key):
+        """命中时返回结果并刷新访问时间，未命中返回 None"""
+        data_path, meta_path = self._paths(key)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(data_path, 'rb') as f:
+                result = decode_frame(f.read())
+            os.utime(data_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"缓存文件损坏，已删除: {key}: {e}")
+            self.remove(key)
+            return None
+        return result
+
+    def put(self, key, result, meta):
+        """写入结果（先写临时文件再替换，并发读取不会读到不完整的文件），然后按上限淘汰"""
+        os.makedirs(self.root, exist_ok=True)
+        data_path, meta_path = self._paths(key)
+        frame = encode_frame(result)
+        meta = {**meta, 'size': len(frame), 'created_at': datetime.now().isoformat(timespec='seconds')}
+        for path, content in ((data_path, frame), (meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))):
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        self.evict()
+
+    def remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def entries(self):
+        """[(键, 大小, 最近访问时间)]"""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith('.bin'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:
+                continue
+            entries.append((name[:-len('.bin')], stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        """总大小超过上限时从最久未访问的结果开始删除"""
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"回归结果缓存淘汰 {removed} 项，当前 {total / 1024 / 1024:.1f} MB")
+        return removed
+
+    def invalidate_range(self, start_date, end_date, table='fuan_data'):
+        """删除数据日期范围与 [start_date, end_date]（YYYYMMDD，含）重叠的缓存"""
+        start = datetime.strptime(str(start_date), '%Y%m%d').date().isoformat()
+        end = datetime.strptime(str(end_date), '%Y%m%d').date().isoformat()
+        removed = 0
+        for key, _, _ in self.entries():
+            try:
+                with open(self._paths(key)[1], encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            data_range = meta.get('range')
+            if not data_range or meta.get('table') != table:
+                continue
+            # 比较日期部分（描述中的结束时间可能带时分秒）
+            if data_range[0][:10] <= end and data_range[1][:10] >= start:
+                self.remove(key)
+                removed += 1
+        logger.info(f"回归结果缓存失效 {removed} 项: {start} ~ {end}")
+        return removed
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            self.remove(key)
+
+
+def cached_run(script, handle, input_data, load):
+    """
+    带缓存执行：命中时直接返回缓存结果（不加载数据集、不拟合），否则执行并写入缓存
+    load(input_data) 返回 (handle 的输入, 结果后处理函数)；input_data 中 "cache": false 或 "save_model": true 时跳过缓存
+    """
+    # 没有训练数据（如 model_store 的预测、查询）、需要保存模型或显式关闭时不使用缓存
+    if (input_data.get('cache') is False or input_data.get('save_model')
+            or not ('dataset' in input_data or 'y' in input_data)):
+        params, finish = load(input_data)
+        return finish(handle(params))
+
+    params = {key: value for key, value in input_data.items() if key not in DATA_KEYS}
+    meta = {'script': script}
+    if 'dataset' in input_data:
+        from dataset_loader import get_connection, normalize_spec
+
+        spec = normalize_spec(input_data['dataset'])
+        try:
+            watermark = sync_watermark(get_connection(), spec['start_date'], spec['end_date'])
+        except Exception as e:
+            logger.warning(f"读取同步水位失败，跳过缓存: {e}")
+            watermark = None
+        if watermark is None:
+            params, finish = load(input_data)
+            return finish(handle(params))
+        fingerprint = {'spec': spec, 'watermark': watermark}
+        meta.update(table=spec['table'], range=[str(spec['start_date']), str(spec['end_date'])])
+    else:
+        fingerprint = array_fingerprint(input_data['X'], input_data['y'])
+
+    key = cache_key(script, params, fingerprint)
+    cache = ResultCache()
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    started = time.perf_counter()
+    handle_input, finish = load(input_data)
+    result = finish(handle(handle_input))
+    meta['fit_seconds'] = round(time.perf_counter() - started, 3)
+    try:
+        cache.put(key, result, meta)
+    except OSError as e:
+        logger.warning(f"写入回归结果缓存失败: {e}")
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='回归结果缓存')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='缓存项数和总大小')
+    invalidate_parser = subparsers.add_parser('invalidate', help='删除与指定日期重叠的缓存')
+    invalidate_parser.add_argument('start_date', help='开始日期，格式：YYYYMMDD')
+    invalidate_parser.add_argument('end_date', help='结束日期，格式：YYYYMMDD')
+    subparsers.add_parser('clear', help='清空缓存')
+    args = parser.parse_args()
+
+    cache = ResultCache()
+    if args.command == 'stats':
+        entries = cache.entries()
+        print(json.dumps({
+            'root': cache.root,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': cache.max_bytes,
+        }, ensure_ascii=False))
+    elif args.command == 'invalidate':
+        cache.invalidate_range(args.start_date, args.end_date)
+    else:
+        cache.clear()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
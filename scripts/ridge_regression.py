@@ -5,16 +5,46 @@
 适用于处理多重共线性问题
 """
 
-import sys
-import json
 import numpy as np
 from sklearn.linear_model import Ridge
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
+from regression_io import Records, run_cli
+from model_store import FittedModel
+from regularization_path import ridge_search
 
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）：X 和 y 按训练集标准化
+PREPROCESS = ('scale',)
 
-def ridge_regression(X, y, alpha=1.0, test_size=0.2, random_state=42):
+
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在标准化后的训练集上拟合岭回归（本脚本与 regression_engine.py 共用）
+    params: alpha（"auto" 时一次 SVD 计算整条正则化路径和留一交叉验证误差，取误差最小的 alpha）、alphas
+    返回 (估计器, 结果中的系数、正则化路径等字段)
+    """
+    params = params or {}
+    alpha = params.get('alpha', 1.0)
+    details = {}
+    if alpha == 'auto':
+        details['regularization_path'] = ridge_search(X_train, y_train, params.get('alphas'))
+        alpha = details['regularization_path']['best_alpha']
+    alpha = float(alpha)
+
+    model = Ridge(alpha=alpha, random_state=random_state)
+    model.fit(X_train, y_train)
+    # 标准化空间的系数
+    details['coefficients'] = {
+        'intercept': float(model.intercept_),
+        'coef': model.coef_.tolist() if len(model.coef_) > 1 else float(model.coef_[0]),
+        'alpha': alpha
+    }
+    return model, details
+
+
+def ridge_regression(X, y, alpha=1.0, test_size=0.2, random_state=42, return_model=False,
+                     alphas=None):
     """
     执行岭回归分析
     模型形式: y = b0 + b1*x1 + b2*x2 + ... + L2正则化项
@@ -22,9 +52,11 @@ def ridge_regression(X, y, alpha=1.0, test_size=0.2, random_state=42):
     参数:
         X: 自变量数据 (n_samples, n_features)
         y: 因变量数据 (n_samples,)
-        alpha: 正则化强度（越大，正则化越强）
+        alpha: 正则化强度（越大，正则化越强）；"auto" 时按留一交叉验证在正则化路径上选择
         test_size: 测试集比例
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
+        alphas: alpha 为 "auto" 时的候选值（默认按数据的奇异值生成网格）
     
     返回:
         dict: 包含系数、R²、预测值等结果
@@ -48,9 +80,8 @@ def ridge_regression(X, y, alpha=1.0, test_size=0.2, random_state=42):
     
     y_train_scaled = scaler_y.fit_transform(y_train.reshape(-1, 1)).ravel()
     
-    # 训练岭回归模型
-    model = Ridge(alpha=alpha, random_state=random_state)
-    model.fit(X_train_scaled, y_train_scaled)
+    # 训练岭回归模型（alpha 为 "auto" 时先在正则化路径上选参）
+    model, details = fit_model(X_train_scaled, y_train_scaled, {'alpha': alpha, 'alphas': alphas}, random_state)
     
     # 预测（标准化空间）
     y_pred_train_scaled = model.predict(X_train_scaled)
@@ -68,66 +99,51 @@ def ridge_regression(X, y, alpha=1.0, test_size=0.2, random_state=42):
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 获取系数（标准化空间的系数）
-    coefficients = {
-        'intercept': float(model.intercept_),
-        'coef': model.coef_.tolist() if len(model.coef_) > 1 else float(model.coef_[0]),
-        'alpha': float(alpha)
-    }
-    
     # 计算散点图数据（使用测试集）
-    scatter_data = [
-        {'actual': float(y_test[i]), 'predicted': float(y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    scatter_data = Records(actual=y_test, predicted=y_pred_test)
     
     # 计算残差数据（使用测试集）
-    residuals_data = [
-        {'predicted': float(y_pred_test[i]), 'residual': float(y_test[i] - y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    residuals_data = Records(predicted=y_pred_test, residual=y_test - y_pred_test)
     
-    return {
-        'coefficients': coefficients,
+    result = {
+        'coefficients': details['coefficients'],
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': y_pred_all.tolist(),
+        'predictions': y_pred_all,
         'scatter_data': scatter_data,
         'residuals_data': residuals_data
     }
+    if 'regularization_path' in details:
+        result['regularization_path'] = details['regularization_path']
+    if return_model:
+        result['model'] = FittedModel('ridge', model, x_scaler=scaler_X, y_scaler=scaler_y)
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    alpha = input_data.get('alpha', 1.0)
+    alphas = input_data.get('alphas')
+    test_size = input_data.get('test_size', 0.2)
+    random_state = input_data.get('random_state', 42)
+    save_model = input_data.get('save_model', False)
+
+    # 执行岭回归
+    return ridge_regression(X, y, alpha, test_size, random_state, return_model=save_model,
+                            alphas=alphas)
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        alpha = input_data.get('alpha', 1.0)
-        test_size = input_data.get('test_size', 0.2)
-        random_state = input_data.get('random_state', 42)
-        
-        # 执行岭回归
-        result = ridge_regression(X, y, alpha, test_size, random_state)
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
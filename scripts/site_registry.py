@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+站点注册表
+每个站点（水厂/片区）的压力计、指标和目标表在 sites.json 中配置，新增站点只需添加一项：
+
+    {
+      "name": "站点标识（命令行 --site 使用）",
+      "table": "目标表名",
+      "post_tasks": false,              # 是否执行同步后的预测/泵曲线计算（目前只适用于福安）
+      "enabled": true,
+      "influx_bucket": "metricsData",   # 可选，默认使用 INFLUX_CONFIG['bucket']
+      "pressure_meters": ["压力计编号", ...],
+      "pressure_clock_offsets": {"压力计编号": 秒},   # 可选，时钟偏快为正，as-of 对齐时修正
+      "indicator_groups": {"分组名": [指标ID 或 [起始ID, 结束ID], ...]},
+      "integer_columns": ["i_xxxx", ...] # 可选，取值只可能为整数的字段（计数/状态量），narrow 存储布局才会用整数类型
+    }
+"""
+
+import json
+import os
+import re
+
+SITES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sites.json')
+
+# 表名会直接拼接进 SQL，只允许字母数字下划线
+TABLE_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
+
+
+def expand_indicators(spec):
+    """指标配置展开为ID列表：整数为单个指标，[a, b] 为闭区间 a..b"""
+    indicators = []
+    for item in spec:
+        if isinstance(item, list):
+            start, end = item
+            indicators.extend(range(start, end + 1))
+        else:
+            indicators.append(int(item))
+    return indicators
+
+
+def normalize_site(raw):
+    """校验并补全单个站点配置"""
+    name = raw['name']
+    table = raw.get('table', f"{name}_data")
+    if not TABLE_NAME_PATTERN.match(table):
+        raise ValueError(f"站点 {name} 的表名不合法: {table}")
+
+    groups = {
+        group: expand_indicators(spec)
+        for group, spec in raw.get('indicator_groups', {}).items()
+    }
+    indicators = []
+    for group_indicators in groups.values():
+        indicators.extend(i for i in group_indicators if i not in indicators)
+
+    pressure_meters = [str(sn) for sn in raw.get('pressure_meters', [])]
+    suffixes = [sn[-4:] for sn in pressure_meters]
+    if len(set(suffixes)) != len(suffixes):
+        # 压力计字段名取编号后四位（press_xxxx），同一站点内不能重复
+        raise ValueError(f"站点 {name} 的压力计编号后四位重复")
+
+    clock_offsets = {str(sn): float(seconds) for sn, seconds in raw.get('pressure_clock_offsets', {}).items()}
+    unknown = [sn for sn in clock_offsets if sn not in pressure_meters]
+    if unknown:
+        raise ValueError(f"站点 {name} 的时钟偏差配置了未知压力计: {', '.join(unknown)}")
+
+    integer_columns = [str(col) for col in raw.get('integer_columns', [])]
+    for col in integer_columns:
+        if not TABLE_NAME_PATTERN.match(col):
+            raise ValueError(f"站点 {name} 的整数字段名不合法: {col}")
+
+    return {
+        'name': name,
+        'label': raw.get('label', name),
+        'table': table,
+        'enabled': raw.get('enabled', True),
+        'post_tasks': raw.get('post_tasks', False),
+        'influx_bucket': raw.get('influx_bucket'),
+        'pressure_meters': pressure_meters,
+        'pressure_clock_offsets': clock_offsets,
+        'indicator_groups': groups,
+        'indicators': indicators,
+        'integer_columns': integer_columns,
+    }
+
+
+def load_sites(path=SITES_FILE):
+    """读取站点注册表，返回 {站点标识: 站点配置}（保持文件中的顺序）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        raw_sites = json.load(f)['sites']
+
+    sites = {}
+    tables = set()
+    for raw in raw_sites:
+        site = normalize_site(raw)
+        if site['name'] in sites:
+            raise ValueError(f"站点标识重复: {site['name']}")
+        if site['table'] in tables:
+            raise ValueError(f"目标表重复: {site['table']}")
+        sites[site['name']] = site
+        tables.add(site['table'])
+    return sites
+
+
+def get_site(name, path=SITES_FILE):
+    sites = load_sites(path)
+    if name not in sites:
+        raise KeyError(f"未知站点: {name}，可选: {', '.join(sites)}")
+    return sites[name]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fuan_data 存储布局迁移
+版本:
+    1  旧布局：所有字段 DECIMAL(10,3) DEFAULT 0，缺失值写为 0
+    2  紧凑布局：所有字段可为 NULL，缺失值写为 NULL，字段类型为
+         float   FLOAT（取值超出 FLOAT 三位小数精度范围的字段用 DOUBLE；之后同步的值超出该范围时字段改为 DOUBLE）
+         narrow  声明为整数的字段（站点配置 integer_columns，如计数/状态量）按实际取值范围选择最窄整数类型
+                 （TINYINT/SMALLINT/...），其余字段与 float 相同
+                 历史数据恰好没有小数不代表以后不会有，未声明的字段不使用整数类型，避免之后同步的小数被截断
+迁移过程（在线）：建新表 -> 按天分批复制 -> 逐批校验精度 -> RENAME TABLE 原子切换
+迁移期间持有同步执行锁，阻止同步写入；看板查询不受影响
+"""
+
+import json
+import logging
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = 'fuan_schema_version'
+LEGACY_VERSION = 1
+COMPACT_VERSION = 2
+LAYOUTS = ('float', 'narrow')
+
+# 0 为有效读数的字段（泵频率为0表示停机、阀门开度为0表示关闭），迁移时保留0，不转换为 NULL
+ZERO_VALID_COLUMNS = {'i_1049', 'i_1050', 'i_1051', 'i_1098'}
+
+# FLOAT 有效位数为24位：|v| < 2^13 时单位最小精度 < 0.001，三位小数可无损往返
+FLOAT_EXACT_LIMIT = 2 ** 13
+# 按观测范围选择类型时预留的增长空间（累计量等字段会持续增长）
+RANGE_HEADROOM = 4
+# 校验允许的误差（DECIMAL(10,3) 的最小单位为 0.001）
+VERIFY_DECIMALS = 3
+
+INTEGER_TYPES = [
+    ('TINYINT UNSIGNED', 0, 255),
+    ('SMALLINT', -32768, 32767),
+    ('MEDIUMINT', -8388608, 8388607),
+    ('INT', -2147483648, 2147483647),
+]
+
+# 各类型可存储的取值范围（写入前超出范围的值置为缺失）
+TYPE_LIMITS = {name: (low, high) for name, low, high in INTEGER_TYPES}
+TYPE_LIMITS['FLOAT'] = (-3.4e38, 3.4e38)
+TYPE_LIMITS['DOUBLE'] = (-1.7e308, 1.7e308)
+TYPE_LIMITS['DECIMAL(10,3)'] = (-9999999.999, 9999999.999)
+# 三位小数可无损往返的绝对值上限（只有 FLOAT 有）；同步时超出的字段改为 DOUBLE，见 widen_columns
+PRECISION_LIMITS = {'FLOAT': FLOAT_EXACT_LIMIT}
+
+
+def create_schema_version_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version INT NOT NULL,
+            layout VARCHAR(16) NULL,
+            column_types JSON NULL,
+            migrated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='数据表存储布局版本'
+        """)
+
+
+def read_schema_version(connection, table):
+    """返回 (版本, 字段类型字典)；未记录版本的表视为旧布局"""
+    create_schema_version_table(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT version, column_types FROM {SCHEMA_VERSION_TABLE} WHERE table_name = %s",
+            (table,)
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return LEGACY_VERSION, {}
+    column_types = row[1] if isinstance(row[1], dict) else json.loads(row[1] or '{}')
+    return row[0], column_types
+
+
+def write_schema_version(connection, table, version, layout, column_types):
+    """写入版本记录；layout 为 None 时保留原记录的布局"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+        INSERT INTO {SCHEMA_VERSION_TABLE} (table_name, version, layout, column_types)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            version=VALUES(version), layout=COALESCE(VALUES(layout), layout),
+            column_types=VALUES(column_types)
+        """, (table, version, layout, json.dumps(column_types)))
+
+
+def is_integer_type(col_type):
+    return col_type in TYPE_LIMITS and col_type not in ('FLOAT', 'DOUBLE', 'DECIMAL(10,3)')
+
+
+def choose_column_type(layout, stats, integral=False):
+    """
+    根据字段统计值选择紧凑类型
+    stats: {'min': 最小值, 'max': 最大值, 'fractional': 含小数部分的行数}，无数据时 min/max 为 None
+    integral: 字段是否声明为整数；只有声明为整数且历史数据确无小数时 narrow 布局才使用整数类型
+    """
+    low, high = stats['min'], stats['max']
+    if low is None or high is None:
+        return 'FLOAT'
+
+    bound = max(abs(low), abs(high)) * RANGE_HEADROOM
+    if layout == 'narrow' and integral and stats['fractional'] == 0:
+        for name, type_low, type_high in INTEGER_TYPES:
+            if type_low <= min(low, 0) * RANGE_HEADROOM and bound <= type_high:
+                return name
+
+    return 'FLOAT' if bound < FLOAT_EXACT_LIMIT else 'DOUBLE'
+
+
+def expected_value_sql(column, alias='o'):
+    """迁移后字段的期望值：0 转换为 NULL（ZERO_VALID_COLUMNS 除外）"""
+    if column in ZERO_VALID_COLUMNS:
+        return f"{alias}.{column}"
+    return f"NULLIF({alias}.{column}, 0)"
+
+
+class StorageLayoutMigrator:
+    def __init__(self, connection, table='fuan_data', batch_days=1, integer_columns=()):
+        self.connection = connection
+        self.table = table
+        self.integer_columns = set(integer_columns)
+        self.new_table = f"{table}_v{COMPACT_VERSION}"
+        self.legacy_table = f"{table}_legacy_v{LEGACY_VERSION}"
+        self.batch_days = batch_days
+
+    def data_columns(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DESCRIBE {self.table}")
+            return [row[0] for row in cursor.fetchall() if row[0] != 'collect_time']
+
+    def collect_stats(self, columns):
+        """单次全表扫描统计每个字段的取值范围和是否含小数（0 值按缺失处理）"""
+        parts = []
+        for col in columns:
+            value = f"NULLIF({col}, 0)" if col not in ZERO_VALID_COLUMNS else col
+            parts.extend([
+                f"MIN({value})",
+                f"MAX({value})",
+                f"SUM({col} <> ROUND({col}))",
+            ])
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(parts)} FROM {self.table}")
+            row = cursor.fetchone()
+
+        stats = {}
+        for i, col in enumerate(columns):
+            low, high, fractional = row[3 * i:3 * i + 3]
+            stats[col] = {
+                'min': float(low) if low is not None else None,
+                'max': float(high) if high is not None else None,
+                'fractional': int(fractional or 0),
+            }
+        return stats
+
+    def create_new_table(self, column_types):
+        columns = ['collect_time DATETIME PRIMARY KEY']
+        columns += [f"{col} {col_type} NULL DEFAULT NULL" for col, col_type in column_types.items()]
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.new_table} (
+                {', '.join(columns)}
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='福安数据同步表（紧凑布局）'
+            """)
+
+    def time_range(self, table):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(collect_time), MAX(collect_time) FROM {table}")
+            return cursor.fetchone()
+
+    def copy_batch(self, columns, start, end):
+        select_parts = ', '.join(expected_value_sql(col) for col in columns)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            REPLACE INTO {self.new_table} (collect_time, {', '.join(columns)})
+            SELECT o.collect_time, {select_parts}
+            FROM {self.table} o
+            WHERE o.collect_time >= %s AND o.collect_time < %s
+            """, (start, end))
+            return cursor.rowcount
+
+    def verify_batch(self, columns, start, end):
+        """
+        校验一个批次：行数一致，且每个字段四舍五入到三位小数后与期望值完全相等
+        返回 {字段: 不一致行数}（只包含有差异的字段，'_rows' 表示缺失行）
+        """
+        mismatch_parts = [
+            f"SUM(NOT (ROUND(n.{col}, {VERIFY_DECIMALS}) <=> {expected_value_sql(col)}))"
+            for col in columns
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+            SELECT SUM(n.collect_time IS NULL), {', '.join(mismatch_parts)}
+            FROM {self.table} o
+            LEFT JOIN {self.new_table} n ON n.collect_time = o.collect_time
+            WHERE o.collect_time >= %s AND o.collect_time < %s
+            """, (start, end))
+            row = cursor.fetchone()
+
+        mismatches = {}
+        if row[0]:
+            mismatches['_rows'] = int(row[0])
+        for col, count in zip(columns, row[1:]):
+            if count:
+                mismatches[col] = int(count)
+        return mismatches
+
+    def migrate(self, layout):
+        """
+        执行迁移，返回是否成功
+        支持断点续传：新表已存在时从其最后一天重新开始复制
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"未知的存储布局: {layout}")
+
+        version, _ = read_schema_version(self.connection, self.table)
+        if version >= COMPACT_VERSION:
+            logger.info(f"表 {self.table} 已是紧凑布局（版本 {version}），无需迁移")
+            return True
+
+        columns = self.data_columns()
+        logger.info(f"统计 {len(columns)} 个字段的取值范围...")
+        stats = self.collect_stats(columns)
+        column_types = {
+            col: choose_column_type(layout, stats[col], col in self.integer_columns)
+            for col in columns
+        }
+        for col in columns:
+            logger.info(f"  {col}: {stats[col]['min']} ~ {stats[col]['max']} -> {column_types[col]}")
+            if col in self.integer_columns and stats[col]['fractional']:
+                logger.warning(f"  {col} 声明为整数但历史数据含 {stats[col]['fractional']} 个小数值，改用浮点类型")
+
+        self.create_new_table(column_types)
+
+        first_time, last_time = self.time_range(self.table)
+        if first_time is None:
+            logger.info("原表为空，直接切换")
+        else:
+            resume_time = self.time_range(self.new_table)[1]
+            current = (resume_time or first_time).replace(hour=0, minute=0, second=0, microsecond=0)
+            end_time = last_time + timedelta(minutes=1)
+            step = timedelta(days=self.batch_days)
+
+            while current < end_time:
+                batch_end = current + step
+                copied = self.copy_batch(columns, current, batch_end)
+                mismatches = self.verify_batch(columns, current, batch_end)
+                if mismatches:
+                    logger.error(f"批次 {current:%Y-%m-%d} 校验失败，存在精度损失: {mismatches}")
+                    return False
+                logger.info(f"批次 {current:%Y-%m-%d} 复制并校验通过: {copied} 行")
+                current = batch_end
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"RENAME TABLE {self.table} TO {self.legacy_table}, {self.new_table} TO {self.table}"
+            )
+        write_schema_version(self.connection, self.table, COMPACT_VERSION, layout, column_types)
+        logger.info(
+            f"迁移完成: {self.table} 已切换为紧凑布局（{layout}），原表保留为 {self.legacy_table}"
+        )
+        return True
+
+
+def imprecise_columns(column_types, df):
+    """取值超出字段类型精度范围（PRECISION_LIMITS）的字段，写入会静默丢失小数精度"""
+    columns = []
+    for col, col_type in column_types.items():
+        limit = PRECISION_LIMITS.get(col_type)
+        if limit is not None and col in df.columns and (df[col].abs() >= limit).any():
+            columns.append(col)
+    return columns
+
+
+def widen_columns(connection, table, columns, column_types):
+    """把字段改为 DOUBLE 并更新版本记录中的字段类型（原地修改 column_types）"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {table} " + ', '.join(f"MODIFY COLUMN {col} DOUBLE NULL DEFAULT NULL" for col in columns)
+        )
+    for col in columns:
+        column_types[col] = 'DOUBLE'
+    write_schema_version(connection, table, COMPACT_VERSION, None, column_types)
+
+
+def value_limits(column_types):
+    """字段类型 -> 可写入的取值范围"""
+    return {
+        col: TYPE_LIMITS.get(col_type, TYPE_LIMITS['DOUBLE'])
+        for col, col_type in column_types.items()
+    }
+
@@ -3,18 +3,131 @@
 支持向量回归分析脚本（SVR）
 通过命令行接收JSON格式的数据，执行支持向量回归分析，返回JSON格式的结果
 适合小样本、非线性数据
+
+精确核 SVR 的拟合时间随样本数 2~3 次方增长，一个月的分钟数据（约 4 万行）要拟合数分钟；
+训练样本数达到 APPROX_MIN_SAMPLES 时自动改用核近似：Nyström（或随机傅里叶特征，仅 rbf）把数据映射到
+n_components 维特征空间，再用线性 SVR（同样的 epsilon 不敏感损失和 C）或岭回归（平方损失，更快）求解，
+耗时随样本数线性增长；
+结果中报告近似秩，并在训练集子样本上拟合精确 SVR，对比两者在测试集上的预测
 """
 
-import sys
-import json
+import time
+
 import numpy as np
-from sklearn.svm import SVR
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.pipeline import make_pipeline
+from sklearn.svm import SVR, LinearSVR
+from sklearn.linear_model import Ridge
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.model_selection import train_test_split
+from regression_io import Records, run_cli
+from model_store import FittedModel
+
+# 训练样本数达到该值时 approximation="auto" 改用核近似
+APPROX_MIN_SAMPLES = 10000
+APPROX_METHODS = ('auto', 'exact', 'nystroem', 'rff')
+APPROX_SOLVERS = ('linear_svr', 'ridge')
+# 核近似的默认秩（特征维数）
+DEFAULT_COMPONENTS = 500
+# 与精确 SVR 对比时使用的训练子样本数和测试样本数
+VALIDATION_SAMPLES = 2000
+# 模型所需的共享预处理（regression_engine.py 按此准备数据）：X 和 y 按训练集标准化
+PREPROCESS = ('scale',)
 
 
-def svr_regression(X, y, kernel='rbf', C=1.0, epsilon=0.1, test_size=0.2, random_state=42):
+def make_svr(kernel, C, epsilon, n_samples, gamma, approximation='auto', n_components=DEFAULT_COMPONENTS,
+             random_state=42, solver='linear_svr'):
+    """
+    按样本数选择精确 SVR 或核近似 + 线性求解器，返回 (模型, 近似方式)
+    gamma 与 SVR(gamma='scale') 一致：1 / (特征数 * X 方差)
+    solver: 'linear_svr'（epsilon 不敏感损失，与 SVR 目标一致）或 'ridge'（平方损失，alpha = 1 / 2C，速度快一个数量级）
+    """
+    if approximation not in APPROX_METHODS:
+        raise ValueError(f"不支持的近似方式: {approximation}（可选 {', '.join(APPROX_METHODS)}）")
+    if solver not in APPROX_SOLVERS:
+        raise ValueError(f"不支持的求解器: {solver}（可选 {', '.join(APPROX_SOLVERS)}）")
+    method = approximation
+    if method == 'auto':
+        method = 'nystroem' if n_samples >= APPROX_MIN_SAMPLES else 'exact'
+    if method == 'exact':
+        return SVR(kernel=kernel, C=C, epsilon=epsilon), method
+
+    if solver == 'ridge':
+        estimator = Ridge(alpha=1.0 / (2 * C))
+    else:
+        estimator = LinearSVR(C=C, epsilon=epsilon, loss='epsilon_insensitive', max_iter=10000,
+                              random_state=random_state)
+    if kernel == 'linear':
+        # 线性核不需要近似，直接求解原问题
+        return estimator, 'linear'
+    n_components = int(min(n_components, n_samples))
+    if method == 'rff':
+        if kernel != 'rbf':
+            raise ValueError("随机傅里叶特征只支持 rbf 核")
+        features = RBFSampler(gamma=gamma, n_components=n_components, random_state=random_state)
+    else:
+        # degree / coef0 取 SVR 的默认值（Nystroem 的 coef0 默认 None，poly / sigmoid 核下按 1 计算，与精确 SVR 不是同一个核）
+        features = Nystroem(kernel=kernel, gamma=gamma, degree=3, coef0=0.0, n_components=n_components,
+                            random_state=random_state)
+    return make_pipeline(features, estimator), method
+
+
+def fit_model(X_train, y_train, params=None, random_state=42):
+    """
+    在标准化后的训练集上拟合 SVR（本脚本与 regression_engine.py 共用），样本多时改用核近似
+    params: kernel、C、epsilon、approximation、n_components、solver
+    返回 (估计器, 结果中的模型参数)；与精确 SVR 的对比由调用方按需进行（compare_with_exact）
+    """
+    params = params or {}
+    kernel = params.get('kernel', 'rbf')
+    C = float(params.get('C', 1.0))
+    epsilon = float(params.get('epsilon', 0.1))
+    solver = params.get('solver', 'linear_svr')
+    gamma = 1.0 / (X_train.shape[1] * X_train.var()) if X_train.var() > 0 else 1.0
+    model, method = make_svr(kernel, C, epsilon, len(y_train), gamma, params.get('approximation', 'auto'),
+                             int(params.get('n_components', DEFAULT_COMPONENTS)), random_state, solver)
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    model_params = {
+        'kernel': kernel,
+        'C': C,
+        'epsilon': epsilon,
+        'n_support_vectors': int(model.n_support_[0]) if hasattr(model, 'n_support_') else None
+    }
+    if method != 'exact':
+        model_params['approximation'] = {
+            'method': method,
+            'rank': int(model[0].n_components) if method in ('nystroem', 'rff') else None,
+            'solver': solver,
+            'gamma': float(gamma),
+            'train_samples': int(len(y_train)),
+            'fit_seconds': round(fit_seconds, 3),
+        }
+    return model, {'model_params': model_params}
+
+
+def compare_with_exact(model, X_train, y_train, X_test, kernel, C, epsilon, random_state=42):
+    """在训练集子样本上拟合精确 SVR，与近似模型在测试集（最多 VALIDATION_SAMPLES 行）上的预测对比（标准化空间）"""
+    rng = np.random.default_rng(random_state)
+    train = rng.choice(len(X_train), min(VALIDATION_SAMPLES, len(X_train)), replace=False)
+    test = rng.choice(len(X_test), min(VALIDATION_SAMPLES, len(X_test)), replace=False)
+    started = time.perf_counter()
+    exact = SVR(kernel=kernel, C=C, epsilon=epsilon).fit(X_train[train], y_train[train])
+    exact_pred = exact.predict(X_test[test])
+    approx_pred = model.predict(X_test[test])
+    return {
+        'subsample': int(len(train)),
+        'r2_vs_exact': float(r2_score(exact_pred, approx_pred)),
+        'rmse_vs_exact': float(np.sqrt(mean_squared_error(exact_pred, approx_pred))),
+        'exact_fit_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def svr_regression(X, y, kernel='rbf', C=1.0, epsilon=0.1, test_size=0.2, random_state=42, return_model=False,
+                   approximation='auto', n_components=DEFAULT_COMPONENTS, solver='linear_svr', validate=True):
     """
     执行支持向量回归分析
     
@@ -26,6 +139,11 @@ def svr_regression(X, y, kernel='rbf', C=1.0, epsilon=0.1, test_size=0.2, random
         epsilon: epsilon-tube 宽度
         test_size: 测试集比例
         random_state: 随机种子
+        return_model: 是否在结果中附带可直接预测的模型（model，见 model_store.py）
+        approximation: 'auto'（训练样本数达到 APPROX_MIN_SAMPLES 时用 Nyström）、'exact'、'nystroem'、'rff'
+        n_components: 核近似的秩
+        solver: 核近似后的求解器（'linear_svr' 或 'ridge'）
+        validate: 使用核近似时是否与子样本上的精确 SVR 对比
     
     返回:
         dict: 包含R²、预测值等结果
@@ -49,9 +167,10 @@ def svr_regression(X, y, kernel='rbf', C=1.0, epsilon=0.1, test_size=0.2, random
     
     y_train_scaled = scaler_y.fit_transform(y_train.reshape(-1, 1)).ravel()
     
-    # 训练SVR模型
-    model = SVR(kernel=kernel, C=C, epsilon=epsilon)
-    model.fit(X_train_scaled, y_train_scaled)
+    # 训练SVR模型（样本多时改用核近似 + 线性 SVR）
+    params = {'kernel': kernel, 'C': C, 'epsilon': epsilon, 'approximation': approximation,
+              'n_components': n_components, 'solver': solver}
+    model, details = fit_model(X_train_scaled, y_train_scaled, params, random_state)
     
     # 预测（标准化空间）
     y_pred_train_scaled = model.predict(X_train_scaled)
@@ -69,69 +188,62 @@ def svr_regression(X, y, kernel='rbf', C=1.0, epsilon=0.1, test_size=0.2, random
     mse_train = mean_squared_error(y_train, y_pred_train)
     mse_test = mean_squared_error(y_test, y_pred_test)
     
-    # 模型参数
-    model_params = {
-        'kernel': kernel,
-        'C': float(C),
-        'epsilon': float(epsilon),
-        'n_support_vectors': int(model.n_support_[0]) if hasattr(model, 'n_support_') else None
-    }
+    # 模型参数（使用核近似时与子样本上的精确 SVR 对比）
+    model_params = details['model_params']
+    if 'approximation' in model_params and validate and kernel != 'linear':
+        model_params['approximation']['validation'] = compare_with_exact(
+            model, X_train_scaled, y_train_scaled, X_test_scaled, kernel, C, epsilon, random_state
+        )
     
     # 计算散点图数据（使用测试集）
-    scatter_data = [
-        {'actual': float(y_test[i]), 'predicted': float(y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    scatter_data = Records(actual=y_test, predicted=y_pred_test)
     
     # 计算残差数据（使用测试集）
-    residuals_data = [
-        {'predicted': float(y_pred_test[i]), 'residual': float(y_test[i] - y_pred_test[i])}
-        for i in range(len(y_test))
-    ]
+    residuals_data = Records(predicted=y_pred_test, residual=y_test - y_pred_test)
     
-    return {
+    result = {
         'model_params': model_params,
         'r2_train': float(r2_train),
         'r2_test': float(r2_test),
         'mse_train': float(mse_train),
         'mse_test': float(mse_test),
-        'predictions': y_pred_all.tolist(),
+        'predictions': y_pred_all,
         'scatter_data': scatter_data,
         'residuals_data': residuals_data
     }
+    if return_model:
+        result['model'] = FittedModel('svr', model, x_scaler=scaler_X, y_scaler=scaler_y)
+    return result
+
+
+def handle(input_data):
+    """
+    任务入口：解析输入参数并执行分析（命令行与常驻 worker 共用）
+    """
+    X = input_data['X']
+    y = input_data['y']
+    kernel = input_data.get('kernel', 'rbf')
+    C = input_data.get('C', 1.0)
+    epsilon = input_data.get('epsilon', 0.1)
+    test_size = input_data.get('test_size', 0.2)
+    random_state = input_data.get('random_state', 42)
+    save_model = input_data.get('save_model', False)
+    approximation = input_data.get('approximation', 'auto')
+    n_components = input_data.get('n_components', DEFAULT_COMPONENTS)
+    solver = input_data.get('solver', 'linear_svr')
+    validate = input_data.get('validate', True)
+
+    # 执行SVR回归
+    return svr_regression(X, y, kernel, C, epsilon, test_size, random_state, return_model=save_model,
+                          approximation=approximation, n_components=n_components, solver=solver,
+                          validate=validate)
 
 
 def main():
     """
-    主函数：从stdin读取JSON数据，执行分析，输出JSON结果
+    主函数：从stdin读取数据（JSON 或二进制帧），执行分析，按相同格式输出结果
     """
-    try:
-        # 从stdin读取输入数据
-        input_data = json.loads(sys.stdin.read())
-        
-        X = input_data['X']
-        y = input_data['y']
-        kernel = input_data.get('kernel', 'rbf')
-        C = input_data.get('C', 1.0)
-        epsilon = input_data.get('epsilon', 0.1)
-        test_size = input_data.get('test_size', 0.2)
-        random_state = input_data.get('random_state', 42)
-        
-        # 执行SVR回归
-        result = svr_regression(X, y, kernel, C, epsilon, test_size, random_state)
-        
-        # 输出结果
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # 输出错误信息
-        error_result = {
-            'error': str(e),
-            'type': type(e).__name__
-        }
-        print(json.dumps(error_result), file=sys.stderr)
-        sys.exit(1)
+    run_cli(handle)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,63 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from fuan_data_sync import DataSyncManager
+from storage_migration import COMPACT_VERSION
+
+
+def make_manager():
+    manager = DataSyncManager(run_post_tasks=False)
+    manager.storage_version = COMPACT_VERSION
+    manager.column_types = {'i_1034': 'FLOAT', 'i_1049': 'FLOAT'}
+    return manager
+
+
+def align_one_minute(manager, values):
+    """对齐 2026-01-01 00:00 一分钟的 Influx 读数 {指标: 值}"""
+    influx_df = pd.DataFrame({'collect_time': [pd.Timestamp('2026-01-01 00:00:10')],
+                              **{str(k): [v] for k, v in values.items()}})
+    aligned = manager.align_data_by_minute(pd.DataFrame(), influx_df, '20260101', '20260101')
+    return aligned.iloc[:1]
+
+
+def test_zero_reading_becomes_null_except_zero_valid_columns():
+    aligned = align_one_minute(make_manager(), {1034: 0.0, 1049: 0.0})
+    assert np.isnan(aligned['i_1034'].iloc[0])
+    assert aligned['i_1049'].iloc[0] == 0
+
+
+def test_zero_reading_does_not_overwrite_existing_value():
+    """按同步的更新子句执行 upsert（SQLite 中 VALUES(col) 对应 excluded.col）"""
+    manager = make_manager()
+    aligned = align_one_minute(manager, {1034: 0.0, 1049: 0.0})
+    aligned = aligned.assign(collect_time=aligned['collect_time'].dt.strftime('%Y-%m-%d %H:%M:%S'))
+    columns = list(aligned.columns)
+
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE fuan_data (collect_time TEXT PRIMARY KEY, i_1034 REAL, i_1049 REAL)')
+    db.execute("INSERT INTO fuan_data VALUES ('2026-01-01 00:00:00', 12.5, 35.0)")
+    updates = [clause.replace('VALUES(', 'excluded.').replace('), ', ', ')
+               for clause in manager.build_update_clauses(columns)]
+    db.executemany(
+        f"INSERT INTO fuan_data ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT(collect_time) DO UPDATE SET {', '.join(updates)}",
+        manager.to_row_tuples(aligned),
+    )
+    assert db.execute('SELECT i_1034, i_1049 FROM fuan_data').fetchone() == (12.5, 0.0)
+
+
+def test_forced_downsampled_failure_skips_the_day():
+    manager = DataSyncManager(run_post_tasks=False, influx_source='downsampled')
+    manager.influx_client = object()
+    manager.use_downsampled = lambda start, end: True
+
+    def query_downsampled_by_day(single_date, start, end):
+        if single_date == '20260102':
+            raise RuntimeError('timeout')
+        return [{'collect_time': pd.Timestamp(f'{single_date} 00:00:10'), 'indicator_id': '1034', 'value': 1.0}]
+
+    manager.query_downsampled_by_day = query_downsampled_by_day
+    manager.query_influx_data('20260101', '20260102')
+    assert manager.failed_days == ['20260102']
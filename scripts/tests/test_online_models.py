@@ -0,0 +1,21 @@
+import numpy as np
+
+from model_store import FittedModel
+from online_models import apply_state, coefficient_record, enable_online
+from polynomial_regression import fit_model
+
+
+def test_polynomial_online_state_has_a_single_intercept():
+    X = np.linspace(0, 4, 50).reshape(-1, 1)
+    y = 1.5 + 2.0 * X[:, 0] - 0.5 * X[:, 0] ** 2
+    pipeline, details = fit_model(X, y, {'degree': 2})
+    model = FittedModel('polynomial', pipeline[-1], features=pipeline[0])
+
+    enable_online(model, X, y)
+    assert np.linalg.matrix_rank(model.online.A) == model.online.A.shape[0]
+    apply_state(model)
+
+    record = coefficient_record(model)
+    np.testing.assert_allclose([record['intercept']] + record['coef'], details['coefficients'], atol=1e-8)
+    np.testing.assert_allclose(record['intercept'], 1.5, atol=1e-8)
+    np.testing.assert_allclose(model.predict(X), y, atol=1e-8)
@@ -0,0 +1,23 @@
+import io
+
+import numpy as np
+
+from regression_io import BINARY_MIN_ROWS, Records, decode_frame, is_frame, write_output
+
+
+def test_large_result_is_written_as_frame_for_json_input():
+    result = {'r2': 0.9, 'predictions': np.arange(BINARY_MIN_ROWS, dtype=float),
+              'scatter_data': Records(actual=np.zeros(BINARY_MIN_ROWS), predicted=np.ones(BINARY_MIN_ROWS))}
+    stream = io.BytesIO()
+    write_output(result, False, stream)
+    data = stream.getvalue()
+    assert is_frame(data)
+    decoded = decode_frame(data)
+    assert decoded['r2'] == 0.9
+    assert len(decoded['predictions']) == BINARY_MIN_ROWS
+
+
+def test_small_result_stays_json():
+    stream = io.BytesIO()
+    write_output({'r2': 0.9, 'predictions': [1.0] * 100}, False, stream)
+    assert not is_frame(stream.getvalue())
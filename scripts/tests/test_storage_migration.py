@@ -0,0 +1,24 @@
+import pandas as pd
+
+from storage_migration import FLOAT_EXACT_LIMIT, choose_column_type, imprecise_columns
+
+
+def test_float_chosen_only_within_exact_range():
+    assert choose_column_type('float', {'min': 0.5, 'max': 100.0, 'fractional': 1}) == 'FLOAT'
+    assert choose_column_type('float', {'min': 0.5, 'max': FLOAT_EXACT_LIMIT, 'fractional': 1}) == 'DOUBLE'
+
+
+def test_integer_type_requires_declared_integral_column():
+    stats = {'min': 1.0, 'max': 20.0, 'fractional': 0}
+    assert choose_column_type('narrow', stats) == 'FLOAT'
+    assert choose_column_type('narrow', stats, integral=True) == 'TINYINT UNSIGNED'
+
+
+def test_imprecise_columns_flags_float_values_beyond_exact_range():
+    column_types = {'i_1034': 'FLOAT', 'i_1102': 'DOUBLE', 'press_0001': 'FLOAT'}
+    df = pd.DataFrame({
+        'i_1034': [100.0, FLOAT_EXACT_LIMIT + 0.125, None],
+        'i_1102': [1e9, 2e9, 3e9],
+        'press_0001': [0.3, -0.2, None],
+    })
+    assert imprecise_columns(column_types, df) == ['i_1034']
@@ -0,0 +1,17 @@
+import numpy as np
+from sklearn.metrics.pairwise import pairwise_kernels
+from sklearn.svm import SVR
+
+from svr_regression import make_svr
+
+
+def test_nystroem_uses_the_same_kernel_as_exact_svr():
+    X = np.random.RandomState(0).normal(size=(30, 2))
+    gamma = 0.5
+    model, method = make_svr('poly', 1.0, 0.1, len(X), gamma, 'nystroem', len(X))
+    assert method == 'nystroem'
+    features = model[0].fit(X).transform(X)
+
+    svr = SVR(kernel='poly', gamma=gamma)
+    exact = pairwise_kernels(X, metric='poly', gamma=gamma, degree=svr.degree, coef0=svr.coef0)
+    np.testing.assert_allclose(features @ features.T, exact, rtol=1e-6, atol=1e-6)
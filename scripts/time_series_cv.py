@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+时间序列交叉验证的划分
+分钟数据前后高度自相关，随机打乱划分训练/测试集时相邻的几分钟分别落在两边，测试集指标偏乐观；
+按时间顺序划分并在训练块和测试块之间留出间隔（gap 行）可以避免这种泄漏
+
+- rolling：滚动起点（扩展窗口），第 k 折用第 k 个测试块之前的全部数据（或最近 max_train_size 行）训练，
+  测试块依次后移，模拟“用历史预测未来”
+- blocked：数据均分为 K 个连续块，轮流以一个块为测试集，其余块为训练集，测试块前后各去掉 gap 行
+
+输入数据需按时间排序（dataset_loader.py 的查询均按 collect_time / 时间桶排序）
+"""
+
+import numpy as np
+from sklearn.model_selection import TimeSeriesSplit
+
+CV_METHODS = ('rolling', 'blocked')
+DEFAULT_FOLDS = 5
+
+
+def rolling_splits(n, folds=DEFAULT_FOLDS, gap=0, test_size=None, max_train_size=None):
+    """滚动起点划分（sklearn TimeSeriesSplit），返回 [(训练下标, 测试下标)]"""
+    splitter = TimeSeriesSplit(n_splits=folds, gap=gap, test_size=test_size, max_train_size=max_train_size)
+    return list(splitter.split(np.arange(n)))
+
+
+def blocked_splits(n, folds=DEFAULT_FOLDS, gap=0):
+    """连续块划分，测试块前后各留 gap 行不参与训练，返回 [(训练下标, 测试下标)]"""
+    if folds < 2 or n < folds:
+        raise ValueError(f"样本数 {n} 不足以划分 {folds} 折")
+    edges = np.linspace(0, n, folds + 1).astype(np.int64)
+    indices = np.arange(n)
+    splits = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        train = indices[(indices < start - gap) | (indices >= end + gap)]
+        if len(train):
+            splits.append((train, indices[start:end]))
+    if not splits:
+        raise ValueError(f"间隔 {gap} 行过大，没有可用的训练数据")
+    return splits
+
+
+def make_splits(n, cv):
+    """
+    按交叉验证设置划分
+    cv: {"method": "rolling" | "blocked", "folds": 5, "gap": 0, "test_size": null, "max_train_size": null}
+    """
+    method = cv.get('method', 'rolling')
+    folds = int(cv.get('folds', DEFAULT_FOLDS))
+    gap = int(cv.get('gap', 0))
+    if method not in CV_METHODS:
+        raise ValueError(f"不支持的交叉验证方式: {method}（可选 {', '.join(CV_METHODS)}）")
+    if gap < 0:
+        raise ValueError("gap 不能为负数")
+    if method == 'rolling':
+        return rolling_splits(n, folds, gap, cv.get('test_size'), cv.get('max_train_size'))
+    return blocked_splits(n, folds, gap)